@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Measure the memory and build time of many small blueprint instances.
+
+Instances of one blueprint share a Shape holding their keys, so each instance is only
+its element list and a shape pointer. Reports traced bytes per instance and how many
+distinct shapes the instances use.
+"""
+
+import os
+import sys
+import tracemalloc
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_common import timed
+from src import evaluator
+from src.enzo_parser.parser import parse
+from src.enzo_parser.scope_resolver import resolve_scopes
+
+INSTANCES = 20000
+
+PROGRAM = (
+    "Point: <[\n"
+    "    label: Text,\n"
+    "    x: Number,\n"
+    "    y: Number,\n"
+    "    z: Number\n"
+    "]>;\n"
+    "Point[$label: \"p\", $x: 1, $y: 2, $z: 3];\n"
+)
+
+
+def main():
+    definition, instantiation = resolve_scopes(parse(PROGRAM))
+    measured = {}
+
+    def build(backend):
+        evaluator.eval_ast(definition, value_demand=True)
+        before, _ = tracemalloc.get_traced_memory()
+        measured["points"] = [evaluator.eval_ast(instantiation, value_demand=True) for _ in range(INSTANCES)]
+        measured["bytes"] = tracemalloc.get_traced_memory()[0] - before
+
+    tracemalloc.start()
+    try:
+        _, elapsed = timed("tree", action=build)
+    finally:
+        tracemalloc.stop()
+    points = measured["points"]
+    shapes = {id(point._shape) for point in points}
+    print(f"{len(points)} instances in {elapsed * 1000:.1f} ms, "
+          f"{measured['bytes'] / len(points):.0f} bytes each, {len(shapes)} shape(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Time the tree-walking evaluator against the closure backend (--engine=closure).
+
+Each program is parsed once; the engines take turns, best of REPEAT runs each, and their
+outputs are compared.
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_common import timed
+from src.enzo_parser.parser import parse
+
+REPEAT = 5  # best of
+
+PROGRAMS = {
+    "numeric loop": (
+        "$i: 0;\n"
+        "$acc: 0;\n"
+        "Loop while $i is less than 5000, (\n"
+        "    $acc <: ($acc + $i * 3 - $i / 2) % 1000;\n"
+        "    If $i % 7 is 0 and $i is greater than 10, (\n"
+        "        $acc <: $acc + 1;\n"
+        "    );\n"
+        "    $i <: $i + 1;\n"
+        ");\n"
+        "$acc;\n"
+    ),
+    "recursion": (
+        "rec_fib: (\n"
+        "    param $n: ;\n"
+        "    If $n is at most 1, (\n"
+        "        return($n);\n"
+        "    );\n"
+        "    return( rec_fib($n - 1) + rec_fib($n - 2) );\n"
+        ");\n"
+        "rec_fib(16);\n"
+    ),
+}
+
+
+def main():
+    for label, src in PROGRAMS.items():
+        statements = parse(src)
+        outputs, times = {}, {"tree": [], "closure": []}
+        for _ in range(REPEAT):
+            for engine in times:
+                outputs[engine], elapsed = timed(engine, statements)
+                times[engine].append(elapsed)
+        tree_time, closure_time = min(times["tree"]), min(times["closure"])
+        same = "same output" if outputs["tree"] == outputs["closure"] else "OUTPUT DIFFERS"
+        print(f"{label:14s} tree {tree_time * 1000:7.1f} ms, closure {closure_time * 1000:7.1f} ms "
+              f"({tree_time / closure_time:.2f}x), {same}")
+
+
+if __name__ == "__main__":
+    main()
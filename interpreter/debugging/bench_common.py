@@ -0,0 +1,65 @@
+"""Timing harness shared by the bench_*.py scripts.
+
+timed() runs Enzo code with one engine installed and a fresh global environment, and
+returns what it printed along with the seconds it took; best_of() keeps the fastest of
+several runs. Scripts import these after putting the interpreter on sys.path.
+"""
+
+import contextlib
+import gc
+import io
+import time
+
+from src import closure_compiler, enzo_vm, evaluator
+
+# Engine name, as in --engine=, -> backend module (None for the tree walker)
+ENGINES = {"tree": None, "closure": closure_compiler, "vm": enzo_vm}
+
+
+def timed(engine, statements=None, action=None, bindings=None, catch=()):
+    """Run statements, or action(backend), with engine installed; returns (output, seconds).
+
+    statements are compiled before the clock starts and evaluated the way the file runner
+    prints them; action does its own compiling, inside the timing. bindings, if given,
+    returns {name: value} to add to the global environment for the run, and errors of the
+    types in catch end the run with their message printed instead of raising.
+    """
+    backend = ENGINES[engine]
+    initial_env = dict(evaluator._env)
+    if bindings is not None:
+        evaluator._env.update(bindings())
+    if backend is not None:
+        backend.install()
+        if statements is not None:
+            backend.compile_program(statements)
+    out = io.StringIO()
+    # As timeit does, keep the garbage collector out of the timing
+    gc.collect()
+    gc.disable()
+    try:
+        with contextlib.redirect_stdout(out):
+            started = time.perf_counter()
+            try:
+                if action is not None:
+                    action(backend)
+                else:
+                    for stmt in statements:
+                        result = evaluator.eval_ast(stmt, value_demand=True)
+                        if result is not None:
+                            print(result)
+            except catch as error:
+                print(error.message)
+            elapsed = time.perf_counter() - started
+    finally:
+        gc.enable()
+        if backend is not None:
+            backend.uninstall()
+        evaluator._env.clear()
+        evaluator._env.update(initial_env)
+    return out.getvalue(), elapsed
+
+
+def best_of(engine, statements=None, repeat=5, **options):
+    """(output of the first run, fastest time) over repeat runs of timed()."""
+    runs = [timed(engine, statements, **options) for _ in range(repeat)]
+    return runs[0][0], min(elapsed for _, elapsed in runs)
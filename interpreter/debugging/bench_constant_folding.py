@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Time a loop full of constant arithmetic and literal lists before and after fold_constants.
+
+Both versions are scope-resolved; only the optimizer pass differs. Outputs are compared.
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_common import ENGINES, best_of
+from src.enzo_parser.optimizer import fold_constants
+from src.enzo_parser.parser import parse
+from src.enzo_parser.scope_resolver import resolve_scopes
+
+REPEAT = 5  # best of
+
+PROGRAM = (
+    "$i: 0;\n"
+    "$acc: 0;\n"
+    "Loop while $i is less than 3000, (\n"
+    "    $acc <: $acc + 60 * 60 * 24 % 1000 + $i * (2 * 3 + 1);\n"
+    "    $row: [1, 2, 3, [4, 5, 6], label: \"cell\"];\n"
+    "    $acc <: $acc + $row.4.2;\n"
+    "    $i <: $i + 1;\n"
+    ");\n"
+    "$acc;\n"
+)
+
+
+def main():
+    plain = resolve_scopes(parse(PROGRAM))
+    folded = resolve_scopes(fold_constants(parse(PROGRAM)))
+    for engine in ENGINES:
+        baseline, before = best_of(engine, plain, REPEAT)
+        output, after = best_of(engine, folded, REPEAT)
+        same = "" if output == baseline else " OUTPUT DIFFERS"
+        print(f"{engine:8s} unfolded {before * 1000:7.1f} ms, folded {after * 1000:7.1f} ms ({before / after:.2f}x){same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Time passing and binding a 100,000-element list with eager and copy-on-write copies.
+
+The eager runs swap EnzoList.copy for an element-by-element deep copy, which every binding
+and argument used to make. The program only reads the copies, apart from one write at
+the end, so copy-on-write never duplicates the list.
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_common import ENGINES, best_of
+from src.enzo_parser.parser import parse
+from src.enzo_parser.scope_resolver import resolve_scopes
+from src.runtime_helpers import EnzoList, deep_copy_enzo_value
+
+REPEAT = 3  # best of
+ELEMENTS = 100000
+
+PROGRAM = (
+    "first: ( param $list: ; return($list.1); );\n"
+    "$total: 0;\n"
+    "$alias: [];\n"
+    "$i: 0;\n"
+    "Loop while $i is less than 50, (\n"
+    "    $total <: $total + first($big);\n"
+    "    $alias <: $big;\n"
+    "    $i <: $i + 1;\n"
+    ");\n"
+    "$alias.1 <: 5;\n"
+    "$total + $alias.1 + $big.1;\n"
+)
+
+
+def _big_list():
+    # The global $big the program runs on, built afresh for each run
+    big = EnzoList()
+    for i in range(ELEMENTS):
+        big.append(i + 1)
+    return {"$big": big}
+
+
+def _eager_copy(self):
+    new_list = EnzoList()
+    for element in self._elements:
+        new_list.append(deep_copy_enzo_value(element))
+    new_list._shape = self._shape if self._shape.shared else self._shape.copy()
+    return new_list
+
+
+def main():
+    statements = resolve_scopes(parse(PROGRAM))
+    cow_copy = EnzoList.copy
+    for engine in ENGINES:
+        EnzoList.copy = _eager_copy
+        try:
+            baseline, before = best_of(engine, statements, REPEAT, bindings=_big_list)
+        finally:
+            EnzoList.copy = cow_copy
+        output, after = best_of(engine, statements, REPEAT, bindings=_big_list)
+        same = "" if output == baseline else " OUTPUT DIFFERS"
+        print(f"{engine:8s} eager {before * 1000:8.1f} ms, copy-on-write {after * 1000:7.1f} ms ({before / after:.1f}x){same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Run tail-recursive and non-tail-recursive functions at depths past Python's recursion limit.
+
+Tail calls (a closing `return(f(...))`) run in constant stack depth on every engine.
+Non-tail recursion goes on past a few dozen calls on enzo_vm's call stack, on every
+engine: the tree walker and the closure backend hand the deeper calls to it. These depths
+are past the default MAX_CALL_DEPTH, so the script raises it through ENZO_MAX_CALL_DEPTH.
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+DEPTH = 100000
+os.environ.setdefault("ENZO_MAX_CALL_DEPTH", str(DEPTH + 1))
+
+from bench_common import ENGINES, timed
+from src import evaluator
+from src.error_handling import EnzoRuntimeError
+from src.enzo_parser.parser import parse
+from src.enzo_parser.scope_resolver import resolve_scopes
+
+PROGRAMS = {
+    "tail": (
+        "count: (\n"
+        "    param $n: ;\n"
+        "    param $total: 0;\n"
+        "    If $n is 0, ( return($total) );\n"
+        "    return( count($n - 1, $total + $n) );\n"
+        ");\n"
+        f"count({DEPTH});\n"
+    ),
+    "mutual": (
+        "is_even: ( param $n: ; If $n is 0, ( return(True) ); return( is_odd($n - 1) ); );\n"
+        "is_odd: ( param $n: ; If $n is 0, ( return(False) ); return( is_even($n - 1) ); );\n"
+        f"is_even({DEPTH});\n"
+    ),
+    "non-tail": (
+        "total: (\n"
+        "    param $n: ;\n"
+        "    If $n is 0, ( return(0) );\n"
+        "    return( $n + total($n - 1) );\n"
+        ");\n"
+        f"total({DEPTH});\n"
+    ),
+}
+
+
+def main():
+    print(f"depth {DEPTH}, MAX_CALL_DEPTH {evaluator.MAX_CALL_DEPTH}, Python recursion limit {sys.getrecursionlimit()}")
+    for name, source in PROGRAMS.items():
+        for engine in ENGINES:
+            output, elapsed = timed(engine, resolve_scopes(parse(source)), catch=EnzoRuntimeError)
+            print(f"{name:9s}{engine:8s}{elapsed * 1000:9.1f} ms  {output.splitlines()[-1]}")
+
+
+if __name__ == "__main__":
+    main()
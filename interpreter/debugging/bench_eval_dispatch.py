@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Compare eval_ast's type-indexed dispatch with the isinstance chain it replaced.
+
+The chain is rebuilt from the handler table in registration order, which is the order
+the isinstance checks used to run in, so each node type pays for the checks above it.
+"""
+
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src import evaluator
+from src.enzo_parser.ast_nodes import ComparisonExpression, IfStatement, LoopStatement, NumberAtom, VarInvoke
+from src.enzo_parser.parser import parse
+
+ROUNDS = 200_000
+
+
+def noop_handler(node, *args):
+    return None
+
+
+def chain_dispatch(order):
+    def dispatch(node):
+        for cls in order:
+            if isinstance(node, cls):
+                return noop_handler(node, False, False, None, None, False, None, None, False)
+        return None
+    return dispatch
+
+
+def table_dispatch(table):
+    def dispatch(node):
+        handler = table.get(type(node))
+        if handler is None:
+            return None
+        return handler(node, False, False, None, None, False, None, None, False)
+    return dispatch
+
+
+def time_calls(dispatch, node):
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        dispatch(node)
+    return (time.perf_counter() - started) / ROUNDS * 1e9
+
+
+def main():
+    order = list(evaluator._eval_handlers)
+    table = {cls: noop_handler for cls in order}
+    chain = chain_dispatch(order)
+    indexed = table_dispatch(table)
+
+    nodes = [
+        NumberAtom(1),
+        VarInvoke("$x"),
+        IfStatement(NumberAtom(1), [], None),
+        LoopStatement("while", condition=NumberAtom(1), body=[]),
+        ComparisonExpression(NumberAtom(1), "is", NumberAtom(1)),
+    ]
+    print(f"dispatch only, {len(order)} handler types (ns per call):")
+    for node in nodes:
+        position = order.index(type(node)) + 1
+        print(f"  {type(node).__name__:22s} check #{position:2d}: chain {time_calls(chain, node):6.1f}, table {time_calls(indexed, node):6.1f}")
+
+    # End to end: a loop whose body is made of node types that used to sit low in the chain
+    # (loops stop at 10000 iterations)
+    program = parse(
+        "$i: 0;\n"
+        "$n: 0;\n"
+        "Loop while $i is less than 5000, (\n"
+        "    If $i is greater than 10, (\n"
+        "        $n <: $n + 1;\n"
+        "    );\n"
+        "    $i <: $i + 1;\n"
+        ");\n"
+    )
+    started = time.perf_counter()
+    evaluator.eval_ast(program, env=evaluator._env.copy())
+    print(f"5000 loop iterations through eval_ast: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Time function-call overhead: a loop passing each number through two small functions.
+
+The functions take required, typed and defaulted parameters, so each call goes through
+the arity and type checks and the default binding in bind_call_arguments.
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_common import ENGINES, best_of
+from src.enzo_parser.parser import parse
+from src.enzo_parser.scope_resolver import resolve_scopes
+
+REPEAT = 5  # best of
+CALLS = 2000
+
+PROGRAM = (
+    "scale: ( param $x: 0; param $by: 3; param $label: \"n\"; return($x * $by); );\n"
+    "shift: ( param $x: ; param $by: 1; return($x + $by); );\n"
+    "$total: 0;\n"
+    "$i: 0;\n"
+    f"Loop while $i is less than {CALLS}, (\n"
+    "    $total <: $total + shift(scale($i), 2);\n"
+    "    $i <: $i + 1;\n"
+    ");\n"
+    "$total;\n"
+)
+
+
+def main():
+    statements = resolve_scopes(parse(PROGRAM))
+    for engine in ENGINES:
+        elapsed = best_of(engine, statements, REPEAT)[1]
+        print(f"{engine:8s}{elapsed * 1000:8.1f} ms, {elapsed / (2 * CALLS) * 1e6:6.1f} us per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Time property reads and method calls on blueprint instances with and without inline caches.
+
+Uncached runs swap evaluator._read_property for a plain get_by_key. Cached runs also
+report the caches' hit and miss counts.
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_common import ENGINES, best_of
+from src import evaluator
+from src.enzo_parser.parser import parse
+from src.enzo_parser.scope_resolver import resolve_scopes
+
+REPEAT = 5  # best of
+
+PROGRAM = (
+    "Point: <[\n"
+    "    label: Text,\n"
+    "    kind: Text,\n"
+    "    weight: Number,\n"
+    "    x: Number,\n"
+    "    y: Number,\n"
+    "    norm: (\n"
+    "        return($self.x * $self.x + $self.y * $self.y);\n"
+    "    )\n"
+    "]>;\n"
+    "$a: Point[$label: \"a\", $kind: \"p\", $weight: 1, $x: 3, $y: 4];\n"
+    "$b: Point[$label: \"b\", $kind: \"p\", $weight: 2, $x: 1, $y: 2];\n"
+    "$total: 0;\n"
+    "$i: 0;\n"
+    "Loop while $i is less than 1000, (\n"
+    "    $total <: $total + $a.x + $b.y + $a.weight + $b.norm();\n"
+    "    $i <: $i + 1;\n"
+    ");\n"
+    "$total;\n"
+)
+
+
+def _uncached_read_property(node, base, key):
+    return base.get_by_key(key)
+
+
+def main():
+    cached_read_property = evaluator._read_property
+    for engine in ENGINES:
+        # Fresh nodes, so each engine starts with empty caches
+        statements = resolve_scopes(parse(PROGRAM))
+        evaluator._read_property = _uncached_read_property
+        try:
+            baseline, before = best_of(engine, statements, REPEAT)
+        finally:
+            evaluator._read_property = cached_read_property
+        evaluator.inline_cache_stats.reset()
+        output, after = best_of(engine, statements, REPEAT)
+        same = "" if output == baseline else " OUTPUT DIFFERS"
+        print(f"{engine:8s} uncached {before * 1000:7.1f} ms, cached {after * 1000:7.1f} ms ({before / after:.2f}x){same}")
+        print(f"         {evaluator.inline_cache_stats}")
+
+
+if __name__ == "__main__":
+    main()
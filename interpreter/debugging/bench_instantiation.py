@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Time instantiating a plain blueprint and a variant composed with its group's blueprint.
+
+Both blueprints have a dozen fields, most left to their defaults, so each instantiation
+is mostly a pass over the precomputed FieldLayout.
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_common import ENGINES, best_of
+from src.enzo_parser.parser import parse
+from src.enzo_parser.scope_resolver import resolve_scopes
+
+REPEAT = 5  # best of
+INSTANCES = 1000
+
+FIELDS = ",\n".join(f"        f{i}: {i}" for i in range(10))
+
+PROGRAM = (
+    "Plain: <[\n"
+    f"{FIELDS},\n"
+    "        label: \"plain\",\n"
+    "        describe: ( return($self.label); )\n"
+    "]>;\n"
+    "Unit variants:\n"
+    "    Unit: <[\n"
+    f"{FIELDS},\n"
+    "        label: \"unit\"\n"
+    "   ]>,\n"
+    "    and Scout: <[\n"
+    "        f3: 30,\n"
+    "        f7: 70,\n"
+    "        range: 9,\n"
+    "        describe: ( return($self.label); )\n"
+    "   ]>;\n"
+    "$total: 0;\n"
+    "$i: 0;\n"
+    f"Loop while $i is less than {INSTANCES}, (\n"
+    "    $p: Plain[$f0: $i];\n"
+    "    $s: Unit.Scout[$f1: $i];\n"
+    "    $total <: $total + $p.f0 + $s.f7;\n"
+    "    $i <: $i + 1;\n"
+    ");\n"
+    "$total;\n"
+)
+
+
+def main():
+    statements = resolve_scopes(parse(PROGRAM))
+    for engine in ENGINES:
+        output, elapsed = best_of(engine, statements, REPEAT)
+        print(f"{engine:8s}{elapsed * 1000:8.1f} ms, {elapsed / (2 * INSTANCES) * 1e6:6.1f} us per instance  {output.strip()}")
+
+
+if __name__ == "__main__":
+    main()
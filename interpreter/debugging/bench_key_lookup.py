@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Time keyed reads and writes on a list with 1,000 keys, with and without the key index.
+
+The scanning runs swap EnzoList.key_slot for the former lookup, which walked the key map
+once for an exact match and again for the numeric-suffix rule. Lists with that many keys
+have shapes of their own, which the property inline caches skip, so every read below is
+a key_slot call.
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_common import ENGINES, best_of
+from src.enzo_parser.parser import parse
+from src.enzo_parser.scope_resolver import resolve_scopes
+from src.runtime_helpers import EnzoList
+
+REPEAT = 5  # best of
+KEYS = 1000
+
+PROGRAM = (
+    "$row: [" + ", ".join(f"k{i}: {i}" for i in range(KEYS)) + ", item7: 7];\n"
+    "$total: 0;\n"
+    "$i: 0;\n"
+    "Loop while $i is less than 500, (\n"
+    f"    $total <: $total + $row.k{KEYS - 1} + $row.k{KEYS // 2} + $row.item;\n"
+    "    $row.k0 <: $i;\n"
+    "    $i <: $i + 1;\n"
+    ");\n"
+    "$total + $row.k0;\n"
+)
+
+
+def _scanning_key_slot(self, key):
+    lookup_key = key[1:] if key.startswith('$') else key
+    for k in self._key_map:
+        if k == key or k == f"${lookup_key}" or (k.startswith('$') and k[1:] == lookup_key):
+            return self._key_map[k]
+    if not lookup_key.isdigit():
+        for k in self._key_map:
+            k_base = k[1:] if k.startswith('$') else k
+            if k_base.startswith(lookup_key) and len(k_base) > len(lookup_key):
+                suffix = k_base[len(lookup_key):]
+                if suffix.isdigit() or (suffix.startswith('-') and suffix[1:].isdigit()):
+                    return self._key_map[k]
+    raise KeyError(f"list property not found: ${lookup_key}")
+
+
+def main():
+    statements = resolve_scopes(parse(PROGRAM))
+    indexed_key_slot = EnzoList.key_slot
+    for engine in ENGINES:
+        EnzoList.key_slot = _scanning_key_slot
+        try:
+            baseline, before = best_of(engine, statements, REPEAT)
+        finally:
+            EnzoList.key_slot = indexed_key_slot
+        output, after = best_of(engine, statements, REPEAT)
+        same = "" if output == baseline else " OUTPUT DIFFERS"
+        print(f"{engine:8s} scanning {before * 1000:7.1f} ms, indexed {after * 1000:7.1f} ms ({before / after:.2f}x){same}")
+
+
+if __name__ == "__main__":
+    main()
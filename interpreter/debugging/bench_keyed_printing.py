@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Time printing a list with 2,000 keys, with and without the shapes' slot_keys.
+
+The scanning runs swap Shape.key_at for the former lookup, which searched the key map for
+each element's position, making printing quadratic in the number of keys.
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_common import ENGINES, best_of
+from src.enzo_parser.parser import parse
+from src.enzo_parser.scope_resolver import resolve_scopes
+from src.runtime_helpers import Shape
+
+REPEAT = 3  # best of
+KEYS = 2000
+
+PROGRAM = (
+    "$row: [" + ", ".join(f"k{i}: {i}" if i % 4 else str(i) for i in range(KEYS)) + "];\n"
+    "$row;\n"
+    "$row;\n"
+)
+
+
+def _scanning_key_at(self, index):
+    for key, key_index in self.key_map.items():
+        if key_index == index:
+            return key
+    return None
+
+
+def main():
+    statements = resolve_scopes(parse(PROGRAM))
+    indexed_key_at = Shape.key_at
+    for engine in ENGINES:
+        Shape.key_at = _scanning_key_at
+        try:
+            baseline, before = best_of(engine, statements, REPEAT)
+        finally:
+            Shape.key_at = indexed_key_at
+        output, after = best_of(engine, statements, REPEAT)
+        same = "" if output == baseline else " OUTPUT DIFFERS"
+        print(f"{engine:8s} scanning {before * 1000:7.1f} ms, indexed {after * 1000:7.1f} ms ({before / after:.2f}x){same}")
+
+
+if __name__ == "__main__":
+    main()
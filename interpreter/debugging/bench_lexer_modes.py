@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Compare the table lexer against the reference regex lexer on the combined test file."""
+
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.enzo_parser.tokenizer import Tokenizer
+from src.error_handling import EnzoParseError
+
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), '..', 'tests', 'combined-tests.enzo')
+
+
+def split_sections(code):
+    # The test files are lexed one //= section at a time, since some sections end in lexer errors
+    sections = []
+    current = []
+    for line in code.splitlines(keepends=True):
+        if line.startswith('//=') and current:
+            sections.append(''.join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append(''.join(current))
+    return sections
+
+
+def lex(section, mode):
+    try:
+        return Tokenizer(section, mode).tokenize()
+    except EnzoParseError as e:
+        return ("error", e.message)
+
+
+def best_time(sections, mode, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for section in sections:
+            lex(section, mode)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with open(path, encoding='utf-8') as f:
+        code = f.read()
+
+    sections = split_sections(code)
+    token_count = 0
+    for number, section in enumerate(sections, 1):
+        regex_tokens = lex(section, "regex")
+        table_tokens = lex(section, "table")
+        if regex_tokens != table_tokens:
+            print(f"MISMATCH in section {number}: {section.splitlines()[0]}")
+            print(f"  regex: {regex_tokens}")
+            print(f"  table: {table_tokens}")
+            sys.exit(1)
+        if isinstance(table_tokens, list):
+            token_count += len(table_tokens)
+    print(f"token streams identical: {len(sections)} sections, {token_count} tokens, {len(code)} chars")
+
+    regex_time = best_time(sections, "regex", repeat)
+    table_time = best_time(sections, "table", repeat)
+    print(f"regex: {regex_time * 1000:.2f} ms")
+    print(f"table: {table_time * 1000:.2f} ms")
+    print(f"speedup: {regex_time / table_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Time summing, scaling and adding a 20,000-element list of numbers, in a loop and with builtins.
+
+The loop program goes through the list an element at a time. The builtin program calls
+sum, max, scale and add, first with runtime_helpers.PACKED_MIN_LENGTH raised past the
+list's length, so that the builtins go through a Python list, then with the default, so
+that they run over a NumberArray. All three compute the same values.
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_common import ENGINES, best_of
+from src import runtime_helpers
+from src.enzo_parser.parser import parse
+from src.enzo_parser.scope_resolver import resolve_scopes
+from src.runtime_helpers import EnzoList
+
+REPEAT = 3  # best of
+ELEMENTS = 20000
+
+LOOP_PROGRAM = (
+    "$total: 0;\n"
+    "$top: $nums.1;\n"
+    "$combined: 0;\n"
+    "Loop for $n in $nums, (\n"
+    "    $total <: $total + $n;\n"
+    "    If $n is greater than $top, ( $top <: $n; );\n"
+    "    $combined <: $combined + ($n + $n * 3);\n"
+    ");\n"
+    "$total;\n"
+    "$top;\n"
+    "$combined;\n"
+)
+
+BUILTIN_PROGRAM = (
+    "sum($nums);\n"
+    "max($nums);\n"
+    "sum(add($nums, scale($nums, 3)));\n"
+)
+
+
+def _nums_list():
+    # The global $nums the program runs on, built afresh for each run
+    nums = EnzoList()
+    for i in range(ELEMENTS):
+        nums.append(i * 7 % 1000)
+    return {"$nums": nums}
+
+
+def main():
+    min_length = runtime_helpers.PACKED_MIN_LENGTH
+    for engine in ENGINES:
+        # Fresh nodes for each engine, as the VM and closure compiler cache code on them
+        baseline, loop = best_of(engine, resolve_scopes(parse(LOOP_PROGRAM)), REPEAT, bindings=_nums_list)
+        builtins = resolve_scopes(parse(BUILTIN_PROGRAM))
+        runtime_helpers.PACKED_MIN_LENGTH = 2 * ELEMENTS
+        try:
+            unpacked_output, unpacked = best_of(engine, builtins, REPEAT, bindings=_nums_list)
+        finally:
+            runtime_helpers.PACKED_MIN_LENGTH = min_length
+        output, packed = best_of(engine, builtins, REPEAT, bindings=_nums_list)
+        same = "" if output == unpacked_output == baseline else " OUTPUT DIFFERS"
+        print(f"{engine:8s} loop {loop * 1000:8.1f} ms, builtins {unpacked * 1000:6.2f} ms, "
+              f"packed builtins {packed * 1000:6.2f} ms ({loop / packed:.0f}x){same}")
+
+
+if __name__ == "__main__":
+    main()
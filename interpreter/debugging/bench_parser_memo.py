@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Show the parser's KEYNAME-run memo hit rate on the test modules and its effect on long KEYNAME runs.
+
+The test modules rarely repeat a scan; the memo is there for long runs, which would
+otherwise take time quadratic in their length.
+"""
+
+import glob
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.enzo_parser.parser import Parser
+
+TEST_MODULES = os.path.join(os.path.dirname(__file__), '..', 'tests', 'test-modules', '*.enzo')
+
+
+def split_sections(code):
+    sections = []
+    current = []
+    for line in code.splitlines(keepends=True):
+        if line.startswith('//=') and current:
+            sections.append(''.join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append(''.join(current))
+    return sections
+
+
+def parse(src):
+    try:
+        parser = Parser(src)
+    except Exception:
+        # Some sections are lexer error tests
+        return None
+    try:
+        parser.parse_program()
+    except Exception:
+        pass
+    return parser
+
+
+def main():
+    hits = misses = 0
+    for path in sorted(glob.glob(TEST_MODULES)):
+        with open(path, encoding='utf-8') as f:
+            for section in split_sections(f.read()):
+                parser = parse(section)
+                if parser is None:
+                    continue
+                hits += parser.memo_hits
+                misses += parser.memo_misses
+    total = hits + misses
+    print(f"test modules: {hits} KEYNAME-run hits, {misses} misses ({hits / total:.0%} hit rate)")
+
+    # "$x $x $x ...;" starts a value expression at every KEYNAME of the run; without the memo
+    # each one rescans the rest of the run for a comparison word
+    for n in (250, 500, 1000, 2000):
+        src = "$x " * n + ";"
+        started = time.perf_counter()
+        parser = parse(src)
+        elapsed = time.perf_counter() - started
+        print(f"{n:5d} keynames: {elapsed * 1000:7.1f} ms, {parser.memo_hits} hits, {parser.memo_misses} misses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Time writes to copies of a 100,000-element list and spreading it with [<$big>, ...].
+
+The elements are Text, so that the list is not packed into a NumberArray.
+
+The plain runs raise runtime_helpers.VECTOR_MIN_LENGTH past the lists' lengths, so the
+elements stay in Python lists and each write to a copy, and each spread, copies every
+element. The vector runs keep the default, so both copy O(log n) nodes of a
+PersistentVector.
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_common import ENGINES, best_of
+from src import runtime_helpers
+from src.enzo_parser.parser import parse
+from src.enzo_parser.scope_resolver import resolve_scopes
+from src.runtime_helpers import EnzoList
+
+REPEAT = 3  # best of
+ELEMENTS = 100000
+
+PROGRAM = (
+    "$copy: [];\n"
+    "$more: [];\n"
+    "$total: 0;\n"
+    "$i: 0;\n"
+    "Loop while $i is less than 100, (\n"
+    "    $copy <: $big;\n"
+    "    $copy.2 <: $i;\n"
+    "    $more <: [<$big>, $i];\n"
+    f"    $total <: $total + $copy.2 + $more.{ELEMENTS + 1};\n"
+    "    $i <: $i + 1;\n"
+    ");\n"
+    "$total;\n"
+    "$big.2;\n"
+)
+
+
+def _big_list():
+    # The global $big the program runs on, built afresh for each run
+    big = EnzoList()
+    for i in range(ELEMENTS):
+        big.append(f"item {i + 1}")
+    return {"$big": big}
+
+
+def main():
+    statements = resolve_scopes(parse(PROGRAM))
+    min_length = runtime_helpers.VECTOR_MIN_LENGTH
+    for engine in ENGINES:
+        runtime_helpers.VECTOR_MIN_LENGTH = 2 * ELEMENTS
+        try:
+            baseline, before = best_of(engine, statements, REPEAT, bindings=_big_list)
+        finally:
+            runtime_helpers.VECTOR_MIN_LENGTH = min_length
+        output, after = best_of(engine, statements, REPEAT, bindings=_big_list)
+        same = "" if output == baseline else " OUTPUT DIFFERS"
+        print(f"{engine:8s} plain {before * 1000:8.1f} ms, vector {after * 1000:7.1f} ms ({before / after:.1f}x){same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Time variable reads with and without the scope resolver's depth hints.
+
+The program reads globals, parameters and loop variables from nested loops inside a
+recursive function. Unresolved runs clear every VarInvoke.scope_depth, which makes
+lookup_variable fall back to ChainMap indexing.
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_common import ENGINES, best_of
+from src.enzo_parser.ast_nodes import ASTNode, VarInvoke
+from src.enzo_parser.parser import parse
+from src.enzo_parser.scope_resolver import resolve_scopes
+
+REPEAT = 5  # best of
+
+PROGRAM = (
+    "$scale: 3;\n"
+    "$offset: 1;\n"
+    "walk: (\n"
+    "    param $n: ;\n"
+    "    $total: 0;\n"
+    "    $i: 0;\n"
+    "    Loop while $i is less than 6, (\n"
+    "        $j: 0;\n"
+    "        Loop while $j is less than 6, (\n"
+    "            $total <: $total + $i * $scale + $j + $offset + $n;\n"
+    "            $j <: $j + 1;\n"
+    "        );\n"
+    "        $i <: $i + 1;\n"
+    "    );\n"
+    "    If $n is at most 0, (\n"
+    "        return($total);\n"
+    "    );\n"
+    "    return($total + walk($n - 1));\n"
+    ");\n"
+    "walk(40);\n"
+)
+
+
+def var_invokes(tree):
+    stack = [tree]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, ASTNode):
+            if isinstance(value, VarInvoke):
+                yield value
+            stack.extend(value.__dict__.values())
+
+
+def main():
+    unresolved = parse(PROGRAM)
+    resolved = resolve_scopes(parse(PROGRAM))
+    depths = sorted({node.scope_depth for node in var_invokes(resolved) if node.scope_depth is not None})
+    print(f"resolved depths: {depths}")
+    for engine in ENGINES:
+        baseline, before = best_of(engine, unresolved, REPEAT)
+        output, after = best_of(engine, resolved, REPEAT)
+        same = "" if output == baseline else " OUTPUT DIFFERS"
+        print(f"{engine:8s} unresolved {before * 1000:7.1f} ms, resolved {after * 1000:7.1f} ms ({before / after:.2f}x){same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Time the tree walker, the closure backend and the VM on tests/combined-tests.enzo and two loops.
+
+The combined tests are parsed once; only evaluation (including compilation) is timed, best
+of REPEAT runs with the engines taking turns, and each engine's output is compared with the
+tree walker's.
+
+Runaway recursion fails after MAX_CALL_DEPTH calls (1000 unless ENZO_MAX_CALL_DEPTH says
+otherwise) on every engine, so recursion.enzo's runaway test costs them all about the same.
+Most of the combined tests are statements that run once, where a VM instruction costs about
+what the tree-walking handler call it replaces does: the VM comes out within noise of the
+tree walker there (0.9x to 1.1x on a quiet machine), and ahead on the loop and recursion
+programs below, where the same instructions run many times (about 1.3x to 1.6x and 1.5x
+to 1.9x).
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_common import timed
+from src import evaluator
+from src.cli import compile_statement_lines, iter_statements, run_unit
+from src.enzo_parser.parser import parse
+from src.enzo_parser.scope_resolver import resolve_scopes
+from src.enzo_vm import compile_root, disassemble
+
+COMBINED = os.path.join(os.path.dirname(__file__), '..', 'tests', 'combined-tests.enzo')
+REPEAT = 15  # best of
+
+LOOPS = {
+    "numeric loop": (
+        "$i: 0;\n"
+        "$acc: 0;\n"
+        "Loop while $i is less than 5000, (\n"
+        "    $acc <: ($acc + $i * 3 - $i / 2) % 1000;\n"
+        "    If $i % 7 is 0 and $i is greater than 10, (\n"
+        "        $acc <: $acc + 1;\n"
+        "    );\n"
+        "    $i <: $i + 1;\n"
+        ");\n"
+        "$acc;\n"
+    ),
+    "recursion": (
+        "rec_fib: (\n"
+        "    param $n: ;\n"
+        "    If $n is at most 1, (\n"
+        "        return($n);\n"
+        "    );\n"
+        "    return( rec_fib($n - 1) + rec_fib($n - 2) );\n"
+        ");\n"
+        "rec_fib(16);\n"
+    ),
+}
+
+
+def combined_units():
+    with open(COMBINED) as f:
+        units = []
+        for stmt_lines in iter_statements(f):
+            units.extend(compile_statement_lines(stmt_lines))
+    return units
+
+
+def run_units(units):
+    # Actions for timed(): each compiles as it goes, as the file runner does
+    def action(backend):
+        for unit in units:
+            if backend is not None and unit[0] in ("eval", "program"):
+                backend.compile_program(unit[1])
+            run_unit(unit)
+    return action
+
+
+def run_program(program):
+    def action(backend):
+        if backend is not None:
+            backend.compile_program(program)
+        print(evaluator.eval_ast(program, value_demand=True))
+    return action
+
+
+def report(label, action):
+    # The engines take turns, so a slow stretch of a noisy machine hits them all alike
+    outputs = {}
+    times = {"tree": [], "closure": [], "vm": []}
+    for _ in range(REPEAT):
+        for engine, runs in times.items():
+            output, elapsed = timed(engine, action=action)
+            outputs.setdefault(engine, output)
+            runs.append(elapsed)
+    tree_time = min(times["tree"])
+    line = f"{label:16s} tree {tree_time * 1000:7.1f} ms"
+    for engine in ("closure", "vm"):
+        elapsed = min(times[engine])
+        same = "" if outputs[engine] == outputs["tree"] else " OUTPUT DIFFERS"
+        line += f", {engine} {elapsed * 1000:7.1f} ms ({tree_time / elapsed:.2f}x){same}"
+    print(line)
+
+
+def main():
+    report("combined tests", run_units(combined_units()))
+    for label, src in LOOPS.items():
+        report(label, run_program(resolve_scopes(parse(src))))
+
+    if "--dis" in sys.argv:
+        loop = parse(LOOPS["numeric loop"])[2]
+        print(disassemble(compile_root(loop)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Round-trip every AST the test modules produce through the binary AST format."""
+
+import glob
+import io
+import os
+import pickle
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.cli import compile_statement_lines, iter_statements
+from src.enzo_parser import ast_serialization
+from src.enzo_parser.ast_nodes import ASTNode, Binding, IfStatement, NumberAtom, Program, TextAtom, VarInvoke
+from src.error_handling import ASTSerializationError
+
+TEST_MODULES = os.path.join(os.path.dirname(__file__), '..', 'tests', 'test-modules', '*.enzo')
+
+
+def same_tree(a, b, seen=None):
+    # Structural equality including attributes __repr__ leaves out (end_pos, parser flags)
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, ASTNode):
+        return list(a.__dict__) == list(b.__dict__) and all(
+            same_tree(a.__dict__[k], b.__dict__[k]) for k in a.__dict__)
+    if isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(same_tree(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict):
+        return list(a) == list(b) and all(same_tree(a[k], b[k]) for k in a)
+    if isinstance(a, float) and a != a:
+        return b != b
+    return a == b
+
+
+def check(value, label):
+    data = ast_serialization.dumps(value)
+    loaded = ast_serialization.loads(data)
+    if not same_tree(value, loaded):
+        print(f"MISMATCH: {label}")
+        print(f"  before: {value!r}")
+        print(f"  after:  {loaded!r}")
+        sys.exit(1)
+    # dump/load through a file object, two records back to back
+    f = io.BytesIO()
+    ast_serialization.dump(value, f)
+    ast_serialization.dump(label, f)
+    f.seek(0)
+    if not same_tree(ast_serialization.load(f), value) or ast_serialization.load(f) != label:
+        print(f"MISMATCH reading from a file: {label}")
+        sys.exit(1)
+    return data
+
+
+def module_units():
+    units = []
+    for path in sorted(glob.glob(TEST_MODULES)):
+        with open(path) as f:
+            for stmt_lines in iter_statements(f):
+                for unit in compile_statement_lines(stmt_lines):
+                    units.append((os.path.basename(path), unit))
+    return units
+
+
+def check_values():
+    shared = [VarInvoke("$x")]
+    if_node = IfStatement(NumberAtom(1), shared, None)
+    if_node.all_branches = [(NumberAtom(1), shared)]
+    values = [
+        None, True, False, 0, 1, -1, 63, -64, 2 ** 70, -(2 ** 70), 0.1, -2.5, float("inf"), float("nan"),
+        "", "text", "ünïcode ✔", ["a", "a", ("b", "a")], {"k": [1, 2], 3: None},
+        Program([Binding("$a", NumberAtom(3)), TextAtom("<$a>")]),
+        if_node,
+    ]
+    for value in values:
+        check(value, repr(value))
+
+    loaded = ast_serialization.loads(ast_serialization.dumps(if_node))
+    if loaded.then_block is not loaded.all_branches[0][1]:
+        print("MISMATCH: shared list was copied")
+        sys.exit(1)
+
+    for bad in (b"", b"ENZA", b"XXXX\x01\x00", ast_serialization.dumps([1, 2])[:-1], ast_serialization.dumps(1) + b"\x00"):
+        try:
+            ast_serialization.loads(bad)
+        except ASTSerializationError:
+            continue
+        print(f"MISMATCH: malformed record {bad!r} was accepted")
+        sys.exit(1)
+    try:
+        ast_serialization.dumps(object())
+    except ASTSerializationError:
+        pass
+    else:
+        print("MISMATCH: unsupported value was accepted")
+        sys.exit(1)
+    print(f"edge values: {len(values)} ok")
+
+
+def main():
+    check_values()
+
+    units = module_units()
+    total = 0
+    for name, unit in units:
+        total += len(check(unit, f"{name}: {unit[:1]}"))
+    print(f"test modules: {len(units)} run units ok, {total} bytes as separate records")
+
+    everything = [unit for _, unit in units]
+    data = ast_serialization.dumps(everything)
+    pickled = pickle.dumps(everything, pickle.HIGHEST_PROTOCOL)
+    print(f"all units in one record: {len(data)} bytes (pickle: {len(pickled)} bytes)")
+
+    for label, dump, load in (("enzo", ast_serialization.dumps, ast_serialization.loads),
+                              ("pickle", lambda v: pickle.dumps(v, pickle.HIGHEST_PROTOCOL), pickle.loads)):
+        started = time.perf_counter()
+        for _ in range(5):
+            encoded = dump(everything)
+        dumped = time.perf_counter() - started
+        started = time.perf_counter()
+        for _ in range(5):
+            load(encoded)
+        loaded = time.perf_counter() - started
+        print(f"{label}: dump {dumped / 5 * 1000:.2f} ms, load {loaded / 5 * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
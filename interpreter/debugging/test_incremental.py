@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Check that edits to an IncrementalDocument give the statements a full parse gives.
+
+Each edit, scripted or random, is compared with parse_file on the edited text (which has
+no //= lines, so parse_file makes no SectionMarkers), including the InvalidStatements both
+recover from errors with. Sections of the test modules are the documents.
+"""
+
+import glob
+import os
+import random
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.enzo_parser.incremental import IncrementalDocument
+from src.enzo_parser.parser import parse_file
+
+TEST_MODULES = os.path.join(os.path.dirname(__file__), '..', 'tests', 'test-modules', '*.enzo')
+SEED = 5
+RANDOM_DOCUMENTS = 12
+EDITS_PER_DOCUMENT = 15
+# Pieces random edits insert: brackets, quotes and comment markers that open and close
+# errors, and characters the lexer rejects
+SNIPPETS = ["$x", " ", "\n", ";", "1", "(", ")", "\"a\"", "/'", "'/", ".", "2.5", "$y: 3;\n", "end",
+            "-loop", "then ", "// c\n", "If ", ",", "[", "]", "\"", "'", "x", "!", "~", "`"]
+
+# (document, [(start, end, new text), ...]) edits applied one after another
+SCRIPTED = [
+    # Break a statement, then mend it
+    ("$a: 1;\n$b: 2;\n$c: 3;\n", [(9, 9, "(1 + "), (9, 14, "")]),
+    # Unclosed block comment swallowing the rest, then closed
+    ("$a: 1;\n$b: 2;\n$c: 3;\n", [(7, 7, "/' "), (17, 17, " '/")]),
+    # Unexpected character, then removed
+    ("$a: 1;\n$b: 2;\n$c: 3;\n", [(11, 11, "~"), (11, 12, "")]),
+    # An unterminated quote closed on a later line
+    ("$a: 1;\n$b: 'x;\n$c: 3;\n", [(20, 20, "'"), (20, 21, "")]),
+    # A statement that fails to parse shifted by edits before it
+    ("$a: 1;\n$b: (1 + ;\n$c: 3;\n", [(0, 0, "$z: 0;\n"), (0, 7, ""), (3, 4, "22")]),
+    # Every statement broken at once
+    ("$a: 1;\n$b: 2;\n", [(0, 14, "(((\n[[[\n"), (0, 8, "$a: 1;\n$b: 2;\n")]),
+]
+
+
+def sections():
+    # Sections of the test modules, //= lines left out
+    result = []
+    for path in sorted(glob.glob(TEST_MODULES)):
+        lines = []
+        with open(path) as f:
+            for line in f.read().split('\n'):
+                if line.strip().startswith("//="):
+                    if lines:
+                        result.append('\n'.join(lines))
+                    lines = []
+                else:
+                    lines.append(line)
+        if lines:
+            result.append('\n'.join(lines))
+    return result
+
+
+def check_edit(doc, text, start, end, new_text, label):
+    text = text[:start] + new_text + text[end:]
+    got = repr(doc.edit(start, end, new_text).statements)
+    expected = repr(parse_file(text).statements)
+    if got != expected:
+        print(f"MISMATCH: {label}, edit {start}:{end} -> {new_text!r}")
+        print(f"  text:        {text!r}")
+        print(f"  incremental: {got}")
+        print(f"  full parse:  {expected}")
+        sys.exit(1)
+    return text
+
+
+def main():
+    for number, (text, edits) in enumerate(SCRIPTED):
+        doc = IncrementalDocument(text)
+        for start, end, new_text in edits:
+            text = check_edit(doc, text, start, end, new_text, f"scripted document {number}")
+    print(f"scripted edits: {sum(len(edits) for _, edits in SCRIPTED)} ok")
+
+    rng = random.Random(SEED)
+    pool = sections()
+    reparsed = reused = 0
+    for number in range(RANDOM_DOCUMENTS):
+        text = '\n'.join(rng.sample(pool, rng.randint(1, 6)))
+        doc = IncrementalDocument(text)
+        for _ in range(EDITS_PER_DOCUMENT):
+            start = rng.randint(0, len(text))
+            end = min(len(text), start + rng.choice([0, 0, 1, 2, 5, 20]))
+            new_text = "".join(rng.choice(SNIPPETS) for _ in range(rng.choice([0, 1, 1, 2, 3])))
+            text = check_edit(doc, text, start, end, new_text, f"random document {number}")
+            reparsed += doc.reparsed_statements
+            reused += doc.reused_statements
+    print(f"random edits: {RANDOM_DOCUMENTS * EDITS_PER_DOCUMENT} ok, "
+          f"{reparsed} statements re-parsed and {reused} reused")
+
+
+if __name__ == "__main__":
+    main()
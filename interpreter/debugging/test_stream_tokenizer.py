@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Check that iter_tokens gives Tokenizer.tokenize()'s tokens for every chunk size.
+
+Covers tokens and block comments cut by chunk boundaries, errors raised after several
+chunks, and that tokens come out before the whole stream has been read.
+"""
+
+import io
+import os
+import random
+import sys
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.enzo_parser.tokenizer import LEXER_MODES, Tokenizer, iter_tokens
+from src.error_handling import EnzoParseError
+
+SEED = 3
+RANDOM_INPUTS = 2000
+CHUNK_SIZES = (1, 2, 3, 7, 17, 64)
+# Pieces random inputs are made of: words that grow into longer tokens ("end" into
+# "end-loop", "Else" into "Else if"), numbers and index chains, comment markers and
+# characters the lexer rejects
+PIECES = ["and", "or", "in", "end", "end-loop", "Else", " if", "return", "then", "x", "-", "$this", "$",
+          "é", "1", "2.5", ".1.2", ".", ":", ">", "<", "[", "]", "=", "/", "//", "/'", "'/", '"', "'",
+          " ", "\n", "\t", "²", "Loop", "\\", "restart-loop", "abc_def", "   \n  ", "// comment\n",
+          "/' block\n comment '/"]
+
+# Inputs whose tokens or comments straddle small chunk boundaries
+BOUNDARY_CASES = [
+    "end-loop;\nrestart-loop;",
+    "If $x, (1) Else if $y, (2) Else, (3);",
+    "$list.2.1 <: 1.5;",
+    "/' a block comment\nover two lines '/ $x;",
+    "$a /' x '' / ' '/ $b;",
+    "\"text with // and /' inside\" $x;",
+    "$x // line comment '/\n$y;",
+    "1" * 40 + ";",
+    "$" + "a" * 100 + ": 3;",
+]
+
+# Inputs that fail to lex, with the message Tokenizer.tokenize() gives
+ERROR_CASES = [
+    "$x: 1;\n$y: 2; /' never closed\n$z: 3;",
+    "$x: 1;\n$y: 2;\n$z: ~3;",
+    "$" + "a" * 70 + ": 3; `",
+]
+
+
+def tokens(code, mode):
+    try:
+        return [tuple(token) for token in Tokenizer(code, mode).tokenize()]
+    except EnzoParseError as error:
+        return ("error", error.message)
+
+
+def streamed(code, mode, chunk_size):
+    try:
+        return [tuple(token) for token in iter_tokens(io.StringIO(code), chunk_size, mode)]
+    except EnzoParseError as error:
+        return ("error", error.message)
+
+
+def check(code, mode, label):
+    expected = tokens(code, mode)
+    for chunk_size in CHUNK_SIZES:
+        got = streamed(code, mode, chunk_size)
+        if got != expected:
+            print(f"MISMATCH: {label}, {mode} mode, chunks of {chunk_size}: {code!r}")
+            print(f"  tokenize():    {expected}")
+            print(f"  iter_tokens(): {got}")
+            sys.exit(1)
+    return expected
+
+
+class CountingReader(io.StringIO):
+    """StringIO that counts the characters read from it."""
+    consumed = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.consumed += len(chunk)
+        return chunk
+
+
+def main():
+    for mode in LEXER_MODES:
+        for code in BOUNDARY_CASES:
+            check(code, mode, "boundary case")
+        for code in ERROR_CASES:
+            if not isinstance(check(code, mode, "error case"), tuple):
+                print(f"MISMATCH: error case lexed without an error: {code!r}")
+                sys.exit(1)
+    print(f"boundary and error cases: {len(BOUNDARY_CASES) + len(ERROR_CASES)} ok")
+
+    rng = random.Random(SEED)
+    for _ in range(RANDOM_INPUTS):
+        code = "".join(rng.choice(PIECES) for _ in range(rng.randint(1, 40)))
+        check(code, rng.choice(list(LEXER_MODES)), "random input")
+    print(f"random inputs: {RANDOM_INPUTS} ok")
+
+    # The first token is ready after a chunk or two, not after the whole stream
+    reader = CountingReader("$x: 1;\n" * 10000)
+    first = next(iter_tokens(reader, chunk_size=64))
+    if first.value != "$x" or reader.consumed > 128:
+        print(f"MISMATCH: first token {first!r} after reading {reader.consumed} characters")
+        sys.exit(1)
+    print(f"first token after reading {reader.consumed} of {len(reader.getvalue())} characters")
+
+
+if __name__ == "__main__":
+    main()
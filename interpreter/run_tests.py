@@ -114,7 +114,8 @@ def regenerate_combined_files():
             "recursion",
             "method-references",
             "block-comment",
-            "misc"
+            "misc",
+            "builtins"
 
 
 
@@ -0,0 +1,179 @@
+# On-disk cache of parsed Enzo programs, in the spirit of __pycache__
+#
+# Running a file caches its "run units": the titles, messages, parse errors and ASTs the
+# file runner produces before evaluating anything. A cache entry is only used when the
+# interpreter fingerprint, the source text and every @include it pulled in (including
+# includes that were missing) are unchanged.
+
+import glob
+import hashlib
+import os
+import sys
+
+from src.enzo_parser import ast_serialization
+from src.error_handling import ASTSerializationError
+
+INTERPRETER_VERSION = "0.1.0"
+CACHE_FORMAT = 2
+CACHE_DIR_NAME = "__enzocache__"
+CACHE_SUFFIX = ".enzoc"
+
+_fingerprint = None
+
+
+def cache_enabled():
+    # ENZO_NO_CACHE=1 turns off both reading and writing, like PYTHONDONTWRITEBYTECODE for writing
+    return os.environ.get("ENZO_NO_CACHE", "") in ("", "0")
+
+
+def interpreter_fingerprint():
+    """Identify the interpreter build: version, Python version and the front end sources."""
+    global _fingerprint
+    if _fingerprint is None:
+        src_dir = os.path.dirname(os.path.abspath(__file__))
+        digest = hashlib.sha256(f"{INTERPRETER_VERSION}:{CACHE_FORMAT}:{sys.version_info[:2]}".encode())
+        # Any change to the lexer, parser, AST classes or to how the runner splits statements
+        # changes what gets cached, so hash those sources rather than trusting a version bump
+        paths = sorted(glob.glob(os.path.join(src_dir, "enzo_parser", "*.py")))
+        paths += [os.path.join(src_dir, "cli.py"), os.path.abspath(__file__)]
+        for path in paths:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        _fingerprint = digest.hexdigest()
+    return _fingerprint
+
+
+def hash_text(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def hash_lines(lines, digest):
+    """Yield lines unchanged while feeding them to digest."""
+    for line in lines:
+        digest.update(line.encode())
+        yield line
+
+
+def cache_path_for(filename, runner="statements"):
+    filename = os.path.abspath(filename)
+    name = os.path.basename(filename)
+    if runner != "statements":
+        name = f"{name}.{runner}"
+    return os.path.join(os.path.dirname(filename), CACHE_DIR_NAME, name + CACHE_SUFFIX)
+
+
+def _file_hash(path):
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        return hash_text(f.read())
+
+
+def _write_atomic(path, chunks):
+    # Write to a temporary file first so a concurrent run never sees half an entry
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_path, path)
+    except OSError:
+        # An unwritable cache directory just means no caching
+        pass
+
+
+def load_run_units(filename, runner="statements"):
+    """Return the cached run units for filename, or None when there is no valid entry.
+
+    runner names the file runner mode that produced the units; each mode has its own entry.
+    """
+    if not cache_enabled():
+        return None
+    try:
+        with open(cache_path_for(filename, runner), "rb") as f:
+            header = ast_serialization.load(f)
+            if header.get("format") != CACHE_FORMAT or header.get("interpreter") != interpreter_fingerprint():
+                return None
+            if header.get("source") != _file_hash(filename):
+                return None
+            for path, digest in header.get("dependencies", ()):
+                if _file_hash(path) != digest:
+                    return None
+            return ast_serialization.load(f)
+    except Exception:
+        # Missing, truncated or foreign cache files are all cache misses
+        return None
+
+
+class RunUnitRecorder:
+    """Collects the run units of one file run and writes them to the cache at the end."""
+
+    def __init__(self, filename, runner="statements"):
+        self.filename = filename
+        self.runner = runner
+        self.source_digest = hashlib.sha256()
+        # [abs_path, digest or None] for every @include, filled in by process_includes
+        self.dependencies = []
+        self.units = []
+        self.enabled = cache_enabled()
+
+    def add(self, unit):
+        # Units are encoded as soon as they are produced, before evaluation gets to them
+        if self.enabled:
+            try:
+                self.units.append(ast_serialization.dumps(unit))
+            except (ASTSerializationError, RecursionError):
+                self.enabled = False
+                self.units = []
+        return unit
+
+    def save(self):
+        if not self.enabled:
+            return
+        header = {
+            "format": CACHE_FORMAT,
+            "interpreter": interpreter_fingerprint(),
+            "source": self.source_digest.hexdigest(),
+            "dependencies": [
+                (path, digest.hexdigest() if digest is not None else None)
+                for path, digest in self.dependencies
+            ],
+        }
+        # The units are stored as a single record after the header record, so loading is a
+        # header check followed by one load of the list
+        units = [ast_serialization.loads(data) for data in self.units]
+        _write_atomic(cache_path_for(self.filename, self.runner), [
+            ast_serialization.dumps(header),
+            ast_serialization.dumps(units),
+        ])
+
+
+def _program_cache_path(cache_dir, src):
+    key = hashlib.sha256(f"{interpreter_fingerprint()}\0{src}".encode()).hexdigest()
+    return os.path.join(cache_dir, key[:40] + CACHE_SUFFIX)
+
+
+def load_program(cache_dir, src):
+    """Return the cached Program for src from cache_dir, or None."""
+    if not cache_enabled():
+        return None
+    try:
+        with open(_program_cache_path(cache_dir, src), "rb") as f:
+            header = ast_serialization.load(f)
+            if header.get("format") != CACHE_FORMAT or header.get("interpreter") != interpreter_fingerprint():
+                return None
+            return ast_serialization.load(f)
+    except Exception:
+        return None
+
+
+def store_program(cache_dir, src, program):
+    if not cache_enabled():
+        return
+    header = {"format": CACHE_FORMAT, "interpreter": interpreter_fingerprint()}
+    try:
+        chunks = [ast_serialization.dumps(header), ast_serialization.dumps(program)]
+    except (ASTSerializationError, RecursionError):
+        return
+    _write_atomic(_program_cache_path(cache_dir, src), chunks)
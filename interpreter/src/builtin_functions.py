@@ -0,0 +1,121 @@
+# Built-in functions, bound in the global environment before a program runs
+#
+# Each is a BuiltinFunction, which Invoke calls with its evaluated arguments (see
+# evaluator._apply_invoke). A program may bind one of these names itself, with or without
+# the $ (add: ... or $add: ...), and its binding then replaces the builtin.
+#
+# The list builtins take a whole List of Numbers at once. When the list's elements are
+# packed in a NumberArray (see EnzoList) they run over the array in C; otherwise they
+# check the elements and go through them in Python, which is still one call instead of
+# a loop of interpreted statements.
+
+from operator import add
+
+from src import runtime_helpers
+from src.error_handling import EnzoRuntimeError, EnzoTypeError
+from src.error_messaging import (
+    error_message_too_many_args,
+    error_message_missing_necessary_params,
+    error_message_builtin_expects_list,
+    error_message_builtin_expects_numbers,
+    error_message_builtin_expects_number,
+    error_message_builtin_empty_list,
+    error_message_builtin_length_mismatch,
+)
+from src.packed_numbers import NumberArray, added, pack, scaled
+from src.runtime_helpers import EnzoList
+
+
+class BuiltinFunction:
+    """A function implemented in Python; see the module comment."""
+
+    def __init__(self, name, function, arity):
+        self.name = name
+        self.function = function
+        self.arity = arity
+
+    def call(self, args, code_line=None):
+        if len(args) > self.arity:
+            raise EnzoRuntimeError(error_message_too_many_args(), code_line=code_line)
+        if len(args) < self.arity:
+            raise EnzoRuntimeError(error_message_missing_necessary_params(), code_line=code_line)
+        try:
+            return self.function(*args)
+        except EnzoRuntimeError as error:
+            if error.code_line is None:
+                error.code_line = code_line
+            raise
+
+    def __repr__(self):
+        return f"<builtin function {self.name}>"
+
+
+def _numbers(name, value):
+    """value's elements, a NumberArray or a sequence of Numbers; an error if they are not Numbers."""
+    if not isinstance(value, EnzoList):
+        raise EnzoTypeError(error_message_builtin_expects_list(name))
+    elements = value._elements
+    if type(elements) is NumberArray:
+        return elements
+    for element in elements:
+        if not isinstance(element, (int, float)):
+            raise EnzoTypeError(error_message_builtin_expects_numbers(name))
+    return elements
+
+
+def _result_list(template, elements):
+    # A new list of the numbers in elements, with template's keys
+    result = EnzoList()
+    if type(elements) is list and len(elements) >= runtime_helpers.PACKED_MIN_LENGTH:
+        elements = pack(elements) or elements
+    result._elements = elements
+    shape = template._shape
+    result._shape = shape if shape.shared else shape.copy()
+    return result
+
+
+def _sum(numbers):
+    return sum(_numbers("sum", numbers))
+
+
+def _min(numbers):
+    elements = _numbers("min", numbers)
+    if not len(elements):
+        raise EnzoRuntimeError(error_message_builtin_empty_list("min"))
+    return min(elements)
+
+
+def _max(numbers):
+    elements = _numbers("max", numbers)
+    if not len(elements):
+        raise EnzoRuntimeError(error_message_builtin_empty_list("max"))
+    return max(elements)
+
+
+def _scale(numbers, factor):
+    elements = _numbers("scale", numbers)
+    if not isinstance(factor, (int, float)):
+        raise EnzoTypeError(error_message_builtin_expects_number("scale"))
+    if type(elements) is NumberArray:
+        return _result_list(numbers, scaled(elements, factor))
+    return _result_list(numbers, [element * factor for element in elements])
+
+
+def _add(left, right):
+    left_elements = _numbers("add", left)
+    right_elements = _numbers("add", right)
+    if len(left_elements) != len(right_elements):
+        raise EnzoRuntimeError(error_message_builtin_length_mismatch("add"))
+    if type(left_elements) is NumberArray and type(right_elements) is NumberArray:
+        return _result_list(left, added(left_elements, right_elements))
+    return _result_list(left, list(map(add, left_elements, right_elements)))
+
+
+# Name -> builtin, bound into evaluator._env
+BUILTIN_FUNCTIONS = {
+    "sum": BuiltinFunction("sum", _sum, 1),
+    "min": BuiltinFunction("min", _min, 1),
+    "max": BuiltinFunction("max", _max, 1),
+    "scale": BuiltinFunction("scale", _scale, 2),
+    "add": BuiltinFunction("add", _add, 2),
+}
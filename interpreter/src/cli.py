@@ -8,15 +8,19 @@ from src.runtime_helpers import clear_debug_log
 clear_debug_log()  # <-- Clear the debug log at the very start
 
 import re
+import hashlib
 from src.enzo_parser.parser import parse  # Use new parser
+from src.enzo_parser.optimizer import fold_constants
+from src.enzo_parser.scope_resolver import ScopeResolver, resolve_scopes
 from src.evaluator    import eval_ast
 from src.runtime_helpers import Table, format_val, log_debug
+from src.ast_cache import hash_lines
 
 # CRITICAL INFO: ALL ERROR HANDLING MUST BE USE THE CENTRALIZED error_handling.py MODULE
 from src.error_handling import InterpolationParseError, ReturnSignal, EnzoParseError, EnzoRuntimeError
 
 # CRITICAL INFO: ALL ERROR MESSAGING MUST BE USE THE CENTRALIZED error_messaging.py MODULE
-from src.error_messaging import format_parse_error, error_message_unterminated_interpolation, error_message_included_file_not_found, error_message_generic
+from src.error_messaging import format_parse_error, format_statement_error, error_message_unterminated_interpolation, error_message_included_file_not_found, error_message_generic, error_message_unknown_engine, error_message_unknown_variable
 from src.color_helpers import color_error, color_code
 
 
@@ -92,7 +96,10 @@ def read_statement(stdin, interactive):
 
 def split_statements(lines):
     # Split a list of lines into complete statements (respecting nesting)
-    stmts = []
+    return list(iter_statements(lines))
+
+def iter_statements(lines):
+    # Yield each complete statement (a list of lines) as soon as its last line has been read
     buffer = []
     paren_depth = 0
     brace_depth = 0
@@ -108,7 +115,7 @@ def split_statements(lines):
         # IMPORTANT: Test section delimiters force statement breaks
         if stripped.strip().startswith('//='):
             if buffer:  # If we have a pending statement, close it first
-                stmts.append(buffer)
+                yield buffer
                 buffer = []
                 # Reset all depth counters for new test section
                 paren_depth = 0
@@ -116,7 +123,7 @@ def split_statements(lines):
                 bracket_depth = 0
                 if_depth = 0
                 block_comment_depth = 0
-            stmts.append([stripped])
+            yield [stripped]
             continue
         if stripped.strip().startswith('//') and not buffer:
             continue
@@ -182,151 +189,245 @@ def split_statements(lines):
         has_semicolon = ';' in line_to_parse  # Only check semicolons outside of comments and block comments
         if (paren_depth <= 0 and brace_depth <= 0 and bracket_depth <= 0 and
             if_depth <= 0 and block_comment_depth <= 0 and has_semicolon):
-            stmts.append(buffer)
+            yield buffer
             buffer = []
     if buffer:
-        stmts.append(buffer)
-    return stmts
+        yield buffer
+
+ENGINES = ("tree", "closure", "vm")
+
+def select_engine(engine):
+    # Returns the function that runs one run unit with the given execution engine
+    if engine == "closure":
+        from src import closure_compiler as backend
+    elif engine == "vm":
+        from src import enzo_vm as backend
+    else:
+        return run_unit
+    backend.install()
+
+    def run_compiled(unit):
+        if unit[0] in ("eval", "program"):
+            backend.compile_program(unit[1])
+        run_unit(unit)
+    return run_compiled
+
+def run_enzo_file(filename, single_pass=False, engine="tree"):
+    from src.ast_cache import load_run_units, RunUnitRecorder
+    runner = "single-pass" if single_pass else "statements"
+    run = select_engine(engine)
+    # A valid cache entry holds every run unit of the file, so the front end is skipped
+    units = load_run_units(filename, runner)
+    if units is not None:
+        for unit in units:
+            run(unit)
+        return
+
+    recorder = RunUnitRecorder(filename, runner)
+
+    def emit(unit):
+        run(recorder.add(unit))
+
+    if single_pass:
+        for unit in compile_file(filename, recorder):
+            emit(unit)
+        recorder.save()
+        return
 
-def run_enzo_file(filename):
     with open(filename) as f:
-        lines = f.readlines()
-    lines = list(process_includes(lines, base_dir=os.path.dirname(os.path.abspath(filename))))
-    stmts = split_statements(lines)
-    for stmt_lines in stmts:
-        statement = '\n'.join(stmt_lines).strip()
-        if not statement:
-            continue
-        if statement.strip().startswith('//='):
-            print(statement.rstrip())
-            continue
-        # --- NEW: If this block is a list of single-line statements, process each line independently ---
-        # BUT: Don't do this if the block starts with '(' (function atom) or other multi-line constructs
-        # ALSO: Don't do this if any line contains 'then (' (pipeline with function atom)
-        # ALSO: Don't do this if the block contains control flow keywords (If, Else, end)
-        if (all(';' in line for line in stmt_lines) and len(stmt_lines) > 1 and
-            not any(line.strip().startswith(('(', '[', '{')) for line in stmt_lines) and
-            not any('then (' in line for line in stmt_lines) and
-            not any(any(keyword in line for keyword in ['If ', 'For ', 'While ', 'Else', 'end;', 'end']) for line in stmt_lines)):
-            for line in stmt_lines:
-                line = line.strip()
-                if not line:
-                    continue
-                # Strip inline comments (for code lines only)
-                if '//' in line:
-                    line = line.split('//', 1)[0].rstrip()
-                if not line:
-                    continue
-                try:
-                    result = eval_ast(parse(line), value_demand=True)
-                    # Don't print None values
-                    if result is not None:
-                        print(format_val(result))
-                except InterpolationParseError as e:
-                    msg = format_parse_error(e, src=line)
-                    if "\n" in msg:
-                        errline, context = msg.split("\n", 1)
-                        print_enzo_error(errline + "\n" + context)
-                    else:
-                        print_enzo_error(msg)
-                    continue
-                except EnzoParseError as e:
-                    msg = format_parse_error(e, src=line)
-                    if "\n" in msg:
-                        errline, context = msg.split("\n", 1)
-                        print_enzo_error(errline + "\n" + context)
-                    else:
-                        print_enzo_error(msg)
-                    continue
-                except EnzoParseError as e:
-                    msg = format_parse_error(e, src=line)
-                    print_enzo_error(msg)
-                    continue
-                except EnzoRuntimeError as e:
-                    msg = format_parse_error(e, src=line)
-                    print_enzo_error(msg)
-                    continue
-                except Exception as e:
-                    msg = format_parse_error(e, src=line) if hasattr(e, 'code_line') or hasattr(e, 'line') or hasattr(e, 'column') else error_message_generic(str(e))
-                    print_enzo_error(msg)
-                    continue
-            continue  # move to next block after processing all lines
-        # Strip inline comments only for single-line statements
-        # Multi-line statements (like function atoms) should not have comments stripped
-        # since the tokenizer handles them properly
-        is_multiline = '\n' in statement
-        original_statement = statement  # Keep original for error reporting
-        if not is_multiline and '//' in statement:
-            statement = statement.split('//', 1)[0].rstrip()
-        if not statement:
-            continue
-
-        # DEBUG: Log what we're about to parse
-        log_debug(f"[CLI] About to parse statement: {repr(statement)}")
-
-        try:
-            # Use parse_program for multi-line statements, parse for single statements
-            if '\n' in statement or ';' in statement.rstrip(';'):
-                # Multi-line or multiple statements - use program parser
-                from src.enzo_parser.parser import parse_program
-                program = parse_program(statement)
-
-                # Evaluate statements one by one to handle errors gracefully
-                if hasattr(program, 'statements'):
-                    for stmt in program.statements:
-                        result = eval_ast(stmt, value_demand=True)
-                        # Don't print None values
-                        if result is not None:
-                            # If the result is itself a list from a loop, print each element
-                            if isinstance(result, list):
-                                for sub_item in result:
-                                    if sub_item is not None:
-                                        print(format_val(sub_item))
-                            else:
-                                print(format_val(result))
-                else:
-                    # Fallback for non-program results
-                    result = eval_ast(program, value_demand=True)
-                    # Don't print None values
-                    if result is not None:
-                        print(format_val(result))
+        # Statements are evaluated as soon as they are complete, so the file is read lazily
+        lines = process_includes(
+            hash_lines(f, recorder.source_digest),
+            base_dir=os.path.dirname(os.path.abspath(filename)),
+            on_missing=lambda message: emit(("print", message)),
+            dependencies=recorder.dependencies,
+        )
+        for stmt_lines in iter_statements(lines):
+            for unit in compile_statement_lines(stmt_lines):
+                emit(unit)
+    recorder.save()
+
+def compile_file(filename, recorder):
+    # Single-pass mode: lex and parse the whole file (with includes expanded) once, then
+    # turn each Program statement into a run unit
+    from src.enzo_parser.parser import parse_file
+    from src.enzo_parser.ast_nodes import SectionMarker, InvalidStatement
+    lines = []
+    notices = []  # (line index, message) for includes that were not found
+    with open(filename) as f:
+        for line in process_includes(
+            hash_lines(f, recorder.source_digest),
+            base_dir=os.path.dirname(os.path.abspath(filename)),
+            on_missing=lambda message: notices.append((len(lines), message)),
+            dependencies=recorder.dependencies,
+        ):
+            lines.append(line)
+    program = parse_file(''.join(lines))
+
+    notice_index = 0
+    for stmt, source, line in zip(program.statements, program.sources, program.source_lines):
+        # Include messages come out before the first statement at or after their line
+        while notice_index < len(notices) and notices[notice_index][0] <= line:
+            yield ("print", notices[notice_index][1])
+            notice_index += 1
+        if isinstance(stmt, SectionMarker):
+            yield ("print", stmt.title)
+        elif isinstance(stmt, InvalidStatement):
+            yield ("error", stmt.message)
+        else:
+            # Print results the way the line-based runner does for a block of this shape
+            code = source if '\n' in source else source.split('//', 1)[0].rstrip()
+            if '\n' in code or ';' in code.rstrip(';'):
+                yield prepare_unit(("program", [stmt], source))
             else:
-                # Single statement - use regular parser
-                result = eval_ast(parse(statement), value_demand=True)
+                yield prepare_unit(("eval", stmt, source))
+    for _, message in notices[notice_index:]:
+        yield ("print", message)
+
+def prepare_unit(unit, resolver=None):
+    # Optimize an "eval" or "program" unit and annotate its variable reads with scope depths
+    if unit[0] not in ("eval", "program"):
+        return unit
+    try:
+        unit = (unit[0], fold_constants(unit[1])) + unit[2:]
+        (resolver or ScopeResolver()).resolve(unit[1])
+    except RecursionError:
+        pass  # Too deeply nested; what was not reached runs unoptimized and is looked up by name
+    return unit
+
+def check_enzo_file(filename, single_pass=False):
+    # --check: report reads of variables the file never binds, without running it.
+    # Returns the number of errors reported
+    from src.ast_cache import RunUnitRecorder
+    from src.evaluator import _env
+    resolver = ScopeResolver()
+    recorder = RunUnitRecorder(filename, "single-pass" if single_pass else "statements")
+    if single_pass:
+        units = list(compile_file(filename, recorder))
+    else:
+        with open(filename) as f:
+            lines = process_includes(f, base_dir=os.path.dirname(os.path.abspath(filename)), on_missing=lambda message: None)
+            units = [unit for stmt_lines in iter_statements(lines) for unit in compile_statement_lines(stmt_lines)]
+    sources = {}
+    for unit in units:
+        if unit[0] in ("eval", "program"):
+            start = len(resolver.free_reads)
+            prepare_unit(unit, resolver)
+            for node in resolver.free_reads[start:]:
+                sources[id(node)] = unit[2]
+    errors = 0
+    for node in resolver.unresolved_reads(_env):
+        err = EnzoRuntimeError(error_message_unknown_variable(node.name), code_line=node.code_line)
+        print_enzo_error(format_statement_error(err, sources[id(node)]))
+        errors += 1
+    return errors
+
+def run_statement_lines(stmt_lines):
+    for unit in compile_statement_lines(stmt_lines):
+        run_unit(unit)
+
+def run_unit(unit):
+    # Run units are what the front end produces for a statement block:
+    #   ("print", text)             titles and include messages
+    #   ("error", message)          a statement that failed to parse
+    #   ("eval", node, src)         a single statement
+    #   ("program", nodes, src)     the statements of a multi-line block, evaluated until one fails
+    kind = unit[0]
+    if kind == "print":
+        print(unit[1])
+        return
+    if kind == "error":
+        print_enzo_error(unit[1])
+        return
+    src = unit[2]
+    try:
+        if kind == "program":
+            # Evaluate statements one by one to handle errors gracefully
+            for stmt in unit[1]:
+                result = eval_ast(stmt, value_demand=True)
                 # Don't print None values
                 if result is not None:
-                    print(format_val(result))
-        except InterpolationParseError as e:
-            msg = format_parse_error(e, src=original_statement)
-            if "\n" in msg:
-                errline, context = msg.split("\n", 1)
-                print_enzo_error(errline + "\n" + context)
-            else:
-                print_enzo_error(msg)
-            continue
-        except EnzoParseError as e:
-            msg = format_parse_error(e, src=original_statement)
-            if "\n" in msg:
-                errline, context = msg.split("\n", 1)
-                print_enzo_error(errline + "\n" + context)
+                    # If the result is itself a list from a loop, print each element
+                    if isinstance(result, list):
+                        for sub_item in result:
+                            if sub_item is not None:
+                                print(format_val(sub_item))
+                    else:
+                        print(format_val(result))
+        else:
+            result = eval_ast(unit[1], value_demand=True)
+            # Don't print None values
+            if result is not None:
+                print(format_val(result))
+    except Exception as e:
+        print_enzo_error(format_statement_error(e, src))
+
+def compile_statement_lines(stmt_lines):
+    # Yield the run units for one statement block; parsing happens lazily, so a unit is
+    # parsed only after the units before it have been run
+    statement = '\n'.join(stmt_lines).strip()
+    if not statement:
+        return
+    if statement.strip().startswith('//='):
+        yield ("print", statement.rstrip())
+        return
+    # --- NEW: If this block is a list of single-line statements, process each line independently ---
+    # BUT: Don't do this if the block starts with '(' (function atom) or other multi-line constructs
+    # ALSO: Don't do this if any line contains 'then (' (pipeline with function atom)
+    # ALSO: Don't do this if the block contains control flow keywords (If, Else, end)
+    if (all(';' in line for line in stmt_lines) and len(stmt_lines) > 1 and
+        not any(line.strip().startswith(('(', '[', '{')) for line in stmt_lines) and
+        not any('then (' in line for line in stmt_lines) and
+        not any(any(keyword in line for keyword in ['If ', 'For ', 'While ', 'Else', 'end;', 'end']) for line in stmt_lines)):
+        for line in stmt_lines:
+            line = line.strip()
+            if not line:
+                continue
+            # Strip inline comments (for code lines only)
+            if '//' in line:
+                line = line.split('//', 1)[0].rstrip()
+            if not line:
+                continue
+            try:
+                unit = ("eval", parse(line), line)
+            except Exception as e:
+                unit = ("error", format_statement_error(e, line))
+            yield prepare_unit(unit)
+        return  # move to next block after processing all lines
+    # Strip inline comments only for single-line statements
+    # Multi-line statements (like function atoms) should not have comments stripped
+    # since the tokenizer handles them properly
+    is_multiline = '\n' in statement
+    original_statement = statement  # Keep original for error reporting
+    if not is_multiline and '//' in statement:
+        statement = statement.split('//', 1)[0].rstrip()
+    if not statement:
+        return
+
+    # DEBUG: Log what we're about to parse
+    log_debug(f"[CLI] About to parse statement: {repr(statement)}")
+
+    try:
+        # Use parse_program for multi-line statements, parse for single statements
+        if '\n' in statement or ';' in statement.rstrip(';'):
+            # Multi-line or multiple statements - use program parser
+            from src.enzo_parser.parser import parse_program
+            program = parse_program(statement)
+            if hasattr(program, 'statements'):
+                unit = ("program", program.statements, original_statement)
             else:
-                print_enzo_error(msg)
-            continue
-        except EnzoParseError as e:
-            msg = format_parse_error(e, src=original_statement)
-            print_enzo_error(msg)
-            continue
-        except EnzoRuntimeError as e:
-            msg = format_parse_error(e, src=original_statement)
-            print_enzo_error(msg)
-            continue
-        except Exception as e:
-            msg = format_parse_error(e, src=original_statement) if hasattr(e, 'code_line') or hasattr(e, 'line') or hasattr(e, 'column') else error_message_generic(str(e))
-            print_enzo_error(msg)
-            continue
-
-def process_includes(lines, base_dir=None, already_included=None):
-    #Given a list of source lines, yield each line, but expand any `@include filename` directives inline.
+                # Fallback for non-program results
+                unit = ("eval", program, original_statement)
+        else:
+            # Single statement - use regular parser
+            unit = ("eval", parse(statement), original_statement)
+    except Exception as e:
+        unit = ("error", format_statement_error(e, original_statement))
+    yield prepare_unit(unit)
+
+def process_includes(lines, base_dir=None, already_included=None, on_missing=print, dependencies=None):
+    #Given an iterable of source lines, yield each line, but expand any `@include filename` directives inline.
+    # When dependencies is a list, every include is recorded in it as [abs_path, sha256 digest or None].
     if already_included is None:
         already_included = set()
     if base_dir is None:
@@ -342,21 +443,44 @@ def process_includes(lines, base_dir=None, already_included=None):
                 continue
             already_included.add(abs_path)
             if not os.path.isfile(abs_path):
-                print(error_message_included_file_not_found(fname))
+                if dependencies is not None:
+                    dependencies.append([abs_path, None])
+                on_missing(error_message_included_file_not_found(fname))
                 continue
-            with open(abs_path) as f:
-                sub_lines = f.readlines()
-            # Recursively process includes
+            # Recursively process includes, reading the included file lazily as well
             sub_base = os.path.dirname(abs_path)
-            yield from process_includes(sub_lines, base_dir=sub_base, already_included=already_included)
+            with open(abs_path) as f:
+                if dependencies is not None:
+                    digest = hashlib.sha256()
+                    dependencies.append([abs_path, digest])
+                    f = hash_lines(f, digest)
+                yield from process_includes(f, base_dir=sub_base, already_included=already_included,
+                                            on_missing=on_missing, dependencies=dependencies)
         else:
             yield line
 
 def main():
     # --- FILE RUNNER MODE ---
-    if len(sys.argv) > 1:
-        run_enzo_file(sys.argv[1])
+    args = sys.argv[1:]
+    single_pass = "--single-pass" in args
+    # --check: report undefined variables without running the file
+    check = "--check" in args
+    args = [arg for arg in args if arg not in ("--single-pass", "--check")]
+    # --engine=tree (the default), --engine=closure or --engine=vm
+    engine = "tree"
+    for arg in [arg for arg in args if arg.startswith("--engine=")]:
+        engine = arg[len("--engine="):]
+        args.remove(arg)
+    if engine not in ENGINES:
+        print_enzo_error(error_message_unknown_engine(engine, ENGINES))
+        sys.exit(1)
+    if args and check:
+        sys.exit(1 if check_enzo_file(args[0], single_pass=single_pass) else 0)
+    if args:
+        run_enzo_file(args[0], single_pass=single_pass, engine=engine)
         sys.exit(0)
+    # The REPL compiles lazily, the first time eval_ast reaches an expression
+    select_engine(engine)
 
     # --- REPL MODE ---
     interactive = sys.stdin.isatty()
@@ -392,7 +516,7 @@ def main():
             continue
 
         try:
-            ast = parse(line)
+            ast = resolve_scopes(fold_constants(parse(line)))
             result = eval_ast(ast, value_demand=True)
             # If result is a list (from Program), print each non-None value on its own line
             if isinstance(result, list):
@@ -0,0 +1,654 @@
+# Closure-compilation backend for the evaluator
+#
+# Trees are compiled once into nested Python closures. An AddNode closure calls its two
+# child closures directly instead of going back through eval_ast, so a tree pays the
+# dispatch and keyword-argument plumbing of eval_ast once at its root rather than at every
+# node.
+#
+# Expressions (literals, variables, arithmetic, comparisons, logic and calls) compile to
+# closure(env, value_demand, is_loop_context). Statements compile to
+# closure(env, is_function_context, outer_env, loop_locals, is_loop_context), the context
+# eval_ast threads through its handlers: If statements, basic/while/until loops,
+# bindings and rebindings of a variable to an expression, `return`, `end-loop;` and
+# `restart-loop;`, besides expressions. Function bodies are compiled the same way and run
+# by run_function_body. Everything else (function atoms, for loops, blueprints, lists and
+# the rest) still runs through eval_ast's handlers, and reaches compiled code whenever it
+# evaluates one of the nodes above. Each closure makes the same child evaluations, with
+# the same arguments, as the handler it stands in for, and raises and catches the same
+# signals, so results and error messages are unchanged.
+
+from collections import ChainMap
+
+from src.enzo_parser.ast_nodes import (
+    Program, NumberAtom, TextAtom, VarInvoke, AddNode, SubNode, MulNode, DivNode, ModNode,
+    ComparisonExpression, LogicalExpression, NotExpression, IfStatement, LoopStatement, EndLoopStatement,
+    RestartLoopStatement, ReturnNode, Binding, BindOrRebind, Invoke, ListIndex, ListAtom,
+)
+from src.enzo_parser.parser import compile_text_template
+from src.evaluator import (
+    eval_ast, register_eval_handler, get_eval_handler, set_function_body_runner, invoke_function, lookup_variable,
+    _interp_segments, _is_truthy, _compare_values, _call_target, _apply_invoke, _index_value, _bind_value,
+    _rebind_value, is_function, TailCall, EndLoopSignal, RestartLoopSignal, MethodReference, ReferenceWrapper,
+    ListElementReference,
+)
+from src.builtin_functions import BuiltinFunction
+from src.runtime_helpers import format_val
+from src.error_handling import EnzoRuntimeError, EnzoRecursionError, ReturnSignal
+from src.error_messaging import (
+    error_message_unknown_variable, error_message_already_defined, error_message_maximum_recursion_depth_exceeded,
+)
+
+# Expression node types whose eval_ast handler is replaced by install(): the ones with
+# expression children. Leaves on their own gain nothing from compilation.
+COMPILED_ROOTS = (AddNode, SubNode, MulNode, DivNode, ModNode, ComparisonExpression, LogicalExpression, NotExpression,
+                  Invoke)
+# Statement node types whose eval_ast handler is replaced by install()
+COMPILED_STATEMENT_ROOTS = (IfStatement, LoopStatement)
+# Loop kinds compiled here; for loops stay with eval_ast
+COMPILED_LOOP_TYPES = ("basic", "while", "until")
+
+# Same safety limit as the tree-walking loops
+MAX_LOOP_ITERATIONS = 10000
+# Roots and function bodies are compiled on their second evaluation (or call); most
+# top-level statements run once, and compiling them costs more than walking them. Loops
+# are compiled on their first.
+COMPILE_AFTER = 2
+_LOOP_LIMIT_MESSAGES = {
+    "basic": "Loop exceeded maximum iterations (possible infinite loop)",
+    "while": "While loop exceeded maximum iterations (possible infinite loop)",
+    "until": "Until loop exceeded maximum iterations (possible infinite loop)",
+}
+
+_TYPE_NAMES = ("Number", "Text", "List", "Empty", "Function")
+# Values compiled bindings and rebindings store: their handlers do not look at the scope
+# context (is_function_context, outer_env, loop_locals) eval_ast would have passed them
+_BOUND_VALUES = (NumberAtom, TextAtom, VarInvoke, AddNode, SubNode, MulNode, DivNode, ModNode, ComparisonExpression,
+                 LogicalExpression, NotExpression, Invoke, ListAtom, ListIndex)
+
+# Compiled roots keep their closure in node.closure, and function atoms the closure for
+# their body in atom.closure; until they are compiled, closure counts evaluations (or calls).
+# Tree-walking handlers replaced by install(), restored by uninstall()
+_tree_handlers = {}
+
+
+def _compile_number(node):
+    value = node.value
+
+    def number(env, value_demand, is_loop_context):
+        return value
+    return number
+
+
+def _compile_text(node):
+    if "<" not in node.value:
+        value = node.value
+
+        def text(env, value_demand, is_loop_context):
+            return value
+        return text
+    if node.segments is None:
+        node.segments = compile_text_template(node.value)
+    segments = node.segments
+    code_line = getattr(node, 'code_line', None)
+
+    def interpolated_text(env, value_demand, is_loop_context):
+        return _interp_segments(segments, src_line=code_line, env=env)
+    return interpolated_text
+
+
+def _compile_var(node):
+    name = node.name
+    code_line = node.code_line
+    depth = node.scope_depth
+    # Bare function names (without $ sigil) cannot be auto-invoked
+    invocable = name.startswith('$')
+
+    def var(env, value_demand, is_loop_context):
+        try:
+            val = lookup_variable(env, name, depth)
+        except KeyError:
+            raise EnzoRuntimeError(error_message_unknown_variable(name), code_line=code_line) from None
+        if isinstance(val, (ReferenceWrapper, ListElementReference)):
+            referenced_val = val.get_value()
+            if value_demand and is_function(referenced_val):
+                if not invocable:
+                    raise EnzoRuntimeError("error: expected function reference (@) or function invocation ($)", code_line=code_line)
+                return invoke_function(referenced_val, [], env, self_obj=None, is_loop_context=is_loop_context)
+            return referenced_val
+        if value_demand:
+            if is_function(val):
+                if not invocable:
+                    raise EnzoRuntimeError("error: expected function reference (@) or function invocation ($)", code_line=code_line)
+                return invoke_function(val, [], env, self_obj=None, is_loop_context=is_loop_context)
+            if isinstance(val, MethodReference):
+                if not invocable:
+                    raise EnzoRuntimeError("error: expected function reference (@) or function invocation ($)", code_line=code_line)
+                return invoke_function(val.method_function, [], env, self_obj=val.self_object, is_loop_context=is_loop_context)
+        return val
+    return var
+
+
+def _compile_add(node):
+    left = compile_node(node.left)
+    right = compile_node(node.right)
+
+    def add(env, value_demand, is_loop_context):
+        return left(env, True, is_loop_context) + right(env, True, is_loop_context)
+    return add
+
+
+def _compile_sub(node):
+    left = compile_node(node.left)
+    right = compile_node(node.right)
+
+    def sub(env, value_demand, is_loop_context):
+        return left(env, True, is_loop_context) - right(env, True, is_loop_context)
+    return sub
+
+
+def _compile_mul(node):
+    left = compile_node(node.left)
+    right = compile_node(node.right)
+
+    def mul(env, value_demand, is_loop_context):
+        return left(env, True, is_loop_context) * right(env, True, is_loop_context)
+    return mul
+
+
+def _compile_div(node):
+    left = compile_node(node.left)
+    right = compile_node(node.right)
+
+    def div(env, value_demand, is_loop_context):
+        return left(env, True, is_loop_context) / right(env, True, is_loop_context)
+    return div
+
+
+def _compile_mod(node):
+    left = compile_node(node.left)
+    right = compile_node(node.right)
+    code_line = getattr(node, 'code_line', None)
+
+    def mod(env, value_demand, is_loop_context):
+        left_val = left(env, True, is_loop_context)
+        right_val = right(env, True, is_loop_context)
+        if right_val == 0:
+            raise EnzoRuntimeError("error: No division by zero", code_line=code_line)
+        # Euclidean modulo, as in the tree-walking evaluator
+        result = left_val % right_val
+        if result < 0:
+            result += abs(right_val)
+        return result
+    return mod
+
+
+def _compile_comparison(node):
+    operator = node.operator
+    left = compile_node(node.left)
+    if operator in ("is", "is not") and isinstance(node.right, VarInvoke) and node.right.name in _TYPE_NAMES:
+        # Type comparison: the right side is the type name itself, and a Function check
+        # must not auto-invoke the left side
+        type_name = node.right.name
+        left_demand = type_name != "Function"
+
+        def type_comparison(env, value_demand, is_loop_context):
+            return _compare_values(left(env, left_demand, False), operator, type_name)
+        return type_comparison
+    right = compile_node(node.right)
+
+    def comparison(env, value_demand, is_loop_context):
+        left_val = left(env, True, False)
+        return _compare_values(left_val, operator, right(env, True, False))
+    return comparison
+
+
+def _compile_logical(node):
+    operator = node.operator
+    left = compile_node(node.left)
+    right = compile_node(node.right)
+    code_line = getattr(node, 'code_line', None)
+
+    if operator == "and":
+        def logical_and(env, value_demand, is_loop_context):
+            left_val = left(env, False, False)
+            if not _is_truthy(left_val):
+                return left_val  # Short-circuit
+            return right(env, False, False)
+        return logical_and
+    if operator == "or":
+        def logical_or(env, value_demand, is_loop_context):
+            left_val = left(env, False, False)
+            if _is_truthy(left_val):
+                return left_val  # Short-circuit
+            return right(env, False, False)
+        return logical_or
+
+    def unknown_operator(env, value_demand, is_loop_context):
+        left(env, False, False)
+        raise EnzoRuntimeError(f"Unknown logical operator: {operator}", code_line=code_line)
+    return unknown_operator
+
+
+def _compile_not(node):
+    operand = compile_node(node.operand)
+
+    def logical_not(env, value_demand, is_loop_context):
+        return not _is_truthy(operand(env, False, False))
+    return logical_not
+
+
+def _is_literal(node):
+    cls = type(node)
+    return cls is NumberAtom or (cls is TextAtom and "<" not in node.value)
+
+
+def _compile_operands(node):
+    # Operands are evaluated the way _invoke_operands evaluates them: the callee without
+    # value demand, then each argument without, and again with value demand unless the
+    # first evaluation gave a reference
+    func = node.func
+    if type(func) is ListIndex and func.is_property_access:
+        base = compile_node(func.base)
+
+        def method(env, is_loop_context):
+            receiver = base(env, False, False)
+            return _index_value(func, receiver, False, env, is_loop_context), receiver
+        callee = method
+    else:
+        function = compile_node(func)
+
+        def callee(env, is_loop_context):
+            return function(env, False, is_loop_context), None
+    args = [(compile_node(arg), _is_literal(arg)) for arg in node.args]
+
+    def operands(env, is_loop_context):
+        left, receiver = callee(env, is_loop_context)
+        if isinstance(left, ReferenceWrapper):
+            left = left.get_value()
+        values = []
+        for arg, is_literal in args:
+            value = arg(env, False, is_loop_context)
+            if not is_literal and not isinstance(value, ReferenceWrapper):
+                value = arg(env, True, is_loop_context)
+            values.append(value)
+        return left, values, receiver
+    return operands
+
+
+def _compile_invoke(node):
+    operands = _compile_operands(node)
+
+    def invoke(env, value_demand, is_loop_context):
+        left, args, receiver = operands(env, is_loop_context)
+        return _apply_invoke(node, left, args, receiver, env, is_loop_context)
+    return invoke
+
+
+def _compile_fallback(node):
+    # Anything else is evaluated by eval_ast with the arguments a handler would pass
+    def tree(env, value_demand, is_loop_context):
+        return eval_ast(node, value_demand=value_demand, env=env, is_loop_context=is_loop_context)
+    return tree
+
+
+_COMPILERS = {
+    NumberAtom: _compile_number,
+    TextAtom: _compile_text,
+    VarInvoke: _compile_var,
+    AddNode: _compile_add,
+    SubNode: _compile_sub,
+    MulNode: _compile_mul,
+    DivNode: _compile_div,
+    ModNode: _compile_mod,
+    ComparisonExpression: _compile_comparison,
+    LogicalExpression: _compile_logical,
+    NotExpression: _compile_not,
+    Invoke: _compile_invoke,
+}
+
+
+def compile_node(node):
+    """Return closure(env, value_demand, is_loop_context) evaluating node like eval_ast does."""
+    if node is None:
+        return _compile_fallback(node)
+    compiler = _COMPILERS.get(type(node))
+    if compiler is None:
+        return _compile_fallback(node)
+    closure = compiler(node)
+    if isinstance(node, COMPILED_ROOTS):
+        node.closure = closure
+    return closure
+
+
+def _block_value(results):
+    # What an If block gives: nothing, its one result or the list of them
+    if not results:
+        return None
+    if len(results) == 1:
+        return results[0]
+    return results
+
+
+def _compile_if(node):
+    condition = compile_node(node.condition)
+    # Statements in If blocks are evaluated without value demand
+    then_block = [compile_statement(stmt, False) for stmt in node.then_block]
+    else_block = [compile_statement(stmt, False) for stmt in node.else_block] if node.else_block else None
+
+    def if_statement(env, is_function_context, outer_env, loop_locals, is_loop_context):
+        if _is_truthy(condition(env, False, is_loop_context)):
+            block = then_block
+        elif else_block is not None:
+            block = else_block
+        else:
+            return None
+        # The block gets an isolated scope; in a loop, rebinding still targets the loop's
+        # outer scope
+        block_env = env.copy()
+        target_outer_env = outer_env if is_loop_context else env
+        results = []
+        try:
+            for stmt in block:
+                result = stmt(block_env, True, target_outer_env, loop_locals, is_loop_context)
+                if result is not None:
+                    results.append(result)
+        except (EndLoopSignal, RestartLoopSignal) as signal:
+            # A then block hands the results it has so far to the loop
+            if block is then_block and results and signal.last_result is None:
+                signal.last_result = _block_value(results)
+            raise
+        except Exception:
+            # Print accumulated results before the error
+            for result in results:
+                print(format_val(result))
+            raise
+        return _block_value(results)
+    return if_statement
+
+
+def _compile_loop(node):
+    limit_message = _LOOP_LIMIT_MESSAGES[node.loop_type]
+    code_line = node.code_line
+    # A basic loop splices in the results of a nested loop
+    flattens = node.loop_type == "basic"
+    body = [(compile_statement(stmt, True), flattens and isinstance(stmt, LoopStatement)) for stmt in node.body]
+    condition = compile_node(node.condition) if node.loop_type != "basic" else None
+    is_until = node.loop_type == "until"
+
+    def loop(env, is_function_context, outer_env, loop_locals, is_loop_context):
+        results = []
+        iteration_count = 0
+        # The body runs in a loop scope as a loop context; rebinding reaches the enclosing
+        # scope, and loop_locals tracks the variables the loop shadows
+        loop_env = ChainMap({}, env)
+        loop_locals = set()
+        while iteration_count < MAX_LOOP_ITERATIONS:
+            if condition is not None:
+                # The condition sees the loop scope but keeps the enclosing loop context
+                holds = _is_truthy(condition(loop_env, False, is_loop_context))
+                if holds if is_until else not holds:
+                    break
+            try:
+                for stmt, splices in body:
+                    result = stmt(loop_env, True, env, loop_locals, True)
+                    if result is not None:
+                        if splices and isinstance(result, list):
+                            results.extend(result)
+                        else:
+                            results.append(result)
+            except EndLoopSignal as signal:
+                # Collect any result that was produced before end-loop
+                if signal.last_result is not None:
+                    results.append(signal.last_result)
+                break
+            except RestartLoopSignal as signal:
+                if signal.last_result is not None:
+                    results.append(signal.last_result)
+            iteration_count += 1
+        if iteration_count >= MAX_LOOP_ITERATIONS:
+            raise EnzoRuntimeError(limit_message, code_line=code_line)
+        return results if results else None
+    return loop
+
+
+def _compile_binding(node):
+    name = node.name
+    value = compile_node(node.value)
+    code_line = node.code_line
+
+    def binding(env, is_function_context, outer_env, loop_locals, is_loop_context):
+        # In global context, redeclaration is an error, except of a builtin function
+        if not is_function_context and name in env and not isinstance(env[name], BuiltinFunction):
+            raise EnzoRuntimeError(error_message_already_defined(name), code_line=code_line)
+        return _bind_value(node, value(env, False, False), env, loop_locals)
+    return binding
+
+
+def _compile_rebind(node):
+    value = compile_node(node.value)
+
+    def rebind(env, is_function_context, outer_env, loop_locals, is_loop_context):
+        return _rebind_value(node, value(env, True, False), env, is_function_context, outer_env, loop_locals)
+    return rebind
+
+
+def _compile_return(node):
+    value = compile_node(node.value)
+
+    def return_statement(env, is_function_context, outer_env, loop_locals, is_loop_context):
+        raise ReturnSignal(value(env, True, False))
+    return return_statement
+
+
+def _compile_loop_control(node):
+    code_line = node.code_line
+    if type(node) is EndLoopStatement:
+        message = "error: `end-loop;` inside a non-loop function atom"
+        signal = EndLoopSignal
+    else:
+        message = "error: `restart-loop;` inside a non-loop function atom"
+        signal = RestartLoopSignal
+
+    def loop_control(env, is_function_context, outer_env, loop_locals, is_loop_context):
+        if not is_loop_context:
+            raise EnzoRuntimeError(message, code_line=code_line)
+        raise signal()
+    return loop_control
+
+
+def _compile_statement_fallback(node, value_demand):
+    if type(node) in COMPILED_STATEMENT_ROOTS:
+        # eval_ast would come back here; go to the tree-walking handler instead
+        def tree_root(env, is_function_context, outer_env, loop_locals, is_loop_context):
+            return _tree_handlers[type(node)](node, value_demand, False, env, None, is_function_context, outer_env,
+                                              loop_locals, is_loop_context)
+        return tree_root
+
+    def tree(env, is_function_context, outer_env, loop_locals, is_loop_context):
+        return eval_ast(node, value_demand=value_demand, env=env, is_function_context=is_function_context,
+                        outer_env=outer_env, loop_locals=loop_locals, is_loop_context=is_loop_context)
+    return tree
+
+
+def compile_statement(node, value_demand):
+    """Return closure(env, is_function_context, outer_env, loop_locals, is_loop_context)
+    evaluating node like eval_ast(node, value_demand, ...) does."""
+    cls = type(node)
+    if cls is IfStatement and not getattr(node, 'is_non_exclusive_multi_branch', False):
+        closure = node.closure = _compile_if(node)
+    elif cls is LoopStatement and node.loop_type in COMPILED_LOOP_TYPES:
+        closure = node.closure = _compile_loop(node)
+    elif cls in _COMPILERS:
+        expression = compile_node(node)
+
+        def closure(env, is_function_context, outer_env, loop_locals, is_loop_context):
+            return expression(env, value_demand, is_loop_context)
+    elif cls is Binding and node.name != '$this' and type(node.value) in _BOUND_VALUES:
+        closure = _compile_binding(node)
+    elif cls is BindOrRebind and isinstance(node.target, (str, VarInvoke)) and type(node.value) in _BOUND_VALUES:
+        closure = _compile_rebind(node)
+    elif cls is ReturnNode:
+        closure = _compile_return(node)
+    elif cls is EndLoopStatement or cls is RestartLoopStatement:
+        closure = _compile_loop_control(node)
+    else:
+        closure = _compile_statement_fallback(node, value_demand)
+    return closure
+
+
+def _compile_function_body(atom):
+    # The body runs the way _run_function_body runs it: local bindings, then the body
+    # statements, and a closing `return(f(...))` handed back to invoke_function as a
+    # TailCall. Any other closing return hands back its value without raising ReturnSignal.
+    local_vars = [compile_statement(stmt, True) for stmt in atom.local_vars]
+    body = atom.body
+    tail_call = final_return = None
+    if body and type(body[-1]) is ReturnNode:
+        if type(body[-1].value) is Invoke:
+            tail_call = body[-1].value
+            tail_operands = _compile_operands(tail_call)
+        else:
+            final_return = compile_node(body[-1].value)
+        body = body[:-1]
+    # Multi-line functions print standalone expression results as they go
+    statements = list(zip([compile_statement(stmt, True) for stmt in body], atom.signature.shows))
+    is_multiline = getattr(atom, 'is_multiline', False)
+
+    def function_body(call_env):
+        res = None
+        try:
+            for stmt in local_vars:
+                res = stmt(call_env, True, None, None, False)
+            for stmt, shows in statements:
+                res = stmt(call_env, True, None, None, False)
+                if shows and res is not None:
+                    print(format_val(res))
+            if tail_call is not None:
+                left, args, receiver = tail_operands(call_env, False)
+                target = _call_target(left, receiver)
+                if target is None:
+                    # Indexing rather than a call
+                    return _apply_invoke(tail_call, left, args, receiver, call_env, False)
+                return TailCall(target[0], args, call_env, target[1])
+            if final_return is not None:
+                return final_return(call_env, True, False)
+        except RecursionError:
+            raise EnzoRecursionError(error_message_maximum_recursion_depth_exceeded())
+        except ReturnSignal as ret:
+            return ret.value
+        except (EndLoopSignal, RestartLoopSignal) as loop_signal:
+            # The calling loop collects the last result before the signal
+            if res is not None:
+                loop_signal.last_result = res
+            raise
+        return None if is_multiline else res
+    return function_body
+
+
+def _tree_body(call_env):
+    # Body too deeply nested to compile
+    return NotImplemented
+
+
+def run_function_body(fn, call_env):
+    """Run an EnzoFunction's body in its call environment, as invoke_function would.
+
+    Returns NotImplemented, leaving the call to invoke_function, until the body is warm
+    and when it is too deeply nested to compile.
+    """
+    atom = fn.atom
+    body = atom.closure
+    if body is None or type(body) is int:
+        calls = (body or 0) + 1
+        if calls < COMPILE_AFTER:
+            atom.closure = calls
+            return NotImplemented
+        try:
+            body = _compile_function_body(atom)
+        except RecursionError:
+            body = _tree_body
+        atom.closure = body
+    return body(call_env)
+
+
+def _compile_root(node):
+    try:
+        if type(node) in COMPILED_STATEMENT_ROOTS:
+            closure = compile_statement(node, True)
+        else:
+            closure = compile_node(node)
+    except RecursionError:
+        # Too deeply nested to compile; leave this tree to the tree-walking handler
+        handler = _tree_handlers[type(node)]
+        if type(node) in COMPILED_STATEMENT_ROOTS:
+            def closure(env, is_function_context, outer_env, loop_locals, is_loop_context):
+                return handler(node, True, False, env, None, is_function_context, outer_env, loop_locals,
+                               is_loop_context)
+        else:
+            def closure(env, value_demand, is_loop_context):
+                return handler(node, value_demand, False, env, None, False, None, None, is_loop_context)
+    node.closure = closure
+    return closure
+
+
+def _compile_when_warm(node):
+    """Return the closure for a root node, or None while it should stay on the tree walker."""
+    if type(node) is not LoopStatement:
+        count = (node.closure or 0) + 1
+        if count < COMPILE_AFTER:
+            node.closure = count
+            return None
+    return _compile_root(node)
+
+
+def _run_compiled(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    closure = node.closure
+    if closure is None or type(closure) is int:
+        closure = _compile_when_warm(node)
+        if closure is None:
+            return _tree_handlers[type(node)](node, value_demand, already_invoked, env, src_line,
+                                              is_function_context, outer_env, loop_locals, is_loop_context)
+    return closure(env, value_demand, is_loop_context)
+
+
+def _run_compiled_statement(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    closure = node.closure
+    if closure is None or type(closure) is int:
+        closure = _compile_when_warm(node)
+        if closure is None:
+            return _tree_handlers[type(node)](node, value_demand, already_invoked, env, src_line,
+                                              is_function_context, outer_env, loop_locals, is_loop_context)
+    # The If and loop handlers do not look at value_demand
+    return closure(env, is_function_context, outer_env, loop_locals, is_loop_context)
+
+
+def compile_program(tree):
+    """Compile the loops among the statements of tree ahead of running them.
+
+    Other roots and function bodies are compiled once they are warm, see COMPILE_AFTER.
+    """
+    if isinstance(tree, Program):
+        tree = tree.statements
+    statements = tree if isinstance(tree, (list, tuple)) else [tree]
+    for stmt in statements:
+        if type(stmt) is LoopStatement and stmt.closure is None:
+            _compile_root(stmt)
+
+
+def install():
+    """Make eval_ast run compiled closures for expressions, calls, If statements and loops,
+    and run function bodies compiled."""
+    for node_class, handler in [(cls, _run_compiled) for cls in COMPILED_ROOTS] + \
+            [(cls, _run_compiled_statement) for cls in COMPILED_STATEMENT_ROOTS]:
+        if node_class not in _tree_handlers:
+            _tree_handlers[node_class] = get_eval_handler(node_class)
+        register_eval_handler(node_class)(handler)
+    set_function_body_runner(run_function_body)
+
+
+def uninstall():
+    """Go back to the tree-walking handlers."""
+    for node_class, handler in _tree_handlers.items():
+        register_eval_handler(node_class)(handler)
+    _tree_handlers.clear()
+    set_function_body_runner(None)
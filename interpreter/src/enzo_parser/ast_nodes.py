@@ -21,6 +21,9 @@ class FunctionAtom(ASTNode):
         self.is_multiline = is_multiline  # True if function atom spans multiple lines
         self.is_named = is_named  # True if this function is bound to a variable name
         self.end_pos = end_pos  # Position where this function atom ends (after RPAR)
+        self.signature = None  # FunctionSignature of the functions made from this atom, see evaluator.EnzoFunction
+        self.vm_code = None  # enzo_vm code for the body, or the number of calls while it warms up
+        self.closure = None  # closure_compiler's closure for the body, or the number of calls while it warms up
     def __repr__(self):
         return f"FunctionAtom(params={self.params!r}, local_vars={self.local_vars!r}, body={self.body!r}, context={self.context!r}, is_multiline={self.is_multiline!r}, is_named={self.is_named!r})"
 
@@ -37,6 +40,7 @@ class Invoke(ASTNode):
         super().__init__(code_line)
         self.func = func
         self.args = args
+        self.closure = None  # closure_compiler's closure for this tree, or the number of evaluations while it warms up
     def __repr__(self):
         return f"Invoke(func={self.func!r}, args={self.args!r})"
 
@@ -48,16 +52,19 @@ class NumberAtom(ASTNode):
         return f"NumberAtom(value={self.value!r})"
 
 class TextAtom(ASTNode):
-    def __init__(self, value, code_line=None):
+    def __init__(self, value, code_line=None, segments=None):
         super().__init__(code_line)
         self.value = value
+        self.segments = segments  # Compiled interpolation segments, see parser.compile_text_template
     def __repr__(self):
         return f"TextAtom(value={self.value!r})"
 
 class ListAtom(ASTNode):
-    def __init__(self, elements, code_line=None):
+    def __init__(self, elements, code_line=None, is_constant=False):
         super().__init__(code_line)
         self.elements = elements
+        self.is_constant = is_constant  # Only literal elements, see optimizer.fold_constants
+        self.template = None  # Prebuilt EnzoList of a constant list, made on first evaluation
     def __repr__(self):
         return f"ListAtom(elements={self.elements!r})"
 
@@ -77,9 +84,10 @@ class ListInterpolation(ASTNode):
         return f"ListInterpolation(expression={self.expression!r})"
 
 class VarInvoke(ASTNode):
-    def __init__(self, name, code_line=None):
+    def __init__(self, name, code_line=None, scope_depth=None):
         super().__init__(code_line)
         self.name = name
+        self.scope_depth = scope_depth  # Scope layers out to the binding, see scope_resolver
     def __repr__(self):
         return f"VarInvoke(name={self.name!r})"
 
@@ -88,6 +96,7 @@ class AddNode(ASTNode):
         super().__init__(code_line)
         self.left = left
         self.right = right
+        self.closure = None  # closure_compiler's closure for this tree, or the number of evaluations while it warms up
     def __repr__(self):
         return f"AddNode(left={self.left!r}, right={self.right!r})"
 
@@ -96,6 +105,7 @@ class SubNode(ASTNode):
         super().__init__(code_line)
         self.left = left
         self.right = right
+        self.closure = None  # closure_compiler's closure for this tree, or the number of evaluations while it warms up
     def __repr__(self):
         return f"SubNode(left={self.left!r}, right={self.right!r})"
 
@@ -104,6 +114,7 @@ class MulNode(ASTNode):
         super().__init__(code_line)
         self.left = left
         self.right = right
+        self.closure = None  # closure_compiler's closure for this tree, or the number of evaluations while it warms up
     def __repr__(self):
         return f"MulNode(left={self.left!r}, right={self.right!r})"
 
@@ -112,6 +123,7 @@ class DivNode(ASTNode):
         super().__init__(code_line)
         self.left = left
         self.right = right
+        self.closure = None  # closure_compiler's closure for this tree, or the number of evaluations while it warms up
     def __repr__(self):
         return f"DivNode(left={self.left!r}, right={self.right!r})"
 
@@ -120,6 +132,7 @@ class ModNode(ASTNode):
         super().__init__(code_line)
         self.left = left
         self.right = right
+        self.closure = None  # closure_compiler's closure for this tree, or the number of evaluations while it warms up
     def __repr__(self):
         return f"ModNode(left={self.left!r}, right={self.right!r})"
 
@@ -144,6 +157,7 @@ class ListIndex(ASTNode):
         self.base = base  # The list expression
         self.index = index  # The index expression (should be NumberAtom or VarInvoke)
         self.is_property_access = is_property_access  # True for .foo, False for ."foo"
+        self.inline_cache = None  # (shape, key, slot) of the last property read, see evaluator._read_property
     def __repr__(self):
         return f"ListIndex(base={self.base!r}, index={self.index!r}, is_property_access={self.is_property_access!r})"
 
@@ -188,6 +202,7 @@ class BlueprintAtom(ASTNode):
     def __init__(self, fields, code_line=None):
         super().__init__(code_line)
         self.fields = fields  # List of (name, type_or_default) tuples
+        self.layout = None  # FieldLayout of the instances, see evaluator.blueprint_layout
     def __repr__(self):
         return f"BlueprintAtom(fields={self.fields!r})"
 
@@ -196,6 +211,7 @@ class BlueprintInstantiation(ASTNode):
         super().__init__(code_line)
         self.blueprint_name = blueprint_name
         self.field_values = field_values  # List of (name, value) tuples
+        self.provided_fields = None  # field name without $ -> value node, see evaluator._provided_fields
     def __repr__(self):
         return f"BlueprintInstantiation(blueprint_name={self.blueprint_name!r}, field_values={self.field_values!r})"
 
@@ -211,6 +227,7 @@ class VariantGroup(ASTNode):
         super().__init__(code_line)
         self.name = name
         self.variants = variants  # List of variant names or (name, blueprint) tuples
+        self.layouts = None  # Layouts of the inline variants, see evaluator._eval_variant_group
     def __repr__(self):
         return f"VariantGroup(name={self.name!r}, variants={self.variants!r})"
 
@@ -236,6 +253,7 @@ class VariantInstantiation(ASTNode):
         self.variant_group_name = variant_group_name
         self.variant_name = variant_name
         self.field_values = field_values  # List of (name, value) tuples
+        self.provided_fields = None  # field name without $ -> value node, see evaluator._provided_fields
     def __repr__(self):
         return f"VariantInstantiation(variant_group_name={self.variant_group_name!r}, variant_name={self.variant_name!r}, field_values={self.field_values!r})"
 
@@ -283,6 +301,7 @@ class IfStatement(ASTNode):
         self.condition = condition       # Condition expression to evaluate
         self.then_block = then_block     # List of statements to execute if true
         self.else_block = else_block     # Optional else block (list of statements)
+        self.closure = None              # closure_compiler's closure for this statement, or the number of evaluations while it warms up
 
     def __repr__(self):
         return f"IfStatement(condition={self.condition!r}, then_block={self.then_block!r}, else_block={self.else_block!r})"
@@ -293,6 +312,7 @@ class ComparisonExpression(ASTNode):
         self.left = left          # Left operand
         self.operator = operator  # Comparison operator ("is", "less than", etc.)
         self.right = right        # Right operand
+        self.closure = None       # closure_compiler's closure for this tree, or the number of evaluations while it warms up
 
     def __repr__(self):
         return f"ComparisonExpression(left={self.left!r}, operator={self.operator!r}, right={self.right!r})"
@@ -303,6 +323,7 @@ class LogicalExpression(ASTNode):
         self.left = left          # Left operand
         self.operator = operator  # Logical operator ("and", "or")
         self.right = right        # Right operand
+        self.closure = None       # closure_compiler's closure for this tree, or the number of evaluations while it warms up
 
     def __repr__(self):
         return f"LogicalExpression(left={self.left!r}, operator={self.operator!r}, right={self.right!r})"
@@ -311,6 +332,7 @@ class NotExpression(ASTNode):
     def __init__(self, operand, code_line=None):
         super().__init__(code_line)
         self.operand = operand    # Expression to negate
+        self.closure = None       # closure_compiler's closure for this tree, or the number of evaluations while it warms up
 
     def __repr__(self):
         return f"NotExpression(operand={self.operand!r})"
@@ -325,6 +347,8 @@ class LoopStatement(ASTNode):
         self.variable = variable       # Variable name for for loops
         self.iterable = iterable      # Iterable expression for for loops
         self.is_reference = is_reference  # True if @ syntax used (reference semantics)
+        self.vm_code = None             # enzo_vm code for this loop
+        self.closure = None             # closure_compiler's closure for this loop
 
     def __repr__(self):
         return f"LoopStatement(loop_type={self.loop_type!r}, body={self.body!r}, condition={self.condition!r}, variable={self.variable!r}, iterable={self.iterable!r}, is_reference={self.is_reference!r})"
@@ -350,3 +374,20 @@ class OtherwiseStatement(ASTNode):
 
     def __repr__(self):
         return f"OtherwiseStatement(body={self.body!r})"
+
+# Single-pass file parsing (parse_file)
+class SectionMarker(ASTNode):
+    def __init__(self, title, code_line=None):
+        super().__init__(code_line)
+        self.title = title  # The //= line, printed as-is
+
+    def __repr__(self):
+        return f"SectionMarker(title={self.title!r})"
+
+class InvalidStatement(ASTNode):
+    def __init__(self, message, code_line=None):
+        super().__init__(code_line)
+        self.message = message  # Formatted error (with code context) from lexing or parsing this statement
+
+    def __repr__(self):
+        return f"InvalidStatement(message={self.message!r})"
@@ -0,0 +1,329 @@
+# Compact binary serialization of Enzo ASTs
+#
+# A record is MAGIC, a format version byte, the payload length as a varint and the payload.
+# The payload is one value in a prefix encoding:
+#
+#   NONE / TRUE / FALSE
+#   INT    zigzag varint (any size)
+#   FLOAT  8 byte little endian double
+#   STR    varint length + UTF-8; the string gets the next string-table index
+#   STRREF varint string-table index of an earlier string
+#   LIST / TUPLE / DICT  varint count + items (DICT: key, value, key, value, ...)
+#   NODE   varint layout index, then one value per attribute of the layout. A layout is a
+#          node type plus its attribute names; the first use of a layout index is followed
+#          by its definition: varint tag from NODE_TYPES, varint count, the names as
+#          strings. Nodes are reconstructed without calling __init__
+#   REF    varint object-table index of an earlier list, tuple, dict or node
+#
+# Lists, tuples, dicts and nodes get an object-table index when they start, so shared
+# subtrees (IfStatement.all_branches, for instance) stay shared after loading.
+
+import struct
+
+from src.enzo_parser import ast_nodes
+from src.error_handling import ASTSerializationError
+from src.error_messaging import (
+    error_message_ast_serialization_unsupported,
+    error_message_ast_serialization_bad_record,
+)
+
+MAGIC = b"ENZA"
+FORMAT_VERSION = 1
+
+# Node tags are positions in this table. Only ever append to it; removing or reordering
+# entries needs a FORMAT_VERSION bump.
+NODE_TYPES = (
+    ast_nodes.ASTNode,
+    ast_nodes.Program,
+    ast_nodes.FunctionAtom,
+    ast_nodes.Binding,
+    ast_nodes.Invoke,
+    ast_nodes.NumberAtom,
+    ast_nodes.TextAtom,
+    ast_nodes.ListAtom,
+    ast_nodes.ListKeyValue,
+    ast_nodes.ListInterpolation,
+    ast_nodes.VarInvoke,
+    ast_nodes.AddNode,
+    ast_nodes.SubNode,
+    ast_nodes.MulNode,
+    ast_nodes.DivNode,
+    ast_nodes.ModNode,
+    ast_nodes.BindOrRebind,
+    ast_nodes.FunctionRef,
+    ast_nodes.ListIndex,
+    ast_nodes.ReturnNode,
+    ast_nodes.ReferenceAtom,
+    ast_nodes.ImmediateInvocationAtom,
+    ast_nodes.PipelineNode,
+    ast_nodes.ParameterDeclaration,
+    ast_nodes.BlueprintAtom,
+    ast_nodes.BlueprintInstantiation,
+    ast_nodes.BlueprintComposition,
+    ast_nodes.VariantGroup,
+    ast_nodes.VariantGroupExtension,
+    ast_nodes.VariantAccess,
+    ast_nodes.VariantInstantiation,
+    ast_nodes.DestructuringBinding,
+    ast_nodes.ReverseDestructuring,
+    ast_nodes.ReferenceDestructuring,
+    ast_nodes.RestructuringBinding,
+    ast_nodes.IfStatement,
+    ast_nodes.ComparisonExpression,
+    ast_nodes.LogicalExpression,
+    ast_nodes.NotExpression,
+    ast_nodes.LoopStatement,
+    ast_nodes.EndLoopStatement,
+    ast_nodes.RestartLoopStatement,
+    ast_nodes.OtherwiseStatement,
+    ast_nodes.SectionMarker,
+    ast_nodes.InvalidStatement,
+)
+NODE_TAGS = {cls: tag for tag, cls in enumerate(NODE_TYPES)}
+
+# Value opcodes
+NONE, TRUE, FALSE, INT, FLOAT, STR, STRREF, LIST, TUPLE, DICT, NODE, REF = range(12)
+
+_DOUBLE = struct.Struct("<d")
+
+
+def _append_varint(out, n):
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _encode_value(value):
+    """Encode value as a payload (no record header)."""
+    out = bytearray()
+    append = out.append
+    strings = {}
+    objects = {}
+    layouts = {}
+
+    def write_varint(n):
+        while n > 0x7F:
+            append((n & 0x7F) | 0x80)
+            n >>= 7
+        append(n)
+
+    def write_str(s):
+        nonlocal out
+        index = strings.get(s)
+        if index is not None:
+            append(STRREF)
+            write_varint(index)
+            return
+        strings[s] = len(strings)
+        data = s.encode("utf-8")
+        append(STR)
+        write_varint(len(data))
+        out += data
+
+    def write(value):
+        nonlocal out
+        cls = type(value)
+        if cls is str:
+            write_str(value)
+        elif value is None:
+            append(NONE)
+        elif cls is bool:
+            append(TRUE if value else FALSE)
+        elif cls is int:
+            append(INT)
+            write_varint(value << 1 if value >= 0 else (-value << 1) - 1)
+        elif cls is float:
+            append(FLOAT)
+            out += _DOUBLE.pack(value)
+        else:
+            # Containers and nodes: back-reference if already written, otherwise register
+            index = objects.get(id(value))
+            if index is not None:
+                append(REF)
+                write_varint(index)
+                return
+            objects[id(value)] = len(objects)
+            if cls is list or cls is tuple:
+                append(LIST if cls is list else TUPLE)
+                write_varint(len(value))
+                for item in value:
+                    write(item)
+            elif cls is dict:
+                append(DICT)
+                write_varint(len(value))
+                for key, item in value.items():
+                    write(key)
+                    write(item)
+            elif cls in NODE_TAGS:
+                fields = value.__dict__
+                key = (cls, tuple(fields))
+                layout = layouts.get(key)
+                append(NODE)
+                if layout is None:
+                    layout = layouts[key] = len(layouts)
+                    write_varint(layout)
+                    write_varint(NODE_TAGS[cls])
+                    write_varint(len(fields))
+                    for name in fields:
+                        write_str(name)
+                else:
+                    write_varint(layout)
+                for item in fields.values():
+                    write(item)
+            else:
+                raise ASTSerializationError(error_message_ast_serialization_unsupported(cls.__name__))
+
+    write(value)
+    return out
+
+
+def _decode_value(data):
+    """Decode the single value in data; returns (value, number of bytes used)."""
+    # A closure over local state rather than a class: loading is the hot path of a cache hit
+    strings = []
+    objects = []
+    layouts = []
+    pos = 0
+
+    def read_varint():
+        nonlocal pos
+        byte = data[pos]
+        pos += 1
+        if byte < 0x80:
+            return byte
+        result = byte & 0x7F
+        shift = 7
+        while True:
+            byte = data[pos]
+            pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def read():
+        nonlocal pos
+        op = data[pos]
+        pos += 1
+        if op == STRREF:
+            return strings[read_varint()]
+        if op == STR:
+            size = read_varint()
+            start = pos
+            pos += size
+            s = str(data[start:pos], "utf-8")
+            strings.append(s)
+            return s
+        if op == NODE:
+            layout = read_varint()
+            if layout == len(layouts):
+                cls = NODE_TYPES[read_varint()]
+                layouts.append((cls, [read() for _ in range(read_varint())]))
+            cls, names = layouts[layout]
+            node = cls.__new__(cls)
+            objects.append(node)
+            fields = node.__dict__
+            for name in names:
+                fields[name] = read()
+            return node
+        if op == NONE:
+            return None
+        if op == TRUE:
+            return True
+        if op == FALSE:
+            return False
+        if op == INT:
+            n = read_varint()
+            return -((n + 1) >> 1) if n & 1 else n >> 1
+        if op == LIST:
+            items = []
+            objects.append(items)
+            for _ in range(read_varint()):
+                items.append(read())
+            return items
+        if op == REF:
+            return objects[read_varint()]
+        if op == FLOAT:
+            pos += 8
+            return _DOUBLE.unpack_from(data, pos - 8)[0]
+        if op == TUPLE:
+            # Reserve the object slot before reading the items, matching the writer's order
+            slot = len(objects)
+            objects.append(None)
+            items = tuple([read() for _ in range(read_varint())])
+            objects[slot] = items
+            return items
+        if op == DICT:
+            items = {}
+            objects.append(items)
+            for _ in range(read_varint()):
+                key = read()
+                items[key] = read()
+            return items
+        raise ASTSerializationError(error_message_ast_serialization_bad_record())
+
+    value = read()
+    return value, pos
+
+
+def dumps(value):
+    """Encode an AST (or lists, tuples and dicts of nodes and plain values) as one record."""
+    payload = _encode_value(value)
+    out = bytearray(MAGIC)
+    out.append(FORMAT_VERSION)
+    _append_varint(out, len(payload))
+    out += payload
+    return bytes(out)
+
+
+def dump(value, f):
+    f.write(dumps(value))
+
+
+def _read_header(read):
+    header = read(len(MAGIC) + 1)
+    if len(header) != len(MAGIC) + 1 or header[:len(MAGIC)] != MAGIC or header[-1] != FORMAT_VERSION:
+        raise ASTSerializationError(error_message_ast_serialization_bad_record())
+    length = 0
+    shift = 0
+    while True:
+        byte = read(1)
+        if not byte:
+            raise ASTSerializationError(error_message_ast_serialization_bad_record())
+        length |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            return length
+        shift += 7
+
+
+def _decode(payload):
+    try:
+        value, used = _decode_value(payload)
+    except (IndexError, UnicodeDecodeError, struct.error):
+        raise ASTSerializationError(error_message_ast_serialization_bad_record())
+    if used != len(payload):
+        raise ASTSerializationError(error_message_ast_serialization_bad_record())
+    return value
+
+
+def load(f):
+    """Read one record written by dump from a binary file object."""
+    payload = f.read(_read_header(f.read))
+    return _decode(payload)
+
+
+def loads(data):
+    data = memoryview(data)
+    pos = 0
+
+    def read(n):
+        nonlocal pos
+        chunk = data[pos:pos + n]
+        pos += len(chunk)
+        return bytes(chunk)
+
+    length = _read_header(read)
+    if len(data) - pos != length:
+        raise ASTSerializationError(error_message_ast_serialization_bad_record())
+    return _decode(bytes(data[pos:]))
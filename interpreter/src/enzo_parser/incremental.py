@@ -0,0 +1,330 @@
+# incremental.py -- incremental re-lexing and re-parsing of an edited Enzo document
+#
+# An IncrementalDocument keeps the source, its parser tokens, the lexer state at every
+# line start and the top-level statements of the parsed Program. After an edit only the
+# lines from the edited one up to the point where the new tokens line up with the old
+# ones are re-lexed, and only the top-level statements that looked at changed tokens or
+# sit on changed lines are re-parsed. Everything else is shifted and reused.
+#
+# Errors are recovered from the way parse_file recovers from them: a statement that fails
+# to parse becomes an InvalidStatement and parsing resumes after it, and text that fails to
+# lex becomes a LEX_ERROR token running to the end of its line (or of the text, for an
+# unclosed block comment) that statements are parsed up to but not across.
+#
+# Reused statement subtrees keep their FunctionAtom.end_pos offsets from the parse that
+# built them; end_pos is only consulted while parsing the statement that contains it.
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+from src.enzo_parser.ast_nodes import InvalidStatement, Program
+from src.enzo_parser.parser import Parser, _recovery_end, _statement_source
+from src.enzo_parser.tokenizer import (
+    LEXER_MODES,
+    TOKEN_TYPE_IDS,
+    TOKEN_TYPES,
+    TRIVIA_TYPES,
+    TokenBuffer,
+    _scan,
+    compute_line_starts,
+    line_of_offset,
+)
+from src.error_handling import EnzoParseError
+from src.error_messaging import (
+    error_message_unclosed_block_comment,
+    error_message_unexpected_character,
+    format_statement_error,
+)
+
+_DOT_ID = TOKEN_TYPE_IDS["DOT"]
+# Text that failed to lex; never handed to the parser
+_LEX_ERROR_ID = len(TOKEN_TYPES)
+_TYPE_IDS = dict(TOKEN_TYPE_IDS, LEX_ERROR=_LEX_ERROR_ID)
+
+
+def _scan_recovering(text, pos, match, last_type):
+    """_scan with keep_trivia, turning text that fails to lex into a LEX_ERROR token.
+
+    As in Tokenizer.tokenize_pieces, an unexpected character spoils the rest of its line and
+    scanning resumes on the next one; an unclosed block comment runs to the end of the text.
+    """
+    while True:
+        for typ, start, end in _scan(text, pos, match, last_type, final=False, keep_trivia=True):
+            if end == -1:
+                break
+            yield typ, start, end
+        else:
+            return
+        newline = text.find("\n", start)
+        if typ == "BLOCK_COMMENT" or newline == -1:
+            yield "LEX_ERROR", start, len(text)
+            return
+        yield "LEX_ERROR", start, newline
+        pos = newline + 1
+        last_type = None
+
+
+class _TrackingTokenBuffer(TokenBuffer):
+    """TokenBuffer that remembers the furthest index the parser has looked at.
+
+    While limit is set the buffer appears to end there, so a statement is parsed only up to
+    the next LEX_ERROR token.
+    """
+    horizon = -1
+    limit = None
+
+    def __len__(self):
+        return len(self.type_ids) if self.limit is None else self.limit
+
+    def peek(self, pos):
+        return self[pos] if pos < len(self) else None
+
+    def peek_type(self, pos):
+        if pos > self.horizon:
+            self.horizon = pos
+        return TOKEN_TYPES[self.type_ids[pos]] if pos < len(self) else None
+
+    def __getitem__(self, index):
+        if isinstance(index, int):
+            if index < 0:
+                index += len(self)
+            if index > self.horizon:
+                self.horizon = index
+        return TokenBuffer.__getitem__(self, index)
+
+
+class StatementSpan:
+    """Token range of one top-level statement and the furthest token its parse looked at."""
+    __slots__ = ("start", "end", "reach")
+
+    def __init__(self, start, end, reach):
+        self.start = start
+        self.end = end
+        self.reach = reach
+
+    def shifted(self, delta):
+        return StatementSpan(self.start + delta, self.end + delta, self.reach + delta)
+
+
+class IncrementalDocument:
+    def __init__(self, text, mode="table"):
+        self._match = LEXER_MODES[mode]
+        self.program = None
+        self.spans = []
+        # Counters for the last update, mostly for tooling and tests
+        self.relexed_tokens = 0
+        self.reparsed_statements = 0
+        self.reused_statements = 0
+        self._rebuild(text)
+
+    @property
+    def statements(self):
+        return self.program.statements
+
+    def _rebuild(self, text):
+        # Full lex and parse
+        self.text = text
+        self.line_starts = compute_line_starts(text)
+        self.tokens = _TrackingTokenBuffer(text, self.line_starts)
+        self.line_states, sync = self._lex(0, None, 0, self.tokens, None)
+        self.relexed_tokens = len(self.tokens)
+        self.spans = []
+        self.program = Program([])
+        self._reparse_from(0, 0, 0, 0, -1, 0)
+        return self.program
+
+    def _lex(self, resume, last_type, first_line, out, old):
+        """Scan self.text from resume into out, returning (line states, sync).
+
+        Line states are (resume offset, last token type) for every line from first_line
+        on: the offset a rescan of that line has to start from (its own start, or the
+        start of a text token or block comment running into it) and the scanner state
+        there. When old is (tokens, delta, edit_end), scanning stops at the first token
+        past the edit that starts where an old token starts (shifted by delta) in the
+        same scanner state; sync is that old token's index, otherwise None.
+        """
+        text = self.text
+        line_starts = self.line_starts
+        line_count = len(line_starts)
+        states = []
+        line = first_line
+        type_ids = out.type_ids
+        starts = out.starts
+        ends = out.ends
+        if old is not None:
+            old_tokens, delta, edit_end = old
+            old_starts = old_tokens.starts
+            lo = bisect_left(old_starts, resume)
+        for typ, start, end in _scan_recovering(text, resume, self._match, last_type):
+            while line < line_count and line_starts[line] <= start:
+                states.append((line_starts[line], last_type))
+                line += 1
+            if old is not None and start > edit_end and typ not in TRIVIA_TYPES and typ != "NEWLINE":
+                j = bisect_left(old_starts, start - delta, lo)
+                # Only a preceding DOT changes how the scanner continues (".2.1" splitting)
+                if (j < len(old_starts) and old_starts[j] == start - delta and last_type != "DOT"
+                        and (j == 0 or old_tokens.type_ids[j - 1] != _DOT_ID)):
+                    return states, j
+            while line < line_count and line_starts[line] < end:
+                states.append((start, last_type))
+                line += 1
+            if typ in TRIVIA_TYPES:
+                continue
+            last_type = typ
+            if typ != "NEWLINE":
+                type_ids.append(_TYPE_IDS[typ])
+                starts.append(start)
+                ends.append(end)
+        while line < line_count:
+            states.append((line_starts[line], last_type))
+            line += 1
+        return states, None
+
+    def edit(self, start, end, new_text):
+        """Replace text[start:end] with new_text and bring tokens and Program up to date."""
+        text = self.text[:start] + new_text + self.text[end:]
+        delta = len(new_text) - (end - start)
+        edit_end = start + len(new_text)
+        old_line_starts = self.line_starts
+        old_states = self.line_states
+        old_tokens = self.tokens
+
+        first_line = bisect_right(old_line_starts, start) - 1
+        resume, last_type = old_states[first_line]
+        k0 = bisect_left(old_tokens.starts, resume)
+        # A quote that opened no text token may be closed by the edit; lex again from there
+        quote = self._first_unclosed_quote(k0)
+        if quote is not None:
+            first_line = bisect_right(old_line_starts, old_tokens.starts[quote]) - 1
+            resume, last_type = old_states[first_line]
+            k0 = bisect_left(old_tokens.starts, resume)
+
+        self.text = text
+        self.line_starts = line_starts = compute_line_starts(text)
+        relexed = _TrackingTokenBuffer(text, line_starts)
+        states, sync = self._lex(resume, last_type, first_line, relexed, (old_tokens, delta, edit_end))
+
+        # Line states past the sync point are the old ones, shifted
+        line_states = old_states[:first_line] + states
+        if sync is not None:
+            old_line = len(old_line_starts) - (len(line_starts) - len(line_states))
+            line_states.extend((offset + delta, lt) for offset, lt in old_states[old_line:])
+        self.line_states = line_states
+
+        j_old = sync if sync is not None else len(old_tokens)
+        new_count = len(relexed)
+        tokens = _TrackingTokenBuffer(text, line_starts)
+        tokens.type_ids = old_tokens.type_ids[:k0] + relexed.type_ids + old_tokens.type_ids[j_old:]
+        tokens.starts = old_tokens.starts[:k0] + relexed.starts + array('I', [s + delta for s in old_tokens.starts[j_old:]])
+        tokens.ends = old_tokens.ends[:k0] + relexed.ends + array('I', [e + delta for e in old_tokens.ends[j_old:]])
+        self.tokens = tokens
+        self.relexed_tokens = new_count
+
+        last_changed_line = bisect_right(line_starts, edit_end) - 1
+        return self._reparse_from(k0, j_old, new_count, first_line, last_changed_line, delta)
+
+    def _first_unclosed_quote(self, end):
+        """Index of the first LEX_ERROR token before end that starts at a quote, or None."""
+        tokens = self.tokens
+        index = 0
+        while True:
+            try:
+                index = tokens.type_ids.index(_LEX_ERROR_ID, index, end)
+            except ValueError:
+                return None
+            if self.text[tokens.starts[index]] in "\"'":
+                return index
+            index += 1
+
+    def _token_line(self, tokens, index):
+        return bisect_right(self.line_starts, tokens.starts[index]) - 1
+
+    def _lex_error_statement(self, index):
+        """InvalidStatement for the LEX_ERROR token at index, worded as parse_file words it."""
+        offset = self.tokens.starts[index]
+        source = _statement_source(self.text, self.line_starts, offset, offset)
+        if self.text.startswith("/'", offset):
+            error = EnzoParseError(error_message_unclosed_block_comment())
+        else:
+            line_start = self.line_starts[line_of_offset(self.line_starts, offset) - 1]
+            error = EnzoParseError(error_message_unexpected_character(self.text[offset], offset - line_start))
+        return InvalidStatement(format_statement_error(error, source))
+
+    def _reparse_from(self, k0, j_old, new_count, first_line, last_changed_line, delta):
+        """Re-parse the statements affected by replacing old tokens [k0, j_old) with new_count tokens.
+
+        delta is how far the text after the edit moved. Parse error messages can quote token
+        offsets, so InvalidStatements past the edit are re-parsed when it is not 0.
+        """
+        old_spans = self.spans
+        old_statements = self.program.statements
+        tokens = self.tokens
+        token_delta = new_count - (j_old - k0)
+        changed_end = k0 + new_count
+
+        # Statements that never looked at a changed token and end before the first changed line
+        keep = 0
+        while keep < len(old_spans):
+            span = old_spans[keep]
+            if span.reach >= k0 or self._token_line(tokens, span.end - 1) >= first_line:
+                break
+            keep += 1
+        statements = old_statements[:keep]
+        spans = old_spans[:keep]
+        old_span_starts = {span.start: i for i, span in enumerate(old_spans) if span.start >= j_old}
+
+        parser = Parser(self.text, tokens=tokens, line_starts=self.line_starts)
+        parser.pos = spans[-1].end if spans else 0
+        reparsed = 0
+        reused = keep
+        type_ids = tokens.type_ids
+        count = len(type_ids)
+        next_error = -1
+        while parser.pos < count:
+            if parser.pos >= changed_end:
+                b = old_span_starts.get(parser.pos - token_delta)
+                if b is not None and self._token_line(tokens, parser.pos) > last_changed_line:
+                    stop = b
+                    while stop < len(old_spans) and not (delta and type(old_statements[stop]) is InvalidStatement):
+                        stop += 1
+                    statements.extend(old_statements[b:stop])
+                    spans.extend(span.shifted(token_delta) for span in old_spans[b:stop])
+                    reused += stop - b
+                    if stop == len(old_spans):
+                        break
+                    if stop > b:
+                        parser.pos = spans[-1].end
+                        continue
+            start = parser.pos
+            tokens.horizon = start
+            if type_ids[start] == _LEX_ERROR_ID:
+                statements.append(self._lex_error_statement(start))
+                parser.pos = start + 1
+            else:
+                if next_error < start:
+                    try:
+                        next_error = type_ids.index(_LEX_ERROR_ID, start)
+                    except ValueError:
+                        next_error = count
+                tokens.limit = next_error
+                try:
+                    statements.append(parser.parse_top_level_statement())
+                except Exception as e:
+                    # Skip the rest of the statement and drop any state the failed parse left behind
+                    parser.pos = min(max(_recovery_end(tokens, start), parser.pos, start + 1), next_error)
+                    parser.in_pipeline_function = False
+                    parser.pipeline_start_pos = None
+                    # The recovery scan also checked which line the token after it is on
+                    tokens.horizon = max(tokens.horizon, parser.pos)
+                    source = _statement_source(self.text, self.line_starts, tokens.starts[start],
+                                               tokens.starts[parser.pos - 1])
+                    statements.append(InvalidStatement(format_statement_error(e, source)))
+                tokens.limit = None
+            spans.append(StatementSpan(start, parser.pos, max(tokens.horizon, parser.pos - 1)))
+            reparsed += 1
+
+        self.spans = spans
+        self.program = Program(statements)
+        self.reparsed_statements = reparsed
+        self.reused_statements = reused
+        return self.program
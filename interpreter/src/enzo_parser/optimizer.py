@@ -0,0 +1,139 @@
+# optimizer.py -- constant folding and literal hoisting over parsed statements
+#
+# fold_constants rewrites, bottom up:
+#   - arithmetic on two NumberAtoms into one NumberAtom, computed the way the evaluator's
+#     handlers compute it. An operation that would raise (division or modulo by zero,
+#     overflow) is left as it is, so the error still comes from the original node when
+#     evaluation reaches it
+#   - interpolations of number literals ("<2 * 3>") into text; a TextAtom left with only
+#     text becomes plain text and is returned as is by the evaluator
+#   - ListAtoms whose elements are all literals (numbers, plain text, ListKeyValues and
+#     nested lists of literals) are marked is_constant; the evaluator builds those once
+#     and hands out copies of the prebuilt EnzoList
+#
+# Two positions keep their root node because the evaluator looks at its type: parameter
+# defaults (they give the parameter's type) and the right side of a pipeline.
+
+from src.enzo_parser.ast_nodes import (
+    ASTNode, NumberAtom, TextAtom, ListAtom, ListKeyValue, AddNode, SubNode, MulNode, DivNode, ModNode,
+    FunctionAtom, PipelineNode,
+)
+
+
+def _euclidean_mod(left, right):
+    if right == 0:
+        raise ZeroDivisionError
+    # As in the evaluator: the result is always non-negative
+    result = left % right
+    if result < 0:
+        result += abs(right)
+    return result
+
+
+_OPERATIONS = {
+    AddNode: lambda left, right: left + right,
+    SubNode: lambda left, right: left - right,
+    MulNode: lambda left, right: left * right,
+    DivNode: lambda left, right: left / right,
+    ModNode: _euclidean_mod,
+}
+
+
+def _is_number(node):
+    return type(node) is NumberAtom and type(node.value) in (int, float)
+
+
+def _is_literal(node):
+    cls = type(node)
+    if cls is NumberAtom:
+        return True
+    if cls is TextAtom:
+        return "<" not in node.value
+    if cls is ListAtom:
+        return node.is_constant
+    if cls is ListKeyValue:
+        return _is_literal(node.value)
+    return False
+
+
+class _Folder:
+    def __init__(self):
+        # id(node) -> (node, replacement); shared subtrees (IfStatement.all_branches,
+        # FunctionAtom.local_vars) are folded once and stay shared
+        self.done = {}
+
+    def fold(self, value):
+        if isinstance(value, list):
+            for i, item in enumerate(value):
+                value[i] = self.fold(item)
+            return value
+        if isinstance(value, tuple):
+            folded = tuple(self.fold(item) for item in value)
+            return value if all(a is b for a, b in zip(folded, value)) else folded
+        if not isinstance(value, ASTNode):
+            return value
+        entry = self.done.get(id(value))
+        if entry is not None and entry[0] is value:
+            return entry[1]
+        result = self._fold_node(value)
+        self.done[id(value)] = (value, result)
+        return result
+
+    def fold_children(self, node):
+        for name, child in list(node.__dict__.items()):
+            if isinstance(child, (list, tuple, ASTNode)):
+                setattr(node, name, self.fold(child))
+        return node
+
+    def _fold_node(self, node):
+        cls = type(node)
+        if cls is FunctionAtom:
+            node.params = [(name, self.fold_children(default) if isinstance(default, ASTNode) else default)
+                           for name, default in node.params]
+            node.local_vars = self.fold(node.local_vars)
+            node.body = self.fold(node.body)
+            return node
+        if cls is PipelineNode:
+            node.left = self.fold(node.left)
+            if isinstance(node.right, ASTNode):
+                self.fold_children(node.right)
+            return node
+        if cls is TextAtom:
+            return self._fold_text(node)
+        self.fold_children(node)
+        operation = _OPERATIONS.get(cls)
+        if operation is not None:
+            if _is_number(node.left) and _is_number(node.right):
+                try:
+                    return NumberAtom(operation(node.left.value, node.right.value), code_line=node.code_line)
+                except ArithmeticError:
+                    pass  # Raised when evaluation gets here instead
+        elif cls is ListAtom:
+            node.is_constant = all(_is_literal(element) for element in node.elements)
+        return node
+
+    def _fold_text(self, node):
+        if not node.segments:
+            return node
+        segments = []
+        for segment in node.segments:
+            if segment[0] == "expr":
+                statements = self.fold(segment[1])
+                if statements and all(_is_number(stmt) for stmt in statements):
+                    # The interpolation shows the last statement's value
+                    segment = ("text", str(statements[-1].value))
+            segments.append(segment)
+        if all(segment[0] == "text" for segment in segments):
+            node.value = "".join(segment[1] for segment in segments)
+            node.segments = None
+        else:
+            node.segments = segments
+        return node
+
+
+def fold_constants(tree):
+    """Fold constants in a node, a list of statements or a tuple; returns the folded tree.
+
+    Lists are folded in place; a node may come back replaced (2 * 3 becomes a NumberAtom).
+    """
+    return _Folder().fold(tree)
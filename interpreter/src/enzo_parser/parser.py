@@ -1,7 +1,7 @@
 # Main parser entry point for Enzo
 
 from src.enzo_parser.ast_nodes import *
-from src.enzo_parser.tokenizer import Tokenizer
+from src.enzo_parser.tokenizer import Tokenizer, line_of_offset
 from src.error_handling import EnzoParseError
 from src.error_messaging import (
     error_message_expected_type,
@@ -18,22 +18,60 @@ from src.enzo_parser.parser_function import parse_function_atom
 from src.enzo_parser.parser_list import parse_list_atom
 
 class Parser:
-    def __init__(self, src):
+    def __init__(self, src, tokens=None, line_starts=None):
         self.src = src
-        self.src_lines = src.splitlines()
-        self.tokens = Tokenizer(src).tokenize()
-        self.tokens = [t for t in self.tokens if t.type not in ("NEWLINE", "COMMENT", "SKIP")]
+        # Lines are split on '\n' only, so line numbers agree with the tokenizer's line starts
+        self.src_lines = src.split('\n')
+        if tokens is None:
+            tokenizer = Tokenizer(src)
+            tokens = tokenizer.tokenize_buffer(skip=("NEWLINE", "COMMENT", "SKIP"))
+            line_starts = tokenizer.line_starts
+        self.tokens = tokens  # a TokenBuffer, possibly supplied pre-lexed (see incremental.py)
+        self.line_starts = line_starts if line_starts is not None else tokens.line_starts
+        self._code_lines = {}  # line number -> stripped source text
         self.pos = 0
         self.in_pipeline_function = False  # Track if we're parsing inside a pipeline function atom
         self.pipeline_start_pos = None  # Track the start position of the current pipeline statement
+        # Memo of KEYNAME-run scans, token index -> index of the first token after the run
+        self._keyname_runs = {}
+        self.memo_hits = 0
+        self.memo_misses = 0
+
+    def _keyname_run_end(self, pos):
+        """Index of the first non-KEYNAME token at or after pos."""
+        end = self._keyname_runs.get(pos)
+        if end is not None:
+            self.memo_hits += 1
+            # Peek the token again so buffers that track lookahead (incremental.py) see it
+            self.tokens.peek_type(end)
+            return end
+        self.memo_misses += 1
+        end = pos
+        while self.tokens.peek_type(end) == "KEYNAME":
+            end += 1
+        # Every position in the run ends at the same token, so a run is only ever scanned once
+        for i in range(pos, end + 1):
+            self._keyname_runs[i] = end
+        return end
+
+    def _looks_like_comparison(self):
+        # A run of KEYNAMEs followed by a comparison word, like "$count is 2"
+        return self.tokens.peek_type(self._keyname_run_end(self.pos)) in ("CONTAINS", "IS", "LESS", "GREATER", "AT_WORD")
 
     def _get_code_line(self, token):
-        return get_code_line(self.src_lines, token, self.src)
+        line = getattr(token, 'line', None)
+        if line is None:
+            return get_code_line(self.src_lines, token, self.src, self.line_starts)
+        code_line = self._code_lines.get(line)
+        if code_line is None:
+            code_line = self._code_lines[line] = get_code_line(self.src_lines, token, self.src, self.line_starts)
+        return code_line
 
     def peek(self, offset=0):
-        if self.pos + offset < len(self.tokens):
-            return self.tokens[self.pos + offset]
-        return None
+        return self.tokens.peek(self.pos + offset)
+
+    def peek_type(self, offset=0):
+        return self.tokens.peek_type(self.pos + offset)
 
     def advance(self):
         token, self.pos = advance(self.tokens, self.pos)
@@ -57,13 +95,13 @@ class Parser:
         fields = []
         field_name_token = None  # Initialize to None for empty blueprints
 
-        while self.peek() and self.peek().type != "BLUEPRINT_END":
+        while self.peek_type() not in (None, "BLUEPRINT_END"):
             # Skip newlines
-            while self.peek() and self.peek().type == "NEWLINE":
+            while self.peek_type() == "NEWLINE":
                 self.advance()
 
             # Check if we've reached the end after skipping newlines
-            if not self.peek() or self.peek().type == "BLUEPRINT_END":
+            if self.peek_type() in (None, "BLUEPRINT_END"):
                 break
 
             # Parse field: Type or field: default_value
@@ -75,7 +113,7 @@ class Parser:
             fields.append((field_name, field_type_or_default))
 
             # Skip comma if present
-            if self.peek() and self.peek().type == "COMMA":
+            if self.peek_type() == "COMMA":
                 self.advance()
 
         self.expect("BLUEPRINT_END")  # ]>
@@ -87,16 +125,18 @@ class Parser:
         start_token = self.expect("LBRACK")  # [
 
         field_values = []
-        while self.peek() and self.peek().type != "RBRACK":
-            if self.peek().type == "KEYNAME":
+        while self.peek_type() not in (None, "RBRACK"):
+            if self.peek_type() == "KEYNAME":
                 field_name_token = self.advance()
                 field_name = field_name_token.value
                 self.expect("BIND")  # :
                 field_value = self.parse_value_expression()
                 field_values.append((field_name, field_value))
 
-            if self.peek() and self.peek().type == "COMMA":
+            if self.peek_type() == "COMMA":
                 self.advance()
+            elif self.peek_type() != "KEYNAME":
+                break  # not a field; expect() below reports it
 
         self.expect("RBRACK")  # ]
 
@@ -106,14 +146,14 @@ class Parser:
         """Parse A and B and C syntax, including inline blueprints"""
         blueprints = [first_blueprint]
 
-        while self.peek() and self.peek().type == "AND":
+        while self.peek_type() == "AND":
             self.advance()  # consume AND
 
             # Check if next element is an inline blueprint definition
-            if self.peek() and self.peek().type == "BLUEPRINT_START":
+            if self.peek_type() == "BLUEPRINT_START":
                 inline_blueprint = self.parse_blueprint_definition()
                 blueprints.append(inline_blueprint)
-            elif self.peek() and self.peek().type == "KEYNAME":
+            elif self.peek_type() == "KEYNAME":
                 next_blueprint_token = self.advance()
                 blueprints.append(next_blueprint_token.value)
             else:
@@ -128,10 +168,10 @@ class Parser:
 
         # Check if this is extension (include) or declaration (:)
         is_extension = False
-        if self.peek() and self.peek().type == "INCLUDE":
+        if self.peek_type() == "INCLUDE":
             is_extension = True
             self.advance()  # consume include
-        elif self.peek() and self.peek().type == "BIND":
+        elif self.peek_type() == "BIND":
             is_extension = False
             self.advance()  # consume :
         else:
@@ -147,11 +187,11 @@ class Parser:
         # Parse additional variants with optional comma and "or"/"and"
         while True:
             # Skip optional comma
-            if self.peek() and self.peek().type == "COMMA":
+            if self.peek_type() == "COMMA":
                 self.advance()
 
             # Check for "or" or "and" keyword
-            if self.peek() and self.peek().type in ("OR", "AND"):
+            if self.peek_type() in ("OR", "AND"):
                 self.advance()  # consume OR/AND
                 variant = self.parse_single_variant()
                 variants.append(variant)
@@ -167,13 +207,13 @@ class Parser:
 
     def parse_single_variant(self):
         """Parse a single variant which can be just a name or Name: <[...]>"""
-        if self.peek() and self.peek().type == "KEYNAME":
+        if self.peek_type() == "KEYNAME":
             variant_name = self.advance().value
 
             # Check if this variant has an inline blueprint definition
-            if self.peek() and self.peek().type == "BIND":
+            if self.peek_type() == "BIND":
                 self.advance()  # consume ":"
-                if self.peek() and self.peek().type == "BLUEPRINT_START":
+                if self.peek_type() == "BLUEPRINT_START":
                     blueprint_def = self.parse_blueprint_definition()
                     return (variant_name, blueprint_def)
                 else:
@@ -241,10 +281,7 @@ class Parser:
                 # Check if there's a semicolon between base expression and current token
                 if hasattr(base, 'end_pos') and base.end_pos is not None:
                     # Look for semicolons between base.end_pos and t.start
-                    semicolon_between = any(
-                        token.type == "SEMICOLON" and base.end_pos <= token.start < t.start
-                        for token in self.tokens
-                    )
+                    semicolon_between = self.tokens.has_type_between("SEMICOLON", base.end_pos, t.start)
                     if semicolon_between:
                         # There's a semicolon separating this, so don't treat as function call
                         break
@@ -255,14 +292,14 @@ class Parser:
                 code_line = self._get_code_line(t)
 
                 # Parse arguments
-                while self.peek() and self.peek().type != "RPAR":
+                while self.peek_type() not in (None, "RPAR"):
                     args.append(self.parse_value_expression())
-                    if self.peek() and self.peek().type == "COMMA":
+                    if self.peek_type() == "COMMA":
                         self.advance()  # consume comma
-                    elif self.peek() and self.peek().type != "RPAR":
+                    elif self.peek_type() not in (None, "RPAR"):
                         raise EnzoParseError("Expected ',' or ')' in function invocation", code_line=code_line)
 
-                if not self.peek() or self.peek().type != "RPAR":
+                if self.peek_type() != "RPAR":
                     raise EnzoParseError("Expected ')' to close function invocation", code_line=code_line)
                 self.advance()  # consume RPAR
 
@@ -283,8 +320,8 @@ class Parser:
                     field_values = []
 
                     # Parse field assignments
-                    while self.peek() and self.peek().type != "RBRACK":
-                        if self.peek().type == "KEYNAME":
+                    while self.peek_type() not in (None, "RBRACK"):
+                        if self.peek_type() == "KEYNAME":
                             field_name = self.advance().value
                             self.expect("BIND")  # :
                             field_value = self.parse_value_expression()
@@ -293,9 +330,9 @@ class Parser:
                             # Skip non-field elements for now
                             self.parse_value_expression()
 
-                        if self.peek() and self.peek().type == "COMMA":
+                        if self.peek_type() == "COMMA":
                             self.advance()  # consume comma
-                        elif self.peek() and self.peek().type != "RBRACK":
+                        elif self.peek_type() not in (None, "RBRACK"):
                             break
 
                     self.expect("RBRACK")
@@ -329,12 +366,15 @@ class Parser:
             else:
                 node = NumberAtom(int(val), code_line=code_line)
         elif t.type == "TEXT_TOKEN":
-            node = TextAtom(self.advance().value[1:-1], code_line=code_line)
+            text = self.advance().value[1:-1]
+            # Interpolated text is split into literal and expression segments once, here
+            segments = compile_text_template(text) if "<" in text else None
+            node = TextAtom(text, code_line=code_line, segments=segments)
         elif t.type == "KEYNAME":
             node = VarInvoke(self.advance().value, code_line=code_line)
         elif t.type == "THIS":
             # Check if this is an illegal binding: $this: ...
-            if self.peek(1) and self.peek(1).type == "BIND":
+            if self.peek_type(1) == "BIND":
                 from src.error_messaging import error_message_cannot_declare_this
                 # Construct the error line manually since we know the pattern
                 code_line = "$this: 7;"  # This matches the expected golden file output
@@ -343,7 +383,7 @@ class Parser:
         elif t.type == "AT":
             self.advance()
             # Check if this is @(...) for anonymous function reference
-            if self.peek() and self.peek().type == "LPAR":
+            if self.peek_type() == "LPAR":
                 # Parse the function atom after @
                 function_atom = self.parse_function_atom()
                 # Mark it as an explicit function reference
@@ -356,7 +396,7 @@ class Parser:
         elif t.type == "BANG":
             self.advance()
             # Check if this is !(...)  for immediate invocation
-            if self.peek() and self.peek().type == "LPAR":
+            if self.peek_type() == "LPAR":
                 # Parse the function atom after !
                 function_atom = self.parse_function_atom()
                 from src.enzo_parser.ast_nodes import ImmediateInvocationAtom
@@ -369,7 +409,7 @@ class Parser:
             # ALL parentheses create function atoms according to the language spec
             node = self.parse_function_atom()
             # Only consume trailing semicolons, NOT commas (commas belong to parent context)
-            while self.peek() and self.peek().type == "SEMICOLON":
+            while self.peek_type() == "SEMICOLON":
                 self.advance()
         elif t.type == "LBRACK":
             node = self.parse_list_atom()
@@ -400,7 +440,7 @@ class Parser:
     def parse_factor(self):
         node = self.parse_atom()
         node = self.parse_postfix(node)
-        while self.peek() and self.peek().type in ("STAR", "SLASH", "MODULO"):
+        while self.peek_type() in ("STAR", "SLASH", "MODULO"):
             op = self.advance()
             right = self.parse_atom()
             right = self.parse_postfix(right)
@@ -414,7 +454,7 @@ class Parser:
 
     def parse_term(self):
         node = self.parse_factor()
-        while self.peek() and self.peek().type in ("PLUS", "MINUS"):
+        while self.peek_type() in ("PLUS", "MINUS"):
             op = self.advance()
             right = self.parse_factor()
             if op.type == "PLUS":
@@ -437,16 +477,12 @@ class Parser:
             if self.peek():
                 # Find the start of the line containing this token
                 token = self.peek()
-                line_start = self.src.rfind('\n', 0, token.start)
-                if line_start == -1:
-                    self.pipeline_start_pos = 0  # Beginning of file
-                else:
-                    self.pipeline_start_pos = line_start + 1  # After the newline
+                self.pipeline_start_pos = self.line_starts[token.line - 1]
             else:
                 self.pipeline_start_pos = 0
 
         node = self.parse_pipeline_expression()
-        while self.peek() and self.peek().type == "THEN":
+        while self.peek_type() == "THEN":
             self.advance()  # consume THEN
             t = self.peek()
             code_line = self._get_code_line(t) if t else None
@@ -467,10 +503,7 @@ class Parser:
         if self.in_pipeline_function:
             # In pipeline function context, comparison operators should trigger an error
             # We need to peek ahead to see if this looks like a comparison
-            pos = 0
-            while self.peek(pos) and self.peek(pos).type == "KEYNAME":
-                pos += 1
-            if self.peek(pos) and self.peek(pos).type in ("CONTAINS", "IS", "LESS", "GREATER", "AT_WORD"):
+            if self._looks_like_comparison():
                 from src.error_messaging import error_message_comparison_in_pipeline
                 # For this specific test case, provide the exact expected context
                 # This is a targeted fix for the known multi-line pipeline case
@@ -479,15 +512,111 @@ class Parser:
                 raise EnzoParseError(error_message_comparison_in_pipeline(), code_line=multi_line_context)
 
         # Look ahead to see if this is a comparison expression (like "$count is 2")
-        pos = 0
-        while self.peek(pos) and self.peek(pos).type == "KEYNAME":
-            pos += 1
-        if self.peek(pos) and self.peek(pos).type in ("CONTAINS", "IS", "LESS", "GREATER", "AT_WORD"):
+        if self._looks_like_comparison():
             # This looks like a comparison expression, parse it as such
             return self.parse_comparison()
 
         return self.parse_pipeline()
 
+    def _scan_complex_bracket_destructuring(self, start):
+        """Lookahead for [$var1, $var2 -> $var3]:> $target[] at start."""
+        # Check if this looks like complex bracket destructuring
+        pos = 1
+        found_keyname = False
+        found_arrow_or_comma = False
+        found_rbrack = False
+        found_rebind_rightward = False
+        has_interpolation = False  # Track if we see list interpolation syntax
+        has_list_indexing = False  # Track if we see list indexing syntax
+
+        while self.tokens.peek_type(start + pos) and pos < 30:  # Reasonable lookahead limit
+            token_type = self.tokens.peek_type(start + pos)
+
+            # Check for list interpolation: <$var>
+            if token_type == "LT" and self.tokens.peek_type(start + pos + 1) == "KEYNAME":
+                has_interpolation = True
+                pos += 2  # Skip over the interpolation
+                continue
+            # Check for list indexing: $var.2 or $var.property
+            elif (token_type == "KEYNAME" and
+                  self.tokens.peek_type(start + pos + 1) == "DOT"):
+                has_list_indexing = True
+                # Skip ahead to after the dot expression
+                pos += 2
+                while self.tokens.peek_type(start + pos) in ("NUMBER", "KEYNAME"):
+                    pos += 1
+                continue
+            elif token_type == "KEYNAME" and not found_keyname and not has_interpolation and not has_list_indexing:
+                # Only consider it a destructuring keyname if we haven't seen interpolation or indexing
+                found_keyname = True
+            elif token_type in ["COMMA", "ARROW"] and found_keyname:
+                found_arrow_or_comma = True
+            elif token_type == "RBRACK" and found_arrow_or_comma:
+                found_rbrack = True
+            elif token_type == "REBIND_RIGHTWARD" and found_rbrack:
+                found_rebind_rightward = True
+                break
+            elif token_type in ["SEMICOLON", "NEWLINE", "RBRACE"]:
+                break  # End of statement
+            pos += 1
+
+        # Only treat as complex bracket destructuring if we found the pattern AND no interpolation or indexing
+        return found_rebind_rightward and not has_interpolation and not has_list_indexing
+
+    def _scan_destructuring_pattern(self, start):
+        """Look ahead to determine if this is a destructuring pattern."""
+        pos = 1
+        found_comma = False
+        bracket_depth = 0
+
+        # First check if this is just a simple binding: $var: value
+        # If the next token is directly BIND, this is NOT destructuring
+        if self.tokens.peek_type(start + 1) == "BIND":
+            return False
+
+        # Scan ahead looking for comma followed by eventual colon or arrow
+        # But only count commas that are outside of brackets (not inside blueprint instantiations)
+        while self.tokens.peek_type(start + pos) and pos < 20:  # Reasonable lookahead limit
+            token_type = self.tokens.peek_type(start + pos)
+            if token_type == "LBRACK":
+                bracket_depth += 1
+            elif token_type == "RBRACK":
+                bracket_depth -= 1
+            elif token_type == "COMMA" and bracket_depth == 0:
+                # Only count commas that are not inside brackets
+                found_comma = True
+            elif token_type == "BIND" and found_comma:
+                return True  # Found comma followed by colon
+            elif token_type == "ARROW" and found_comma:
+                return True  # Found comma followed by arrow (renaming)
+            elif token_type == "VARIANTS":
+                # If we encounter 'variants' keyword, this is NOT destructuring
+                return False
+            elif token_type in ["ADD", "SUBTRACT", "STAR", "DIVIDE", "MODULO", "POWER",
+                              "EQUAL", "NOT_EQUAL", "LESS_THAN", "GREATER_THAN",
+                              "LESS_EQUAL", "GREATER_EQUAL", "AND", "OR"]:
+                # If we find mathematical or logical operators, this is an expression, not destructuring
+                return False
+            elif token_type in ["SEMICOLON", "NEWLINE", "RBRACE"]:
+                break  # End of statement
+            pos += 1
+        return False
+
+    def _scan_reverse_destructuring(self, start):
+        """Lookahead for :> $var1, $var2 at start."""
+        if self.tokens.peek_type(start + 1) != "KEYNAME":
+            return False
+        # Look further ahead for comma OR arrow to confirm destructuring
+        pos = 2
+        while self.tokens.peek_type(start + pos) and pos < 10:  # Look ahead a reasonable amount
+            token_type = self.tokens.peek_type(start + pos)
+            if token_type in ["COMMA", "ARROW"]:
+                return True
+            elif token_type in ["SEMICOLON", "NEWLINE", "RBRACE"]:
+                break
+            pos += 1
+        return False
+
     def parse_statement(self):
         t = self.peek()
         code_line = self._get_code_line(t) if t else None
@@ -520,13 +649,13 @@ class Parser:
         if t and t.type == "RETURN":
             self.advance()  # consume 'return'
             # Expect opening parenthesis
-            if not self.peek() or self.peek().type != "LPAR":
+            if self.peek_type() != "LPAR":
                 raise EnzoParseError("Expected '(' after 'return'", code_line=code_line)
             self.advance()  # consume '('
             # Parse the expression inside the parentheses
             expr = self.parse_value_expression()
             # Expect closing parenthesis
-            if not self.peek() or self.peek().type != "RPAR":
+            if self.peek_type() != "RPAR":
                 raise EnzoParseError("Expected ')' after return expression", code_line=code_line)
             self.advance()  # consume ')'
             # Always consume a trailing semicolon or comma after return
@@ -555,16 +684,16 @@ class Parser:
         if t and t.type == "PARAM":
             self.advance()  # consume 'param'
             # Expect variable name
-            if not self.peek() or self.peek().type not in ("KEYNAME", "THIS"):
+            if self.peek_type() not in ("KEYNAME", "THIS"):
                 raise EnzoParseError("Expected variable name after 'param'", code_line=code_line)
             var_token = self.advance()
             var_name = var_token.value
             # Expect colon
-            if not self.peek() or self.peek().type != "BIND":
+            if self.peek_type() != "BIND":
                 raise EnzoParseError("Expected ':' after parameter name", code_line=code_line)
             self.advance()  # consume ':'
             # Parse default value expression - handle empty defaults
-            if self.peek() and self.peek().type in ("SEMICOLON", "COMMA", "RPAR"):
+            if self.peek_type() in ("SEMICOLON", "COMMA", "RPAR"):
                 # Empty default value - create a special marker
                 from src.enzo_parser.ast_nodes import ParameterDeclaration
                 return ParameterDeclaration(var_name, None, code_line=code_line)
@@ -575,118 +704,38 @@ class Parser:
 
         # Look ahead for complex bracket destructuring: [$var1, $var2 -> $var3]:> $target[]
         # This must be checked BEFORE KEYNAME destructuring detection
-        if (self.peek() and self.peek().type == "LBRACK"):
-            # Check if this looks like complex bracket destructuring
-            pos = 1
-            found_keyname = False
-            found_arrow_or_comma = False
-            found_rbrack = False
-            found_rebind_rightward = False
-            has_interpolation = False  # Track if we see list interpolation syntax
-            has_list_indexing = False  # Track if we see list indexing syntax
-
-            while self.peek(pos) and pos < 30:  # Reasonable lookahead limit
-                token = self.peek(pos)
-
-                # Check for list interpolation: <$var>
-                if token.type == "LT" and self.peek(pos + 1) and self.peek(pos + 1).type == "KEYNAME":
-                    has_interpolation = True
-                    pos += 2  # Skip over the interpolation
-                    continue
-                # Check for list indexing: $var.2 or $var.property
-                elif (token.type == "KEYNAME" and
-                      self.peek(pos + 1) and self.peek(pos + 1).type == "DOT"):
-                    has_list_indexing = True
-                    # Skip ahead to after the dot expression
-                    pos += 2
-                    while (self.peek(pos) and
-                           self.peek(pos).type in ["NUMBER", "KEYNAME"]):
-                        pos += 1
-                    continue
-                elif token.type == "KEYNAME" and not found_keyname and not has_interpolation and not has_list_indexing:
-                    # Only consider it a destructuring keyname if we haven't seen interpolation or indexing
-                    found_keyname = True
-                elif token.type in ["COMMA", "ARROW"] and found_keyname:
-                    found_arrow_or_comma = True
-                elif token.type == "RBRACK" and found_arrow_or_comma:
-                    found_rbrack = True
-                elif token.type == "REBIND_RIGHTWARD" and found_rbrack:
-                    found_rebind_rightward = True
-                    break
-                elif token.type in ["SEMICOLON", "NEWLINE", "RBRACE"]:
-                    break  # End of statement
-                pos += 1
-
-            # Only treat as complex bracket destructuring if we found the pattern AND no interpolation or indexing
-            if found_rebind_rightward and not has_interpolation and not has_list_indexing:
-                return self.parse_complex_bracket_destructuring()        # --- Handle destructuring: $var1, $var2: source[] or $var1, $var2 -> $new: source[] ---
+        if (self.peek_type() == "LBRACK"):
+            if self._scan_complex_bracket_destructuring(self.pos):
+                return self.parse_complex_bracket_destructuring()
+        # --- Handle destructuring: $var1, $var2: source[] or $var1, $var2 -> $new: source[] ---
         if t and t.type == "KEYNAME":
             # Look ahead to see if this is destructuring
             # Check for patterns:
             # - $var1, $var2: (comma then eventually colon)
             # - $var1, $var2 -> $new: (comma, then arrow, then colon)
 
-            def is_destructuring_pattern():
-                """Look ahead to determine if this is a destructuring pattern"""
-                pos = 1
-                found_comma = False
-                bracket_depth = 0
-
-                # First check if this is just a simple binding: $var: value
-                # If the next token is directly BIND, this is NOT destructuring
-                if self.peek(1) and self.peek(1).type == "BIND":
-                    return False
-
-                # Scan ahead looking for comma followed by eventual colon or arrow
-                # But only count commas that are outside of brackets (not inside blueprint instantiations)
-                while self.peek(pos) and pos < 20:  # Reasonable lookahead limit
-                    token = self.peek(pos)
-                    if token.type == "LBRACK":
-                        bracket_depth += 1
-                    elif token.type == "RBRACK":
-                        bracket_depth -= 1
-                    elif token.type == "COMMA" and bracket_depth == 0:
-                        # Only count commas that are not inside brackets
-                        found_comma = True
-                    elif token.type == "BIND" and found_comma:
-                        return True  # Found comma followed by colon
-                    elif token.type == "ARROW" and found_comma:
-                        return True  # Found comma followed by arrow (renaming)
-                    elif token.type == "VARIANTS":
-                        # If we encounter 'variants' keyword, this is NOT destructuring
-                        return False
-                    elif token.type in ["ADD", "SUBTRACT", "STAR", "DIVIDE", "MODULO", "POWER",
-                                      "EQUAL", "NOT_EQUAL", "LESS_THAN", "GREATER_THAN",
-                                      "LESS_EQUAL", "GREATER_EQUAL", "AND", "OR"]:
-                        # If we find mathematical or logical operators, this is an expression, not destructuring
-                        return False
-                    elif token.type in ["SEMICOLON", "NEWLINE", "RBRACE"]:
-                        break  # End of statement
-                    pos += 1
-                return False
-
             # Look ahead for reverse destructuring: $var[] :> $var1, $var2, $var3 -> $var4
             # Check for pattern: KEYNAME LBRACK RBRACK REBIND_RIGHTWARD (with variables and commas/arrows after)
-            if (self.peek(1) and self.peek(1).type == "LBRACK" and
-                self.peek(2) and self.peek(2).type == "RBRACK" and
-                self.peek(3) and self.peek(3).type == "REBIND_RIGHTWARD"):
+            if (self.peek_type(1) == "LBRACK" and
+                self.peek_type(2) == "RBRACK" and
+                self.peek_type(3) == "REBIND_RIGHTWARD"):
                 # More flexible check - just need to see REBIND_RIGHTWARD after []
                 return self.parse_reverse_destructuring_early()
 
-            if is_destructuring_pattern():
+            if self._scan_destructuring_pattern(self.pos):
                 return self.parse_destructuring_statement()
 
         # Support binding to variable, list index, or table index
         # Parse a value expression (could be VarInvoke, ListIndex, etc.)
         expr1 = self.parse_value_expression()
         # Assignment: <:
-        if self.peek() and self.peek().type == "REBIND_LEFTWARD":
+        if self.peek_type() == "REBIND_LEFTWARD":
             self.advance()  # consume REBIND_LEFTWARD
             value = self.parse_value_expression()
             return BindOrRebind(expr1, value, code_line=code_line)
 
         # Check for variant group: Name variants: ... or Name variants include ...
-        if isinstance(expr1, VarInvoke) and self.peek() and self.peek().type == "VARIANTS":
+        if isinstance(expr1, VarInvoke) and self.peek_type() == "VARIANTS":
             variant_group = self.parse_variant_group(expr1.name)
 
             # If it's an extension, return it directly as a statement
@@ -698,16 +747,16 @@ class Parser:
                 return Binding(expr1.name, variant_group, code_line=code_line)
 
         # Variable binding: $x: ... or Blueprint definition: Name: <[...]>
-        if isinstance(expr1, VarInvoke) and self.peek() and self.peek().type == "BIND":
+        if isinstance(expr1, VarInvoke) and self.peek_type() == "BIND":
             self.advance()  # consume BIND
 
             # Check if this is a blueprint definition: Name: <[...]>
-            if self.peek() and self.peek().type == "BLUEPRINT_START":
+            if self.peek_type() == "BLUEPRINT_START":
                 blueprint_def = self.parse_blueprint_definition()
                 return Binding(expr1.name, blueprint_def, code_line=code_line)
 
             # Support empty bind: $x: ;
-            if self.peek() and self.peek().type == "SEMICOLON":
+            if self.peek_type() == "SEMICOLON":
                 return Binding(expr1.name, None, code_line=code_line)
 
             # Check if this is a blueprint composition: Name and OtherName
@@ -715,7 +764,7 @@ class Parser:
             value = self.parse_value_expression()
 
             # If the next token is "and", this is blueprint composition
-            if self.peek() and self.peek().type == "AND":
+            if self.peek_type() == "AND":
                 # The value should be a VarInvoke (blueprint name)
                 if isinstance(value, VarInvoke):
                     first_blueprint = value.name
@@ -728,31 +777,18 @@ class Parser:
             return Binding(expr1.name, value, code_line=code_line)
 
         # Property binding: $list.property: ... (binding to list/object properties)
-        if isinstance(expr1, ListIndex) and getattr(expr1, 'is_property_access', False) and self.peek() and self.peek().type == "BIND":
+        if isinstance(expr1, ListIndex) and getattr(expr1, 'is_property_access', False) and self.peek_type() == "BIND":
             self.advance()  # consume BIND
             value = self.parse_value_expression()
             return BindOrRebind(expr1, value, code_line=code_line)
         # Check for reverse destructuring: source[] :> $var1, $var2
-        if self.peek() and self.peek().type == "REBIND_RIGHTWARD":
+        if self.peek_type() == "REBIND_RIGHTWARD":
             # Look ahead to see if this is reverse destructuring (variable after :>)
-            if self.peek(1) and self.peek(1).type == "KEYNAME":
-                # Look further ahead for comma OR arrow to confirm destructuring
-                pos = 2
-                found_destructuring_pattern = False
-                while self.peek(pos) and pos < 10:  # Look ahead a reasonable amount
-                    token = self.peek(pos)
-                    if token.type in ["COMMA", "ARROW"]:
-                        found_destructuring_pattern = True
-                        break
-                    elif token.type in ["SEMICOLON", "NEWLINE", "RBRACE"]:
-                        break
-                    pos += 1
-
-                if found_destructuring_pattern:
-                    return self.parse_reverse_destructuring(expr1)
+            if self._scan_reverse_destructuring(self.pos):
+                return self.parse_reverse_destructuring(expr1)
 
         # Implicit bind-or-rebind: :>
-        if self.peek() and self.peek().type == "REBIND_RIGHTWARD":
+        if self.peek_type() == "REBIND_RIGHTWARD":
             self.advance()
             expr2 = self.parse_value_expression()
             if isinstance(expr1, VarInvoke) and isinstance(expr2, VarInvoke):
@@ -778,11 +814,11 @@ class Parser:
             stmt = self.parse_statement()
             stmts.append(stmt)
             # Accept and consume all consecutive semicolons or commas after a statement
-            while self.peek() and self.peek().type in ("SEMICOLON", "COMMA"):
+            while self.peek_type() in ("SEMICOLON", "COMMA"):
                 self.advance()
                 log_debug(f"[main parser] skipped trailing delimiter after statement, now at parser.pos={self.pos}")
             # Stop if next token is a closing delimiter or end of input
-            if self.peek() and self.peek().type in ("RPAR", "RBRACK", "RBRACE"):
+            if self.peek_type() in ("RPAR", "RBRACK", "RBRACE"):
                 break
             elif not self.peek():
                 break
@@ -798,7 +834,7 @@ class Parser:
         from src.runtime_helpers import log_debug
         ast = self.parse_block()
         # Consume any trailing semicolons/commas after a block
-        while self.peek() and self.peek().type in ("SEMICOLON", "COMMA"):
+        while self.peek_type() in ("SEMICOLON", "COMMA"):
             self.advance()
             log_debug(f"[main parser] skipped trailing delimiter after block, now at parser.pos={self.pos}")
         if self.pos != len(self.tokens):
@@ -807,13 +843,20 @@ class Parser:
 
     def parse_program(self):
         statements = []
+        self.statement_spans = []  # (first token, token after the statement) for each statement
         while self.pos < len(self.tokens):
-            stmt = self.parse_statement()
-            statements.append(stmt)
-            if self.peek() and self.peek().type in ("SEMICOLON", "COMMA"):
-                self.advance()
+            start = self.pos
+            statements.append(self.parse_top_level_statement())
+            self.statement_spans.append((start, self.pos))
         return Program(statements)
 
+    def parse_top_level_statement(self):
+        """Parse one Program statement and its trailing delimiter."""
+        stmt = self.parse_statement()
+        if self.peek_type() in ("SEMICOLON", "COMMA"):
+            self.advance()
+        return stmt
+
     def parse_destructuring_statement(self):
         """Parse destructuring statements like:
         $var1, $var2: source[]
@@ -825,12 +868,12 @@ class Parser:
 
         # Check if this starts with @ for reference destructuring
         is_reference = False
-        if self.peek() and self.peek().type == "AT":
+        if self.peek_type() == "AT":
             is_reference = True
             self.advance()  # consume @
 
         # Parse first variable
-        if not self.peek() or self.peek().type != "KEYNAME":
+        if self.peek_type() != "KEYNAME":
             raise EnzoParseError("Expected variable name in destructuring", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
         first_var_token = self.advance()
@@ -838,32 +881,32 @@ class Parser:
         target_vars = [first_var]
 
         # Parse remaining variables separated by commas
-        while self.peek() and self.peek().type == "COMMA":
+        while self.peek_type() == "COMMA":
             self.advance()  # consume comma
 
             # Check for @ on individual variables
             var_is_reference = is_reference
-            if self.peek() and self.peek().type == "AT":
+            if self.peek_type() == "AT":
                 var_is_reference = True
                 self.advance()  # consume @
 
-            if not self.peek() or self.peek().type != "KEYNAME":
+            if self.peek_type() != "KEYNAME":
                 raise EnzoParseError("Expected variable name after comma in destructuring", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
             var_name = self.advance().value
             target_vars.append(var_name)
 
         # Check for renaming operator ->
-        if self.peek() and self.peek().type == "ARROW":
+        if self.peek_type() == "ARROW":
             self.advance()  # consume ->
 
-            if not self.peek() or self.peek().type != "KEYNAME":
+            if self.peek_type() != "KEYNAME":
                 raise EnzoParseError("Expected new variable name after '->' in destructuring", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
             new_var = self.advance().value
 
             # Expect colon
-            if not self.peek() or self.peek().type != "BIND":
+            if self.peek_type() != "BIND":
                 raise EnzoParseError("Expected ':' after renaming in destructuring", code_line=self._get_code_line(self.peek()) if self.peek() else None)
             self.advance()  # consume ':'
 
@@ -873,7 +916,7 @@ class Parser:
             return RestructuringBinding(target_vars, new_var, source_expr, is_reference, code_line=self._get_code_line(first_var_token))
 
         # Check for regular binding :
-        elif self.peek() and self.peek().type == "BIND":
+        elif self.peek_type() == "BIND":
             self.advance()  # consume ':'
 
             # Parse source expression (with destructuring context)
@@ -898,12 +941,12 @@ class Parser:
         is_reference = isinstance(source_expr, ReferenceAtom)
 
         # Also check if this starts with @ for reference destructuring (alternative syntax)
-        if self.peek() and self.peek().type == "AT":
+        if self.peek_type() == "AT":
             is_reference = True
             self.advance()  # consume @
 
         # Parse first variable
-        if not self.peek() or self.peek().type != "KEYNAME":
+        if self.peek_type() != "KEYNAME":
             raise EnzoParseError("Expected variable name after ':>' in reverse destructuring", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
         first_var_token = self.advance()
@@ -913,9 +956,9 @@ class Parser:
         renamed_pairs = {}
 
         # Check for renaming with -> for the first variable
-        if self.peek() and self.peek().type == "ARROW":
+        if self.peek_type() == "ARROW":
             self.advance()  # consume ->
-            if not self.peek() or self.peek().type != "KEYNAME":
+            if self.peek_type() != "KEYNAME":
                 raise EnzoParseError("Expected new variable name after '->' in reverse destructuring", code_line=self._get_code_line(self.peek()) if self.peek() else None)
             new_var_name = self.advance().value
             target_vars.append(new_var_name)
@@ -924,24 +967,24 @@ class Parser:
             target_vars.append(first_var)
 
         # Parse remaining variables separated by commas
-        while self.peek() and self.peek().type == "COMMA":
+        while self.peek_type() == "COMMA":
             self.advance()  # consume comma
 
             # Check for @ on individual variables
             var_is_reference = is_reference
-            if self.peek() and self.peek().type == "AT":
+            if self.peek_type() == "AT":
                 var_is_reference = True
                 self.advance()  # consume @
 
-            if not self.peek() or self.peek().type != "KEYNAME":
+            if self.peek_type() != "KEYNAME":
                 raise EnzoParseError("Expected variable name after comma in reverse destructuring", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
             var_name = self.advance().value
 
             # Check for renaming with -> in reverse destructuring
-            if self.peek() and self.peek().type == "ARROW":
+            if self.peek_type() == "ARROW":
                 self.advance()  # consume ->
-                if not self.peek() or self.peek().type != "KEYNAME":
+                if self.peek_type() != "KEYNAME":
                     raise EnzoParseError("Expected new variable name after '->' in reverse destructuring", code_line=self._get_code_line(self.peek()) if self.peek() else None)
                 new_var_name = self.advance().value
                 target_vars.append(new_var_name)
@@ -968,12 +1011,12 @@ class Parser:
 
         # Check if this starts with @ for reference destructuring
         is_reference = False
-        if self.peek() and self.peek().type == "AT":
+        if self.peek_type() == "AT":
             is_reference = True
             self.advance()  # consume @
 
         # Parse first variable
-        if not self.peek() or self.peek().type != "KEYNAME":
+        if self.peek_type() != "KEYNAME":
             raise EnzoParseError("Expected variable name after ':>' in reverse destructuring", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
         first_var_token = self.advance()
@@ -983,9 +1026,9 @@ class Parser:
         renamed_pairs = {}
 
         # Check for renaming with -> for the first variable
-        if self.peek() and self.peek().type == "ARROW":
+        if self.peek_type() == "ARROW":
             self.advance()  # consume ->
-            if not self.peek() or self.peek().type != "KEYNAME":
+            if self.peek_type() != "KEYNAME":
                 raise EnzoParseError("Expected new variable name after '->' in reverse destructuring", code_line=self._get_code_line(self.peek()) if self.peek() else None)
             new_var_name = self.advance().value
             target_vars.append(new_var_name)
@@ -994,24 +1037,24 @@ class Parser:
             target_vars.append(first_var)
 
         # Parse remaining variables separated by commas
-        while self.peek() and self.peek().type == "COMMA":
+        while self.peek_type() == "COMMA":
             self.advance()  # consume comma
 
             # Check for @ on individual variables
             var_is_reference = is_reference
-            if self.peek() and self.peek().type == "AT":
+            if self.peek_type() == "AT":
                 var_is_reference = True
                 self.advance()  # consume @
 
-            if not self.peek() or self.peek().type != "KEYNAME":
+            if self.peek_type() != "KEYNAME":
                 raise EnzoParseError("Expected variable name after comma in reverse destructuring", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
             var_name = self.advance().value
 
             # Check for renaming with -> in reverse destructuring
-            if self.peek() and self.peek().type == "ARROW":
+            if self.peek_type() == "ARROW":
                 self.advance()  # consume ->
-                if not self.peek() or self.peek().type != "KEYNAME":
+                if self.peek_type() != "KEYNAME":
                     raise EnzoParseError("Expected new variable name after '->' in reverse destructuring", code_line=self._get_code_line(self.peek()) if self.peek() else None)
                 new_var_name = self.advance().value
                 target_vars.append(new_var_name)
@@ -1026,7 +1069,7 @@ class Parser:
         # In destructuring context, we expect: $variable[]
         # The [] should NOT be treated as blueprint instantiation
 
-        if not self.peek() or self.peek().type != "KEYNAME":
+        if self.peek_type() != "KEYNAME":
             raise EnzoParseError("Expected variable name in destructuring source", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
         # Parse the variable name
@@ -1035,9 +1078,9 @@ class Parser:
         base_expr = VarInvoke(var_token.value, code_line=self._get_code_line(var_token))
 
         # Check for [] suffix which indicates destructuring
-        if self.peek() and self.peek().type == "LBRACK":
+        if self.peek_type() == "LBRACK":
             self.advance()  # consume LBRACK
-            if self.peek() and self.peek().type == "RBRACK":
+            if self.peek_type() == "RBRACK":
                 self.advance()  # consume RBRACK
                 # Return the variable - the [] just indicates destructuring context
                 return base_expr
@@ -1056,7 +1099,7 @@ class Parser:
         self.advance()
 
         # Parse first variable
-        if not self.peek() or self.peek().type != "KEYNAME":
+        if self.peek_type() != "KEYNAME":
             raise EnzoParseError("Expected variable name in complex bracket destructuring", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
         first_var_token = self.advance()
@@ -1065,31 +1108,31 @@ class Parser:
         new_var = None
 
         # Parse remaining variables separated by commas
-        while self.peek() and self.peek().type == "COMMA":
+        while self.peek_type() == "COMMA":
             self.advance()  # consume comma
 
-            if not self.peek() or self.peek().type != "KEYNAME":
+            if self.peek_type() != "KEYNAME":
                 raise EnzoParseError("Expected variable name after comma in complex bracket destructuring", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
             var_name = self.advance().value
             target_vars.append(var_name)
 
         # Check for renaming operator -> after all variables have been parsed
-        if self.peek() and self.peek().type == "ARROW":
+        if self.peek_type() == "ARROW":
             self.advance()  # consume ->
 
-            if not self.peek() or self.peek().type != "KEYNAME":
+            if self.peek_type() != "KEYNAME":
                 raise EnzoParseError("Expected new variable name after '->' in complex bracket destructuring", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
             new_var = self.advance().value
 
         # Consume ]
-        if not self.peek() or self.peek().type != "RBRACK":
+        if self.peek_type() != "RBRACK":
             raise EnzoParseError("Expected ']' in complex bracket destructuring", code_line=self._get_code_line(self.peek()) if self.peek() else None)
         self.advance()
 
         # Consume :>
-        if not self.peek() or self.peek().type != "REBIND_RIGHTWARD":
+        if self.peek_type() != "REBIND_RIGHTWARD":
             raise EnzoParseError("Expected ':>' after ']' in complex bracket destructuring", code_line=self._get_code_line(self.peek()) if self.peek() else None)
         self.advance()
 
@@ -1104,7 +1147,7 @@ class Parser:
 
         # NEW SYNTAX: After comma, expect function atom (...)
         # Parse the then block as a function atom
-        if not self.peek() or self.peek().type != "LPAR":
+        if self.peek_type() != "LPAR":
             raise EnzoParseError("Expected '(' after If condition comma", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
         # Parse the function atom - this will handle the (...) block
@@ -1112,17 +1155,17 @@ class Parser:
         then_block = then_function.body  # Extract the statements from the function atom
 
         # Check for comma after the function atom (needed for Else clause)
-        if self.peek() and self.peek().type == "COMMA":
+        if self.peek_type() == "COMMA":
             self.advance()  # consume comma
 
         # Check for non-exclusive multi-branch (or clause)
-        if self.peek() and self.peek().type == "OR":
+        if self.peek_type() == "OR":
             return self._parse_non_exclusive_multi_branch(condition, then_block, consume_end)
 
         # Parse optional else block
         else_block = None
-        if self.peek() and self.peek().type in ("ELSE", "ELSE_IF"):
-            if self.peek().type == "ELSE_IF":
+        if self.peek_type() in ("ELSE", "ELSE_IF"):
+            if self.peek_type() == "ELSE_IF":
                 # This is 'Else if' - parse the condition and create nested if
                 self.advance()  # consume 'Else if'
 
@@ -1130,7 +1173,7 @@ class Parser:
                 nested_condition = self.parse_comparison()
 
                 # Expect comma
-                if not self.peek() or self.peek().type != "COMMA":
+                if self.peek_type() != "COMMA":
                     raise EnzoParseError("Expected ',' after Else if condition", code_line=self._get_code_line(self.peek()) if self.peek() else None)
                 self.advance()
 
@@ -1142,17 +1185,17 @@ class Parser:
                 self.advance()  # consume 'Else'
 
                 # Check for 'Else if' pattern (legacy support)
-                if self.peek() and self.peek().type == "IF":
+                if self.peek_type() == "IF":
                     # This is 'Else if' - parse as nested if statement
                     else_block = [self.parse_if_statement()]
                 else:
                     # Regular else block - expect comma then function atom
-                    if not self.peek() or self.peek().type != "COMMA":
+                    if self.peek_type() != "COMMA":
                         raise EnzoParseError("Expected ',' after Else", code_line=self._get_code_line(self.peek()) if self.peek() else None)
                     self.advance()  # consume comma after 'Else'
 
                     # Parse else function atom
-                    if not self.peek() or self.peek().type != "LPAR":
+                    if self.peek_type() != "LPAR":
                         raise EnzoParseError("Expected '(' after Else comma", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
                     else_function = self.parse_function_atom()
@@ -1174,25 +1217,25 @@ class Parser:
         condition = self._parse_branch_condition(left_expr)
 
         # Expect comma
-        if not self.peek() or self.peek().type != "COMMA":
+        if self.peek_type() != "COMMA":
             raise EnzoParseError("Expected ',' after branch condition", code_line=self._get_code_line(self.peek()) if self.peek() else None)
         self.advance()
 
         # Parse then block for first branch - expect function atom
-        if not self.peek() or self.peek().type != "LPAR":
+        if self.peek_type() != "LPAR":
             raise EnzoParseError("Expected '(' after branch condition comma", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
         then_function = self.parse_function_atom()
         then_block = then_function.body  # Extract statements from function atom
 
         # Check for comma after function atom (needed for or/Otherwise clauses)
-        if self.peek() and self.peek().type == "COMMA":
+        if self.peek_type() == "COMMA":
             self.advance()  # consume comma
 
         # Parse additional branches with 'or'
         else_block = None
-        if self.peek() and self.peek().type in ("OR", "OTHERWISE"):
-            if self.peek().type == "OR":
+        if self.peek_type() in ("OR", "OTHERWISE"):
+            if self.peek_type() == "OR":
                 # Parse more 'or' branches recursively
                 self.advance()  # consume 'or'
 
@@ -1207,11 +1250,11 @@ class Parser:
                 self.advance()  # consume 'Otherwise'
 
                 # Expect comma then function atom
-                if not self.peek() or self.peek().type != "COMMA":
+                if self.peek_type() != "COMMA":
                     raise EnzoParseError("Expected ',' after Otherwise", code_line=self._get_code_line(self.peek()) if self.peek() else None)
                 self.advance()
 
-                if not self.peek() or self.peek().type != "LPAR":
+                if self.peek_type() != "LPAR":
                     raise EnzoParseError("Expected '(' after Otherwise comma", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
                 else_function = self.parse_function_atom()
@@ -1228,7 +1271,7 @@ class Parser:
         first_comparison = self._parse_single_comparison(left_expr)
 
         # Check for logical operators (and, or)
-        if self.peek() and self.peek().type in ("AND", "OR"):
+        if self.peek_type() in ("AND", "OR"):
             operator = self.peek().value
             self.advance()  # consume 'and' or 'or'
 
@@ -1244,33 +1287,33 @@ class Parser:
         from src.enzo_parser.ast_nodes import ComparisonExpression
 
         # Parse the operator and right side
-        if self.peek() and self.peek().type == "IS":
+        if self.peek_type() == "IS":
             operator = "is"
             self.advance()
 
             # Check for compound operators
-            if self.peek() and self.peek().type == "LESS":
+            if self.peek_type() == "LESS":
                 self.advance()  # consume 'less'
-                if self.peek() and self.peek().type == "THAN":
+                if self.peek_type() == "THAN":
                     self.advance()  # consume 'than'
                     operator = "is less than"
-            elif self.peek() and self.peek().type == "GREATER":
+            elif self.peek_type() == "GREATER":
                 self.advance()  # consume 'greater'
-                if self.peek() and self.peek().type == "THAN":
+                if self.peek_type() == "THAN":
                     self.advance()  # consume 'than'
                     operator = "is greater than"
-            elif self.peek() and self.peek().type == "AT_WORD":
+            elif self.peek_type() == "AT_WORD":
                 at_token = self.advance()  # consume 'at'
-                if self.peek() and self.peek().type == "MOST":
+                if self.peek_type() == "MOST":
                     self.advance()  # consume 'most'
                     operator = "is at most"
-                elif self.peek() and self.peek().type == "LEAST":
+                elif self.peek_type() == "LEAST":
                     self.advance()  # consume 'least'
                     operator = "is at least"
 
             right = self.parse_value_expression()
             return ComparisonExpression(left_expr, operator, right)
-        elif self.peek() and self.peek().type == "CONTAINS":
+        elif self.peek_type() == "CONTAINS":
             # Check if we're in a pipeline function context
             if self.in_pipeline_function:
                 from src.error_messaging import error_message_comparison_in_pipeline
@@ -1280,7 +1323,7 @@ class Parser:
             self.advance()  # consume 'contains'
             right = self.parse_value_expression()
             return ComparisonExpression(left_expr, "contains", right)
-        elif self.peek() and self.peek().type == "KEYNAME":
+        elif self.peek_type() == "KEYNAME":
             # Handle shorthand type checking: "or Number" means "or is Number"
             type_name = self.peek().value
             if type_name in ["Number", "Text", "List", "Empty"]:
@@ -1296,25 +1339,25 @@ class Parser:
         from src.enzo_parser.ast_nodes import IfStatement
 
         # Expect comma
-        if not self.peek() or self.peek().type != "COMMA":
+        if self.peek_type() != "COMMA":
             raise EnzoParseError("Expected ',' after branch condition", code_line=self._get_code_line(self.peek()) if self.peek() else None)
         self.advance()
 
         # Parse then block for this branch - expect function atom
-        if not self.peek() or self.peek().type != "LPAR":
+        if self.peek_type() != "LPAR":
             raise EnzoParseError("Expected '(' after branch condition comma", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
         then_function = self.parse_function_atom()
         then_block = then_function.body  # Extract statements from function atom
 
         # Check for comma after function atom (needed for or/Otherwise clauses)
-        if self.peek() and self.peek().type == "COMMA":
+        if self.peek_type() == "COMMA":
             self.advance()  # consume comma
 
         # Parse next branch if any
         else_block = None
-        if self.peek() and self.peek().type in ("OR", "OTHERWISE"):
-            if self.peek().type == "OR":
+        if self.peek_type() in ("OR", "OTHERWISE"):
+            if self.peek_type() == "OR":
                 self.advance()  # consume 'or'
                 next_condition = self._parse_branch_condition(left_expr)
                 nested_if = self._parse_multi_branch_if_continuation(left_expr, next_condition)
@@ -1324,11 +1367,11 @@ class Parser:
                 self.advance()  # consume 'Otherwise'
 
                 # Expect comma then function atom
-                if not self.peek() or self.peek().type != "COMMA":
+                if self.peek_type() != "COMMA":
                     raise EnzoParseError("Expected ',' after Otherwise", code_line=self._get_code_line(self.peek()) if self.peek() else None)
                 self.advance()
 
-                if not self.peek() or self.peek().type != "LPAR":
+                if self.peek_type() != "LPAR":
                     raise EnzoParseError("Expected '(' after Otherwise comma", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
                 else_function = self.parse_function_atom()
@@ -1343,7 +1386,7 @@ class Parser:
         branches = [(first_condition, first_then_block)]
 
         # Parse all 'or' branches
-        while self.peek() and self.peek().type == "OR":
+        while self.peek_type() == "OR":
             self.advance()  # consume 'or'
 
             # Extract the left expression from the first condition for reuse
@@ -1358,12 +1401,12 @@ class Parser:
                 or_condition = self.parse_comparison()
 
             # Expect comma
-            if not self.peek() or self.peek().type != "COMMA":
+            if self.peek_type() != "COMMA":
                 raise EnzoParseError("Expected ',' after or condition", code_line=self._get_code_line(self.peek()) if self.peek() else None)
             self.advance()
 
             # Parse the body for this branch - expect function atom
-            if not self.peek() or self.peek().type != "LPAR":
+            if self.peek_type() != "LPAR":
                 raise EnzoParseError("Expected '(' after or condition comma", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
             or_function = self.parse_function_atom()
@@ -1384,8 +1427,8 @@ class Parser:
 
         # Handle any remaining else/else if blocks normally
         else_block = None
-        if self.peek() and self.peek().type in ("ELSE", "ELSE_IF"):
-            if self.peek().type == "ELSE_IF":
+        if self.peek_type() in ("ELSE", "ELSE_IF"):
+            if self.peek_type() == "ELSE_IF":
                 # This is 'Else if' - parse the condition and create nested if
                 self.advance()  # consume 'Else if'
 
@@ -1393,7 +1436,7 @@ class Parser:
                 nested_condition = self.parse_comparison()
 
                 # Expect comma
-                if not self.peek() or self.peek().type != "COMMA":
+                if self.peek_type() != "COMMA":
                     raise EnzoParseError("Expected ',' after Else if condition", code_line=self._get_code_line(self.peek()) if self.peek() else None)
                 self.advance()
 
@@ -1405,16 +1448,16 @@ class Parser:
                 self.advance()  # consume 'Else'
 
                 # Check for 'Else if' pattern (legacy support)
-                if self.peek() and self.peek().type == "IF":
+                if self.peek_type() == "IF":
                     # This is 'Else if' - parse as nested if statement
                     else_block = [self.parse_if_statement()]
                 else:
                     # Regular else block - expect comma then function atom
-                    if not self.peek() or self.peek().type != "COMMA":
+                    if self.peek_type() != "COMMA":
                         raise EnzoParseError("Expected ',' after Else", code_line=self._get_code_line(self.peek()) if self.peek() else None)
                     self.advance()  # consume comma after 'Else'
 
-                    if not self.peek() or self.peek().type != "LPAR":
+                    if self.peek_type() != "LPAR":
                         raise EnzoParseError("Expected '(' after Else comma", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
                     else_function = self.parse_function_atom()
@@ -1434,11 +1477,11 @@ class Parser:
         condition = self.parse_comparison()
 
         # Check if this is a multi-branch if (either keyword)
-        if self.peek() and self.peek().type == "EITHER":
+        if self.peek_type() == "EITHER":
             return self._parse_multi_branch_if(condition)
 
         # Expect comma for single-branch if
-        if not self.peek() or self.peek().type != "COMMA":
+        if self.peek_type() != "COMMA":
             raise EnzoParseError("Expected ',' after If condition", code_line=self._get_code_line(self.peek()) if self.peek() else None)
         self.advance()
 
@@ -1453,12 +1496,12 @@ class Parser:
         self.advance()
 
         # Expect comma
-        if not self.peek() or self.peek().type != "COMMA":
+        if self.peek_type() != "COMMA":
             raise EnzoParseError("Expected ',' after Otherwise", code_line=self._get_code_line(self.peek()) if self.peek() else None)
         self.advance()
 
         # Parse function atom body
-        if not self.peek() or self.peek().type != "LPAR":
+        if self.peek_type() != "LPAR":
             raise EnzoParseError("Expected '(' after Otherwise comma", code_line=self._get_code_line(self.peek()) if self.peek() else None)
 
         body_atom = self.parse_function_atom()
@@ -1473,57 +1516,57 @@ class Parser:
         code_line = self._get_code_line(self.peek()) if self.peek() else None
 
         # Check what type of loop this is
-        if self.peek() and self.peek().type == "WHILE":
+        if self.peek_type() == "WHILE":
             # Loop while condition, (...)
             self.advance()  # consume 'while'
             condition = self.parse_comparison()
 
             # Expect comma
-            if not self.peek() or self.peek().type != "COMMA":
+            if self.peek_type() != "COMMA":
                 raise EnzoParseError("Expected ',' after while condition", code_line=code_line)
             self.advance()  # consume ','
 
             # Parse function atom body
-            if not self.peek() or self.peek().type != "LPAR":
+            if self.peek_type() != "LPAR":
                 raise EnzoParseError("Expected '(' after while condition", code_line=code_line)
             body_atom = self.parse_function_atom()
 
             return LoopStatement("while", body_atom.body, condition=condition, code_line=code_line)
 
-        elif self.peek() and self.peek().type == "UNTIL":
+        elif self.peek_type() == "UNTIL":
             # Loop until condition, (...)
             self.advance()  # consume 'until'
             condition = self.parse_comparison()
 
             # Expect comma
-            if not self.peek() or self.peek().type != "COMMA":
+            if self.peek_type() != "COMMA":
                 raise EnzoParseError("Expected ',' after until condition", code_line=code_line)
             self.advance()  # consume ','
 
             # Parse function atom body
-            if not self.peek() or self.peek().type != "LPAR":
+            if self.peek_type() != "LPAR":
                 raise EnzoParseError("Expected '(' after until condition", code_line=code_line)
             body_atom = self.parse_function_atom()
 
             return LoopStatement("until", body_atom.body, condition=condition, code_line=code_line)
 
-        elif self.peek() and self.peek().type == "FOR":
+        elif self.peek_type() == "FOR":
             # Loop for $var in list, (...) or Loop for @var in list, (...)
             self.advance()  # consume 'for'
 
             # Check for reference syntax (@var)
             is_reference = False
-            if self.peek() and self.peek().type == "AT":
+            if self.peek_type() == "AT":
                 is_reference = True
                 self.advance()  # consume '@'
 
             # Expect variable name
-            if not self.peek() or self.peek().type != "KEYNAME":
+            if self.peek_type() != "KEYNAME":
                 raise EnzoParseError("Expected variable name after 'for'", code_line=code_line)
             variable = self.advance().value
 
             # Expect 'in'
-            if not self.peek() or self.peek().type != "IN":
+            if self.peek_type() != "IN":
                 raise EnzoParseError("Expected 'in' after for variable", code_line=code_line)
             self.advance()  # consume 'in'
 
@@ -1531,12 +1574,12 @@ class Parser:
             iterable = self.parse_value_expression()
 
             # Expect comma
-            if not self.peek() or self.peek().type != "COMMA":
+            if self.peek_type() != "COMMA":
                 raise EnzoParseError("Expected ',' after for iterable", code_line=code_line)
             self.advance()  # consume ','
 
             # Parse function atom body
-            if not self.peek() or self.peek().type != "LPAR":
+            if self.peek_type() != "LPAR":
                 raise EnzoParseError("Expected '(' after for iterable", code_line=code_line)
             body_atom = self.parse_function_atom()
 
@@ -1545,12 +1588,12 @@ class Parser:
         else:
             # Basic loop: Loop, (...)
             # Expect comma
-            if not self.peek() or self.peek().type != "COMMA":
+            if self.peek_type() != "COMMA":
                 raise EnzoParseError("Expected ',' after 'Loop'", code_line=code_line)
             self.advance()  # consume ','
 
             # Parse function atom body
-            if not self.peek() or self.peek().type != "LPAR":
+            if self.peek_type() != "LPAR":
                 raise EnzoParseError("Expected '(' after 'Loop,'", code_line=code_line)
             body_atom = self.parse_function_atom()
 
@@ -1589,11 +1632,11 @@ class Parser:
 
         left = self.parse_not_expression()
 
-        while self.peek() and self.peek().type in ("AND", "OR"):
+        while self.peek_type() in ("AND", "OR"):
             op_token = self.advance()
 
             # Check for context-sensitive comparison operators (e.g., "and at most 65")
-            if (self.peek() and self.peek().type == "AT_WORD" and
+            if (self.peek_type() == "AT_WORD" and
                 hasattr(left, 'left') and hasattr(left, 'operator') and
                 left.operator in ["is at least", "is at most", "is less than", "is greater than", "is"]):
 
@@ -1602,10 +1645,10 @@ class Parser:
 
                 # Parse the comparison operator
                 at_token = self.advance()  # consume 'at'
-                if self.peek() and self.peek().type == "MOST":
+                if self.peek_type() == "MOST":
                     self.advance()  # consume 'most'
                     operator = "is at most"
-                elif self.peek() and self.peek().type == "LEAST":
+                elif self.peek_type() == "LEAST":
                     self.advance()  # consume 'least'
                     operator = "is at least"
                 else:
@@ -1625,7 +1668,7 @@ class Parser:
         """Parse 'not' expressions"""
         from src.enzo_parser.ast_nodes import NotExpression
 
-        if self.peek() and self.peek().type == "NOT":
+        if self.peek_type() == "NOT":
             self.advance()  # consume 'not'
             expr = self.parse_comparison_expression()
             return NotExpression(expr)
@@ -1639,35 +1682,35 @@ class Parser:
         left = self.parse_pipeline()
 
         # Check for comparison operators
-        if self.peek() and self.peek().type == "IS":
+        if self.peek_type() == "IS":
             op_start = self.advance()  # consume 'is'
             operator = "is"
 
             # Check for 'is not'
-            if self.peek() and self.peek().type == "NOT":
+            if self.peek_type() == "NOT":
                 self.advance()  # consume 'not'
                 operator = "is not"
             # Check for compound operators like 'is less than'
-            elif self.peek() and self.peek().type == "LESS":
+            elif self.peek_type() == "LESS":
                 self.advance()  # consume 'less'
-                if self.peek() and self.peek().type == "THAN":
+                if self.peek_type() == "THAN":
                     self.advance()  # consume 'than'
                     operator = "is less than"
                 else:
                     raise EnzoParseError("Expected 'than' after 'is less'", code_line=self._get_code_line(self.peek()) if self.peek() else None)
-            elif self.peek() and self.peek().type == "GREATER":
+            elif self.peek_type() == "GREATER":
                 self.advance()  # consume 'greater'
-                if self.peek() and self.peek().type == "THAN":
+                if self.peek_type() == "THAN":
                     self.advance()  # consume 'than'
                     operator = "is greater than"
                 else:
                     raise EnzoParseError("Expected 'than' after 'is greater'", code_line=self._get_code_line(self.peek()) if self.peek() else None)
-            elif self.peek() and self.peek().type == "AT_WORD":
+            elif self.peek_type() == "AT_WORD":
                 at_token = self.advance()  # consume 'at'
-                if self.peek() and self.peek().type == "MOST":
+                if self.peek_type() == "MOST":
                     self.advance()  # consume 'most'
                     operator = "is at most"
-                elif self.peek() and self.peek().type == "LEAST":
+                elif self.peek_type() == "LEAST":
                     self.advance()  # consume 'least'
                     operator = "is at least"
                 else:
@@ -1676,7 +1719,7 @@ class Parser:
             right = self.parse_term()
             return ComparisonExpression(left, operator, right)
 
-        elif self.peek() and self.peek().type == "CONTAINS":
+        elif self.peek_type() == "CONTAINS":
             # Check if we're in a pipeline function context
             if self.in_pipeline_function:
                 from src.error_messaging import error_message_comparison_in_pipeline
@@ -1696,7 +1739,146 @@ def parse(src):
     parser = Parser(src)
     return parser.parse()
 
-def parse_program(src):
-    """Parse a full Enzo source string into a Program AST (multiple statements)."""
+# Token types that open and close nesting for parse_file's error recovery
+_RECOVERY_OPENERS = ("LPAR", "LBRACK", "LBRACE", "BLUEPRINT_START", "IF", "LOOP")
+_RECOVERY_CLOSERS = ("RPAR", "RBRACK", "RBRACE", "BLUEPRINT_END", "END")
+
+def _recovery_end(tokens, start):
+    """Index after the end of the statement starting at start, for skipping one that failed to parse.
+
+    The statement ends at a semicolon outside any nesting that is the last token on its line,
+    the same boundary the line-based runner splits statements at.
+    """
+    depth = 0
+    count = len(tokens)
+    line_starts = tokens.line_starts
+    i = start
+    while i < count:
+        typ = tokens.peek_type(i)
+        if typ in _RECOVERY_OPENERS:
+            depth += 1
+        elif typ in _RECOVERY_CLOSERS:
+            depth = max(0, depth - 1)
+        elif typ == "SEMICOLON" and depth == 0:
+            if i + 1 == count or line_of_offset(line_starts, tokens.starts[i + 1]) != line_of_offset(line_starts, tokens.starts[i]):
+                return i + 1
+        i += 1
+    return count
+
+def _statement_source(src, line_starts, first, last):
+    """The source lines holding offsets first..last, as the line-based runner would have joined them."""
+    start = line_starts[line_of_offset(line_starts, first) - 1]
+    end = src.find("\n", last)
+    return src[start:len(src) if end == -1 else end].strip()
+
+def parse_file(src):
+    """Lex and parse a whole file in one pass into a Program.
+
+    //= lines become SectionMarker statements and lexing restarts after each one. A statement
+    that fails to lex or parse becomes an InvalidStatement with the formatted error, and parsing
+    resumes after it. program.sources holds the source text of every statement (None for
+    section markers), for error messages and for deciding how results are printed, and
+    program.source_lines the 0-based line each statement starts on.
+    """
+    from src.error_messaging import format_statement_error
+    tokenizer = Tokenizer(src)
+    line_starts = tokenizer.line_starts
+    statements = []
+    sources = []
+    source_lines = []
+
+    # Section boundaries: every line whose text starts with //=
+    sections = []
+    section_start = 0
+    for number, line_start in enumerate(line_starts):
+        line_end = line_starts[number + 1] if number + 1 < len(line_starts) else len(src)
+        line = src[line_start:line_end]
+        if line.strip().startswith("//="):
+            sections.append((section_start, line_start, line.rstrip("\n").strip()))
+            section_start = line_end
+    sections.append((section_start, len(src), None))
+
+    for start, end, title in sections:
+        for piece in tokenizer.tokenize_pieces(start, end):
+            if isinstance(piece, tuple):
+                offset, error = piece
+                source = _statement_source(src, line_starts, offset, offset)
+                statements.append(InvalidStatement(format_statement_error(error, source)))
+                sources.append(source)
+                source_lines.append(line_of_offset(line_starts, offset) - 1)
+                continue
+            parser = Parser(src, tokens=piece, line_starts=line_starts)
+            while parser.pos < len(piece):
+                first = parser.pos
+                try:
+                    stmt = parser.parse_top_level_statement()
+                    last = parser.pos - 1
+                except Exception as e:
+                    # Skip the rest of the statement and drop any state the failed parse left behind
+                    parser.pos = min(max(_recovery_end(piece, first), parser.pos, first + 1), len(piece))
+                    parser.in_pipeline_function = False
+                    parser.pipeline_start_pos = None
+                    source = _statement_source(src, line_starts, piece.starts[first], piece.starts[parser.pos - 1])
+                    statements.append(InvalidStatement(format_statement_error(e, source)))
+                    sources.append(source)
+                    source_lines.append(line_of_offset(line_starts, piece.starts[first]) - 1)
+                    continue
+                statements.append(stmt)
+                sources.append(_statement_source(src, line_starts, piece.starts[first], piece.starts[last]))
+                source_lines.append(line_of_offset(line_starts, piece.starts[first]) - 1)
+        if title is not None:
+            statements.append(SectionMarker(title))
+            sources.append(None)
+            source_lines.append(line_of_offset(line_starts, end) - 1)
+
+    program = Program(statements)
+    program.sources = sources
+    program.source_lines = source_lines
+    return program
+
+def compile_text_template(text):
+    """Split interpolated text into segments for the evaluator.
+
+    Segments are ("text", literal), ("expr", ast) for each `;`-separated expression inside
+    `<...>`, ("error",) for an expression that failed to parse and ("unterminated",) for a
+    `<` without a closing `>`. Errors are kept as segments rather than raised so they still
+    surface when, and only if, evaluation reaches them.
+    """
+    segments = []
+    i = 0
+    while i < len(text):
+        j = text.find("<", i)
+        if j == -1:
+            segments.append(("text", text[i:]))
+            break
+        if j > i:
+            segments.append(("text", text[i:j]))
+        k = text.find(">", j + 1)
+        if k == -1:
+            segments.append(("unterminated",))
+            break
+        for part in text[j + 1:k].split(";"):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                segments.append(("expr", parse(part)))
+            except Exception:
+                segments.append(("error",))
+        i = k + 1
+    return segments
+
+def parse_program(src, cache_dir=None):
+    """Parse a full Enzo source string into a Program AST (multiple statements).
+
+    With cache_dir, the Program is looked up in and stored to the on-disk AST cache there.
+    """
+    if cache_dir is not None:
+        from src.ast_cache import load_program, store_program
+        program = load_program(cache_dir, src)
+        if program is None:
+            program = Parser(src).parse_program()
+            store_program(cache_dir, src, program)
+        return program
     parser = Parser(src)
     return parser.parse_program()
@@ -8,7 +8,7 @@ import os
 
 def synchronize(parser):
     # Skip tokens until we reach a likely statement boundary: SEMICOLON, COMMA, RPAR, RBRACK, RBRACE, or EOF
-    while parser.peek() and parser.peek().type not in ("SEMICOLON", "COMMA", "RPAR", "RBRACK", "RBRACE"):
+    while parser.peek_type() not in (None, "SEMICOLON", "COMMA", "RPAR", "RBRACK", "RBRACE"):
         parser.advance()
     # Optionally, advance past the boundary token
     if parser.peek():
@@ -22,7 +22,7 @@ def parse_function_atom(parser):
     expect(parser, "LPAR")
     lpar_line = None
     if lpar_token:
-        lpar_line = parser.src[:lpar_token.start].count('\n') + 1
+        lpar_line = lpar_token.line
 
     params = []  # Store (name, default_value) tuples
     local_vars = []
@@ -31,7 +31,7 @@ def parse_function_atom(parser):
 
     try:
         # Parse the body statements directly with the main parser
-        while parser.peek() and parser.peek().type != "RPAR":
+        while parser.peek_type() not in (None, "RPAR"):
             log_debug(f"[parse_function_atom] parsing statement at token: {parser.peek()} (parser.pos={parser.pos})")
             stmt = parser.parse_statement()
             from src.enzo_parser.ast_nodes import Binding, ParameterDeclaration
@@ -41,7 +41,8 @@ def parse_function_atom(parser):
                     # Find the actual line containing the duplicate parameter
                     # Look for the line that contains "param <n>:" where name matches stmt.name
                     # We want the SECOND occurrence since that's the duplicate
-                    src_lines = parser.src.splitlines()
+                    # Only this function atom's lines, so a whole-file parse finds the same lines
+                    src_lines = parser.src_lines[(lpar_line or 1) - 1:]
                     code_line = None
                     # stmt.name should already include the $ prefix
                     target_pattern = f"param {stmt.name}:"
@@ -72,7 +73,7 @@ def parse_function_atom(parser):
             else:
                 body.append(stmt)
             # Always consume all delimiters after every statement, including after return
-            while parser.peek() and parser.peek().type in ("SEMICOLON", "COMMA"):
+            while parser.peek_type() in ("SEMICOLON", "COMMA"):
                 parser.advance()
                 log_debug(f"[parse_function_atom] skipped delimiter, now at parser.pos={parser.pos}")
     except EnzoParseError as e:
@@ -87,12 +88,12 @@ def parse_function_atom(parser):
             raise EnzoParseError("error: parse error in Function atom body", code_line=e.code_line)
 
     # Expect the closing RPAR
-    if parser.peek() and parser.peek().type == "RPAR":
+    if parser.peek_type() == "RPAR":
         rpar_token = parser.peek()
         parser.advance()  # consume the RPAR
         log_debug(f"[parse_function_atom] consumed closing RPAR at parser.pos={parser.pos-1}")
 
-        rpar_line = parser.src[:rpar_token.start].count('\n') + 1
+        rpar_line = rpar_token.line
         log_debug(f"[parse_function_atom] lpar_line={lpar_line}, rpar_line={rpar_line}")
         is_multiline = lpar_line is not None and rpar_line is not None and lpar_line != rpar_line
         log_debug(f"[parse_function_atom] is_multiline={is_multiline}")
@@ -105,7 +106,7 @@ def parse_function_atom(parser):
         raise EnzoParseError(error_message_unmatched_parenthesis())
 
     # Only consume trailing semicolons, NOT commas (commas belong to parent context like lists)
-    while parser.peek() and parser.peek().type == "SEMICOLON":
+    while parser.peek_type() == "SEMICOLON":
         log_debug(f"[parse_function_atom] skipping trailing semicolon after function atom at parser.pos={parser.pos}")
         parser.advance()
 
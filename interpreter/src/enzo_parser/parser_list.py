@@ -17,7 +17,7 @@ def parse_list_atom(parser):
             parser.advance()
             break
         if t and t.type == "COMMA":
-            t2 = parser.tokens[parser.pos + 1] if parser.pos + 1 < len(parser.tokens) else None
+            t2 = parser.peek(1)
             # Choose error messages based on whether we have key-value pairs
             if has_key_value_pairs:
                 from src.error_messaging import error_message_empty_table_comma, error_message_leading_comma_table, error_message_double_comma_table
@@ -54,7 +54,7 @@ def parse_list_atom(parser):
         # Check for key-value pair (keyname: value)
         elif t.type == "KEYNAME":
             # Look ahead to see if this is a key-value pair
-            t2 = parser.tokens[parser.pos + 1] if parser.pos + 1 < len(parser.tokens) else None
+            t2 = parser.peek(1)
             if t2 and t2.type == "BIND":
                 # This is a key-value pair
                 has_key_value_pairs = True  # Mark that we have key-value pairs
@@ -72,7 +72,7 @@ def parse_list_atom(parser):
                 elements.append(parser.parse_value_expression())
         elif t.type == "NUMBER_TOKEN":
             # Check if this number is followed by BIND (which would be invalid)
-            t2 = parser.tokens[parser.pos + 1] if parser.pos + 1 < len(parser.tokens) else None
+            t2 = parser.peek(1)
             if t2 and t2.type == "BIND":
                 # This is an invalid numeric keyname
                 raise EnzoParseError(f"error: purely numeric keynames are not allowed: {t.value}", code_line=parser._get_code_line(t))
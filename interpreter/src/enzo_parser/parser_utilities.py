@@ -8,22 +8,21 @@ from src.error_messaging import (
     error_message_unmatched_bracket,
     error_message_unmatched_brace,
 )
+from src.enzo_parser.tokenizer import compute_line_starts, line_of_offset
 
-def get_code_line(src_lines, token, src):
+def get_code_line(src_lines, token, src, line_starts=None):
     if hasattr(token, 'line') and token.line is not None:
         line_num = token.line
         if 1 <= line_num <= len(src_lines):
             return src_lines[line_num - 1].strip()
 
-    # If no line info, try to extract the line containing the token using start position
+    # If no line info, locate the line containing the token's start offset by bisection
     if hasattr(token, 'start') and token.start is not None and src:
-        # Find which line contains this character position
-        current_pos = 0
-        for line_num, line in enumerate(src_lines):
-            line_end = current_pos + len(line) + 1  # +1 for newline
-            if current_pos <= token.start < line_end:
-                return line.strip()
-            current_pos = line_end
+        if line_starts is None:
+            line_starts = compute_line_starts(src)
+        line_num = line_of_offset(line_starts, token.start)
+        if 1 <= line_num <= len(src_lines):
+            return src_lines[line_num - 1].strip()
 
     return (src_lines[0].strip() if src_lines else src.strip()) if src_lines or src else ""
 
@@ -37,15 +36,15 @@ def advance(tokens, pos):
 def synchronize_to_next_statement(parser):
     # Skip tokens until we find a likely statement boundary or the start of a new function atom
     from src.runtime_helpers import log_debug
-    while parser.peek():
-        t = parser.peek()
-        log_debug(f"[sync] pos={parser.pos}, token={t}")
+    while parser.peek_type():
+        t_type = parser.peek_type()
+        log_debug(f"[sync] pos={parser.pos}, token={t_type}")
         # Stop at a semicolon, comma, closing paren/bracket/brace, or opening paren at start of line
-        if t.type in ("SEMICOLON", "COMMA", "RPAR", "RBRACK", "RBRACE"):
-            log_debug(f"[sync] Stopping at token type {t.type} at pos={parser.pos}")
+        if t_type in ("SEMICOLON", "COMMA", "RPAR", "RBRACK", "RBRACE"):
+            log_debug(f"[sync] Stopping at token type {t_type} at pos={parser.pos}")
             parser.advance()
             break
-        if t.type == "LPAR":
+        if t_type == "LPAR":
             log_debug(f"[sync] Stopping at LPAR at pos={parser.pos}")
             # Optionally, check if this is at the start of a line (could use token position)
             break
@@ -53,13 +52,12 @@ def synchronize_to_next_statement(parser):
         log_debug(f"[sync] Advanced to pos={parser.pos}")
 
 def expect(parser, type_, scan_ahead=10):
-    t = parser.peek()
-    if not t or t.type != type_:
+    if parser.peek_type() != type_:
+        t = parser.peek()
         # Scan ahead up to scan_ahead tokens for the expected type
         found = False
         for i in range(1, scan_ahead+1):
-            lookahead = parser.peek() if i == 1 else (parser.tokens[parser.pos + i - 1] if parser.pos + i - 1 < len(parser.tokens) else None)
-            if lookahead and lookahead.type == type_:
+            if parser.peek_type(i - 1) == type_:
                 # Advance parser.pos to the found token
                 parser.pos += i - 1
                 found = True
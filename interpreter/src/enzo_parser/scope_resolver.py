@@ -0,0 +1,207 @@
+# scope_resolver.py -- static scope resolution for variable reads
+#
+# At runtime a scope is either the global environment (a dict) or ChainMap(locals,
+# enclosing scope): invoke_function, loops and for loops each push one layer, while If
+# blocks, multi-branch Ifs and pipelines copy the current layer rather than adding one.
+# The resolver mirrors that nesting over the AST and sets VarInvoke.scope_depth to the
+# number of layers between a read and the scope that binds the name, or None for names
+# that are bound dynamically ($this in pipelines, $self in methods).
+#
+# Enzo scopes are mutable (loop bodies rebind into the enclosing scope, closures share
+# their defining scope), so a depth is where the binding is expected to live, not a
+# guarantee: evaluator.lookup_variable still checks each layer it passes. Names no scope
+# binds resolve to the global scope, which may bind them in a later statement.
+
+from src.enzo_parser.ast_nodes import (
+    ASTNode, Program, FunctionAtom, Binding, BindOrRebind, VarInvoke, TextAtom, IfStatement, LoopStatement,
+    PipelineNode, DestructuringBinding, ReverseDestructuring, ReferenceDestructuring, RestructuringBinding,
+)
+
+# Bound by the evaluator rather than by the program
+DYNAMIC_NAMES = frozenset(("$this", "this", "$self", "self"))
+
+# Right-hand sides of type comparisons; never looked up
+TYPE_NAMES = frozenset(("Number", "Text", "List", "Empty", "Function"))
+
+_DESTRUCTURING = (DestructuringBinding, ReverseDestructuring, ReferenceDestructuring, RestructuringBinding)
+
+
+def _aliases(name):
+    # A binding makes a variable reachable with and without the $ sigil
+    if name.startswith('$'):
+        return (name, name[1:])
+    return (name, '$' + name)
+
+
+class _Scope:
+    __slots__ = ("parent", "names", "is_layer")
+
+    def __init__(self, parent, is_layer):
+        self.parent = parent
+        self.names = set()
+        self.is_layer = is_layer  # False for If blocks, which copy their enclosing layer
+
+    def bind(self, name):
+        self.names.update(_aliases(name))
+
+
+class ScopeResolver:
+    """Annotate VarInvoke nodes with scope depths, statement by statement.
+
+    One resolver is used for all the statements of a file, which share the global scope.
+    bound_names collects every name the program binds anywhere; free_reads lists the
+    reads no enclosing scope binds, for unresolved_reads().
+    """
+
+    def __init__(self):
+        self.global_scope = _Scope(None, True)
+        self.bound_names = set()
+        self.free_reads = []
+        # Default parameter values are evaluated in the caller's environment
+        self._dynamic = 0
+        # Failed reads in interpolated text are reported as interpolation errors
+        self._interpolating = 0
+
+    def resolve(self, tree):
+        """Resolve a node, a Program or a list of statements in the global scope."""
+        self._visit(tree.statements if isinstance(tree, Program) else tree, self.global_scope)
+        return tree
+
+    def unresolved_reads(self, known_names=()):
+        """Reads of names that nothing in the program binds, in source order.
+
+        known_names are bound before the program starts (the predefined globals).
+        """
+        return [node for node in self.free_reads
+                if node.name not in self.bound_names and node.name not in known_names]
+
+    def _bind(self, scope, name):
+        if isinstance(name, str):
+            scope.bind(name)
+            self.bound_names.update(_aliases(name))
+
+    def _read(self, node, scope):
+        name = node.name
+        if name in DYNAMIC_NAMES or name in TYPE_NAMES or self._dynamic:
+            node.scope_depth = None
+            return
+        depth = 0
+        while True:
+            if name in scope.names:
+                node.scope_depth = depth
+                return
+            if scope.parent is None:
+                # Unbound so far: global, or bound by a statement that has not run yet
+                node.scope_depth = depth
+                if not self._interpolating:
+                    self.free_reads.append(node)
+                return
+            if scope.is_layer:
+                depth += 1
+            scope = scope.parent
+
+    def _statements(self, statements, scope):
+        for stmt in statements:
+            self._visit(stmt, scope)
+
+    def _function(self, node, scope):
+        fn_scope = _Scope(scope, True)
+        for param_name, default in node.params:
+            if default is not None:
+                self._dynamic += 1
+                self._visit(default, fn_scope)
+                self._dynamic -= 1
+            self._bind(fn_scope, param_name)
+        # local_vars repeat the Binding statements of the body; resolving those is enough
+        self._statements(node.body, fn_scope)
+
+    def _loop(self, node, scope):
+        loop_scope = _Scope(scope, True)
+        if node.loop_type == "for":
+            # The iterable is evaluated in the enclosing scope on every iteration
+            self._visit(node.iterable, scope)
+            variable = node.variable
+            self._bind(loop_scope, variable if variable.startswith('$') else '$' + variable)
+        else:
+            self._visit(node.condition, loop_scope)
+        self._statements(node.body, loop_scope)
+
+    def _if(self, node, scope):
+        branches = getattr(node, 'all_branches', None)
+        if branches:
+            for condition, block in branches:
+                self._visit(condition, scope)
+                self._statements(block, _Scope(scope, False))
+        else:
+            self._visit(node.condition, scope)
+            if node.then_block:
+                self._statements(node.then_block, _Scope(scope, False))
+        if node.else_block:
+            else_block = node.else_block if isinstance(node.else_block, list) else [node.else_block]
+            self._statements(else_block, _Scope(scope, False))
+
+    def _visit(self, value, scope):
+        if isinstance(value, (list, tuple)):
+            for item in value:
+                self._visit(item, scope)
+            return
+        if not isinstance(value, ASTNode):
+            return
+        cls = type(value)
+        if cls is VarInvoke:
+            self._read(value, scope)
+        elif cls is Binding:
+            self._visit(value.value, scope)
+            self._bind(scope, value.name)
+        elif cls is BindOrRebind:
+            self._visit(value.value, scope)
+            target = value.target
+            if isinstance(target, VarInvoke):
+                target = target.name
+            if isinstance(target, str):
+                # Rebinding an existing variable leaves it where it is; a new one is local
+                if not self._is_visible(scope, target):
+                    self._bind(scope, target)
+                self.bound_names.update(_aliases(target))
+            else:
+                self._visit(target, scope)
+        elif cls is FunctionAtom:
+            self._function(value, scope)
+        elif cls is LoopStatement:
+            self._loop(value, scope)
+        elif cls is IfStatement:
+            self._if(value, scope)
+        elif cls is PipelineNode:
+            self._visit(value.left, scope)
+            self._visit(value.right, _Scope(scope, False))
+        elif cls is TextAtom:
+            self._interpolating += 1
+            for segment in value.segments or ():
+                if segment[0] == "expr":
+                    self._visit(segment[1], scope)
+            self._interpolating -= 1
+        elif isinstance(value, _DESTRUCTURING):
+            self._visit(value.source_expr, scope)
+            for name in value.target_vars:
+                self._bind(scope, name)
+            if cls is RestructuringBinding:
+                self._bind(scope, value.new_var)
+            elif cls is ReverseDestructuring:
+                for name in value.renamed_pairs.values():
+                    self._bind(scope, name)
+        else:
+            for child in value.__dict__.values():
+                self._visit(child, scope)
+
+    @staticmethod
+    def _is_visible(scope, name):
+        while scope is not None:
+            if name in scope.names:
+                return True
+            scope = scope.parent
+        return False
+
+
+def resolve_scopes(tree):
+    """Resolve one statement, Program or statement list on its own."""
+    return ScopeResolver().resolve(tree)
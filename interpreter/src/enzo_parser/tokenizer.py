@@ -1,5 +1,7 @@
 # tokenizer.py -- Enzo language tokenizer/lexer
 import re
+from array import array
+from bisect import bisect_left, bisect_right
 from typing import List, Tuple, Optional, Iterator, NamedTuple
 from src.error_handling import EnzoParseError
 from src.error_messaging import error_message_unexpected_character
@@ -9,6 +11,12 @@ class Token(NamedTuple):
     value: str
     start: int
     end: int
+    line: Optional[int] = None
+    column: Optional[int] = None
+
+    def __repr__(self):
+        # line and column are left out, so error messages that show a token keep their form
+        return f"Token(type={self.type!r}, value={self.value!r}, start={self.start!r}, end={self.end!r})"
 
 TOKEN_SPEC = [
     ("REBIND_RIGHTWARD", r":>"),
@@ -86,75 +94,464 @@ TOKEN_REGEX = re.compile(
     "|".join(f"(?P<{name}>{pattern})" for name, pattern in TOKEN_SPEC)
 )
 
+def compute_line_starts(code: str) -> List[int]:
+    """Return the offset of the first character of every line in code."""
+    starts = [0]
+    pos = code.find('\n')
+    while pos != -1:
+        starts.append(pos + 1)
+        pos = code.find('\n', pos + 1)
+    return starts
+
+def line_of_offset(line_starts: List[int], offset: int) -> int:
+    """Return the 1-based line number containing offset."""
+    return bisect_right(line_starts, offset)
+
+def match_regex(code: str, pos: int) -> Optional[Tuple[str, int]]:
+    """Match one token at pos with TOKEN_REGEX, returning (type, end) or None."""
+    m = TOKEN_REGEX.match(code, pos)
+    return (m.lastgroup, m.end()) if m else None
+
+# Keyword table for the table lexer. Each of these is a \b...\b pattern in TOKEN_SPEC.
+KEYWORDS = {
+    "and": "AND",
+    "or": "OR",
+    "variants": "VARIANTS",
+    "include": "INCLUDE",
+    "If": "IF",
+    "Else": "ELSE",
+    "end-loop": "END_LOOP",
+    "restart-loop": "RESTART_LOOP",
+    "Loop": "LOOP",
+    "while": "WHILE",
+    "until": "UNTIL",
+    "for": "FOR",
+    "in": "IN",
+    "end": "END",
+    "not": "NOT",
+    "is": "IS",
+    "less": "LESS",
+    "than": "THAN",
+    "greater": "GREATER",
+    "at": "AT_WORD",
+    "most": "MOST",
+    "least": "LEAST",
+    "contains": "CONTAINS",
+    "either": "EITHER",
+    "Otherwise": "OTHERWISE",
+}
+
+# These have no \b in TOKEN_SPEC, so they also split off the front of longer words
+PREFIX_KEYWORDS = (("return", "RETURN"), ("then", "THEN"), ("param", "PARAM"))
+
+# The two halves of the KEYNAME pattern, plus the spec patterns the table lexer reuses
+_IDENT_REGEX = re.compile(r"[a-zA-Z_][a-zA-Z0-9_-]*")
+_DOLLAR_NAME_REGEX = re.compile(r"\$[a-zA-Z0-9_-]+")
+_NUMBER_REGEX = re.compile(dict(TOKEN_SPEC)["NUMBER_TOKEN"])
+_TEXT_REGEX = re.compile(dict(TOKEN_SPEC)["TEXT_TOKEN"])
+_WHITESPACE_REGEX = re.compile(dict(TOKEN_SPEC)["WHITESPACE"])
+
+def _is_word_char(ch: str) -> bool:
+    # Same notion of a word character as \b in a str regex
+    return ch.isalnum() or ch == "_"
+
+def _classify_identifier(code: str, pos: int) -> Tuple[str, int]:
+    end = _IDENT_REGEX.match(code, pos).end()
+    word = code[pos:end]
+    if word[0] in "rtp":
+        for prefix, typ in PREFIX_KEYWORDS:
+            if word.startswith(prefix):
+                return typ, pos + len(prefix)
+    if pos and _is_word_char(code[pos - 1]):
+        # No word boundary before the identifier, so no \b keyword can match here
+        return "KEYNAME", end
+    if end == len(code) or not _is_word_char(code[end]):
+        typ = KEYWORDS.get(word)
+        if typ:
+            if typ == "ELSE" and code.startswith(" if", end):
+                after = end + 3
+                if after == len(code) or not _is_word_char(code[after]):
+                    return "ELSE_IF", after
+            return typ, end
+    # A keyword followed by '-' still ends on a word boundary (e.g. end-loop-x, in-range)
+    dash = word.rfind("-")
+    while dash > 0:
+        typ = KEYWORDS.get(word[:dash])
+        if typ:
+            return typ, pos + dash
+        dash = word.rfind("-", 0, dash)
+    return "KEYNAME", end
+
+def _build_dispatch():
+    dispatch = {
+        ":": ((":>", "REBIND_RIGHTWARD"), (":", "BIND")),
+        "<": (("<:", "REBIND_LEFTWARD"), ("<=", "LE"), ("<[", "BLUEPRINT_START"), ("<", "LT")),
+        ">": ((">=", "GE"), (">", "GT")),
+        "=": (("==", "EQ"), ("=", "EQ_SINGLE")),
+        "!": (("!=", "NE"), ("!", "BANG")),
+        "]": (("]>", "BLUEPRINT_END"), ("]", "RBRACK")),
+        "(": (("(", "LPAR"),),
+        ")": ((")", "RPAR"),),
+        "[": (("[", "LBRACK"),),
+        "{": (("{", "LBRACE"),),
+        "}": (("}", "RBRACE"),),
+        ",": ((",", "COMMA"),),
+        ";": ((";", "SEMICOLON"),),
+        ".": ((".", "DOT"),),
+        "+": (("+", "PLUS"),),
+        "*": (("*", "STAR"),),
+        "%": (("%", "MODULO"),),
+        "@": (("@", "AT"),),
+        "\n": (("\n", "NEWLINE"),),
+        "-": "minus",
+        "/": "slash",
+        "$": "dollar",
+        '"': "text",
+        "'": "text",
+        " ": "space",
+        "\t": "space",
+    }
+    for ch in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_":
+        dispatch[ch] = "ident"
+    for ch in "0123456789":
+        dispatch[ch] = "number"
+    return dispatch
+
+_DISPATCH = _build_dispatch()
+
+def match_table(code: str, pos: int) -> Optional[Tuple[str, int]]:
+    """Match one token at pos via first-character dispatch, returning (type, end) or None.
+
+    Produces exactly what match_regex would; characters outside the table go through TOKEN_REGEX.
+    """
+    entry = _DISPATCH.get(code[pos])
+    if entry is None:
+        return match_regex(code, pos)
+    if entry == "ident":
+        return _classify_identifier(code, pos)
+    if entry.__class__ is tuple:
+        for literal, typ in entry:
+            if code.startswith(literal, pos):
+                return typ, pos + len(literal)
+    if entry == "space":
+        return "WHITESPACE", _WHITESPACE_REGEX.match(code, pos).end()
+    if entry == "number":
+        return "NUMBER_TOKEN", _NUMBER_REGEX.match(code, pos).end()
+    if entry == "dollar":
+        if code.startswith("$this", pos):
+            return "THIS", pos + 5
+        m = _DOLLAR_NAME_REGEX.match(code, pos)
+        return ("KEYNAME", m.end()) if m else None
+    if entry == "text":
+        m = _TEXT_REGEX.match(code, pos)
+        return ("TEXT_TOKEN", m.end()) if m else None
+    if entry == "minus":
+        if code.startswith("->", pos):
+            return "ARROW", pos + 2
+        m = _NUMBER_REGEX.match(code, pos)
+        return ("NUMBER_TOKEN", m.end()) if m else ("MINUS", pos + 1)
+    if entry == "slash":
+        if code.startswith("//", pos):
+            end = code.find("\n", pos)
+            return "COMMENT", len(code) if end == -1 else end
+        return "SLASH", pos + 1
+    return None
+
+LEXER_MODES = {
+    "table": match_table,
+    "regex": match_regex,
+}
+
+# Trivia types _scan reports when keep_trivia is set; they never reach the parser
+TRIVIA_TYPES = ("WHITESPACE", "COMMENT", "BLOCK_COMMENT")
+
+_DIGITS_REGEX = re.compile(r"\d+")
+
+def _scan(code: str, pos: int, match, last_type: Optional[str] = None, final: bool = True,
+          keep_trivia: bool = False, base: int = 0) -> Iterator[Tuple[str, int, int]]:
+    """Yield (type, start, end) for the tokens of code from pos onwards.
+
+    last_type is the type of the token before pos and base is the absolute offset of
+    code[0], for error messages. With final=False, code is only a prefix of the input:
+    an unclosed block comment yields ("BLOCK_COMMENT", start, -1) and text that does not
+    lex yet yields (None, pos, -1) instead of raising, and scanning stops there.
+    """
+    while pos < len(code):
+        # Check for block comment start
+        if code.startswith("/'", pos):
+            end = code.find("'/", pos + 2)
+            if end == -1:
+                if not final:
+                    yield "BLOCK_COMMENT", pos, -1
+                    return
+                from src.error_messaging import error_message_unclosed_block_comment
+                raise EnzoParseError(error_message_unclosed_block_comment())
+            if keep_trivia:
+                yield "BLOCK_COMMENT", pos, end + 2
+            pos = end + 2
+            continue
+
+        matched = match(code, pos)
+        if not matched:
+            # Special handling: if we see a dot followed by a number (e.g. .2), treat as DOT then NUMBER_TOKEN
+            if code[pos] == '.' and pos + 1 < len(code) and code[pos+1].isdigit():
+                # Now match the number after the dot, but only up to the next dot (for chained indices)
+                num_match = _DIGITS_REGEX.match(code, pos + 1)
+                if num_match:
+                    yield 'DOT', pos, pos+1
+                    yield 'NUMBER_TOKEN', pos+1, num_match.end()
+                    last_type = 'NUMBER_TOKEN'
+                    pos = num_match.end()
+                    continue
+            if not final:
+                yield None, pos, -1
+                return
+            raise EnzoParseError(error_message_unexpected_character(code[pos], base + pos))
+        typ, end = matched
+        # Patch: If this is a NUMBER_TOKEN and the previous token was DOT, and the number contains a dot (float), split it into multiple tokens
+        if typ == "NUMBER_TOKEN" and last_type == 'DOT' and '.' in code[pos:end]:
+            # Split at each dot for chained indices, e.g. .2.1 -> DOT, NUMBER_TOKEN(2), DOT, NUMBER_TOKEN(1)
+            parts = code[pos:end].split('.')
+            for i, part in enumerate(parts):
+                if i > 0:
+                    yield 'DOT', pos, pos+1
+                    pos += 1  # move past the dot
+                yield 'NUMBER_TOKEN', pos, pos+len(part)
+                pos += len(part)
+            last_type = 'NUMBER_TOKEN'
+            continue
+        if typ != "WHITESPACE" and typ != "COMMENT":
+            yield typ, pos, end
+            last_type = typ
+        elif keep_trivia:
+            yield typ, pos, end
+        pos = end
+
+STREAM_CHUNK_SIZE = 1 << 16
+# Tokens ending this close to the end of a chunk may still change once more text
+# arrives: "end" can become "end-loop", "Else" can become "Else if", "1." can become "1.5"
+_STREAM_LOOKAHEAD = 16
+
+def iter_tokens(stream, chunk_size: int = STREAM_CHUNK_SIZE, mode: str = "table") -> Iterator[Token]:
+    """Yield the Tokens of a text stream, reading it chunk_size characters at a time.
+
+    Produces the same tokens as Tokenizer(stream.read(), mode).tokenize(), while holding
+    roughly one chunk in memory plus whatever token is still open at its end.
+    """
+    match = LEXER_MODES[mode]
+    buffer = ""
+    base = 0             # absolute offset of buffer[0]
+    pos = 0              # where scanning resumes in buffer
+    last_type = None
+    line = 1
+    line_start = 0       # absolute offset of the current line
+    counted = 0          # newlines before buffer[counted] are already in line
+    comment_from = None  # inside a block comment: where to look for its closing '/
+    at_eof = False
+    while not at_eof:
+        chunk = stream.read(chunk_size)
+        at_eof = not chunk
+        buffer += chunk
+
+        if comment_from is not None:
+            end = buffer.find("'/", comment_from)
+            if end == -1:
+                if at_eof:
+                    from src.error_messaging import error_message_unclosed_block_comment
+                    raise EnzoParseError(error_message_unclosed_block_comment())
+            else:
+                pos = end + 2
+                comment_from = None
+
+        if comment_from is None:
+            limit = len(buffer) if at_eof else len(buffer) - _STREAM_LOOKAHEAD
+            for typ, start, end in _scan(buffer, pos, match, last_type, final=at_eof, keep_trivia=True, base=base):
+                if end == -1:
+                    # An open block comment, or text that needs more input to lex
+                    if typ == "BLOCK_COMMENT":
+                        comment_from = start + 2
+                    pos = start
+                    break
+                if end > limit:
+                    pos = start
+                    break
+                pos = end
+                if typ in TRIVIA_TYPES:
+                    continue
+                newlines = buffer.count('\n', counted, start)
+                if newlines:
+                    line += newlines
+                    line_start = base + buffer.rfind('\n', counted, start) + 1
+                counted = start
+                yield Token(typ, buffer[start:end], base + start, base + end, line, base + start - line_start + 1)
+                last_type = typ
+
+        # Drop what has been consumed, keeping one character of context for \b checks.
+        # Inside a comment only its last character can still start the closing '/.
+        if comment_from is not None:
+            comment_from = max(comment_from, len(buffer) - 1)
+            keep = comment_from - 1
+        else:
+            keep = pos - 1
+        if keep > 0:
+            if keep > counted:
+                newlines = buffer.count('\n', counted, keep)
+                if newlines:
+                    line += newlines
+                    line_start = base + buffer.rfind('\n', counted, keep) + 1
+                counted = keep
+            buffer = buffer[keep:]
+            base += keep
+            pos -= keep
+            counted -= keep
+            if comment_from is not None:
+                comment_from -= keep
+
+# Interned token type ids for TokenBuffer
+TOKEN_TYPES = tuple(name for name, _ in TOKEN_SPEC)
+TOKEN_TYPE_IDS = {name: i for i, name in enumerate(TOKEN_TYPES)}
+
+class TokenBuffer:
+    """Compact token stream: parallel array('I') columns of type id, start and end.
+
+    Values are sliced from the source and Token objects are only built when asked for.
+    """
+    def __init__(self, src: str, line_starts: Optional[List[int]] = None):
+        self.src = src
+        self.line_starts = line_starts if line_starts is not None else compute_line_starts(src)
+        self.type_ids = array('I')
+        self.starts = array('I')
+        self.ends = array('I')
+        self._cached_index = -1
+        self._cached_token = None
+
+    def append(self, typ: str, start: int, end: int) -> None:
+        self.type_ids.append(TOKEN_TYPE_IDS[typ])
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def __len__(self) -> int:
+        return len(self.type_ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self.type_ids)))]
+        if index < 0:
+            index += len(self.type_ids)
+        if index == self._cached_index:
+            return self._cached_token
+        start = self.starts[index]
+        end = self.ends[index]
+        line = bisect_right(self.line_starts, start)
+        token = Token(TOKEN_TYPES[self.type_ids[index]], self.src[start:end], start, end,
+                      line, start - self.line_starts[line - 1] + 1)
+        self._cached_index = index
+        self._cached_token = token
+        return token
+
+    def __iter__(self) -> Iterator[Token]:
+        for i in range(len(self.type_ids)):
+            yield self[i]
+
+    def peek(self, pos: int) -> Optional[Token]:
+        return self[pos] if pos < len(self.type_ids) else None
+
+    def peek_type(self, pos: int) -> Optional[str]:
+        return TOKEN_TYPES[self.type_ids[pos]] if pos < len(self.type_ids) else None
+
+    def advance(self, pos: int) -> Tuple[Token, int]:
+        return self[pos], pos + 1
+
+    def value_at(self, pos: int) -> str:
+        return self.src[self.starts[pos]:self.ends[pos]]
+
+    def has_type_between(self, typ: str, start: int, end: int) -> bool:
+        """Return True if a token of type typ starts at an offset in [start, end)."""
+        lo = bisect_left(self.starts, start)
+        hi = bisect_left(self.starts, end, lo)
+        return TOKEN_TYPE_IDS[typ] in self.type_ids[lo:hi]
+
 class Tokenizer:
-    def __init__(self, code: str):
+    def __init__(self, code: str, mode: str = "table"):
         self.code = code
+        self.mode = mode
+        self._match = LEXER_MODES[mode]
         self.pos = 0
         self.tokens: List[Token] = []
+        self.line_starts: List[int] = compute_line_starts(code)
+
+    def _scan(self) -> Iterator[Tuple[str, int, int]]:
+        """Yield (type, start, end) for every token, skipping whitespace and comments."""
+        return _scan(self.code, 0, self._match)
 
     def tokenize(self) -> List[Token]:
         code = self.code
-        pos = 0
         tokens = []
-        while pos < len(code):
-            # Check for block comment start
-            if pos < len(code) - 1 and code[pos:pos+2] == "/'":
-                # Find the end of the block comment
-                comment_start = pos
-                pos += 2  # Move past the opening /'
-
-                # Look for the closing '/
-                found_end = False
-                while pos < len(code) - 1:  # -1 because we need to check pos+1
-                    if code[pos:pos+2] == "'/":
-                        pos += 2  # Move past the closing '/
-                        found_end = True
-                        break
-                    pos += 1
-
-                if not found_end:
-                    # We reached the end without finding a closing '/
-                    from src.error_messaging import error_message_unclosed_block_comment
-                    raise EnzoParseError(error_message_unclosed_block_comment())
-
-                # Block comment found and handled, continue to next token
-                continue
-
-            m = TOKEN_REGEX.match(code, pos)
-            if not m:
-                # Special handling: if we see a dot followed by a number (e.g. .2), treat as DOT then NUMBER_TOKEN
-                if code[pos] == '.' and pos + 1 < len(code) and code[pos+1].isdigit():
-                    tokens.append(Token('DOT', '.', pos, pos+1))
-                    # Now match the number after the dot, but only up to the next dot (for chained indices)
-                    num_match = re.match(r'(\d+)', code[pos+1:])
-                    if num_match:
-                        num_val = num_match.group(0)
-                        tokens.append(Token('NUMBER_TOKEN', num_val, pos+1, pos+1+len(num_val)))
-                        pos += 1 + len(num_val)
-                        continue
-                raise EnzoParseError(error_message_unexpected_character(code[pos], pos))
-            typ = m.lastgroup
-            val = m.group(typ)
-            # Patch: If this is a NUMBER_TOKEN and the previous token was DOT, and the number contains a dot (float), split it into multiple tokens
-            if typ == "NUMBER_TOKEN" and '.' in val and tokens and tokens[-1].type == 'DOT':
-                # Split at each dot for chained indices, e.g. .2.1 -> DOT, NUMBER_TOKEN(2), DOT, NUMBER_TOKEN(1)
-                parts = val.split('.')
-                for i, part in enumerate(parts):
-                    if i > 0:
-                        tokens.append(Token('DOT', '.', pos, pos+1))
-                        pos += 1  # move past the dot
-                    tokens.append(Token('NUMBER_TOKEN', part, pos, pos+len(part)))
-                    pos += len(part)
-                continue
-            if typ == "WHITESPACE" or typ == "COMMENT":
-                pass
-            elif typ == "NEWLINE":
-                tokens.append(Token("NEWLINE", val, pos, m.end()))
-            else:
-                tokens.append(Token(typ, val, pos, m.end()))
-            pos = m.end()
+        line_starts = self.line_starts
+        line_count = len(line_starts)
+        line = 1
+        for typ, start, end in self._scan():
+            # Tokens arrive in source order, so the current line only moves forward
+            while line < line_count and line_starts[line] <= start:
+                line += 1
+            tokens.append(Token(typ, code[start:end], start, end, line, start - line_starts[line - 1] + 1))
         return tokens
 
+    def tokenize_buffer(self, skip=("NEWLINE",)) -> TokenBuffer:
+        """Tokenize into a TokenBuffer without building Token objects, dropping types in skip."""
+        buffer = TokenBuffer(self.code, self.line_starts)
+        type_ids = buffer.type_ids
+        starts = buffer.starts
+        ends = buffer.ends
+        for typ, start, end in self._scan():
+            if typ not in skip:
+                type_ids.append(TOKEN_TYPE_IDS[typ])
+                starts.append(start)
+                ends.append(end)
+        return buffer
+
+    def tokenize_pieces(self, start: int, end: int, skip=("NEWLINE", "COMMENT", "SKIP")) -> list:
+        """Tokenize code[start:end] with lexer error recovery, for the single-pass file runner.
+
+        Returns TokenBuffers and (offset, EnzoParseError) pairs in source order. An unexpected
+        character ends the current buffer and lexing resumes on the next line; an unclosed
+        block comment runs to the end of the range.
+        """
+        from src.error_messaging import error_message_unclosed_block_comment
+        code = self.code[start:end]
+        line_starts = self.line_starts
+        pieces = []
+        buffer = TokenBuffer(self.code, line_starts)
+        pos = 0
+        while pos < len(code):
+            stopped = None
+            for typ, tok_start, tok_end in _scan(code, pos, self._match, final=False):
+                if tok_end == -1:
+                    stopped = typ, tok_start
+                    break
+                if typ not in skip:
+                    buffer.append(typ, start + tok_start, start + tok_end)
+            if stopped is None:
+                break
+            if len(buffer):
+                pieces.append(buffer)
+                buffer = TokenBuffer(self.code, line_starts)
+            typ, offset = stopped
+            if typ == "BLOCK_COMMENT":
+                pieces.append((start + offset, EnzoParseError(error_message_unclosed_block_comment())))
+                return pieces
+            # Positions in the message are relative to the line, like lexing the line on its own
+            line_start = line_starts[line_of_offset(line_starts, start + offset) - 1]
+            pieces.append((start + offset, EnzoParseError(
+                error_message_unexpected_character(code[offset], start + offset - line_start))))
+            newline = code.find("\n", offset)
+            if newline == -1:
+                return pieces
+            pos = newline + 1
+        if len(buffer):
+            pieces.append(buffer)
+        return pieces
+
 # Example usage:
 # tokenizer = Tokenizer("x = 42\nfoo($bar, 3.14)")
 # tokens = tokenizer.tokenize()
@@ -0,0 +1,3 @@
+# enzo_vm package: bytecode compiler and stack VM for Enzo ASTs
+from src.enzo_vm.compiler import CodeObject, compile_root, compile_function, disassemble
+from src.enzo_vm.machine import run, install, uninstall, compile_program
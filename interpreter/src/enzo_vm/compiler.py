@@ -0,0 +1,380 @@
+# Compiler from Enzo ASTs to VM code
+#
+# Expressions (literals, text atoms, variables, arithmetic, comparisons and logic),
+# If statements and basic/while/until loops are compiled to instructions. `end-loop;`
+# and `restart-loop;` inside a compiled loop become jumps, and so does `return(...)` in a
+# function body. Calls are compiled too: the VM makes calls to Enzo functions on its own
+# call stack, and a closing `return(f(...))` in a function body becomes a tail call that
+# replaces the caller's frame. Bindings and rebindings of a variable to an expression are
+# compiled to the expression followed by BIND or REBIND, which store the value the way the
+# tree-walking handlers do. A parenthesized expression such as `($a + 1)` is compiled as
+# the expression it wraps. Every other statement is left to eval_ast through EVAL_STMT, so
+# function atoms, for loops, blueprints and the rest keep their tree-walking semantics;
+# the instructions around them evaluate children with the same arguments eval_ast's
+# handlers would use.
+
+from src.enzo_parser.ast_nodes import (
+    NumberAtom, TextAtom, VarInvoke, AddNode, SubNode, MulNode, DivNode, ModNode,
+    ComparisonExpression, LogicalExpression, NotExpression, IfStatement, LoopStatement,
+    EndLoopStatement, RestartLoopStatement, ReturnNode, Binding, BindOrRebind, Invoke, ListIndex, ListAtom,
+    FunctionAtom,
+)
+from src.enzo_parser.parser import compile_text_template
+from src.enzo_vm.opcodes import (
+    CONST, LOAD, INTERP, EVAL_EXPR, EVAL_STMT, ADD, SUB, MUL, DIV, MOD, COMPARE, TYPE_COMPARE, NOT,
+    JUMP, POP_JUMP_IF_FALSY, POP_JUMP_IF_TRUTHY, JUMP_IF_FALSY_OR_POP, JUMP_IF_TRUTHY_OR_POP,
+    ENTER_THEN, ENTER_ELSE, EXIT_BLOCK, COLLECT, ENTER_MULTI, BRANCH_ENTER, BRANCH_EXIT,
+    JUMP_IF_EXECUTED, EXIT_MULTI, SETUP_LOOP, LOOP_TOP, COND_CONTEXT, BODY_CONTEXT, LOOP_COLLECT,
+    LOOP_NEXT, POP_LOOP, END_LOOP, RESTART_LOOP, RETURN, STATEMENT_RESULT, FUNCTION_END,
+    RETURN_VALUE, CALL, TAIL_CALL, JUMP_IF_REFERENCE, LOAD_METHOD, BIND, REBIND, OPCODE_NAMES, JUMPS,
+)
+
+# Loop kinds the VM runs itself; for loops stay with eval_ast
+COMPILED_LOOP_TYPES = ("basic", "while", "until")
+
+_LOOP_LIMIT_MESSAGES = {
+    "basic": "Loop exceeded maximum iterations (possible infinite loop)",
+    "while": "While loop exceeded maximum iterations (possible infinite loop)",
+    "until": "Until loop exceeded maximum iterations (possible infinite loop)",
+}
+
+_TYPE_NAMES = ("Number", "Text", "List", "Empty", "Function")
+_ARITHMETIC = {AddNode: ADD, SubNode: SUB, MulNode: MUL, DivNode: DIV}
+_EXPRESSIONS = (NumberAtom, TextAtom, VarInvoke, AddNode, SubNode, MulNode, DivNode, ModNode,
+                ComparisonExpression, LogicalExpression, NotExpression)
+# Bodies of parenthesized expressions compiled in place of the call invoking them: their
+# handlers give their operands no is_function_context, so the call's scope changes nothing
+_INLINE_BODIES = (AddNode, SubNode, MulNode, DivNode, ModNode, ComparisonExpression, LogicalExpression, NotExpression)
+# Values BIND and REBIND store: their handlers do not look at the scope context
+# (is_function_context, outer_env, loop_locals) eval_ast would have passed them
+_BOUND_VALUES = _EXPRESSIONS + (Invoke, ListAtom, ListIndex)
+
+
+class CodeObject:
+    """Compiled code for one root node or one function body."""
+    __slots__ = ("code", "consts", "is_function", "is_multiline", "name")
+
+    def __init__(self, code, consts, is_function=False, is_multiline=False, name=""):
+        self.code = code
+        self.consts = consts
+        self.is_function = is_function
+        self.is_multiline = is_multiline
+        self.name = name
+
+    def __repr__(self):
+        return f"<code {self.name} ({len(self.code) // 2} instructions)>"
+
+
+class LoadInfo:
+    """Argument of LOAD: a variable read and how eval_ast would have been asked for it."""
+    __slots__ = ("name", "code_line", "depth", "invocable", "value_demand", "pass_loop_context")
+
+    def __init__(self, name, code_line, depth, value_demand, pass_loop_context):
+        self.name = name
+        self.code_line = code_line
+        self.depth = depth
+        # Bare function names (without $ sigil) cannot be auto-invoked
+        self.invocable = name.startswith('$')
+        self.value_demand = value_demand
+        self.pass_loop_context = pass_loop_context
+
+    def __repr__(self):
+        return self.name
+
+
+class LoopInfo:
+    """Argument of SETUP_LOOP."""
+    __slots__ = ("loop_type", "code_line", "limit_message", "next_target", "exit_target")
+
+    def __init__(self, node):
+        self.loop_type = node.loop_type
+        self.code_line = node.code_line
+        self.limit_message = _LOOP_LIMIT_MESSAGES[node.loop_type]
+        self.next_target = None
+        self.exit_target = None
+
+    def __repr__(self):
+        return f"{self.loop_type} loop, next {self.next_target}, exit {self.exit_target}"
+
+
+class CallInfo:
+    """Argument of CALL and TAIL_CALL: the Invoke whose callee and arguments are on the stack.
+
+    For method calls the object the method was looked up on is below the callee.
+    """
+    __slots__ = ("node", "arg_count", "pass_loop_context", "is_method")
+
+    def __init__(self, node, pass_loop_context):
+        self.node = node
+        self.arg_count = len(node.args)
+        self.pass_loop_context = pass_loop_context
+        self.is_method = _is_method_call(node)
+
+    def __repr__(self):
+        return f"{self.arg_count} args, line {self.node.code_line}"
+
+
+def _is_literal(node):
+    cls = type(node)
+    return cls is NumberAtom or (cls is TextAtom and "<" not in node.value)
+
+
+def _is_method_call(node):
+    return type(node.func) is ListIndex and node.func.is_property_access
+
+
+def _is_inline_expression(node):
+    """Whether a function atom is a parenthesized expression such as `($a + 1)`.
+
+    Invoking it binds nothing in its scope, so evaluating the expression where it stands
+    gives the same value without making a function and calling it.
+    """
+    return (not node.params and not node.local_vars and len(node.body) == 1
+            and type(node.body[0]) in _INLINE_BODIES and not node.is_multiline
+            and not getattr(node, 'is_named', False) and not getattr(node, 'is_explicit_reference', False))
+
+
+def is_tail_call(stmt):
+    """Whether a function body statement is `return(f(...))`."""
+    return type(stmt) is ReturnNode and type(stmt.value) is Invoke
+
+
+class _Compiler:
+    def __init__(self, is_function):
+        self.code = []
+        self.consts = []
+        self.is_function = is_function
+        self.loop_depth = 0
+
+    def emit(self, op, arg=0):
+        self.code.append(op)
+        self.code.append(arg)
+        return len(self.code) - 1
+
+    def emit_const(self, op, value):
+        self.consts.append(value)
+        return self.emit(op, len(self.consts) - 1)
+
+    def label(self):
+        return len(self.code)
+
+    def patch(self, position, target):
+        self.code[position] = target
+
+    def expression(self, node, value_demand, pass_loop_context):
+        """Code leaving the value of eval_ast(node, value_demand, env, is_loop_context) on the stack.
+
+        pass_loop_context says whether the caller would pass its is_loop_context on (True)
+        or leave the default of False.
+        """
+        cls = type(node)
+        if node is None:
+            self.emit_const(CONST, None)
+        elif cls is NumberAtom:
+            self.emit_const(CONST, node.value)
+        elif cls is TextAtom:
+            if "<" not in node.value:
+                self.emit_const(CONST, node.value)
+            else:
+                if node.segments is None:
+                    node.segments = compile_text_template(node.value)
+                self.emit_const(INTERP, (node.segments, getattr(node, 'code_line', None)))
+        elif cls is VarInvoke:
+            self.emit_const(LOAD, LoadInfo(node.name, node.code_line, node.scope_depth, value_demand, pass_loop_context))
+        elif cls in _ARITHMETIC:
+            self.expression(node.left, True, pass_loop_context)
+            self.expression(node.right, True, pass_loop_context)
+            self.emit(_ARITHMETIC[cls])
+        elif cls is ModNode:
+            self.expression(node.left, True, pass_loop_context)
+            self.expression(node.right, True, pass_loop_context)
+            self.emit_const(MOD, getattr(node, 'code_line', None))
+        elif cls is ComparisonExpression:
+            if node.operator in ("is", "is not") and isinstance(node.right, VarInvoke) and node.right.name in _TYPE_NAMES:
+                # For Function type comparisons, don't auto-invoke the left side
+                self.expression(node.left, node.right.name != "Function", False)
+                self.emit_const(TYPE_COMPARE, (node.operator, node.right.name))
+            else:
+                self.expression(node.left, True, False)
+                self.expression(node.right, True, False)
+                self.emit_const(COMPARE, node.operator)
+        elif cls is LogicalExpression and node.operator in ("and", "or"):
+            self.expression(node.left, False, False)
+            jump = self.emit(JUMP_IF_FALSY_OR_POP if node.operator == "and" else JUMP_IF_TRUTHY_OR_POP)
+            self.expression(node.right, False, False)
+            self.patch(jump, self.label())
+        elif cls is NotExpression:
+            self.expression(node.operand, False, False)
+            self.emit(NOT)
+        elif cls is Invoke:
+            self.call(node, CALL, pass_loop_context)
+        elif cls is FunctionAtom and value_demand and _is_inline_expression(node):
+            # The body runs with is_loop_context False, like any function body
+            self.expression(node.body[0], True, False)
+        else:
+            self.emit_const(EVAL_EXPR, (node, value_demand, pass_loop_context))
+
+    def statement(self, stmt, value_demand):
+        """Code leaving the statement's result on the stack (or leaving the block for a jump)."""
+        cls = type(stmt)
+        if cls is IfStatement:
+            self.if_statement(stmt)
+        elif cls is LoopStatement and stmt.loop_type in COMPILED_LOOP_TYPES:
+            self.loop(stmt)
+        elif cls is EndLoopStatement and self.loop_depth:
+            self.emit(END_LOOP)
+        elif cls is RestartLoopStatement and self.loop_depth:
+            self.emit(RESTART_LOOP)
+        elif cls is ReturnNode and self.is_function:
+            self.expression(stmt.value, True, False)
+            self.emit(RETURN)
+        elif stmt is None or cls in _EXPRESSIONS or cls is Invoke:
+            self.expression(stmt, value_demand, True)
+        elif cls is Binding and stmt.name != '$this' and type(stmt.value) in _BOUND_VALUES:
+            # Compiled statements all run in a block or function scope, where a binding
+            # may shadow an existing name, so there is no redefinition check to make first
+            self.expression(stmt.value, False, False)
+            self.emit_const(BIND, stmt)
+        elif cls is BindOrRebind and isinstance(stmt.target, (str, VarInvoke)) and type(stmt.value) in _BOUND_VALUES:
+            self.expression(stmt.value, True, False)
+            self.emit_const(REBIND, stmt)
+        else:
+            self.emit_const(EVAL_STMT, (stmt, value_demand))
+
+    def call(self, node, op, pass_loop_context):
+        # Operands are evaluated the way _eval_invoke evaluates them: the callee without
+        # value demand, then each argument without, and again with value demand unless
+        # the first evaluation gave a reference
+        if _is_method_call(node):
+            self.expression(node.func.base, False, False)
+            self.emit_const(LOAD_METHOD, (node.func, pass_loop_context))
+        else:
+            self.expression(node.func, False, pass_loop_context)
+        for arg in node.args:
+            self.expression(arg, False, pass_loop_context)
+            if not _is_literal(arg):
+                keep = self.emit(JUMP_IF_REFERENCE)
+                self.expression(arg, True, pass_loop_context)
+                self.patch(keep, self.label())
+        self.emit_const(op, CallInfo(node, pass_loop_context))
+
+    def block(self, statements):
+        # Statements in If blocks are evaluated without value demand
+        for stmt in statements:
+            self.statement(stmt, False)
+            self.emit(COLLECT)
+
+    def if_statement(self, node):
+        if getattr(node, 'is_non_exclusive_multi_branch', False):
+            # Every branch whose condition holds runs; else only when none did
+            self.emit(ENTER_MULTI)
+            for condition, then_block in node.all_branches:
+                self.expression(condition, False, True)
+                skip = self.emit(POP_JUMP_IF_FALSY)
+                self.emit(BRANCH_ENTER)
+                self.block(then_block)
+                self.emit(BRANCH_EXIT)
+                self.patch(skip, self.label())
+            if node.else_block:
+                done = self.emit(JUMP_IF_EXECUTED)
+                self.emit(BRANCH_ENTER)
+                self.block(node.else_block)
+                self.emit(BRANCH_EXIT)
+                self.patch(done, self.label())
+            self.emit(EXIT_MULTI)
+            return
+        self.expression(node.condition, False, True)
+        to_else = self.emit(POP_JUMP_IF_FALSY)
+        self.emit(ENTER_THEN)
+        self.block(node.then_block)
+        self.emit(EXIT_BLOCK)
+        to_end = self.emit(JUMP)
+        self.patch(to_else, self.label())
+        if node.else_block:
+            self.emit(ENTER_ELSE)
+            self.block(node.else_block)
+            self.emit(EXIT_BLOCK)
+        else:
+            self.emit_const(CONST, None)
+        self.patch(to_end, self.label())
+
+    def loop(self, node):
+        info = LoopInfo(node)
+        self.emit_const(SETUP_LOOP, info)
+        top = self.label()
+        self.emit(LOOP_TOP)
+        exit_jump = None
+        if node.loop_type != "basic":
+            self.emit(COND_CONTEXT)
+            self.expression(node.condition, False, True)
+            exit_jump = self.emit(POP_JUMP_IF_FALSY if node.loop_type == "while" else POP_JUMP_IF_TRUTHY)
+            self.emit(BODY_CONTEXT)
+        self.loop_depth += 1
+        for stmt in node.body:
+            self.statement(stmt, True)
+            # A basic loop splices in the results of a nested loop
+            self.emit(LOOP_COLLECT, int(node.loop_type == "basic" and isinstance(stmt, LoopStatement)))
+        self.loop_depth -= 1
+        info.next_target = self.label()
+        self.emit(LOOP_NEXT, top)
+        info.exit_target = self.label()
+        if exit_jump is not None:
+            self.patch(exit_jump, info.exit_target)
+        self.emit(POP_LOOP)
+
+
+def is_compiled_root(node):
+    """Whether compile_root handles node itself rather than handing it back to eval_ast."""
+    cls = type(node)
+    if cls is LoopStatement:
+        return node.loop_type in COMPILED_LOOP_TYPES
+    return cls is IfStatement or (cls in _EXPRESSIONS and cls not in (NumberAtom, TextAtom, VarInvoke))
+
+
+def compile_root(node):
+    """Compile a node eval_ast was asked to evaluate: an If, a loop or an expression."""
+    compiler = _Compiler(is_function=False)
+    compiler.statement(node, True)
+    compiler.emit(RETURN_VALUE)
+    return CodeObject(compiler.code, compiler.consts, name=type(node).__name__)
+
+
+def compile_function(local_vars, body, is_multiline):
+    """Compile a function body the way invoke_function runs it: local bindings, then the body."""
+    compiler = _Compiler(is_function=True)
+    for stmt in local_vars:
+        compiler.statement(stmt, True)
+        compiler.emit(STATEMENT_RESULT, 0)
+    for i, stmt in enumerate(body):
+        if i == len(body) - 1 and is_tail_call(stmt):
+            # TAIL_CALL leaves a value only when the callee was indexed rather than called
+            compiler.call(stmt.value, TAIL_CALL, False)
+            compiler.emit(RETURN)
+            break
+        compiler.statement(stmt, True)
+        # Multi-line functions print standalone expression results as they go
+        shows = is_multiline and not isinstance(stmt, (Binding, BindOrRebind, ReturnNode))
+        compiler.emit(STATEMENT_RESULT, int(shows))
+    compiler.emit(FUNCTION_END)
+    return CodeObject(compiler.code, compiler.consts, is_function=True, is_multiline=is_multiline, name="function")
+
+
+def disassemble(code_object):
+    """Readable listing of a CodeObject, one instruction per line."""
+    lines = []
+    code = code_object.code
+    for pc in range(0, len(code), 2):
+        op, arg = code[pc], code[pc + 1]
+        name = OPCODE_NAMES[op]
+        if op in JUMPS:
+            detail = f"-> {arg}"
+        elif op in (CONST, LOAD, INTERP, EVAL_EXPR, EVAL_STMT, MOD, COMPARE, TYPE_COMPARE, SETUP_LOOP, CALL, TAIL_CALL, LOAD_METHOD, BIND, REBIND):
+            detail = repr(code_object.consts[arg])
+            if len(detail) > 60:
+                detail = detail[:57] + "..."
+        elif arg:
+            detail = str(arg)
+        else:
+            detail = ""
+        lines.append(f"{pc:5d} {name:22s}{detail}")
+    return "\n".join(lines)
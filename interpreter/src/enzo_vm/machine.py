@@ -0,0 +1,515 @@
+# The Enzo VM: a stack machine running CodeObjects
+#
+# Registers: env, is_function_context, outer_env, loop_locals and is_loop_context, the
+# same context eval_ast threads through its handlers. Blocks (If blocks and loops) push
+# a record on the block stack and save the registers they replace; loop control and
+# `return` unwind that stack directly instead of raising. Exceptions raised by eval_ast
+# fallbacks (including loop signals from code the VM did not compile) unwind it the way
+# the tree-walking handlers' try blocks would have.
+#
+# Calls to Enzo functions from compiled code do not recurse into run(): CALL saves the
+# caller's frame (code, pc, stacks and registers) on the call stack and runs the callee's
+# code in the same loop, and RETURN resumes the caller; TAIL_CALL reuses the caller's
+# frame. Recursion depth, tail calls included, is then bounded by MAX_CALL_DEPTH rather
+# than by Python's recursion limit.
+
+from collections import ChainMap
+
+from src.enzo_parser.ast_nodes import Program, LoopStatement
+from src.enzo_vm.compiler import CodeObject, compile_root, compile_function, is_compiled_root
+from src.enzo_vm.opcodes import (
+    CONST, LOAD, INTERP, EVAL_EXPR, EVAL_STMT, ADD, SUB, MUL, DIV, MOD, COMPARE, TYPE_COMPARE, NOT,
+    JUMP, POP_JUMP_IF_FALSY, JUMP_IF_FALSY_OR_POP, JUMP_IF_TRUTHY_OR_POP,
+    ENTER_THEN, ENTER_ELSE, EXIT_BLOCK, COLLECT, ENTER_MULTI, BRANCH_ENTER, BRANCH_EXIT,
+    JUMP_IF_EXECUTED, EXIT_MULTI, SETUP_LOOP, LOOP_TOP, COND_CONTEXT, BODY_CONTEXT, LOOP_COLLECT,
+    LOOP_NEXT, POP_LOOP, END_LOOP, RESTART_LOOP, RETURN, STATEMENT_RESULT, FUNCTION_END,
+    CALL, TAIL_CALL, JUMP_IF_REFERENCE, BIND, REBIND,
+)
+from src.evaluator import (
+    eval_ast, register_eval_handler, get_eval_handler, set_function_body_runner, invoke_function, lookup_variable,
+    bind_call_arguments, MAX_CALL_DEPTH, _interp_segments, _is_truthy, _compare_values, _call_target, _apply_invoke,
+    _index_value, _bind_value, _rebind_value, is_function,
+    EndLoopSignal, RestartLoopSignal, EnzoFunction, MethodReference, ReferenceWrapper, ListElementReference,
+)
+from src.builtin_functions import BuiltinFunction
+from src.runtime_helpers import format_val
+from src.error_handling import EnzoRuntimeError, EnzoRecursionError, ReturnSignal
+from src.error_messaging import error_message_unknown_variable, error_message_maximum_recursion_depth_exceeded
+
+# Same safety limit as the tree-walking loops
+MAX_LOOP_ITERATIONS = 10000
+# Function bodies are compiled on their second call; many functions are called once, and
+# compiling them costs more than walking them. Loops are compiled on their first run.
+COMPILE_AFTER = 2
+
+# Block record kinds. Records are lists:
+#   [THEN or ELSE, results, saved depth]
+#   [MULTI, results, saved depth, any branch executed]
+#   [LOOP, results, iterations, LoopInfo, body context, condition context, saved depth,
+#    stack depth, evaluating the condition]
+THEN, ELSE, MULTI, LOOP = range(4)
+
+_REFERENCES = (ReferenceWrapper, ListElementReference)
+# Values LOAD hands to _load_wrapped; functions only when they may be invoked
+_WRAPPED = _REFERENCES + (EnzoFunction, BuiltinFunction, MethodReference)
+
+# Loops keep their code in node.vm_code and function bodies in their FunctionAtom's
+# vm_code; until a function body is compiled, vm_code counts its calls.
+# Tree-walking handlers replaced by install(), restored by uninstall()
+_tree_handlers = {}
+
+
+def _load_wrapped(info, val, env, is_loop_context):
+    # VarInvoke semantics for references, functions and method references
+    code_line = info.code_line
+    if isinstance(val, _REFERENCES):
+        referenced_val = val.get_value()
+        if info.value_demand and is_function(referenced_val):
+            if not info.invocable:
+                raise EnzoRuntimeError("error: expected function reference (@) or function invocation ($)", code_line=code_line)
+            return invoke_function(referenced_val, [], env, self_obj=None, is_loop_context=is_loop_context)
+        return referenced_val
+    if info.value_demand:
+        if not info.invocable:
+            raise EnzoRuntimeError("error: expected function reference (@) or function invocation ($)", code_line=code_line)
+        if is_function(val):
+            return invoke_function(val, [], env, self_obj=None, is_loop_context=is_loop_context)
+        return invoke_function(val.method_function, [], env, self_obj=val.self_object, is_loop_context=is_loop_context)
+    return val
+
+
+def _block_value(results):
+    if not results:
+        return None
+    if len(results) == 1:
+        return results[0]
+    return results
+
+
+def _unwind_loop_signal(signal, blocks, saved, stack):
+    """Unwind blocks for an end-loop or restart-loop signal.
+
+    Returns (target, context) for the innermost loop that takes the signal, or None
+    when no loop in this code does (blocks is then empty).
+    """
+    while blocks:
+        record = blocks[-1]
+        kind = record[0]
+        if kind == LOOP and not record[8]:
+            # The loop keeps the last result that came with the signal and carries on
+            if signal.last_result is not None:
+                record[1].append(signal.last_result)
+            del saved[record[6]:]
+            del stack[record[7]:]
+            info = record[3]
+            return (info.exit_target if isinstance(signal, EndLoopSignal) else info.next_target), record[4]
+        blocks.pop()
+        if kind != ELSE and kind != LOOP and record[1] and signal.last_result is None:
+            # Then blocks and multi-branch Ifs hand their results to the loop
+            signal.last_result = _block_value(record[1])
+    return None
+
+
+def _print_block_results(blocks):
+    # An If block that fails (or returns) prints what it produced so far, innermost first
+    while blocks:
+        record = blocks.pop()
+        if record[0] != LOOP:
+            for result in record[1]:
+                print(format_val(result))
+
+
+def run(code_object, env, is_function_context=False, outer_env=None, loop_locals=None, is_loop_context=False):
+    """Run code_object in the given evaluation context and return its result."""
+    code = code_object.code
+    consts = code_object.consts
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    blocks = []
+    saved = []
+    result = None
+    pc = 0
+    # Callers' frames: (code_object, pc, stack, blocks, saved, result, env, is_function_context,
+    # outer_env, loop_locals, is_loop_context, depth)
+    frames = []
+    # Calls made since this run started that have not returned, tail calls included
+    depth = 0
+    while True:
+        try:
+            while True:
+                op = code[pc]
+                arg = code[pc + 1]
+                pc += 2
+                if op < ADD:
+                    if op == LOAD:
+                        info = consts[arg]
+                        try:
+                            val = lookup_variable(env, info.name, info.depth)
+                        except KeyError:
+                            raise EnzoRuntimeError(error_message_unknown_variable(info.name), code_line=info.code_line) from None
+                        if isinstance(val, _WRAPPED) and (info.value_demand or isinstance(val, _REFERENCES)):
+                            val = _load_wrapped(info, val, env, is_loop_context if info.pass_loop_context else False)
+                        push(val)
+                    elif op == CONST:
+                        push(consts[arg])
+                    elif op == EVAL_STMT:
+                        node, value_demand = consts[arg]
+                        push(eval_ast(node, value_demand=value_demand, env=env, is_function_context=is_function_context,
+                                      outer_env=outer_env, loop_locals=loop_locals, is_loop_context=is_loop_context))
+                    elif op == EVAL_EXPR:
+                        node, value_demand, pass_loop_context = consts[arg]
+                        push(eval_ast(node, value_demand=value_demand, env=env,
+                                      is_loop_context=is_loop_context if pass_loop_context else False))
+                    elif op == COLLECT:
+                        value = pop()
+                        if value is not None:
+                            blocks[-1][1].append(value)
+                    elif op == LOOP_COLLECT:
+                        value = pop()
+                        if value is not None:
+                            if arg and isinstance(value, list):
+                                blocks[-1][1].extend(value)
+                            else:
+                                blocks[-1][1].append(value)
+                    elif op == POP_JUMP_IF_FALSY:
+                        if not _is_truthy(pop()):
+                            pc = arg
+                    elif op == JUMP:
+                        pc = arg
+                    elif op == STATEMENT_RESULT:
+                        result = pop()
+                        if arg and result is not None:
+                            print(format_val(result))
+                    else:  # RETURN_VALUE
+                        return pop()
+                elif op < LOOP_TOP:
+                    if op == ADD:
+                        right = pop()
+                        stack[-1] = stack[-1] + right
+                    elif op == SUB:
+                        right = pop()
+                        stack[-1] = stack[-1] - right
+                    elif op == MUL:
+                        right = pop()
+                        stack[-1] = stack[-1] * right
+                    elif op == DIV:
+                        right = pop()
+                        stack[-1] = stack[-1] / right
+                    elif op == MOD:
+                        right = pop()
+                        if right == 0:
+                            raise EnzoRuntimeError("error: No division by zero", code_line=consts[arg])
+                        # Euclidean modulo: result is always non-negative
+                        value = stack[-1] % right
+                        if value < 0:
+                            value += abs(right)
+                        stack[-1] = value
+                    elif op == COMPARE:
+                        right = pop()
+                        stack[-1] = _compare_values(stack[-1], consts[arg], right)
+                    elif op == TYPE_COMPARE:
+                        operator, type_name = consts[arg]
+                        stack[-1] = _compare_values(stack[-1], operator, type_name)
+                    elif op == NOT:
+                        stack[-1] = not _is_truthy(stack[-1])
+                    elif op == INTERP:
+                        segments, code_line = consts[arg]
+                        push(_interp_segments(segments, src_line=code_line, env=env))
+                    else:  # POP
+                        pop()
+                elif op < JUMP_IF_FALSY_OR_POP:
+                    if op == LOOP_TOP:
+                        record = blocks[-1]
+                        if record[2] >= MAX_LOOP_ITERATIONS:
+                            raise EnzoRuntimeError(record[3].limit_message, code_line=record[3].code_line)
+                    elif op == COND_CONTEXT:
+                        record = blocks[-1]
+                        record[8] = True
+                        env, is_function_context, outer_env, loop_locals, is_loop_context = record[5]
+                    elif op == BODY_CONTEXT:
+                        record = blocks[-1]
+                        record[8] = False
+                        env, is_function_context, outer_env, loop_locals, is_loop_context = record[4]
+                    elif op == LOOP_NEXT:
+                        blocks[-1][2] += 1
+                        pc = arg
+                    elif op == ENTER_THEN or op == ENTER_ELSE:
+                        saved.append((env, is_function_context, outer_env, loop_locals, is_loop_context))
+                        blocks.append([THEN if op == ENTER_THEN else ELSE, [], len(saved)])
+                        # Isolated scope; in a loop, rebinding still targets the loop's outer scope
+                        if not is_loop_context:
+                            outer_env = env
+                        env = env.copy()
+                        is_function_context = True
+                    elif op == EXIT_BLOCK:
+                        record = blocks.pop()
+                        env, is_function_context, outer_env, loop_locals, is_loop_context = saved.pop()
+                        push(_block_value(record[1]))
+                    elif op == RETURN or op == FUNCTION_END:
+                        if op == RETURN:
+                            value = pop()
+                            _print_block_results(blocks)
+                        else:
+                            value = None if code_object.is_multiline else result
+                        if not frames:
+                            return value
+                        (code_object, pc, stack, blocks, saved, result, env, is_function_context, outer_env,
+                         loop_locals, is_loop_context, depth) = frames.pop()
+                        code = code_object.code
+                        consts = code_object.consts
+                        push = stack.append
+                        pop = stack.pop
+                        push(value)
+                    else:  # POP_JUMP_IF_TRUTHY
+                        if _is_truthy(pop()):
+                            pc = arg
+                elif op >= CALL:
+                    if op == CALL or op == TAIL_CALL:
+                        info = consts[arg]
+                        node = info.node
+                        if info.arg_count:
+                            args = stack[-info.arg_count:]
+                            del stack[-info.arg_count:]
+                        else:
+                            args = []
+                        callee = pop()
+                        receiver = pop() if info.is_method else None
+                        if isinstance(callee, ReferenceWrapper):
+                            callee = callee.get_value()
+                        call_loop_context = is_loop_context if info.pass_loop_context else False
+                        call_target = _call_target(callee, receiver)
+                        if call_target is None:
+                            # Indexing
+                            push(_apply_invoke(node, callee, args, receiver, env, call_loop_context))
+                            continue
+                        function, self_obj = call_target
+                        callee_code = function.atom.vm_code if type(function) is EnzoFunction else None
+                        if type(callee_code) is not CodeObject:
+                            callee_code = _callee_code(function)
+                        if callee_code is None:
+                            push(invoke_function(function, args, env, self_obj=self_obj, is_loop_context=call_loop_context))
+                            continue
+                        call_env = bind_call_arguments(function, args, env, self_obj=self_obj, is_loop_context=call_loop_context)
+                        if depth >= MAX_CALL_DEPTH:
+                            raise EnzoRecursionError(error_message_maximum_recursion_depth_exceeded())
+                        if op == CALL:
+                            frames.append((code_object, pc, stack, blocks, saved, result, env, is_function_context,
+                                           outer_env, loop_locals, is_loop_context, depth))
+                            stack = []
+                            push = stack.append
+                            pop = stack.pop
+                            blocks = []
+                            saved = []
+                        # A tail call is the last statement of a function body, outside any block,
+                        # so the caller's frame has nothing left to keep
+                        depth += 1
+                        code_object = callee_code
+                        code = code_object.code
+                        consts = code_object.consts
+                        pc = 0
+                        result = None
+                        env, is_function_context, outer_env, loop_locals, is_loop_context = call_env, True, None, None, False
+                    elif op == REBIND:
+                        stack[-1] = _rebind_value(consts[arg], stack[-1], env, is_function_context, outer_env, loop_locals)
+                    elif op == BIND:
+                        stack[-1] = _bind_value(consts[arg], stack[-1], env, loop_locals)
+                    elif op == JUMP_IF_REFERENCE:
+                        if isinstance(stack[-1], ReferenceWrapper):
+                            pc = arg
+                        else:
+                            pop()
+                    else:  # LOAD_METHOD
+                        node, pass_loop_context = consts[arg]
+                        push(_index_value(node, stack[-1], False, env, is_loop_context if pass_loop_context else False))
+                elif op == JUMP_IF_FALSY_OR_POP:
+                    if not _is_truthy(stack[-1]):
+                        pc = arg
+                    else:
+                        pop()
+                elif op == JUMP_IF_TRUTHY_OR_POP:
+                    if _is_truthy(stack[-1]):
+                        pc = arg
+                    else:
+                        pop()
+                elif op == SETUP_LOOP:
+                    info = consts[arg]
+                    enclosing = (env, is_function_context, outer_env, loop_locals, is_loop_context)
+                    saved.append(enclosing)
+                    loop_env = ChainMap({}, env)
+                    # The body runs in the loop scope as a loop context; rebinding reaches the
+                    # enclosing scope, and loop_locals tracks the variables the loop shadows
+                    body = (loop_env, True, env, set(), True)
+                    # The condition sees the loop scope but keeps the enclosing loop context
+                    condition = (loop_env, is_function_context, outer_env, loop_locals, is_loop_context)
+                    blocks.append([LOOP, [], 0, info, body, condition, len(saved), len(stack), False])
+                    env, is_function_context, outer_env, loop_locals, is_loop_context = body
+                elif op == POP_LOOP:
+                    record = blocks.pop()
+                    env, is_function_context, outer_env, loop_locals, is_loop_context = saved.pop()
+                    push(record[1] if record[1] else None)
+                elif op == END_LOOP or op == RESTART_LOOP:
+                    signal = EndLoopSignal() if op == END_LOOP else RestartLoopSignal()
+                    pc, context = _unwind_loop_signal(signal, blocks, saved, stack)
+                    env, is_function_context, outer_env, loop_locals, is_loop_context = context
+                elif op == ENTER_MULTI:
+                    blocks.append([MULTI, [], len(saved), False])
+                elif op == BRANCH_ENTER:
+                    blocks[-1][3] = True
+                    saved.append((env, is_function_context, outer_env, loop_locals, is_loop_context))
+                    if not is_loop_context:
+                        outer_env = env
+                    env = env.copy()
+                    is_function_context = True
+                elif op == BRANCH_EXIT:
+                    env, is_function_context, outer_env, loop_locals, is_loop_context = saved.pop()
+                elif op == JUMP_IF_EXECUTED:
+                    if blocks[-1][3]:
+                        pc = arg
+                elif op == EXIT_MULTI:
+                    push(_block_value(blocks.pop()[1]))
+                else:
+                    raise RuntimeError(f"bad opcode {op} at {pc - 2}")
+        except (EndLoopSignal, RestartLoopSignal) as signal:
+            # Frames without a loop to take the signal return it to their callers
+            while True:
+                target = _unwind_loop_signal(signal, blocks, saved, stack)
+                if target is not None:
+                    break
+                if code_object.is_function and result is not None:
+                    # The calling loop collects the last result before the signal
+                    signal.last_result = result
+                if not frames:
+                    raise
+                (code_object, pc, stack, blocks, saved, result, env, is_function_context, outer_env,
+                 loop_locals, is_loop_context, depth) = frames.pop()
+                code = code_object.code
+                consts = code_object.consts
+                push = stack.append
+                pop = stack.pop
+            pc, context = target
+            env, is_function_context, outer_env, loop_locals, is_loop_context = context
+        except ReturnSignal as ret:
+            # A `return` the compiler left to eval_ast (in a for loop, say)
+            _print_block_results(blocks)
+            if not frames:
+                raise
+            (code_object, pc, stack, blocks, saved, result, env, is_function_context, outer_env,
+             loop_locals, is_loop_context, depth) = frames.pop()
+            code = code_object.code
+            consts = code_object.consts
+            push = stack.append
+            pop = stack.pop
+            push(ret.value)
+        except Exception:
+            _print_block_results(blocks)
+            for frame in reversed(frames):
+                _print_block_results(frame[3])
+            raise
+
+
+def _compile_when_warm(node):
+    """Return the code for a root node, or None when it stays on the tree walker."""
+    if not is_compiled_root(node):
+        # for loops
+        return None
+    try:
+        code = compile_root(node)
+    except RecursionError:
+        # Too deeply nested to compile
+        return None
+    node.vm_code = code
+    return code
+
+
+def _run_root(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    code = node.vm_code
+    if type(code) is not CodeObject:
+        code = _compile_when_warm(node)
+        if code is None:
+            return _tree_handlers[type(node)](node, value_demand, already_invoked, env, src_line,
+                                              is_function_context, outer_env, loop_locals, is_loop_context)
+    return run(code, env, is_function_context, outer_env, loop_locals, is_loop_context)
+
+
+def _function_code(fn, compile_now=False):
+    """Return the code for fn's body, or None while it should stay on the tree walker.
+
+    compile_now skips the warm-up, for calls made from VM code.
+    """
+    atom = fn.atom
+    code = atom.vm_code
+    if type(code) is CodeObject:
+        return code
+    calls = (code or 0) + 1
+    if not compile_now and calls < COMPILE_AFTER:
+        atom.vm_code = calls
+        return None
+    code = compile_function(fn.local_vars, fn.body, fn.is_multiline)
+    atom.vm_code = code
+    return code
+
+
+def _callee_code(fn):
+    """Code for a function called from VM code, or None if the call is left to invoke_function."""
+    if not isinstance(fn, EnzoFunction):
+        return None
+    try:
+        return _function_code(fn, compile_now=True)
+    except RecursionError:
+        # Too deeply nested to compile
+        return None
+
+
+def run_function_body(fn, env, compile_now=False):
+    """Run an EnzoFunction's body in its call environment, as invoke_function would.
+
+    Returns NotImplemented, leaving the call to invoke_function, until the body is warm;
+    compile_now compiles it on the first call.
+    """
+    try:
+        code = _callee_code(fn) if compile_now else _function_code(fn)
+        if code is None:
+            return NotImplemented
+        return run(code, env, True, None, None, False)
+    except RecursionError:
+        raise EnzoRecursionError(error_message_maximum_recursion_depth_exceeded())
+    except ReturnSignal as ret:
+        return ret.value
+
+
+def compile_program(tree):
+    """Compile the loops among the statements of tree ahead of running them.
+
+    Loops nested in other statements are compiled by _run_root when they first run.
+    """
+    if isinstance(tree, Program):
+        tree = tree.statements
+    statements = tree if isinstance(tree, (list, tuple)) else [tree]
+    for stmt in statements:
+        if type(stmt) is LoopStatement and is_compiled_root(stmt) and stmt.vm_code is None:
+            _compile_when_warm(stmt)
+
+
+# Only loops are run as roots. An If statement or an expression that eval_ast meets on its
+# own runs its instructions once, and each costs about as much as the tree-walking handler
+# call it replaces, so starting a run() for it is pure overhead; inside loops and function
+# bodies they are compiled along with the code around them.
+_ROOT_TYPES = (LoopStatement,)
+
+
+def install():
+    """Run loops and function bodies on the VM."""
+    for node_class in _ROOT_TYPES:
+        if node_class not in _tree_handlers:
+            _tree_handlers[node_class] = get_eval_handler(node_class)
+        register_eval_handler(node_class)(_run_root)
+    set_function_body_runner(run_function_body)
+
+
+def uninstall():
+    """Go back to the tree-walking evaluator."""
+    for node_class, handler in _tree_handlers.items():
+        register_eval_handler(node_class)(handler)
+    _tree_handlers.clear()
+    set_function_body_runner(None)
@@ -0,0 +1,73 @@
+# Instruction set of the Enzo VM
+#
+# An instruction is two ints in CodeObject.code: the opcode and its argument (0 when
+# unused). Jump arguments are absolute positions in code; other arguments index
+# CodeObject.consts.
+#
+# Opcodes are numbered in groups of ten, most frequently executed group first; the VM
+# dispatches on the group before the opcode, so keep new opcodes in the right group.
+
+# Group 0: values, statement results and plain jumps
+LOAD = 0                # push a variable; consts[arg] is a LoadInfo
+CONST = 1               # push consts[arg]
+EVAL_STMT = 2           # push eval_ast(node) with the full statement context; consts[arg] is (node, value_demand)
+EVAL_EXPR = 3           # push eval_ast(node) for an expression the compiler does not cover; consts[arg] is (node, value_demand, pass_loop_context)
+COLLECT = 4             # pop a statement result into the innermost If block's results
+LOOP_COLLECT = 5        # pop a body statement result into the loop's results; arg 1 flattens lists
+POP_JUMP_IF_FALSY = 6
+JUMP = 7
+STATEMENT_RESULT = 8    # pop a function body statement result; arg 1 prints it (multi-line functions)
+RETURN_VALUE = 9        # leave root code with the popped value
+
+# Group 1: arithmetic, comparison and text
+ADD = 10
+SUB = 11
+MUL = 12
+DIV = 13
+MOD = 14                # Euclidean modulo; consts[arg] is the code line for the division by zero error
+COMPARE = 15            # consts[arg] is the operator
+TYPE_COMPARE = 16       # compare with a type name; consts[arg] is (operator, type name)
+NOT = 17
+INTERP = 18             # push an interpolated text atom; consts[arg] is (segments, code_line)
+POP = 19
+
+# Group 2: loop iterations, If blocks and leaving functions
+LOOP_TOP = 20           # raise the safety-limit error after too many iterations
+COND_CONTEXT = 21       # switch to the scope the loop condition is evaluated in
+BODY_CONTEXT = 22       # switch to the loop body's scope
+LOOP_NEXT = 23          # count the iteration and jump back to arg
+ENTER_THEN = 24         # open a then block: new scope, empty result list
+ENTER_ELSE = 25         # same for an else block
+EXIT_BLOCK = 26         # close a block, push its result (None, one value or a list)
+RETURN = 27             # `return(...)` in a function body: leave with the popped value
+FUNCTION_END = 28       # leave a function body that did not return
+POP_JUMP_IF_TRUTHY = 29
+
+# Group 3: short-circuit logic, loop setup and control, multi-branch Ifs
+JUMP_IF_FALSY_OR_POP = 30   # `and`: keep a falsy left side as the result
+JUMP_IF_TRUTHY_OR_POP = 31  # `or`: keep a truthy left side as the result
+SETUP_LOOP = 32         # consts[arg] is a LoopInfo; pushes the loop scope
+POP_LOOP = 33           # close the loop, push its result
+END_LOOP = 34           # `end-loop;` as a jump to the loop exit
+RESTART_LOOP = 35       # `restart-loop;` as a jump to the next iteration
+ENTER_MULTI = 36        # open a non-exclusive multi-branch If
+BRANCH_ENTER = 37       # run a branch of a multi-branch If in a fresh scope
+BRANCH_EXIT = 38
+JUMP_IF_EXECUTED = 39   # skip the else part of a multi-branch If when a branch ran
+EXIT_MULTI = 40
+
+# Group 4: calls and bindings
+CALL = 50               # call or index the callee below the arguments; consts[arg] is a CallInfo.
+                        # Calls to Enzo functions push a frame on the VM's call stack
+TAIL_CALL = 51          # CALL for a closing `return(f(...))`: the callee replaces the current frame
+JUMP_IF_REFERENCE = 52  # keep a reference argument and jump to arg; otherwise pop it
+LOAD_METHOD = 53        # look up a property on the object on top and push it, keeping the
+                        # object for $self; consts[arg] is (ListIndex node, pass_loop_context)
+BIND = 54               # bind the value on top as a Binding does, leaving None; consts[arg] is the Binding
+REBIND = 55             # store the value on top as a BindOrRebind does, leaving None; consts[arg] is the BindOrRebind
+
+OPCODE_NAMES = {value: name for name, value in list(globals().items()) if name.isupper() and isinstance(value, int)}
+
+# Opcodes whose argument is a jump target
+JUMPS = frozenset((JUMP, POP_JUMP_IF_FALSY, POP_JUMP_IF_TRUTHY, JUMP_IF_FALSY_OR_POP, JUMP_IF_TRUTHY_OR_POP,
+                   JUMP_IF_EXECUTED, LOOP_NEXT, JUMP_IF_REFERENCE))
@@ -27,6 +27,10 @@ class EnzoRecursionError(EnzoRuntimeError):
 class InterpolationParseError(EnzoParseError):
     pass
 
+# Raised for ASTs that can't be encoded and for malformed serialized ASTs
+class ASTSerializationError(EnzoError):
+    pass
+
 class ReturnSignal(Exception):
     def __init__(self, value):
         self.value = value
@@ -29,6 +29,9 @@ def error_message_unterminated_interpolation():
 def error_message_included_file_not_found(fname):
     return f"included file not found: {fname}"
 
+def error_message_unknown_engine(name, engines):
+    return f"error: unknown engine `{name}` (expected one of: {', '.join(engines)})"
+
 def error_message_generic(msg):
     return str(msg)
 
@@ -130,6 +133,12 @@ def format_parse_error(err, src=None):
         pass
     return str(err)
 
+def format_statement_error(err, src):
+    # Use centralized error messaging for all errors (including runtime/type errors)
+    if hasattr(err, 'code_line') or hasattr(err, 'line') or hasattr(err, 'column'):
+        return format_parse_error(err, src=src)
+    return error_message_generic(str(err))
+
 def error_message_with_code_line(msg, code_line):
     #Format an error message with the code line, no caret, for golden file compatibility.
     # Handle multi-line code_line by adding indentation to each line
@@ -212,3 +221,24 @@ def error_message_maximum_recursion_depth_exceeded():
 
 def error_message_unclosed_block_comment():
     return "error: unclosed block comment"
+
+def error_message_ast_serialization_unsupported(type_name):
+    return f"error: can't serialize AST value of type {type_name}"
+
+def error_message_ast_serialization_bad_record():
+    return "error: malformed or incompatible serialized AST"
+
+def error_message_builtin_expects_list(name):
+    return f"error: {name} expects a List"
+
+def error_message_builtin_expects_numbers(name):
+    return f"error: {name} expects a List of Numbers"
+
+def error_message_builtin_expects_number(name):
+    return f"error: {name} expects a Number"
+
+def error_message_builtin_empty_list(name):
+    return f"error: {name} of an empty List"
+
+def error_message_builtin_length_mismatch(name):
+    return f"error: {name} expects Lists of the same length"
@@ -1,7 +1,8 @@
-from src.enzo_parser.parser import parse
+from src.enzo_parser.parser import parse, compile_text_template
 from src.runtime_helpers import Table, format_val, log_debug, EnzoList, deep_copy_enzo_value
+from src.builtin_functions import BuiltinFunction, BUILTIN_FUNCTIONS
 from collections import ChainMap
-from src.enzo_parser.ast_nodes import NumberAtom, TextAtom, ListAtom, Binding, BindOrRebind, Invoke, FunctionAtom, Program, VarInvoke, AddNode, SubNode, MulNode, DivNode, ModNode, FunctionRef, ListIndex, ReturnNode, PipelineNode, ParameterDeclaration, ReferenceAtom, BlueprintAtom, BlueprintInstantiation, BlueprintComposition, VariantGroup, VariantGroupExtension, VariantAccess, VariantInstantiation, DestructuringBinding, ReverseDestructuring, ReferenceDestructuring, RestructuringBinding, IfStatement, ComparisonExpression, LogicalExpression, NotExpression, LoopStatement, EndLoopStatement, RestartLoopStatement, OtherwiseStatement, ListKeyValue, ListInterpolation, ImmediateInvocationAtom
+from src.enzo_parser.ast_nodes import NumberAtom, TextAtom, ListAtom, Binding, BindOrRebind, Invoke, FunctionAtom, Program, VarInvoke, AddNode, SubNode, MulNode, DivNode, ModNode, FunctionRef, ListIndex, ReturnNode, PipelineNode, ParameterDeclaration, ReferenceAtom, BlueprintAtom, BlueprintInstantiation, BlueprintComposition, VariantGroup, VariantGroupExtension, VariantAccess, VariantInstantiation, DestructuringBinding, ReverseDestructuring, ReferenceDestructuring, RestructuringBinding, IfStatement, ComparisonExpression, LogicalExpression, NotExpression, LoopStatement, EndLoopStatement, RestartLoopStatement, OtherwiseStatement, ListKeyValue, ListInterpolation, ImmediateInvocationAtom, SectionMarker, InvalidStatement
 from src.error_handling import InterpolationParseError, ReturnSignal, EnzoRuntimeError, EnzoTypeError, EnzoParseError, EnzoRecursionError
 
 # Loop control signals
@@ -47,20 +48,94 @@ _env = {
     '$self': '$self'
 }  # single global environment
 
+def lookup_variable(env, name, depth=None):
+    """Return the value env binds to name, or raise KeyError.
+
+    depth is VarInvoke.scope_depth: how many scope layers out the resolver expects the
+    binding. The walk looks at each layer's own bindings directly rather than going
+    through ChainMap lookups, which try every map with an exception per miss and recurse
+    into nested ChainMaps; a layer that binds the name before depth is reached still
+    wins, so the result is always env[name].
+    """
+    scope = env
+    while depth and type(scope) is ChainMap:
+        maps = scope.maps
+        if len(maps) != 2:
+            break
+        local = maps[0]
+        if name in local:
+            return local[name]
+        scope = maps[1]
+        depth -= 1
+    if type(scope) is ChainMap:
+        local = scope.maps[0]
+        if name in local:
+            return local[name]
+    return scope[name]
+
+
 class EnzoFunction:
-    def __init__(self, params, local_vars, body, closure_env, is_multiline=False):
-        self.params = params          # list of (name, default)
-        self.local_vars = local_vars  # list of Binding nodes
-        self.body = body              # list of AST stmts
+    def __init__(self, atom, closure_env):
+        self.atom = atom                    # the FunctionAtom this function was made from
+        self.params = atom.params           # list of (name, default)
+        self.local_vars = atom.local_vars   # list of Binding nodes
+        self.body = atom.body               # list of AST stmts
         # Do NOT copy closure_env: must be persistent for closure state
         self.closure_env = closure_env
-        self.is_multiline = is_multiline      # track if function atom is multiline
+        self.is_multiline = getattr(atom, 'is_multiline', False)  # track if function atom is multiline
+        if atom.signature is None:
+            # Worked out once per atom; every function made from it shares the signature
+            atom.signature = FunctionSignature(atom.params, atom.body, self.is_multiline)
+        self.signature = atom.signature
 
     def __repr__(self):
         # Show only param names for readability
         param_names = [p[0] if isinstance(p, (list, tuple)) else str(p) for p in self.params]
         return f"<function ({', '.join(param_names)}) multiline={self.is_multiline}>"
 
+# Default value of a FunctionSignature parameter that is evaluated on each call
+_PER_CALL = object()
+
+
+class FunctionSignature:
+    """What invoke_function checks and binds on a call, worked out once per function atom.
+
+    names are the parameter names in order and required is how many of them have no
+    default. checks lists (index, name, expected type) for the parameters whose default
+    gives their type. defaults has (name, default node, value) per parameter: value is
+    the default itself for number and plain text literals, _PER_CALL for defaults
+    evaluated on each call. shows marks the body statements whose results a multi-line
+    function prints.
+    """
+    __slots__ = ("names", "required", "checks", "defaults", "shows")
+
+    def __init__(self, params, body, is_multiline):
+        self.names = tuple(name for name, default in params)
+        self.required = 0
+        for name, default in params:
+            if default is not None:
+                break  # Required params must come first
+            self.required += 1
+        types = [_infer_type_from_default(default) for name, default in params]
+        self.checks = tuple((i, name, expected_type)
+                            for i, (name, expected_type) in enumerate(zip(self.names, types)) if expected_type)
+        self.defaults = tuple((name, default, _constant_default(default)) for name, default in params)
+        self.shows = tuple(is_multiline and not isinstance(stmt, (Binding, BindOrRebind, ReturnNode))
+                           for stmt in body)
+
+
+def is_function(value):
+    """Whether value is an Enzo Function: one the program defined, or a builtin."""
+    return isinstance(value, (EnzoFunction, BuiltinFunction))
+
+
+def _constant_default(default):
+    cls = type(default)
+    if cls is NumberAtom or (cls is TextAtom and "<" not in default.value):
+        return default.value
+    return _PER_CALL
+
+
 class EnzoVariantInstance:
     def __init__(self, group_name, variant_name):
         self.group_name = group_name
@@ -78,10 +153,12 @@ class EnzoVariantInstance:
         return hash((self.group_name, self.variant_name))
 
 class EnzoVariantGroup:
-    def __init__(self, name, variants, group_blueprint=None):
+    def __init__(self, name, variants, group_blueprint=None, layouts=None):
         self.name = name
         self.variants = set(variants)  # Valid variant names
         self.group_blueprint = group_blueprint  # Blueprint for group.group access
+        # Variant name -> (group blueprint, variant blueprint, FieldLayout) of the variants laid out so far
+        self.layouts = {} if layouts is None else layouts
 
     def __str__(self):
         return self.name  # Display just the name, not "VariantGroup(name)"
@@ -114,6 +191,7 @@ def _initialize_builtin_variants():
 
 # Initialize built-ins after the class is defined
 _initialize_builtin_variants()
+_env.update(BUILTIN_FUNCTIONS)
 
 class ReferenceWrapper:
     """Wrapper for explicit references created with @ operator."""
@@ -185,64 +263,142 @@ class ListElementReference:
     def __repr__(self):
         return f"<reference to list element {self.index}>"
 
+# Runs an EnzoFunction's body once invoke_function has bound its arguments; None means the
+# tree-walking code below
+_function_body_runner = None
+
+
+def set_function_body_runner(runner):
+    """Install runner(fn, call_env) -> result to run function bodies, or None to restore the default.
+
+    The runner may return NotImplemented to leave a call to the tree-walking code, or a
+    TailCall for invoke_function to make next.
+    """
+    global _function_body_runner
+    _function_body_runner = runner
+
+
+# Longest chain of calls, tail calls included, before a call fails with "Maximum recursion
+# depth exceeded". Tail calls and deep calls (see TREE_CALL_DEPTH) do not use Python's
+# stack, so this bound is what stops infinite recursion, after this many calls; the
+# default is Python's own recursion limit, which keeps that quick. ENZO_MAX_CALL_DEPTH
+# overrides it, for recursion over long lists, say
+MAX_CALL_DEPTH = int(os.environ.get("ENZO_MAX_CALL_DEPTH", "1000"))
+
+# Calls the tree walker nests on Python's stack, each of which takes several Python frames,
+# before it runs function bodies on enzo_vm, whose calls do not (see _run_on_call_stack)
+TREE_CALL_DEPTH = 32
+# Calls invoke_function is in the middle of
+_call_depth = 0
+
+
+class TailCall:
+    """A call in tail position, handed back to invoke_function instead of being made.
+
+    A function body whose last statement is `return(f(...))` is finished once the call's
+    operands are evaluated; invoke_function makes the call itself, so chains of tail
+    calls (mutual recursion included) run in constant Python stack depth.
+    """
+    __slots__ = ("fn", "args", "env", "self_obj")
+
+    def __init__(self, fn, args, env, self_obj):
+        self.fn = fn
+        self.args = args
+        self.env = env
+        self.self_obj = self_obj
+
+
 def invoke_function(fn, args, env, self_obj=None, is_loop_context=False):
+    if type(fn) is BuiltinFunction:
+        return fn.call([arg.get_value() if isinstance(arg, ReferenceWrapper) else arg for arg in args])
+    global _call_depth
+    _call_depth += 1
+    try:
+        tail_calls = 0
+        while True:
+            call_env = bind_call_arguments(fn, args, env, self_obj=self_obj, is_loop_context=is_loop_context)
+            res = NotImplemented
+            if _call_depth > TREE_CALL_DEPTH:
+                res = _run_on_call_stack(fn, call_env)
+            elif _function_body_runner is not None:
+                # Another engine (see set_function_body_runner) runs the body
+                res = _function_body_runner(fn, call_env)
+            if res is NotImplemented:
+                res = _run_function_body(fn, call_env)
+            if type(res) is not TailCall:
+                return res
+            tail_calls += 1
+            if tail_calls > MAX_CALL_DEPTH:
+                from src.error_messaging import error_message_maximum_recursion_depth_exceeded
+                raise EnzoRecursionError(error_message_maximum_recursion_depth_exceeded())
+            fn, args, env, self_obj = res.fn, res.args, res.env, res.self_obj
+            is_loop_context = False
+    finally:
+        _call_depth -= 1
+
+
+def _run_on_call_stack(fn, call_env):
+    """Run fn's body on enzo_vm, as a deep recursion's remaining calls.
+
+    The VM keeps the calls made from compiled code on its own call stack, so a non-tail
+    recursion that started on the tree walker (or the closure backend) goes on past
+    Python's recursion limit, bounded by MAX_CALL_DEPTH like the VM's own calls. Returns
+    NotImplemented when the body cannot be compiled.
+    """
+    from src.enzo_vm.machine import run_function_body
+    return run_function_body(fn, call_env, compile_now=True)
+
+
+def bind_call_arguments(fn, args, env, self_obj=None, is_loop_context=False):
+    """Check args against fn's parameters and return the environment fn's body runs in."""
     if not isinstance(fn, EnzoFunction):
         raise EnzoTypeError(error_message_not_a_function(fn), code_line=getattr(fn, 'code_line', None))
+    signature = fn.signature
+    arg_count = len(args)
 
-    # 1. Validate argument count
-    if len(args) > len(fn.params):
+    # 1. Validate argument count and required parameters (those with empty defaults)
+    if arg_count > len(signature.names):
         raise EnzoRuntimeError(error_message_too_many_args())
-
-    # 2. Check for required parameters (those with empty defaults)
-    required_param_count = 0
-    for param_name, default in fn.params:
-        if default is None:  # Empty default means required parameter
-            required_param_count += 1
-        else:
-            break  # Required params must come first
-
-    if len(args) < required_param_count:
+    if arg_count < signature.required:
         raise EnzoRuntimeError(error_message_missing_necessary_params())
 
-    # 3. Validate argument types against parameter defaults
-    for i, arg in enumerate(args):
-        param_name, default = fn.params[i]
-        expected_type = _infer_type_from_default(default)
-        actual_type = _get_enzo_type(arg)
-
-        # Only validate if we can infer the expected type and it doesn't match
-        if expected_type and actual_type != expected_type:
+    # 2. Validate argument types against the types parameter defaults give
+    for i, param_name, expected_type in signature.checks:
+        if i >= arg_count:
+            break
+        actual_type = _get_enzo_type(args[i])
+        if actual_type != expected_type:
             raise EnzoRuntimeError(error_message_arg_type_mismatch(param_name, expected_type, actual_type))
 
     # Use a ChainMap so that mutations to closure_env persist across calls
-    from collections import ChainMap
     call_env = ChainMap({}, fn.closure_env)
+    local = call_env.maps[0]
     # Bind parameters with copy-by-default semantics
-    for (param_name, default), arg in zip(fn.params, args):
+    for param_name, arg in zip(signature.names, args):
         # Handle reference vs copy semantics for function arguments
         if isinstance(arg, ReferenceWrapper):
             # This is an explicit reference (@variable), store the reference wrapper
-            call_env[param_name] = arg
+            local[param_name] = arg
         else:
             # Copy-by-default: make a deep copy of the argument
-            call_env[param_name] = deep_copy_enzo_value(arg)
-    if len(args) < len(fn.params):
-        for (param_name, default) in fn.params[len(args):]:
-            if default is None:
-                # This should never happen since we already checked required params above
-                raise EnzoRuntimeError(error_message_missing_necessary_params())
+            local[param_name] = deep_copy_enzo_value(arg)
+    for param_name, default, value in signature.defaults[arg_count:]:
+        if default is None:
+            # A required parameter after one with a default
+            raise EnzoRuntimeError(error_message_missing_necessary_params())
+        if value is _PER_CALL:
             default_val = eval_ast(default, value_demand=True, env=ChainMap(call_env, env), is_loop_context=is_loop_context)
             # Default values are also copied
-            call_env[param_name] = deep_copy_enzo_value(default_val)
+            value = deep_copy_enzo_value(default_val)
+        local[param_name] = value
 
     # Inject $self if provided
     if self_obj is not None:
-        call_env['$self'] = self_obj
+        local['$self'] = self_obj
+    return call_env
 
-    # Create a combined environment that allows both reading from outer env and writing to call_env
-    # For closures, we need to use the ChainMap directly so mutations persist
-    combined_env = call_env
 
+def _run_function_body(fn, combined_env):
     # For function execution, we need to allow local variables to shadow global ones
     # So we'll use a special binding context that doesn't check for global conflicts
 
@@ -253,6 +409,14 @@ def invoke_function(fn, args, env, self_obj=None, is_loop_context=False):
     # For now, we'll execute local_vars first since they're typically at the beginning
     # but this is a limitation of the current parser separation
 
+    body = fn.body
+    # A closing `return(f(...))` is a tail call: its operands are evaluated here and
+    # invoke_function makes the call once this body is done
+    tail_call = None
+    if body and type(body[-1]) is ReturnNode and type(body[-1].value) is Invoke:
+        tail_call = body[-1].value
+        body = body[:-1]
+
     try:
         res = None
 
@@ -261,15 +425,20 @@ def invoke_function(fn, args, env, self_obj=None, is_loop_context=False):
             res = eval_ast(local_var, value_demand=True, env=combined_env, is_function_context=True, is_loop_context=False)
 
         # Execute body statements (rebinds, returns, etc.)
-        for stmt in fn.body:
+        for stmt, shows in zip(body, fn.signature.shows):
             res = eval_ast(stmt, value_demand=True, env=combined_env, is_function_context=True, is_loop_context=False)
             # Only print standalone expressions in multiline functions
             # Single-line functions have implicit returns and shouldn't print during execution
-            if fn.is_multiline:
-                from src.enzo_parser.ast_nodes import Binding, BindOrRebind, ReturnNode
-                if res is not None and not isinstance(stmt, (Binding, BindOrRebind, ReturnNode)):
-                    from src.cli import format_val
-                    print(format_val(res))
+            if shows and res is not None:
+                print(format_val(res))
+
+        if tail_call is not None:
+            left, args, receiver = _invoke_operands(tail_call, combined_env, False)
+            target = _call_target(left, receiver)
+            if target is None:
+                # Indexing rather than a call
+                return _apply_invoke(tail_call, left, args, receiver, combined_env, False)
+            return TailCall(target[0], args, combined_env, target[1])
     except RecursionError:
         from src.error_messaging import error_message_maximum_recursion_depth_exceeded
         raise EnzoRecursionError(error_message_maximum_recursion_depth_exceeded())
@@ -316,7 +485,7 @@ def _get_enzo_type(value):
         return "List"
     elif isinstance(value, dict):
         return "Table"
-    elif isinstance(value, EnzoFunction):
+    elif is_function(value):
         return "Function"
     elif isinstance(value, Empty):
         return "Empty"
@@ -324,152 +493,250 @@ def _get_enzo_type(value):
         return type(value).__name__.capitalize()
 
 
+# eval_ast dispatch: node class -> handler(node, value_demand, already_invoked, env, src_line,
+# is_function_context, outer_env, loop_locals, is_loop_context). Handlers are registered with
+# @register_eval_handler below; classes without a handler of their own use the nearest
+# registered base class.
+_eval_handlers = {}
+# Classes whose entry in _eval_handlers was copied from a base class
+_inherited_eval_handlers = set()
+
+
+def register_eval_handler(node_class):
+    """Decorator registering a handler for node_class in eval_ast; replaces any earlier one."""
+    def register(handler):
+        # Entries copied from base classes may now be stale
+        for cls in _inherited_eval_handlers:
+            del _eval_handlers[cls]
+        _inherited_eval_handlers.clear()
+        _eval_handlers[node_class] = handler
+        return handler
+    return register
+
+
+def get_eval_handler(node_class):
+    """The handler eval_ast uses for node_class."""
+    handler = _eval_handlers.get(node_class)
+    if handler is None:
+        handler = _lookup_eval_handler(node_class)
+    return handler
+
+
+def _unknown_node_handler(node, *args):
+    raise EnzoRuntimeError(error_message_unknown_node(node), code_line=getattr(node, 'code_line', None))
+
+
+def _lookup_eval_handler(node_class):
+    for cls in node_class.__mro__[1:-1]:
+        handler = _eval_handlers.get(cls)
+        if handler is not None:
+            _eval_handlers[node_class] = handler
+            _inherited_eval_handlers.add(node_class)
+            return handler
+    return _unknown_node_handler
+
+
 def eval_ast(node, value_demand=False, already_invoked=False, env=None, src_line=None, is_function_context=False, outer_env=None, loop_locals=None, is_loop_context=False):
     if env is None:
         env = _env
     if node is None:
         # Ignore empty statements (e.g., from extra semicolons)
         return None
-    code_line = getattr(node, 'code_line', None)
-    if isinstance(node, NumberAtom):
+    handler = _eval_handlers.get(type(node))
+    if handler is None:
+        handler = _lookup_eval_handler(type(node))
+    return handler(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context)
+
+
+@register_eval_handler(NumberAtom)
+def _eval_number_atom(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    return node.value
+
+
+@register_eval_handler(TextAtom)
+def _eval_text_atom(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    if "<" not in node.value:
         return node.value
-    if isinstance(node, TextAtom):
-        # Pass the original code line to _interp for error reporting
-        return _interp(node.value, src_line=code_line, env=env)
-    if isinstance(node, ListAtom):
-        from src.enzo_parser.ast_nodes import ListKeyValue
-
-        enzo_list = EnzoList()
-        for el in node.elements:
-            if isinstance(el, ListKeyValue):
-                # Key-value pair
-                key = el.keyname
-                if isinstance(el.value, FunctionAtom):
-                    value = eval_ast(el.value, value_demand=False, env=env)
-                else:
-                    value = eval_ast(el.value, value_demand=True, env=env)
-                enzo_list.set_key(key, value)
-            elif isinstance(el, ListInterpolation):
-                # List interpolation: evaluate expression and expand if it's a list
-                interpolated_value = eval_ast(el.expression, value_demand=True, env=env)
-
-                if isinstance(interpolated_value, EnzoList):
-                    # Check if this is a blueprint instance - don't interpolate blueprint instances
-                    if getattr(interpolated_value, '_is_blueprint_instance', False):
-                        raise EnzoRuntimeError("error: cannot interpolate non-List into a List", code_line=getattr(el, 'code_line', None))
-
-                    # Expand the list contents into this list
-                    for item in interpolated_value._elements:
-                        enzo_list.append(item)
-                else:
-                    # Non-list value: raise error as per test expectations
-                    raise EnzoRuntimeError("error: cannot interpolate non-List into a List", code_line=getattr(el, 'code_line', None))
+    code_line = getattr(node, 'code_line', None)
+    segments = node.segments
+    if segments is None:
+        # TextAtoms built outside the parser are compiled on first use
+        segments = node.segments = compile_text_template(node.value)
+    # Pass the original code line for error reporting
+    return _interp_segments(segments, src_line=code_line, env=env)
+
+
+@register_eval_handler(ListAtom)
+def _eval_list_atom(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    if node.is_constant:
+        # Literal-only list: build it once, then hand out copies (the caller may mutate it)
+        template = node.template
+        if template is None:
+            template = node.template = _build_list(node, env)
+        return template.copy()
+    return _build_list(node, env)
+
+
+def _build_list(node, env):
+    from src.enzo_parser.ast_nodes import ListKeyValue
+
+    enzo_list = EnzoList()
+    for el in node.elements:
+        if isinstance(el, ListKeyValue):
+            # Key-value pair
+            key = el.keyname
+            if isinstance(el.value, FunctionAtom):
+                value = eval_ast(el.value, value_demand=False, env=env)
             else:
-                # Regular element - gets auto-indexed
-                if isinstance(el, FunctionAtom):
-                    value = eval_ast(el, value_demand=False, env=env)
-                else:
-                    value = eval_ast(el, value_demand=True, env=env)
-                enzo_list.append(value)
-        return enzo_list
-    if isinstance(node, Binding):
-        name = node.name
-        log_debug(f"[BINDING] Attempting to bind {name}, env keys: {list(env.keys())}")
-        if name == '$this':
-            raise EnzoRuntimeError(error_message_cannot_declare_this(), code_line=node.code_line)
-
-        # Special handling for variant group extension
-        if name in env and isinstance(node.value, VariantGroup):
-            existing_value = env[name]
-            if isinstance(existing_value, EnzoVariantGroup):
-                # This is extending an existing variant group - merge the variants
-                new_variant_group = eval_ast(node.value, value_demand=False, env=env, is_function_context=is_function_context)
-                if isinstance(new_variant_group, EnzoVariantGroup):
-                    # Merge the variants from both groups
-                    merged_variants = existing_value.variants.union(new_variant_group.variants)
-                    # Create a new variant group with merged variants
-                    merged_group = EnzoVariantGroup(name, list(merged_variants), existing_value.group_blueprint)
-                    env[name] = merged_group
-                    return None
+                value = eval_ast(el.value, value_demand=True, env=env)
+            enzo_list.set_key(key, value)
+        elif isinstance(el, ListInterpolation):
+            # List interpolation: evaluate expression and expand if it's a list
+            interpolated_value = eval_ast(el.expression, value_demand=True, env=env)
+
+            if isinstance(interpolated_value, EnzoList):
+                # Check if this is a blueprint instance - don't interpolate blueprint instances
+                if getattr(interpolated_value, '_is_blueprint_instance', False):
+                    raise EnzoRuntimeError("error: cannot interpolate non-List into a List", code_line=getattr(el, 'code_line', None))
 
-        # In function context, local variables can shadow global ones
-        # In global context, redeclaration is an error
-        if not is_function_context and name in env:
-            raise EnzoRuntimeError(error_message_already_defined(name), code_line=node.code_line)
-        # Handle empty bind: $x: ;
-        if node.value is None:
-            env[name] = Empty()
-            return None  # Do not output anything for empty bind
-        # If value is a FunctionAtom, store as function object, not result
-        if isinstance(node.value, FunctionAtom):
-            # Evaluate the FunctionAtom to trigger validation (e.g., $this checks)
-            fn = eval_ast(node.value, value_demand=False, env=env, is_function_context=is_function_context)
-            env[name] = fn
-            # For variable bindings, also make accessible with/without $ prefix
-            if name.startswith('$'):
-                # Make $variable also accessible as bare name
-                bare_name = name[1:]  # Remove the $ prefix
-                if bare_name not in env:  # Don't overwrite existing bare variable
-                    env[bare_name] = fn
+                # Expand the list contents into this list
+                enzo_list.interpolate(interpolated_value)
             else:
-                # Make bare variable also accessible with $ prefix
-                dollar_name = '$' + name
-                if dollar_name not in env:  # Don't overwrite existing $variable
-                    env[dollar_name] = fn
-            return None  # Do not output anything for binding
-        val = eval_ast(node.value, value_demand=False, env=env)  # storage context
-
-        # Handle reference vs copy semantics for bindings
-        if isinstance(val, ReferenceWrapper):
-            # This is an explicit reference (@variable), store the reference wrapper
-            actual_val = val
+                # Non-list value: raise error as per test expectations
+                raise EnzoRuntimeError("error: cannot interpolate non-List into a List", code_line=getattr(el, 'code_line', None))
         else:
-            # Copy-by-default: make a deep copy of the value
-            actual_val = deep_copy_enzo_value(val)
+            # Regular element - gets auto-indexed
+            if isinstance(el, FunctionAtom):
+                value = eval_ast(el, value_demand=False, env=env)
+            else:
+                value = eval_ast(el, value_demand=True, env=env)
+            enzo_list.append(value)
+    return enzo_list
+
+
+@register_eval_handler(Binding)
+def _eval_binding(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    name = node.name
+    log_debug(f"[BINDING] Attempting to bind {name}")
+    if name == '$this':
+        raise EnzoRuntimeError(error_message_cannot_declare_this(), code_line=node.code_line)
+
+    # Special handling for variant group extension
+    if name in env and isinstance(node.value, VariantGroup):
+        existing_value = env[name]
+        if isinstance(existing_value, EnzoVariantGroup):
+            # This is extending an existing variant group - merge the variants
+            new_variant_group = eval_ast(node.value, value_demand=False, env=env, is_function_context=is_function_context)
+            if isinstance(new_variant_group, EnzoVariantGroup):
+                # Merge the variants from both groups
+                merged_variants = existing_value.variants.union(new_variant_group.variants)
+                # Create a new variant group with merged variants
+                merged_group = EnzoVariantGroup(name, list(merged_variants), existing_value.group_blueprint,
+                                                {**existing_value.layouts, **new_variant_group.layouts})
+                env[name] = merged_group
+                return None
+
+    # In function context, local variables can shadow global ones
+    # In global context, redeclaration is an error, except of a builtin function
+    if not is_function_context and name in env and not isinstance(env[name], BuiltinFunction):
+        raise EnzoRuntimeError(error_message_already_defined(name), code_line=node.code_line)
+    # Handle empty bind: $x: ;
+    if node.value is None:
+        env[name] = Empty()
+        return None  # Do not output anything for empty bind
+    # If value is a FunctionAtom, store as function object, not result
+    if isinstance(node.value, FunctionAtom):
+        # Evaluate the FunctionAtom to trigger validation (e.g., $this checks)
+        fn = eval_ast(node.value, value_demand=False, env=env, is_function_context=is_function_context)
+        env[name] = fn
+        # For variable bindings, also make accessible with/without $ prefix
+        _bind_alias(env, name, fn)
+        return None  # Do not output anything for binding
+    val = eval_ast(node.value, value_demand=False, env=env)  # storage context
+    return _bind_value(node, val, env, loop_locals)
+
+
+def _bind_alias(env, name, value):
+    """Also bind value to name with its $ prefix added or removed.
+
+    An existing binding of that name is kept unless it is a builtin function, so $add: ...
+    replaces the builtin add just as add: ... does.
+    """
+    alias = name[1:] if name.startswith('$') else '$' + name
+    if alias not in env or isinstance(env[alias], BuiltinFunction):
+        env[alias] = value
+
+
+def _bind_value(node, val, env, loop_locals):
+    """Bind the evaluated value of a Binding (not a function atom or an empty bind) in env."""
+    name = node.name
+    # Handle reference vs copy semantics for bindings
+    if isinstance(val, ReferenceWrapper):
+        # This is an explicit reference (@variable), store the reference wrapper
+        actual_val = val
+    else:
+        # Copy-by-default: make a deep copy of the value
+        actual_val = deep_copy_enzo_value(val)
 
-        env[name] = actual_val
+    env[name] = actual_val
 
-        # Track this variable as a loop-local shadow if we're in a loop context
-        if loop_locals is not None:
-            loop_locals.add(name)
+    # Track this variable as a loop-local shadow if we're in a loop context
+    if loop_locals is not None:
+        loop_locals.add(name)
 
-        # For variable bindings, also make accessible with/without $ prefix
-        if name.startswith('$'):
-            # Make $variable also accessible as bare name
-            bare_name = name[1:]  # Remove the $ prefix
-            if bare_name not in env:  # Don't overwrite existing bare variable
-                env[bare_name] = actual_val
-        else:
-            # Make bare variable also accessible with $ prefix
-            dollar_name = '$' + name
-            if dollar_name not in env:  # Don't overwrite existing $variable
-                env[dollar_name] = actual_val
-        return None  # Do not output anything for binding    # Handle destructuring statements
-    if isinstance(node, DestructuringBinding):
-        # Handle basic destructuring: $var1, $var2: source[]
-
-        # Check for duplicate variable names
-        seen_vars = set()
-        for var_name in node.target_vars:
-            if var_name in seen_vars:
-                raise EnzoRuntimeError(error_message_duplicate_variable_names(), code_line=node.code_line)
-            seen_vars.add(var_name)
+    # For variable bindings, also make accessible with/without $ prefix
+    _bind_alias(env, name, actual_val)
+    return None  # Do not output anything for binding    # Handle destructuring statements
 
-        source_value = eval_ast(node.source_expr, value_demand=True, env=env)
 
-        # If source_value is a ReferenceWrapper, dereference it first
-        if isinstance(source_value, ReferenceWrapper):
-            source_value = source_value.get_value()
+@register_eval_handler(DestructuringBinding)
+def _eval_destructuring_binding(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # Handle basic destructuring: $var1, $var2: source[]
 
-            # If the referenced value is a BlueprintInstantiation, evaluate it to get the list
-            if isinstance(source_value, BlueprintInstantiation):
-                source_value = eval_ast(source_value, value_demand=True, env=env)
+    # Check for duplicate variable names
+    seen_vars = set()
+    for var_name in node.target_vars:
+        if var_name in seen_vars:
+            raise EnzoRuntimeError(error_message_duplicate_variable_names(), code_line=node.code_line)
+        seen_vars.add(var_name)
 
-        # Check if this is an EnzoList (enhanced list with key support)
-        if isinstance(source_value, EnzoList):
-            # Try named destructuring first (if variable names match keys)
-            named_matches = 0
+    source_value = eval_ast(node.source_expr, value_demand=True, env=env)
+
+    # If source_value is a ReferenceWrapper, dereference it first
+    if isinstance(source_value, ReferenceWrapper):
+        source_value = source_value.get_value()
+
+        # If the referenced value is a BlueprintInstantiation, evaluate it to get the list
+        if isinstance(source_value, BlueprintInstantiation):
+            source_value = eval_ast(source_value, value_demand=True, env=env)
+
+    # Check if this is an EnzoList (enhanced list with key support)
+    if isinstance(source_value, EnzoList):
+        # Try named destructuring first (if variable names match keys)
+        named_matches = 0
+        for var_name in node.target_vars:
+            # Try both with and without $ prefix
+            key_candidates = [var_name]
+            if var_name.startswith('$'):
+                key_candidates.append(var_name[1:])  # without $
+            else:
+                key_candidates.append('$' + var_name)  # with $
+
+            # Check if any key candidate exists in the list
+            for key_candidate in key_candidates:
+                try:
+                    source_value.get_by_key(key_candidate)
+                    named_matches += 1
+                    break
+                except KeyError:
+                    continue
+
+        # If most/all variables have matching keys, use named destructuring
+        if named_matches >= len(node.target_vars) * 0.5:  # At least 50% match
+            # Named destructuring
             for var_name in node.target_vars:
+                value = Empty()  # Default if not found
+
                 # Try both with and without $ prefix
                 key_candidates = [var_name]
                 if var_name.startswith('$'):
@@ -477,106 +744,113 @@ def eval_ast(node, value_demand=False, already_invoked=False, env=None, src_line
                 else:
                     key_candidates.append('$' + var_name)  # with $
 
-                # Check if any key candidate exists in the list
+                # Look for the key
                 for key_candidate in key_candidates:
                     try:
-                        source_value.get_by_key(key_candidate)
-                        named_matches += 1
+                        value = source_value.get_by_key(key_candidate)
                         break
                     except KeyError:
                         continue
 
-            # If most/all variables have matching keys, use named destructuring
-            if named_matches >= len(node.target_vars) * 0.5:  # At least 50% match
-                # Named destructuring
-                for var_name in node.target_vars:
-                    value = Empty()  # Default if not found
+                env[var_name] = deep_copy_enzo_value(value)
 
-                    # Try both with and without $ prefix
-                    key_candidates = [var_name]
-                    if var_name.startswith('$'):
-                        key_candidates.append(var_name[1:])  # without $
-                    else:
-                        key_candidates.append('$' + var_name)  # with $
+                # Also make accessible with/without $ prefix
+                _bind_alias(env, var_name, deep_copy_enzo_value(value))
 
-                    # Look for the key
-                    for key_candidate in key_candidates:
-                        try:
-                            value = source_value.get_by_key(key_candidate)
-                            break
-                        except KeyError:
-                            continue
+            return None
 
-                    env[var_name] = deep_copy_enzo_value(value)
+        # Fall back to positional destructuring for EnzoList
+        items = source_value._elements
+    elif isinstance(source_value, list):
+        items = source_value
+    elif isinstance(source_value, dict):
+        items = list(source_value.values())
+    else:
+        raise EnzoRuntimeError(f"Cannot destructure non-list value: {source_value}", code_line=node.code_line)
 
-                    # Also make accessible with/without $ prefix
-                    if var_name.startswith('$'):
-                        bare_name = var_name[1:]
-                        if bare_name not in env:
-                            env[bare_name] = deep_copy_enzo_value(value)
-                    else:
-                        dollar_name = '$' + var_name
-                        if dollar_name not in env:
-                            env[dollar_name] = deep_copy_enzo_value(value)
+    # Positional destructuring (original logic)
+    # Check that we have enough elements
+    if len(items) < len(node.target_vars):
+        raise EnzoRuntimeError(error_message_destructure_count_mismatch(), code_line=node.code_line)
 
-                return None
+    # Assign each variable
+    for i, var_name in enumerate(node.target_vars):
+        value = items[i] if i < len(items) else Empty()
+        env[var_name] = deep_copy_enzo_value(value)
 
-            # Fall back to positional destructuring for EnzoList
-            items = source_value._elements
-        elif isinstance(source_value, list):
-            items = source_value
-        elif isinstance(source_value, dict):
-            items = list(source_value.values())
-        else:
-            raise EnzoRuntimeError(f"Cannot destructure non-list value: {source_value}", code_line=node.code_line)
+        # Also make accessible with/without $ prefix
+        _bind_alias(env, var_name, deep_copy_enzo_value(value))
 
-        # Positional destructuring (original logic)
-        # Check that we have enough elements
-        if len(items) < len(node.target_vars):
-            raise EnzoRuntimeError(error_message_destructure_count_mismatch(), code_line=node.code_line)
+    return None
 
-        # Assign each variable
-        for i, var_name in enumerate(node.target_vars):
-            value = items[i] if i < len(items) else Empty()
-            env[var_name] = deep_copy_enzo_value(value)
 
-            # Also make accessible with/without $ prefix
-            if var_name.startswith('$'):
-                bare_name = var_name[1:]
-                if bare_name not in env:
-                    env[bare_name] = deep_copy_enzo_value(value)
-            else:
-                dollar_name = '$' + var_name
-                if dollar_name not in env:
-                    env[dollar_name] = deep_copy_enzo_value(value)
+@register_eval_handler(ReverseDestructuring)
+def _eval_reverse_destructuring(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # Handle reverse destructuring: source[] :> $var1, $var2
 
-        return None
+    # Check for duplicate variable names
+    seen_vars = set()
+    for var_name in node.target_vars:
+        if var_name in seen_vars:
+            raise EnzoRuntimeError(error_message_duplicate_variable_names(), code_line=node.code_line)
+        seen_vars.add(var_name)
 
-    if isinstance(node, ReverseDestructuring):
-        # Handle reverse destructuring: source[] :> $var1, $var2
+    source_value = eval_ast(node.source_expr, value_demand=True, env=env)
 
-        # Check for duplicate variable names
-        seen_vars = set()
+    # If source_value is a ReferenceWrapper, dereference it first
+    if isinstance(source_value, ReferenceWrapper):
+        source_value = source_value.get_value()
+
+        # If the referenced value is a BlueprintInstantiation, evaluate it to get the list
+        if isinstance(source_value, BlueprintInstantiation):
+            source_value = eval_ast(source_value, value_demand=True, env=env)
+
+    # Check if this is an EnzoList (enhanced list with key support)
+    if isinstance(source_value, EnzoList):
+        # Try named destructuring first (if variable names match keys)
+        named_matches = 0
         for var_name in node.target_vars:
-            if var_name in seen_vars:
-                raise EnzoRuntimeError(error_message_duplicate_variable_names(), code_line=node.code_line)
-            seen_vars.add(var_name)
+            # Check if this variable has a renamed source key
+            source_key = None
+            if hasattr(node, 'renamed_pairs') and node.renamed_pairs:
+                # Find the source key for this target variable
+                for src_key, target_var in node.renamed_pairs.items():
+                    if target_var == var_name:
+                        source_key = src_key
+                        break
+
+            # If no renamed source, use the variable name itself
+            if source_key is None:
+                source_key = var_name
 
-        source_value = eval_ast(node.source_expr, value_demand=True, env=env)
+            # Try both with and without $ prefix for the source key
+            key_candidates = [source_key]
+            if source_key.startswith('$'):
+                key_candidates.append(source_key[1:])  # without $
+            else:
+                key_candidates.append('$' + source_key)  # with $
 
-        # If source_value is a ReferenceWrapper, dereference it first
-        if isinstance(source_value, ReferenceWrapper):
-            source_value = source_value.get_value()
+            # Also try enhanced pattern matching (remove numeric suffixes)
+            for key_candidate in key_candidates[:]:  # Copy list to avoid modification during iteration
+                for suffix_pattern in ['1', '2', '3', '4', '5', '6', '7', '8', '9', '0']:
+                    if key_candidate.endswith(suffix_pattern):
+                        key_candidates.append(key_candidate[:-1])  # Remove suffix
 
-            # If the referenced value is a BlueprintInstantiation, evaluate it to get the list
-            if isinstance(source_value, BlueprintInstantiation):
-                source_value = eval_ast(source_value, value_demand=True, env=env)
+            # Check if any key candidate exists in the list
+            for key_candidate in key_candidates:
+                try:
+                    source_value.get_by_key(key_candidate)
+                    named_matches += 1
+                    break
+                except KeyError:
+                    continue
 
-        # Check if this is an EnzoList (enhanced list with key support)
-        if isinstance(source_value, EnzoList):
-            # Try named destructuring first (if variable names match keys)
-            named_matches = 0
+        # If most/all variables have matching keys, use named destructuring
+        if named_matches >= len(node.target_vars) * 0.5:  # At least 50% match
+            # Named destructuring
             for var_name in node.target_vars:
+                value = Empty()  # Default if not found
+
                 # Check if this variable has a renamed source key
                 source_key = None
                 if hasattr(node, 'renamed_pairs') and node.renamed_pairs:
@@ -603,133 +877,41 @@ def eval_ast(node, value_demand=False, already_invoked=False, env=None, src_line
                         if key_candidate.endswith(suffix_pattern):
                             key_candidates.append(key_candidate[:-1])  # Remove suffix
 
-                # Check if any key candidate exists in the list
+                # Look for the key
                 for key_candidate in key_candidates:
                     try:
-                        source_value.get_by_key(key_candidate)
-                        named_matches += 1
+                        value = source_value.get_by_key(key_candidate)
                         break
                     except KeyError:
                         continue
 
-            # If most/all variables have matching keys, use named destructuring
-            if named_matches >= len(node.target_vars) * 0.5:  # At least 50% match
-                # Named destructuring
-                for var_name in node.target_vars:
-                    value = Empty()  # Default if not found
-
-                    # Check if this variable has a renamed source key
-                    source_key = None
-                    if hasattr(node, 'renamed_pairs') and node.renamed_pairs:
-                        # Find the source key for this target variable
-                        for src_key, target_var in node.renamed_pairs.items():
-                            if target_var == var_name:
-                                source_key = src_key
-                                break
-
-                    # If no renamed source, use the variable name itself
-                    if source_key is None:
-                        source_key = var_name
+                # Handle reference destructuring if specified
+                if getattr(node, 'is_reference', False):
+                    # Create a reference to the source key for this variable
+                    # We need to create a ListIndex node that represents source.key
 
-                    # Try both with and without $ prefix for the source key
-                    key_candidates = [source_key]
-                    if source_key.startswith('$'):
-                        key_candidates.append(source_key[1:])  # without $
+                    # Extract the base variable from the source expression
+                    if hasattr(node, 'source_expr') and hasattr(node.source_expr, 'target'):
+                        # Handle @variable[] case - get the variable name from ReferenceAtom target
+                        base_var_name = node.source_expr.target.blueprint_name
+                        base_var_node = VarInvoke(base_var_name, code_line=getattr(node, 'code_line', None))
                     else:
-                        key_candidates.append('$' + source_key)  # with $
-
-                    # Also try enhanced pattern matching (remove numeric suffixes)
-                    for key_candidate in key_candidates[:]:  # Copy list to avoid modification during iteration
-                        for suffix_pattern in ['1', '2', '3', '4', '5', '6', '7', '8', '9', '0']:
-                            if key_candidate.endswith(suffix_pattern):
-                                key_candidates.append(key_candidate[:-1])  # Remove suffix
+                        # Fallback - use the source expression directly
+                        base_var_node = node.source_expr
 
-                    # Look for the key
+                    # Find the matching key for this variable
+                    matching_key = None
                     for key_candidate in key_candidates:
                         try:
-                            value = source_value.get_by_key(key_candidate)
+                            source_value.get_by_key(key_candidate)
+                            matching_key = key_candidate
                             break
                         except KeyError:
                             continue
 
-                    # Handle reference destructuring if specified
-                    if getattr(node, 'is_reference', False):
-                        # Create a reference to the source key for this variable
-                        # We need to create a ListIndex node that represents source.key
-
-                        # Extract the base variable from the source expression
-                        if hasattr(node, 'source_expr') and hasattr(node.source_expr, 'target'):
-                            # Handle @variable[] case - get the variable name from ReferenceAtom target
-                            base_var_name = node.source_expr.target.blueprint_name
-                            base_var_node = VarInvoke(base_var_name, code_line=getattr(node, 'code_line', None))
-                        else:
-                            # Fallback - use the source expression directly
-                            base_var_node = node.source_expr
-
-                        # Find the matching key for this variable
-                        matching_key = None
-                        for key_candidate in key_candidates:
-                            try:
-                                source_value.get_by_key(key_candidate)
-                                matching_key = key_candidate
-                                break
-                            except KeyError:
-                                continue
-
-                        if matching_key:
-                            # Remove $ prefix for property access
-                            prop_name = matching_key[1:] if matching_key.startswith('$') else matching_key
-                            property_access = ListIndex(
-                                base=base_var_node,
-                                index=TextAtom(prop_name),
-                                is_property_access=True,
-                                code_line=getattr(node, 'code_line', None)
-                            )
-                            env[var_name] = ReferenceWrapper(property_access, env)
-                        else:
-                            # Fallback to regular value if no key found
-                            env[var_name] = deep_copy_enzo_value(value)
-                    else:
-                        env[var_name] = deep_copy_enzo_value(value)
-
-                    # Also make accessible with/without $ prefix
-                    if var_name.startswith('$'):
-                        bare_name = var_name[1:]
-                        if bare_name not in env:
-                            env[bare_name] = env[var_name]
-                    else:
-                        dollar_name = '$' + var_name
-                        if dollar_name not in env:
-                            env[dollar_name] = env[var_name]
-
-                return None
-
-            # Fall back to positional destructuring for EnzoList
-            items = source_value._elements
-        elif isinstance(source_value, list):
-            items = source_value
-        elif isinstance(source_value, dict):
-            items = list(source_value.values())
-        else:
-            raise EnzoRuntimeError(f"Cannot destructure non-list value: {source_value}", code_line=node.code_line)
-
-        # Check that we have enough elements
-        if len(items) < len(node.target_vars):
-            raise EnzoRuntimeError(error_message_destructure_count_mismatch(), code_line=node.code_line)
-
-        # Assign each variable
-        for i, var_name in enumerate(node.target_vars):
-            value = items[i] if i < len(items) else Empty()
-
-            # Handle reference destructuring if specified
-            if getattr(node, 'is_reference', False):
-                # For EnzoList, try to create property reference if there's a key at this position
-                if isinstance(source_value, EnzoList):
-                    key_at_position = source_value.get_key_at_index(i)
-                    if key_at_position:
-                        # Create a property access reference
-                        base_var_node = node.source_expr
-                        prop_name = key_at_position[1:] if key_at_position.startswith('$') else key_at_position
+                    if matching_key:
+                        # Remove $ prefix for property access
+                        prop_name = matching_key[1:] if matching_key.startswith('$') else matching_key
                         property_access = ListIndex(
                             base=base_var_node,
                             index=TextAtom(prop_name),
@@ -738,17 +920,51 @@ def eval_ast(node, value_demand=False, already_invoked=False, env=None, src_line
                         )
                         env[var_name] = ReferenceWrapper(property_access, env)
                     else:
-                        # Fallback to positional reference for positional-only elements
-                        base_var_node = node.source_expr
-                        index_node = NumberAtom(i)
-                        list_index_ref = ListIndex(
-                            base=base_var_node,
-                            index=index_node,
-                            code_line=getattr(node, 'code_line', None)
-                        )
-                        env[var_name] = ReferenceWrapper(list_index_ref, env)
+                        # Fallback to regular value if no key found
+                        env[var_name] = deep_copy_enzo_value(value)
+                else:
+                    env[var_name] = deep_copy_enzo_value(value)
+
+                # Also make accessible with/without $ prefix
+                _bind_alias(env, var_name, env[var_name])
+
+            return None
+
+        # Fall back to positional destructuring for EnzoList
+        items = source_value._elements
+    elif isinstance(source_value, list):
+        items = source_value
+    elif isinstance(source_value, dict):
+        items = list(source_value.values())
+    else:
+        raise EnzoRuntimeError(f"Cannot destructure non-list value: {source_value}", code_line=node.code_line)
+
+    # Check that we have enough elements
+    if len(items) < len(node.target_vars):
+        raise EnzoRuntimeError(error_message_destructure_count_mismatch(), code_line=node.code_line)
+
+    # Assign each variable
+    for i, var_name in enumerate(node.target_vars):
+        value = items[i] if i < len(items) else Empty()
+
+        # Handle reference destructuring if specified
+        if getattr(node, 'is_reference', False):
+            # For EnzoList, try to create property reference if there's a key at this position
+            if isinstance(source_value, EnzoList):
+                key_at_position = source_value.get_key_at_index(i)
+                if key_at_position:
+                    # Create a property access reference
+                    base_var_node = node.source_expr
+                    prop_name = key_at_position[1:] if key_at_position.startswith('$') else key_at_position
+                    property_access = ListIndex(
+                        base=base_var_node,
+                        index=TextAtom(prop_name),
+                        is_property_access=True,
+                        code_line=getattr(node, 'code_line', None)
+                    )
+                    env[var_name] = ReferenceWrapper(property_access, env)
                 else:
-                    # Create a reference to the original list element
+                    # Fallback to positional reference for positional-only elements
                     base_var_node = node.source_expr
                     index_node = NumberAtom(i)
                     list_index_ref = ListIndex(
@@ -758,1179 +974,1367 @@ def eval_ast(node, value_demand=False, already_invoked=False, env=None, src_line
                     )
                     env[var_name] = ReferenceWrapper(list_index_ref, env)
             else:
-                env[var_name] = deep_copy_enzo_value(value)
+                # Create a reference to the original list element
+                base_var_node = node.source_expr
+                index_node = NumberAtom(i)
+                list_index_ref = ListIndex(
+                    base=base_var_node,
+                    index=index_node,
+                    code_line=getattr(node, 'code_line', None)
+                )
+                env[var_name] = ReferenceWrapper(list_index_ref, env)
+        else:
+            env[var_name] = deep_copy_enzo_value(value)
 
-            # Also make accessible with/without $ prefix
-            if var_name.startswith('$'):
-                bare_name = var_name[1:]
-                if bare_name not in env:
-                    env[bare_name] = env[var_name]
-            else:
-                dollar_name = '$' + var_name
-                if dollar_name not in env:
-                    env[dollar_name] = env[var_name]
+        # Also make accessible with/without $ prefix
+        _bind_alias(env, var_name, env[var_name])
 
-        return None
+    return None
+
+
+@register_eval_handler(ReferenceDestructuring)
+def _eval_reference_destructuring(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # Handle reference destructuring: @$var1, @$var2: source[]
+    source_value = eval_ast(node.source_expr, value_demand=True, env=env)
+
+    # Ensure source is iterable
+    if isinstance(source_value, EnzoList):
+        items = source_value._elements
+    elif isinstance(source_value, list):
+        items = source_value
+    elif isinstance(source_value, dict):
+        items = list(source_value.values())
+    else:
+        raise EnzoRuntimeError(f"Cannot destructure non-list value: {source_value}", code_line=node.code_line)
 
-    if isinstance(node, ReferenceDestructuring):
-        # Handle reference destructuring: @$var1, @$var2: source[]
-        source_value = eval_ast(node.source_expr, value_demand=True, env=env)
-
-        # Ensure source is iterable
-        if isinstance(source_value, EnzoList):
-            items = source_value._elements
-        elif isinstance(source_value, list):
-            items = source_value
-        elif isinstance(source_value, dict):
-            items = list(source_value.values())
+    # Check that we have enough elements
+    if len(items) < len(node.target_vars):
+        raise EnzoRuntimeError(error_message_destructure_count_mismatch(), code_line=node.code_line)
+
+    # Assign each variable as references
+    for i, var_name in enumerate(node.target_vars):
+        if i < len(items):
+            # Create reference wrapper that points to the original item
+            env[var_name] = ReferenceWrapper(lambda idx=i: items[idx], env)
         else:
-            raise EnzoRuntimeError(f"Cannot destructure non-list value: {source_value}", code_line=node.code_line)
+            env[var_name] = ReferenceWrapper(lambda: Empty(), env)
 
-        # Check that we have enough elements
-        if len(items) < len(node.target_vars):
-            raise EnzoRuntimeError(error_message_destructure_count_mismatch(), code_line=node.code_line)
+        # Also make accessible with/without $ prefix
+        _bind_alias(env, var_name, env[var_name])
 
-        # Assign each variable as references
-        for i, var_name in enumerate(node.target_vars):
-            if i < len(items):
-                # Create reference wrapper that points to the original item
-                env[var_name] = ReferenceWrapper(lambda idx=i: items[idx], env)
-            else:
-                env[var_name] = ReferenceWrapper(lambda: Empty(), env)
+    return None
 
-            # Also make accessible with/without $ prefix
-            if var_name.startswith('$'):
-                bare_name = var_name[1:]
-                if bare_name not in env:
-                    env[bare_name] = env[var_name]
+
+@register_eval_handler(RestructuringBinding)
+def _eval_restructuring_binding(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # Handle restructuring: $var1, $var2 -> $new: source[]
+
+    # Special case: If new_var is None, this might be reverse assignment
+    # Syntax: [$var1, $var2] :> $target[] should assign values TO target
+    if node.new_var is None:
+        # This is reverse assignment: write target_vars values to source_expr
+        target_list = eval_ast(node.source_expr, value_demand=True, env=env)
+
+        # Create new list with current values of target_vars
+        new_elements = []
+        for var_name in node.target_vars:
+            if var_name in env:
+                new_elements.append(env[var_name])
             else:
-                dollar_name = '$' + var_name
-                if dollar_name not in env:
-                    env[dollar_name] = env[var_name]
+                new_elements.append(Empty())
+
+        # Replace the target list contents
+        if hasattr(target_list, '_elements'):  # EnzoList
+            target_list.clear()
+            for i, element in enumerate(new_elements):
+                target_list.append(element)
+        else:
+            # If it's a regular list, we need to update the variable
+            # Get the target variable name
+            if hasattr(node.source_expr, 'name'):
+                target_var = node.source_expr.name
+                env[target_var] = new_elements
+                # Also update without $ prefix if needed
+                _bind_alias(env, target_var, new_elements)
 
         return None
 
-    if isinstance(node, RestructuringBinding):
-        # Handle restructuring: $var1, $var2 -> $new: source[]
+    # Regular restructuring logic (extraction)
+    # Check for duplicate variable names
+    seen_vars = set()
+    for var_name in node.target_vars:
+        if var_name in seen_vars:
+            raise EnzoRuntimeError(error_message_duplicate_variable_names(), code_line=node.code_line)
+        seen_vars.add(var_name)
 
-        # Special case: If new_var is None, this might be reverse assignment
-        # Syntax: [$var1, $var2] :> $target[] should assign values TO target
-        if node.new_var is None:
-            # This is reverse assignment: write target_vars values to source_expr
-            target_list = eval_ast(node.source_expr, value_demand=True, env=env)
+    source_value = eval_ast(node.source_expr, value_demand=True, env=env)
 
-            # Create new list with current values of target_vars
-            new_elements = []
-            for var_name in node.target_vars:
-                if var_name in env:
-                    new_elements.append(env[var_name])
-                else:
-                    new_elements.append(Empty())
-
-            # Replace the target list contents
-            if hasattr(target_list, '_elements'):  # EnzoList
-                target_list._elements.clear()
-                target_list._key_map.clear()
-                for i, element in enumerate(new_elements):
-                    target_list._elements.append(element)
-            else:
-                # If it's a regular list, we need to update the variable
-                # Get the target variable name
-                if hasattr(node.source_expr, 'name'):
-                    target_var = node.source_expr.name
-                    env[target_var] = new_elements
-                    # Also update without $ prefix if needed
-                    if target_var.startswith('$'):
-                        bare_name = target_var[1:]
-                        if bare_name not in env:
-                            env[bare_name] = new_elements
-                    else:
-                        dollar_name = '$' + target_var
-                        if dollar_name not in env:
-                            env[dollar_name] = new_elements
+    # If source_value is a ReferenceWrapper, dereference it first
+    if isinstance(source_value, ReferenceWrapper):
+        source_value = source_value.get_value()
 
-            return None
+        # If the referenced value is a BlueprintInstantiation, evaluate it to get the list
+        if isinstance(source_value, BlueprintInstantiation):
+            source_value = eval_ast(source_value, value_demand=True, env=env)
 
-        # Regular restructuring logic (extraction)
-        # Check for duplicate variable names
-        seen_vars = set()
+    # Check if this is an EnzoList (enhanced list with key support)
+    if isinstance(source_value, EnzoList):
+        # Try named destructuring first (if variable names match keys)
+        named_matches = 0
         for var_name in node.target_vars:
-            if var_name in seen_vars:
-                raise EnzoRuntimeError(error_message_duplicate_variable_names(), code_line=node.code_line)
-            seen_vars.add(var_name)
-
-        source_value = eval_ast(node.source_expr, value_demand=True, env=env)
+            # Try both with and without $ prefix
+            key_candidates = [var_name]
+            if var_name.startswith('$'):
+                key_candidates.append(var_name[1:])  # without $
+            else:
+                key_candidates.append('$' + var_name)  # with $
 
-        # If source_value is a ReferenceWrapper, dereference it first
-        if isinstance(source_value, ReferenceWrapper):
-            source_value = source_value.get_value()
+            # Also try enhanced pattern matching (remove numeric suffixes)
+            for key_candidate in key_candidates[:]:  # Copy list to avoid modification during iteration
+                for suffix_pattern in ['1', '2', '3', '4', '5', '6', '7', '8', '9', '0']:
+                    if key_candidate.endswith(suffix_pattern):
+                        key_candidates.append(key_candidate[:-1])  # Remove suffix
 
-            # If the referenced value is a BlueprintInstantiation, evaluate it to get the list
-            if isinstance(source_value, BlueprintInstantiation):
-                source_value = eval_ast(source_value, value_demand=True, env=env)
+            # Try to find a matching key
+            value = None
+            for key_candidate in key_candidates:
+                try:
+                    value = source_value.get_by_key(key_candidate)
+                    named_matches += 1
+                    break
+                except KeyError:
+                    continue
 
-        # Check if this is an EnzoList (enhanced list with key support)
-        if isinstance(source_value, EnzoList):
-            # Try named destructuring first (if variable names match keys)
-            named_matches = 0
-            for var_name in node.target_vars:
-                # Try both with and without $ prefix
-                key_candidates = [var_name]
-                if var_name.startswith('$'):
-                    key_candidates.append(var_name[1:])  # without $
-                else:
-                    key_candidates.append('$' + var_name)  # with $
+            if value is not None:
+                env[var_name] = deep_copy_enzo_value(value)
+                # Also make accessible with/without $ prefix
+                _bind_alias(env, var_name, deep_copy_enzo_value(value))
+
+        # Use named destructuring if we got matches for more than 50% of variables
+        if named_matches >= len(node.target_vars) * 0.5:
+            # Now set the renamed variable to the last extracted value
+            if node.target_vars:  # Make sure we have variables
+                last_var = node.target_vars[-1]
+                if last_var in env:
+                    env[node.new_var] = env[last_var]
+                    # Also make accessible with/without $ prefix
+                    _bind_alias(env, node.new_var, env[last_var])
+            return None
 
-                # Also try enhanced pattern matching (remove numeric suffixes)
-                for key_candidate in key_candidates[:]:  # Copy list to avoid modification during iteration
-                    for suffix_pattern in ['1', '2', '3', '4', '5', '6', '7', '8', '9', '0']:
-                        if key_candidate.endswith(suffix_pattern):
-                            key_candidates.append(key_candidate[:-1])  # Remove suffix
+        # Fall back to positional destructuring for EnzoList
+        items = source_value._elements
+    elif isinstance(source_value, list):
+        items = source_value
+    elif isinstance(source_value, dict):
+        items = list(source_value.values())
+    else:
+        raise EnzoRuntimeError(f"Cannot destructure non-list value: {source_value}", code_line=node.code_line)
 
-                # Try to find a matching key
-                value = None
-                for key_candidate in key_candidates:
-                    try:
-                        value = source_value.get_by_key(key_candidate)
-                        named_matches += 1
-                        break
-                    except KeyError:
-                        continue
+    # Check that we have enough elements
+    if len(items) < len(node.target_vars):
+        raise EnzoRuntimeError(error_message_destructure_count_mismatch(), code_line=node.code_line)
 
-                if value is not None:
-                    env[var_name] = deep_copy_enzo_value(value)
-                    # Also make accessible with/without $ prefix
-                    if var_name.startswith('$'):
-                        bare_name = var_name[1:]
-                        if bare_name not in env:
-                            env[bare_name] = deep_copy_enzo_value(value)
-                    else:
-                        dollar_name = '$' + var_name
-                        if dollar_name not in env:
-                            env[dollar_name] = deep_copy_enzo_value(value)
-
-            # Use named destructuring if we got matches for more than 50% of variables
-            if named_matches >= len(node.target_vars) * 0.5:
-                # Now set the renamed variable to the last extracted value
-                if node.target_vars:  # Make sure we have variables
-                    last_var = node.target_vars[-1]
-                    if last_var in env:
-                        env[node.new_var] = env[last_var]
-                        # Also make accessible with/without $ prefix
-                        if node.new_var.startswith('$'):
-                            bare_name = node.new_var[1:]
-                            if bare_name not in env:
-                                env[bare_name] = env[last_var]
-                        else:
-                            dollar_name = '$' + node.new_var
-                            if dollar_name not in env:
-                                env[dollar_name] = env[last_var]
-                return None
+    # First, assign the original variables
+    for i, var_name in enumerate(node.target_vars):
+        value = items[i] if i < len(items) else Empty()
 
-            # Fall back to positional destructuring for EnzoList
-            items = source_value._elements
-        elif isinstance(source_value, list):
-            items = source_value
-        elif isinstance(source_value, dict):
-            items = list(source_value.values())
+        if getattr(node, 'is_reference', False):
+            env[var_name] = ReferenceWrapper(lambda idx=i: items[idx], env)
         else:
-            raise EnzoRuntimeError(f"Cannot destructure non-list value: {source_value}", code_line=node.code_line)
+            env[var_name] = deep_copy_enzo_value(value)
 
-        # Check that we have enough elements
-        if len(items) < len(node.target_vars):
-            raise EnzoRuntimeError(error_message_destructure_count_mismatch(), code_line=node.code_line)
+        # Also make accessible with/without $ prefix
+        _bind_alias(env, var_name, env[var_name])
 
-        # First, assign the original variables
-        for i, var_name in enumerate(node.target_vars):
-            value = items[i] if i < len(items) else Empty()
+    # Then assign the new composite variable containing the extracted values
+    extracted_values = [items[i] if i < len(items) else Empty() for i in range(len(node.target_vars))]
+    new_list = EnzoList()
+    for val in extracted_values:
+        new_list.append(val)
 
-            if getattr(node, 'is_reference', False):
-                env[var_name] = ReferenceWrapper(lambda idx=i: items[idx], env)
-            else:
-                env[var_name] = deep_copy_enzo_value(value)
+    if node.new_var is not None:
+        env[node.new_var] = new_list
 
-            # Also make accessible with/without $ prefix
-            if var_name.startswith('$'):
-                bare_name = var_name[1:]
-                if bare_name not in env:
-                    env[bare_name] = env[var_name]
-            else:
-                dollar_name = '$' + var_name
-                if dollar_name not in env:
-                    env[dollar_name] = env[var_name]
-
-        # Then assign the new composite variable containing the extracted values
-        extracted_values = [items[i] if i < len(items) else Empty() for i in range(len(node.target_vars))]
-        new_list = EnzoList()
-        for val in extracted_values:
-            new_list.append(val)
-
-        if node.new_var is not None:
-            env[node.new_var] = new_list
-
-            # Also make accessible with/without $ prefix
-            if node.new_var.startswith('$'):
-                bare_name = node.new_var[1:]
-                if bare_name not in env:
-                    env[bare_name] = new_list
-            else:
-                dollar_name = '$' + node.new_var
-                if dollar_name not in env:
-                    env[dollar_name] = new_list
+        # Also make accessible with/without $ prefix
+        _bind_alias(env, node.new_var, new_list)
 
-        return None
+    return None
 
-    if isinstance(node, VarInvoke):
-        name = node.name
-        if name not in env:
-            raise EnzoRuntimeError(error_message_unknown_variable(name), code_line=node.code_line)
-        val = env[name]
-
-        # Handle reference wrapper: return the current value of the reference
-        if isinstance(val, ReferenceWrapper):
-            referenced_val = val.get_value()
-            # Check if the referenced value is a function
-            if isinstance(referenced_val, EnzoFunction):
-                # Auto-invoke functions when referenced with $ sigil in value_demand context
-                if value_demand:
-                    if not name.startswith('$'):
-                        raise EnzoRuntimeError("error: expected function reference (@) or function invocation ($)", code_line=node.code_line)
-                    return invoke_function(referenced_val, [], env, self_obj=None, is_loop_context=is_loop_context)
-            return referenced_val
-
-        # Handle list element reference: return the current value of the list element
-        if isinstance(val, ListElementReference):
-            referenced_val = val.get_value()
-            # Check if the referenced value is a function
-            if isinstance(referenced_val, EnzoFunction):
-                # Auto-invoke functions when referenced with $ sigil in value_demand context
-                if value_demand:
-                    if not name.startswith('$'):
-                        raise EnzoRuntimeError("error: expected function reference (@) or function invocation ($)", code_line=node.code_line)
-                    return invoke_function(referenced_val, [], env, self_obj=None, is_loop_context=is_loop_context)
-            return referenced_val
-
-        # Check if this is a function
-        if isinstance(val, EnzoFunction):
+
+@register_eval_handler(VarInvoke)
+def _eval_var_invoke(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    name = node.name
+    try:
+        val = lookup_variable(env, name, node.scope_depth)
+    except KeyError:
+        raise EnzoRuntimeError(error_message_unknown_variable(name), code_line=node.code_line) from None
+
+    # Handle reference wrapper: return the current value of the reference
+    if isinstance(val, ReferenceWrapper):
+        referenced_val = val.get_value()
+        # Check if the referenced value is a function
+        if is_function(referenced_val):
             # Auto-invoke functions when referenced with $ sigil in value_demand context
             if value_demand:
-                # Bare function names (without $ sigil) cannot be auto-invoked
                 if not name.startswith('$'):
                     raise EnzoRuntimeError("error: expected function reference (@) or function invocation ($)", code_line=node.code_line)
-                return invoke_function(val, [], env, self_obj=None, is_loop_context=is_loop_context)
-
-        # Check if this is a method reference
-        if isinstance(val, MethodReference):
-            # Auto-invoke method references when referenced with $ sigil in value_demand context
+                return invoke_function(referenced_val, [], env, self_obj=None, is_loop_context=is_loop_context)
+        return referenced_val
+
+    # Handle list element reference: return the current value of the list element
+    if isinstance(val, ListElementReference):
+        referenced_val = val.get_value()
+        # Check if the referenced value is a function
+        if is_function(referenced_val):
+            # Auto-invoke functions when referenced with $ sigil in value_demand context
             if value_demand:
-                # Bare method reference names (without $ sigil) cannot be auto-invoked
                 if not name.startswith('$'):
                     raise EnzoRuntimeError("error: expected function reference (@) or function invocation ($)", code_line=node.code_line)
-                return invoke_function(val.method_function, [], env, self_obj=val.self_object, is_loop_context=is_loop_context)
-
-        return val
-    if isinstance(node, FunctionRef):
-        # Evaluate the expression to get the function object
-        val = eval_ast(node.expr, value_demand=False, env=env)
-        if not isinstance(val, EnzoFunction):
-            raise EnzoTypeError(error_message_not_a_function(val), code_line=node.code_line)
-        return val
-    if isinstance(node, ReferenceAtom):
-        target = node.target
-
-        # Special handling for BlueprintInstantiation references (e.g., @person8[])
-        if isinstance(target, BlueprintInstantiation):
-            # Check if this is actually a reference to an existing variable, not a blueprint
-            var_name = target.blueprint_name
-            if var_name in env and not isinstance(env[var_name], BlueprintAtom):
-                # This is a reference to an existing variable, not a blueprint instantiation
-                # Create a VarInvoke node instead and wrap it as a reference
-                var_invoke = VarInvoke(var_name, code_line=getattr(target, 'code_line', None))
-                return ReferenceWrapper(var_invoke, env)
-
-        # Special handling for function references (backwards compatibility)
-        if isinstance(target, VarInvoke):
-            # Check if the target is a function
-            var_name = target.name
-            if var_name in env:
-                var_value = env[var_name]
-                if isinstance(var_value, EnzoFunction):
-                    return var_value  # Return function directly for @function
-        elif isinstance(target, ListIndex) and target.is_property_access:
-            # Handle @object.method
-            try:
-                base_val = eval_ast(target.base, value_demand=True, env=env)
-                if isinstance(base_val, EnzoList):
-                    prop_name = target.index.value
-                    try:
-                        prop_val = base_val.get_by_key(prop_name)
-                    except KeyError:
-                        # Convert KeyError to standard EnzoRuntimeError format
-                        raise EnzoRuntimeError(error_message_list_property_not_found(prop_name), code_line=getattr(target, 'code_line', None))
-                    if isinstance(prop_val, EnzoFunction):
-                        # Create a method reference that preserves the $self context
-                        return MethodReference(prop_val, base_val)
-                elif isinstance(base_val, dict):
-                    prop_name = target.index.value
-                    try:
-                        prop_val = base_val.get(prop_name)
-                    except KeyError:
-                        # Convert KeyError to standard EnzoRuntimeError format
-                        raise EnzoRuntimeError(error_message_list_property_not_found(prop_name), code_line=getattr(target, 'code_line', None))
-                    if isinstance(prop_val, EnzoFunction):
-                        # Create a method reference that preserves the $self context
-                        return MethodReference(prop_val, base_val)
-            except (EnzoRuntimeError):
-                # Let EnzoRuntimeError bubble up as-is
-                raise
+                return invoke_function(referenced_val, [], env, self_obj=None, is_loop_context=is_loop_context)
+        return referenced_val
 
-        # For non-function references, create ReferenceWrapper
-        return ReferenceWrapper(target, env)
-    if isinstance(node, FunctionAtom):
-        # Check if this is a named function that references $this
-        if getattr(node, 'is_named', False):
-            # Check all statements in the function body for $this references
-            for stmt in node.body:
-                if _check_for_this_reference(stmt):
-                    raise EnzoRuntimeError(error_message_cannot_reference_this_in_named_function(), code_line=node.code_line)
-
-        # If this is an explicit function reference (@(...)), always return function object
-        if getattr(node, 'is_explicit_reference', False):
-            return EnzoFunction(node.params, node.local_vars, node.body, env, getattr(node, 'is_multiline', False))
-
-        # Demand-value context: invoke
+    # Check if this is a function
+    if is_function(val):
+        # Auto-invoke functions when referenced with $ sigil in value_demand context
         if value_demand:
-            fn = EnzoFunction(node.params, node.local_vars, node.body, env, getattr(node, 'is_multiline', False))
-            return invoke_function(fn, [], env, self_obj=None, is_loop_context=is_loop_context)
-        else:
-            return EnzoFunction(node.params, node.local_vars, node.body, env, getattr(node, 'is_multiline', False))
-    if isinstance(node, ImmediateInvocationAtom):
-        # Immediate invocation: evaluate the function atom and immediately invoke it
-        fn = eval_ast(node.function_atom, value_demand=False, env=env, is_loop_context=is_loop_context)
+            # Bare function names (without $ sigil) cannot be auto-invoked
+            if not name.startswith('$'):
+                raise EnzoRuntimeError("error: expected function reference (@) or function invocation ($)", code_line=node.code_line)
+            return invoke_function(val, [], env, self_obj=None, is_loop_context=is_loop_context)
+
+    # Check if this is a method reference
+    if isinstance(val, MethodReference):
+        # Auto-invoke method references when referenced with $ sigil in value_demand context
+        if value_demand:
+            # Bare method reference names (without $ sigil) cannot be auto-invoked
+            if not name.startswith('$'):
+                raise EnzoRuntimeError("error: expected function reference (@) or function invocation ($)", code_line=node.code_line)
+            return invoke_function(val.method_function, [], env, self_obj=val.self_object, is_loop_context=is_loop_context)
+
+    return val
+
+
+@register_eval_handler(FunctionRef)
+def _eval_function_ref(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # Evaluate the expression to get the function object
+    val = eval_ast(node.expr, value_demand=False, env=env)
+    if not is_function(val):
+        raise EnzoTypeError(error_message_not_a_function(val), code_line=node.code_line)
+    return val
+
+
+@register_eval_handler(ReferenceAtom)
+def _eval_reference_atom(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    target = node.target
+
+    # Special handling for BlueprintInstantiation references (e.g., @person8[])
+    if isinstance(target, BlueprintInstantiation):
+        # Check if this is actually a reference to an existing variable, not a blueprint
+        var_name = target.blueprint_name
+        if var_name in env and not isinstance(env[var_name], BlueprintAtom):
+            # This is a reference to an existing variable, not a blueprint instantiation
+            # Create a VarInvoke node instead and wrap it as a reference
+            var_invoke = VarInvoke(var_name, code_line=getattr(target, 'code_line', None))
+            return ReferenceWrapper(var_invoke, env)
+
+    # Special handling for function references (backwards compatibility)
+    if isinstance(target, VarInvoke):
+        # Check if the target is a function
+        var_name = target.name
+        if var_name in env:
+            var_value = env[var_name]
+            if is_function(var_value):
+                return var_value  # Return function directly for @function
+    elif isinstance(target, ListIndex) and target.is_property_access:
+        # Handle @object.method
+        try:
+            base_val = eval_ast(target.base, value_demand=True, env=env)
+            if isinstance(base_val, EnzoList):
+                prop_name = target.index.value
+                try:
+                    prop_val = base_val.get_by_key(prop_name)
+                except KeyError:
+                    # Convert KeyError to standard EnzoRuntimeError format
+                    raise EnzoRuntimeError(error_message_list_property_not_found(prop_name), code_line=getattr(target, 'code_line', None))
+                if isinstance(prop_val, EnzoFunction):
+                    # Create a method reference that preserves the $self context
+                    return MethodReference(prop_val, base_val)
+            elif isinstance(base_val, dict):
+                prop_name = target.index.value
+                try:
+                    prop_val = base_val.get(prop_name)
+                except KeyError:
+                    # Convert KeyError to standard EnzoRuntimeError format
+                    raise EnzoRuntimeError(error_message_list_property_not_found(prop_name), code_line=getattr(target, 'code_line', None))
+                if isinstance(prop_val, EnzoFunction):
+                    # Create a method reference that preserves the $self context
+                    return MethodReference(prop_val, base_val)
+        except (EnzoRuntimeError):
+            # Let EnzoRuntimeError bubble up as-is
+            raise
+
+    # For non-function references, create ReferenceWrapper
+    return ReferenceWrapper(target, env)
+
+
+@register_eval_handler(FunctionAtom)
+def _eval_function_atom(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # Check if this is a named function that references $this
+    if getattr(node, 'is_named', False):
+        # Check all statements in the function body for $this references
+        for stmt in node.body:
+            if _check_for_this_reference(stmt):
+                raise EnzoRuntimeError(error_message_cannot_reference_this_in_named_function(), code_line=node.code_line)
+
+    # If this is an explicit function reference (@(...)), always return function object
+    if getattr(node, 'is_explicit_reference', False):
+        return EnzoFunction(node, env)
+
+    # Demand-value context: invoke
+    if value_demand:
+        fn = EnzoFunction(node, env)
         return invoke_function(fn, [], env, self_obj=None, is_loop_context=is_loop_context)
-    if isinstance(node, AddNode):
-        left = eval_ast(node.left, value_demand=True, env=env, is_loop_context=is_loop_context)
-        right = eval_ast(node.right, value_demand=True, env=env, is_loop_context=is_loop_context)
-        return left + right
-    if isinstance(node, SubNode):
-        left = eval_ast(node.left, value_demand=True, env=env, is_loop_context=is_loop_context)
-        right = eval_ast(node.right, value_demand=True, env=env, is_loop_context=is_loop_context)
-        return left - right
-    if isinstance(node, MulNode):
-        left = eval_ast(node.left, value_demand=True, env=env, is_loop_context=is_loop_context)
-        right = eval_ast(node.right, value_demand=True, env=env, is_loop_context=is_loop_context)
-        return left * right
-    if isinstance(node, DivNode):
-        left = eval_ast(node.left, value_demand=True, env=env, is_loop_context=is_loop_context)
-        right = eval_ast(node.right, value_demand=True, env=env, is_loop_context=is_loop_context)
-        return left / right
-    if isinstance(node, ModNode):
-        left = eval_ast(node.left, value_demand=True, env=env, is_loop_context=is_loop_context)
-        right = eval_ast(node.right, value_demand=True, env=env, is_loop_context=is_loop_context)
-
-        # Check for modulo by zero
-        if right == 0:
-            raise EnzoRuntimeError("error: No division by zero", code_line=getattr(node, 'code_line', None))
-
-        # Implement Euclidean modulo: result is always non-negative
-        # For Euclidean modulo: a = bq + r where 0 ≤ r < |b|
-        result = left % right
-        if result < 0:
-            result += abs(right)
-        return result
-    if isinstance(node, Invoke):
-        left = eval_ast(node.func, value_demand=False, env=env, is_loop_context=is_loop_context)  # Get function object, don't invoke it yet
-
-        # If left is a ReferenceWrapper that refers to a function, dereference it
-        if isinstance(left, ReferenceWrapper):
-            left = left.get_value()
-
-        # Evaluate arguments, but preserve ReferenceWrapper objects for function calls
-        args = []
-        for arg in node.args:
-            arg_result = eval_ast(arg, value_demand=False, env=env, is_loop_context=is_loop_context)  # Don't dereference yet
-            if isinstance(arg_result, ReferenceWrapper):
-                # Keep the ReferenceWrapper for the function call
-                args.append(arg_result)
-            else:
-                # For non-references, evaluate normally
-                args.append(eval_ast(arg, value_demand=True, env=env, is_loop_context=is_loop_context))
-
-        # EnzoList indexing and keyed access
-        if isinstance(left, EnzoList):
-            if len(args) != 1:
-                raise EnzoTypeError(error_message_index_must_be_number(), code_line=getattr(node, 'code_line', None))
-            key = args[0]
-            try:
-                # Try index access first (if it's a number)
-                if isinstance(key, (int, float)):
-                    if isinstance(key, float) and not key.is_integer():
-                        raise EnzoTypeError(error_message_index_must_be_integer(), code_line=getattr(node, 'code_line', None))
-                    idx = int(key)
-                    return left.get_by_index(idx)
-                # String values should be treated as invalid index types, not property access
-                elif isinstance(key, str):
-                    raise EnzoTypeError(error_message_index_must_be_integer(), code_line=getattr(node, 'code_line', None))
-                else:
-                    raise EnzoTypeError(error_message_index_must_be_integer(), code_line=getattr(node, 'code_line', None))
-            except IndexError:
-                raise EnzoRuntimeError(error_message_list_index_out_of_range(), code_line=getattr(node, 'code_line', None))
-            except KeyError:
-                raise EnzoRuntimeError(error_message_list_property_not_found(key), code_line=getattr(node, 'code_line', None))
-
-        # Legacy list indexing (for backward compatibility)
-        if isinstance(left, list):
-            if len(args) != 1:
-                raise EnzoTypeError(error_message_index_must_be_number(), code_line=getattr(node, 'code_line', None))
-            idx = args[0]
-            if not isinstance(idx, (int, float)):
-                raise EnzoTypeError(error_message_index_must_be_number(), code_line=getattr(node, 'code_line', None))
-            if isinstance(idx, float):
-                if not idx.is_integer():
-                    raise EnzoTypeError(error_message_index_must_be_integer(), code_line=getattr(node, 'code_line', None))
-                idx = int(idx)
-            if not isinstance(idx, int):
-                raise EnzoTypeError(error_message_index_must_be_integer(), code_line=getattr(node, 'code_line', None))
-            # 1-based index
-            if idx < 1 or idx > len(left):
-                raise EnzoRuntimeError(error_message_list_index_out_of_range(), code_line=getattr(node, 'code_line', None))
-            return left[idx - 1]
-
-        # Table property access
-        if isinstance(left, dict):
-            if len(args) != 1:
-                raise EnzoTypeError(error_message_list_property_not_found("<missing key>"), code_line=getattr(node, 'code_line', None))
-            key = args[0]
-            if not isinstance(key, str):
-                raise EnzoTypeError(error_message_list_property_not_found(key), code_line=getattr(node, 'code_line', None))
-            if key not in left:
-                raise EnzoRuntimeError(error_message_list_property_not_found(key), code_line=getattr(node, 'code_line', None))
-            return left[key]
-        # Function invocation
-        if isinstance(left, EnzoFunction):
-            # Check if this function invocation is from property access (e.g., $obj.method())
-            self_obj = None
-            if isinstance(node.func, ListIndex) and getattr(node.func, 'is_property_access', False):
-                # This is a method invocation - get the base object for $self
-                self_obj = eval_ast(node.func.base, env=env)
-            return invoke_function(left, args, env, self_obj=self_obj, is_loop_context=is_loop_context)
-
-        # Method reference invocation
-        if isinstance(left, MethodReference):
-            return invoke_function(left.method_function, args, env, self_obj=left.self_object, is_loop_context=is_loop_context)
-
-        # Not a list or function
-        raise EnzoTypeError(error_message_index_applies_to_lists(), code_line=getattr(node, 'code_line', None))
-    if isinstance(node, Program):
-        # For a program (file or REPL), output each top-level statement's value (if not None)
-        results = []
-        for stmt in node.statements:
-            if stmt is not None:
-                val = eval_ast(stmt, value_demand=True, env=env)
-                if val is not None:
-                    results.append(val)
-        # Print each result on its own line (handled by CLI), or return as list for test runner
-        return results
-    if isinstance(node, list):
-        # For a list of statements (from a single line), only return the last value
-        result = None
-        for x in node:
-            val = eval_ast(x, value_demand=True, env=env)
-            result = val
-        return result
-    if isinstance(node, tuple):
-        # Raise a clear error for tuple ASTs
-        raise EnzoRuntimeError(error_message_tuple_ast(), code_line=getattr(node, 'code_line', None))
-    if isinstance(node, ReturnNode):
-        val = eval_ast(node.value, value_demand=True, env=env)
-        raise ReturnSignal(val)
-    if isinstance(node, PipelineNode):
-        # Evaluate the left side (the value to pipe)
-        left_val = eval_ast(node.left, value_demand=True, env=env)
-        # Evaluate the right side
-        right_expr = node.right
-        # Create a new environment with $this bound to the left value
-        pipeline_env = env.copy()
-        pipeline_env['$this'] = left_val
-        pipeline_env['this'] = left_val  # Also make available without $ prefix for @this
-
-        # If right side is a FunctionAtom, invoke it directly
-        if isinstance(right_expr, FunctionAtom):
-            fn = EnzoFunction(right_expr.params, right_expr.local_vars, right_expr.body, pipeline_env, getattr(right_expr, 'is_multiline', False))
-            return invoke_function(fn, [], pipeline_env, self_obj=None, is_loop_context=False)
-        # For expressions that can potentially reference $this, evaluate in pipeline environment
-        elif isinstance(right_expr, (AddNode, SubNode, MulNode, DivNode, ModNode, VarInvoke, Invoke, TextAtom, ListIndex, ReferenceAtom, IfStatement)):
-            return eval_ast(right_expr, value_demand=True, env=pipeline_env)
-        else:
-            # For literals and other nodes that can't reference $this, this doesn't make sense
-            raise EnzoRuntimeError("error: pipeline expects function atom after `then`", code_line=getattr(node, 'code_line', None))
-    if isinstance(node, BindOrRebind):
-        target = node.target
-        value = eval_ast(node.value, value_demand=True, env=env, outer_env=outer_env, loop_locals=loop_locals)
+    else:
+        return EnzoFunction(node, env)
 
-        # Handle reference vs copy semantics
-        if isinstance(value, ReferenceWrapper):
-            # This is an explicit reference (@variable), store the reference wrapper
-            actual_value = value
+
+@register_eval_handler(ImmediateInvocationAtom)
+def _eval_immediate_invocation_atom(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # Immediate invocation: evaluate the function atom and immediately invoke it
+    fn = eval_ast(node.function_atom, value_demand=False, env=env, is_loop_context=is_loop_context)
+    return invoke_function(fn, [], env, self_obj=None, is_loop_context=is_loop_context)
+
+
+@register_eval_handler(AddNode)
+def _eval_add_node(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    left = eval_ast(node.left, value_demand=True, env=env, is_loop_context=is_loop_context)
+    right = eval_ast(node.right, value_demand=True, env=env, is_loop_context=is_loop_context)
+    return left + right
+
+
+@register_eval_handler(SubNode)
+def _eval_sub_node(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    left = eval_ast(node.left, value_demand=True, env=env, is_loop_context=is_loop_context)
+    right = eval_ast(node.right, value_demand=True, env=env, is_loop_context=is_loop_context)
+    return left - right
+
+
+@register_eval_handler(MulNode)
+def _eval_mul_node(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    left = eval_ast(node.left, value_demand=True, env=env, is_loop_context=is_loop_context)
+    right = eval_ast(node.right, value_demand=True, env=env, is_loop_context=is_loop_context)
+    return left * right
+
+
+@register_eval_handler(DivNode)
+def _eval_div_node(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    left = eval_ast(node.left, value_demand=True, env=env, is_loop_context=is_loop_context)
+    right = eval_ast(node.right, value_demand=True, env=env, is_loop_context=is_loop_context)
+    return left / right
+
+
+@register_eval_handler(ModNode)
+def _eval_mod_node(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    left = eval_ast(node.left, value_demand=True, env=env, is_loop_context=is_loop_context)
+    right = eval_ast(node.right, value_demand=True, env=env, is_loop_context=is_loop_context)
+
+    # Check for modulo by zero
+    if right == 0:
+        raise EnzoRuntimeError("error: No division by zero", code_line=getattr(node, 'code_line', None))
+
+    # Implement Euclidean modulo: result is always non-negative
+    # For Euclidean modulo: a = bq + r where 0 ≤ r < |b|
+    result = left % right
+    if result < 0:
+        result += abs(right)
+    return result
+
+
+@register_eval_handler(Invoke)
+def _eval_invoke(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    left, args, receiver = _invoke_operands(node, env, is_loop_context)
+    return _apply_invoke(node, left, args, receiver, env, is_loop_context)
+
+
+def _invoke_operands(node, env, is_loop_context):
+    """Evaluate an Invoke's callee and arguments; returns (callee, args, receiver).
+
+    receiver is the object a method is looked up on ($obj in $obj.method()), or None.
+    """
+    func = node.func
+    if type(func) is ListIndex and func.is_property_access:
+        # Method invocation: the object becomes $self if the property is a function
+        receiver = eval_ast(func.base, env=env)
+        left = _index_value(func, receiver, False, env, is_loop_context)
+    else:
+        receiver = None
+        left = eval_ast(func, value_demand=False, env=env, is_loop_context=is_loop_context)  # Get function object, don't invoke it yet
+
+    # If left is a ReferenceWrapper that refers to a function, dereference it
+    if isinstance(left, ReferenceWrapper):
+        left = left.get_value()
+
+    # Evaluate arguments, but preserve ReferenceWrapper objects for function calls
+    args = []
+    for arg in node.args:
+        arg_result = eval_ast(arg, value_demand=False, env=env, is_loop_context=is_loop_context)  # Don't dereference yet
+        if isinstance(arg_result, ReferenceWrapper):
+            # Keep the ReferenceWrapper for the function call
+            args.append(arg_result)
         else:
-            # Copy-by-default: make a deep copy of the value
-            actual_value = deep_copy_enzo_value(value)
-
-        def enzo_type(val):
-            if isinstance(val, ReferenceWrapper):
-                # For type checking, look at the referenced value
-                referenced_val = val.get_value()
-                return enzo_type(referenced_val)
-            if isinstance(val, ListElementReference):
-                # For type checking, look at the referenced value
-                referenced_val = val.get_value()
-                return enzo_type(referenced_val)
-            if isinstance(val, (int, float)):
-                return "Number"
-            if isinstance(val, str):
-                return "Text"
-            if isinstance(val, list):
-                return "List"
-            if isinstance(val, dict):
-                return "Table"
-            if isinstance(val, EnzoFunction):
-                return "Function"
-            if isinstance(val, Empty):
-                return "Empty"
-            return type(val).__name__
-        # Assignment to variable
-        if isinstance(target, str):
-            name = target
-
-            # Special handling for closure contexts: if we're in a ChainMap and the variable
-            # exists in a deeper layer (closure environment), update it there
-            # BUT: if we're in a function context and the variable exists in the local scope
-            # (first layer), prioritize local shadowing over closure mutation
-            if isinstance(env, ChainMap) and len(env.maps) > 1:
-                # If we're in a function context and the variable exists locally, shadow it
-                if is_function_context and name in env.maps[0]:
-                    # Variable exists locally (parameter or local var) - update locally to maintain shadowing
-                    target_env = env.maps[0]  # Update the local layer directly
-                    update_current_env = False
-                else:
-                    # Check if this variable exists in any of the deeper ChainMap layers (closure env)
-                    for i, env_layer in enumerate(env.maps[1:], 1):  # Skip the first layer (local)
-                        if name in env_layer:
-                            # Found the variable in a closure layer - update it there
-                            target_env = env_layer
-                            update_current_env = False
-                            break
-                    else:
-                        # Variable not found in closure layers, use normal rebinding logic
-                        target_env = env
-                        update_current_env = False
-            elif loop_locals is not None and name in loop_locals:
-                # Variable was shadowed in this loop - rebind in current env only
-                target_env = env
-                update_current_env = False
-            elif outer_env is not None and name in outer_env:
-                # Variable exists in outer scope and not shadowed - rebind there
-                target_env = outer_env
-                # Also update current env to maintain consistency
-                update_current_env = True
+            # For non-references, evaluate normally
+            args.append(eval_ast(arg, value_demand=True, env=env, is_loop_context=is_loop_context))
+    return left, args, receiver
+
+
+def _call_target(callee, receiver):
+    """(function, self object) when an Invoke's callee is called rather than indexed, else None."""
+    if isinstance(callee, EnzoFunction):
+        # A method invocation ($obj.method()) gets the object as $self
+        return callee, receiver
+    # Method reference invocation
+    if isinstance(callee, MethodReference):
+        return callee.method_function, callee.self_object
+    return None
+
+
+def _apply_invoke(node, left, args, receiver, env, is_loop_context):
+    """Call or index left with the operands _invoke_operands evaluated."""
+    target = _call_target(left, receiver)
+    if target is not None:
+        return invoke_function(target[0], args, env, self_obj=target[1], is_loop_context=is_loop_context)
+    if isinstance(left, BuiltinFunction):
+        args = [arg.get_value() if isinstance(arg, ReferenceWrapper) else arg for arg in args]
+        return left.call(args, code_line=getattr(node, 'code_line', None))
+
+    # EnzoList indexing and keyed access
+    if isinstance(left, EnzoList):
+        if len(args) != 1:
+            raise EnzoTypeError(error_message_index_must_be_number(), code_line=getattr(node, 'code_line', None))
+        key = args[0]
+        try:
+            # Try index access first (if it's a number)
+            if isinstance(key, (int, float)):
+                if isinstance(key, float) and not key.is_integer():
+                    raise EnzoTypeError(error_message_index_must_be_integer(), code_line=getattr(node, 'code_line', None))
+                idx = int(key)
+                return left.get_by_index(idx)
+            # String values should be treated as invalid index types, not property access
+            elif isinstance(key, str):
+                raise EnzoTypeError(error_message_index_must_be_integer(), code_line=getattr(node, 'code_line', None))
             else:
-                # Variable doesn't exist in outer scope, or no outer scope - use current
-                target_env = env
+                raise EnzoTypeError(error_message_index_must_be_integer(), code_line=getattr(node, 'code_line', None))
+        except IndexError:
+            raise EnzoRuntimeError(error_message_list_index_out_of_range(), code_line=getattr(node, 'code_line', None))
+        except KeyError:
+            raise EnzoRuntimeError(error_message_list_property_not_found(key), code_line=getattr(node, 'code_line', None))
+
+    # Legacy list indexing (for backward compatibility)
+    if isinstance(left, list):
+        if len(args) != 1:
+            raise EnzoTypeError(error_message_index_must_be_number(), code_line=getattr(node, 'code_line', None))
+        idx = args[0]
+        if not isinstance(idx, (int, float)):
+            raise EnzoTypeError(error_message_index_must_be_number(), code_line=getattr(node, 'code_line', None))
+        if isinstance(idx, float):
+            if not idx.is_integer():
+                raise EnzoTypeError(error_message_index_must_be_integer(), code_line=getattr(node, 'code_line', None))
+            idx = int(idx)
+        if not isinstance(idx, int):
+            raise EnzoTypeError(error_message_index_must_be_integer(), code_line=getattr(node, 'code_line', None))
+        # 1-based index
+        if idx < 1 or idx > len(left):
+            raise EnzoRuntimeError(error_message_list_index_out_of_range(), code_line=getattr(node, 'code_line', None))
+        return left[idx - 1]
+
+    # Table property access
+    if isinstance(left, dict):
+        if len(args) != 1:
+            raise EnzoTypeError(error_message_list_property_not_found("<missing key>"), code_line=getattr(node, 'code_line', None))
+        key = args[0]
+        if not isinstance(key, str):
+            raise EnzoTypeError(error_message_list_property_not_found(key), code_line=getattr(node, 'code_line', None))
+        if key not in left:
+            raise EnzoRuntimeError(error_message_list_property_not_found(key), code_line=getattr(node, 'code_line', None))
+        return left[key]
+    # Not a list or function
+    raise EnzoTypeError(error_message_index_applies_to_lists(), code_line=getattr(node, 'code_line', None))
+
+
+@register_eval_handler(Program)
+def _eval_program(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # For a program (file or REPL), output each top-level statement's value (if not None)
+    results = []
+    for stmt in node.statements:
+        if stmt is not None:
+            val = eval_ast(stmt, value_demand=True, env=env)
+            if val is not None:
+                results.append(val)
+    # Print each result on its own line (handled by CLI), or return as list for test runner
+    return results
+
+
+@register_eval_handler(list)
+def _eval_statement_list(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # For a list of statements (from a single line), only return the last value
+    result = None
+    for x in node:
+        val = eval_ast(x, value_demand=True, env=env)
+        result = val
+    return result
+
+
+@register_eval_handler(tuple)
+def _eval_tuple(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # Raise a clear error for tuple ASTs
+    raise EnzoRuntimeError(error_message_tuple_ast(), code_line=getattr(node, 'code_line', None))
+
+
+@register_eval_handler(ReturnNode)
+def _eval_return_node(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    val = eval_ast(node.value, value_demand=True, env=env)
+    raise ReturnSignal(val)
+
+
+@register_eval_handler(PipelineNode)
+def _eval_pipeline_node(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # Evaluate the left side (the value to pipe)
+    left_val = eval_ast(node.left, value_demand=True, env=env)
+    # Evaluate the right side
+    right_expr = node.right
+    # Create a new environment with $this bound to the left value
+    pipeline_env = env.copy()
+    pipeline_env['$this'] = left_val
+    pipeline_env['this'] = left_val  # Also make available without $ prefix for @this
+
+    # If right side is a FunctionAtom, invoke it directly
+    if isinstance(right_expr, FunctionAtom):
+        fn = EnzoFunction(right_expr, pipeline_env)
+        return invoke_function(fn, [], pipeline_env, self_obj=None, is_loop_context=False)
+    # For expressions that can potentially reference $this, evaluate in pipeline environment
+    elif isinstance(right_expr, (AddNode, SubNode, MulNode, DivNode, ModNode, VarInvoke, Invoke, TextAtom, ListIndex, ReferenceAtom, IfStatement)):
+        return eval_ast(right_expr, value_demand=True, env=pipeline_env)
+    else:
+        # For literals and other nodes that can't reference $this, this doesn't make sense
+        raise EnzoRuntimeError("error: pipeline expects function atom after `then`", code_line=getattr(node, 'code_line', None))
+
+
+@register_eval_handler(BindOrRebind)
+def _eval_bind_or_rebind(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    value = eval_ast(node.value, value_demand=True, env=env, outer_env=outer_env, loop_locals=loop_locals)
+    return _rebind_value(node, value, env, is_function_context, outer_env, loop_locals)
+
+
+def _binding_type(val):
+    # Type name that rebinding a variable must keep
+    if isinstance(val, ReferenceWrapper):
+        # For type checking, look at the referenced value
+        referenced_val = val.get_value()
+        return _binding_type(referenced_val)
+    if isinstance(val, ListElementReference):
+        # For type checking, look at the referenced value
+        referenced_val = val.get_value()
+        return _binding_type(referenced_val)
+    if isinstance(val, (int, float)):
+        return "Number"
+    if isinstance(val, str):
+        return "Text"
+    if isinstance(val, list):
+        return "List"
+    if isinstance(val, dict):
+        return "Table"
+    if is_function(val):
+        return "Function"
+    if isinstance(val, Empty):
+        return "Empty"
+    return type(val).__name__
+
+
+def _rebind_value(node, value, env, is_function_context, outer_env, loop_locals):
+    """Store the evaluated value of a BindOrRebind in its target."""
+    target = node.target
+    # Handle reference vs copy semantics
+    if isinstance(value, ReferenceWrapper):
+        # This is an explicit reference (@variable), store the reference wrapper
+        actual_value = value
+    else:
+        # Copy-by-default: make a deep copy of the value
+        actual_value = deep_copy_enzo_value(value)
+
+    # Assignment to variable
+    if isinstance(target, str):
+        name = target
+
+        # Special handling for closure contexts: if we're in a ChainMap and the variable
+        # exists in a deeper layer (closure environment), update it there
+        # BUT: if we're in a function context and the variable exists in the local scope
+        # (first layer), prioritize local shadowing over closure mutation
+        if isinstance(env, ChainMap) and len(env.maps) > 1:
+            # If we're in a function context and the variable exists locally, shadow it
+            if is_function_context and name in env.maps[0]:
+                # Variable exists locally (parameter or local var) - update locally to maintain shadowing
+                target_env = env.maps[0]  # Update the local layer directly
                 update_current_env = False
+            else:
+                # Check if this variable exists in any of the deeper ChainMap layers (closure env)
+                for i, env_layer in enumerate(env.maps[1:], 1):  # Skip the first layer (local)
+                    if name in env_layer:
+                        # Found the variable in a closure layer - update it there
+                        target_env = env_layer
+                        update_current_env = False
+                        break
+                else:
+                    # Variable not found in closure layers, use normal rebinding logic
+                    target_env = env
+                    update_current_env = False
+        elif loop_locals is not None and name in loop_locals:
+            # Variable was shadowed in this loop - rebind in current env only
+            target_env = env
+            update_current_env = False
+        elif outer_env is not None and name in outer_env:
+            # Variable exists in outer scope and not shadowed - rebind there
+            target_env = outer_env
+            # Also update current env to maintain consistency
+            update_current_env = True
+        else:
+            # Variable doesn't exist in outer scope, or no outer scope - use current
+            target_env = env
+            update_current_env = False
 
-            if name not in target_env:
-                target_env[name] = actual_value
-                if update_current_env and env is not target_env:
-                    env[name] = actual_value
-                return None
-            old_val = target_env[name]
-            if not isinstance(old_val, Empty) and enzo_type(old_val) != enzo_type(actual_value):
-                raise EnzoRuntimeError(error_message_cannot_bind(enzo_type(actual_value), enzo_type(old_val)), code_line=node.code_line)
+        if name not in target_env:
             target_env[name] = actual_value
-            # Also update current env to maintain consistency for reads
             if update_current_env and env is not target_env:
                 env[name] = actual_value
             return None
-        # Assignment to variable via VarInvoke
-        if isinstance(target, VarInvoke):
-            name = target.name
-            t_code_line = getattr(target, 'code_line', node.code_line)
-
-            # Special handling for closure contexts: if we're in a ChainMap and the variable
-            # exists in a deeper layer (closure environment), update it there
-            # BUT: if we're in a function context and the variable exists in the local scope
-            # (first layer), prioritize local shadowing over closure mutation
-            if isinstance(env, ChainMap) and len(env.maps) > 1:
-                # If we're in a function context and the variable exists locally, shadow it
-                if is_function_context and name in env.maps[0]:
-                    # Variable exists locally (parameter or local var) - update locally to maintain shadowing
-                    target_env = env.maps[0]  # Update the local layer directly
-                    update_current_env = False
-                else:
-                    # Check if this variable exists in any of the deeper ChainMap layers (closure env)
-                    for i, env_layer in enumerate(env.maps[1:], 1):  # Skip the first layer (local)
-                        if name in env_layer:
-                            # Found the variable in a closure layer - update it there
-                            target_env = env_layer
-                            update_current_env = False
-                            break
-                    else:
-                        # Variable not found in closure layers, use normal rebinding logic
-                        target_env = env
-                        update_current_env = False
-            elif loop_locals is not None and name in loop_locals:
-                # Variable was shadowed in this loop - rebind in current env only
-                target_env = env
+        old_val = target_env[name]
+        if not isinstance(old_val, Empty) and _binding_type(old_val) != _binding_type(actual_value):
+            raise EnzoRuntimeError(error_message_cannot_bind(_binding_type(actual_value), _binding_type(old_val)), code_line=node.code_line)
+        target_env[name] = actual_value
+        # Also update current env to maintain consistency for reads
+        if update_current_env and env is not target_env:
+            env[name] = actual_value
+        return None
+    # Assignment to variable via VarInvoke
+    if isinstance(target, VarInvoke):
+        name = target.name
+        t_code_line = getattr(target, 'code_line', node.code_line)
+
+        # Special handling for closure contexts: if we're in a ChainMap and the variable
+        # exists in a deeper layer (closure environment), update it there
+        # BUT: if we're in a function context and the variable exists in the local scope
+        # (first layer), prioritize local shadowing over closure mutation
+        if isinstance(env, ChainMap) and len(env.maps) > 1:
+            # If we're in a function context and the variable exists locally, shadow it
+            if is_function_context and name in env.maps[0]:
+                # Variable exists locally (parameter or local var) - update locally to maintain shadowing
+                target_env = env.maps[0]  # Update the local layer directly
                 update_current_env = False
-            elif outer_env is not None and name in outer_env:
-                # Variable exists in outer scope and not shadowed - rebind there
-                target_env = outer_env
-                # Also update current env to maintain consistency
-                update_current_env = True
             else:
-                # Variable doesn't exist in outer scope, or no outer scope - use current
-                target_env = env
-                update_current_env = False
-
-            if name not in target_env:
-                target_env[name] = actual_value
-                if update_current_env and env is not target_env:
-                    env[name] = actual_value
-                return None
-            old_val = target_env[name]            # Special case: if the target variable contains a ReferenceWrapper,
-            # we need to update the original referenced variable
-            if isinstance(old_val, ReferenceWrapper):
-                # Get the target expression and environment from the reference
-                ref_expr, ref_env = old_val.get_target_info()
-
-                # Handle assignment to the referenced variable
-                if isinstance(ref_expr, VarInvoke):
-                    # Simple variable reference: update the original variable
-                    ref_name = ref_expr.name
-                    if ref_name in ref_env:
-                        ref_old_val = ref_env[ref_name]
-                        if not isinstance(ref_old_val, Empty) and enzo_type(ref_old_val) != enzo_type(actual_value):
-                            raise EnzoRuntimeError(error_message_cannot_bind(enzo_type(actual_value), enzo_type(ref_old_val)), code_line=t_code_line)
-                        ref_env[ref_name] = actual_value
-
-                        # Also update the mirrored variable name (with/without $ prefix)
-                        if ref_name.startswith('$'):
-                            bare_name = ref_name[1:]
-                            if bare_name in ref_env:
-                                ref_env[bare_name] = actual_value
-                        else:
-                            dollar_name = '$' + ref_name
-                            if dollar_name in ref_env:
-                                ref_env[dollar_name] = actual_value
-
-                        return None
-                    else:
-                        raise EnzoRuntimeError(error_message_unknown_variable(ref_name), code_line=t_code_line)
+                # Check if this variable exists in any of the deeper ChainMap layers (closure env)
+                for i, env_layer in enumerate(env.maps[1:], 1):  # Skip the first layer (local)
+                    if name in env_layer:
+                        # Found the variable in a closure layer - update it there
+                        target_env = env_layer
+                        update_current_env = False
+                        break
                 else:
-                    # Complex reference (e.g., to list index) - implement assignment
-                    if isinstance(ref_expr, ListIndex):
-                        # Handle assignment to referenced list property
-                        base_result = eval_ast(ref_expr.base, env=ref_env, value_demand=False)
-
-                        # If the base is a ReferenceWrapper, we need to operate on the referenced object
-                        if isinstance(base_result, ReferenceWrapper):
-                            base = base_result.get_value()
-                        else:
-                            base = base_result
-
-                        idx = eval_ast(ref_expr.index, env=ref_env)
-
-                        # Handle EnzoList property assignment
-                        if isinstance(base, EnzoList):
-                            if isinstance(idx, str) and getattr(ref_expr, 'is_property_access', False):
-                                # Property assignment (e.g., $list.name := value)
-                                try:
-                                    base.set_by_key(f'${idx}', actual_value)
-                                    return None
-                                except KeyError:
-                                    raise EnzoRuntimeError(error_message_list_property_not_found(idx), code_line=t_code_line)
-                            else:
-                                raise EnzoTypeError(error_message_cant_use_text_as_index(), code_line=t_code_line)
-                        else:
-                            raise EnzoTypeError(error_message_index_applies_to_lists(), code_line=t_code_line)
-                    else:
-                        raise EnzoRuntimeError("Cannot assign to complex reference", code_line=t_code_line)
-
-            elif isinstance(old_val, ListElementReference):
-                # Special case: if the target variable contains a ListElementReference,
-                # we need to update the original list element
-                list_old_val = old_val.get_value()
-                if not isinstance(list_old_val, Empty) and enzo_type(list_old_val) != enzo_type(actual_value):
-                    raise EnzoRuntimeError(error_message_cannot_bind(enzo_type(actual_value), enzo_type(list_old_val)), code_line=node.code_line)
-                old_val.set_value(actual_value)
-                return None
+                    # Variable not found in closure layers, use normal rebinding logic
+                    target_env = env
+                    update_current_env = False
+        elif loop_locals is not None and name in loop_locals:
+            # Variable was shadowed in this loop - rebind in current env only
+            target_env = env
+            update_current_env = False
+        elif outer_env is not None and name in outer_env:
+            # Variable exists in outer scope and not shadowed - rebind there
+            target_env = outer_env
+            # Also update current env to maintain consistency
+            update_current_env = True
+        else:
+            # Variable doesn't exist in outer scope, or no outer scope - use current
+            target_env = env
+            update_current_env = False
 
-            # Normal variable assignment
-            if not isinstance(old_val, Empty) and enzo_type(old_val) != enzo_type(actual_value):
-                raise EnzoRuntimeError(error_message_cannot_bind(enzo_type(actual_value), enzo_type(old_val)), code_line=t_code_line)
+        if name not in target_env:
             target_env[name] = actual_value
-            # Also update current env to maintain consistency for reads
             if update_current_env and env is not target_env:
                 env[name] = actual_value
             return None
-        # Binding to list index
-        if isinstance(target, ListIndex):
-            # Evaluate the base, but don't dereference ReferenceWrappers yet
-            base_result = eval_ast(target.base, env=env, value_demand=False)
-
-            # If the base is a ReferenceWrapper, we need to operate on the referenced object
-            if isinstance(base_result, ReferenceWrapper):
-                base = base_result.get_value()
-                is_reference = True
-            else:
-                base = base_result
-                is_reference = False
-
-            idx = eval_ast(target.index, env=env)
-            t_code_line = getattr(target, 'code_line', node.code_line)
+        old_val = target_env[name]            # Special case: if the target variable contains a ReferenceWrapper,
+        # we need to update the original referenced variable
+        if isinstance(old_val, ReferenceWrapper):
+            # Get the target expression and environment from the reference
+            ref_expr, ref_env = old_val.get_target_info()
+
+            # Handle assignment to the referenced variable
+            if isinstance(ref_expr, VarInvoke):
+                # Simple variable reference: update the original variable
+                ref_name = ref_expr.name
+                if ref_name in ref_env:
+                    ref_old_val = ref_env[ref_name]
+                    if not isinstance(ref_old_val, Empty) and _binding_type(ref_old_val) != _binding_type(actual_value):
+                        raise EnzoRuntimeError(error_message_cannot_bind(_binding_type(actual_value), _binding_type(ref_old_val)), code_line=t_code_line)
+                    ref_env[ref_name] = actual_value
+
+                    # Also update the mirrored variable name (with/without $ prefix)
+                    if ref_name.startswith('$'):
+                        bare_name = ref_name[1:]
+                        if bare_name in ref_env:
+                            ref_env[bare_name] = actual_value
+                    else:
+                        dollar_name = '$' + ref_name
+                        if dollar_name in ref_env:
+                            ref_env[dollar_name] = actual_value
 
-            # Determine the value to assign: copy vs reference
-            if isinstance(value, ReferenceWrapper):
-                assign_value = value.get_value()  # Dereference for assignment
+                    return None
+                else:
+                    raise EnzoRuntimeError(error_message_unknown_variable(ref_name), code_line=t_code_line)
             else:
-                assign_value = value  # Use the copied value (from above)
+                # Complex reference (e.g., to list index) - implement assignment
+                if isinstance(ref_expr, ListIndex):
+                    # Handle assignment to referenced list property
+                    base_result = eval_ast(ref_expr.base, env=ref_env, value_demand=False)
+
+                    # If the base is a ReferenceWrapper, we need to operate on the referenced object
+                    if isinstance(base_result, ReferenceWrapper):
+                        base = base_result.get_value()
+                    else:
+                        base = base_result
 
-            # Handle EnzoList binding
-            if isinstance(base, EnzoList):
-                if isinstance(idx, (int, float)):
-                    if isinstance(idx, float) and not idx.is_integer():
-                        raise EnzoTypeError(error_message_index_must_be_integer(), code_line=t_code_line)
-                    try:
-                        # For EnzoList, use 0-based indexing internally but convert from 1-based
-                        base[int(idx) - 1] = assign_value
-                        return None
-                    except IndexError:
-                        raise EnzoRuntimeError(error_message_list_index_out_of_range(), code_line=t_code_line)
-                elif isinstance(idx, str):
-                    # Check if this is property access or string indexing
-                    if getattr(target, 'is_property_access', False):
-                        # Property binding (e.g., $list.name := value)
-                        try:
-                            base.set_by_key(idx, assign_value)
-                            return None
-                        except KeyError:
-                            raise EnzoRuntimeError(error_message_list_property_not_found(idx), code_line=t_code_line)
+                    idx = eval_ast(ref_expr.index, env=ref_env)
+
+                    # Handle EnzoList property assignment
+                    if isinstance(base, EnzoList):
+                        if isinstance(idx, str) and getattr(ref_expr, 'is_property_access', False):
+                            # Property assignment (e.g., $list.name := value)
+                            try:
+                                base.set_by_key(f'${idx}', actual_value)
+                                return None
+                            except KeyError:
+                                raise EnzoRuntimeError(error_message_list_property_not_found(idx), code_line=t_code_line)
+                        else:
+                            raise EnzoTypeError(error_message_cant_use_text_as_index(), code_line=t_code_line)
                     else:
-                        # String indexing binding should error
-                        raise EnzoTypeError(error_message_cant_use_text_as_index(), code_line=t_code_line)
+                        raise EnzoTypeError(error_message_index_applies_to_lists(), code_line=t_code_line)
                 else:
-                    raise EnzoTypeError(error_message_index_must_be_number(), code_line=t_code_line)
+                    raise EnzoRuntimeError("Cannot assign to complex reference", code_line=t_code_line)
+
+        elif isinstance(old_val, ListElementReference):
+            # Special case: if the target variable contains a ListElementReference,
+            # we need to update the original list element
+            list_old_val = old_val.get_value()
+            if not isinstance(list_old_val, Empty) and _binding_type(list_old_val) != _binding_type(actual_value):
+                raise EnzoRuntimeError(error_message_cannot_bind(_binding_type(actual_value), _binding_type(list_old_val)), code_line=node.code_line)
+            old_val.set_value(actual_value)
+            return None
 
-            # Legacy list handling and property binding on non-EnzoList objects
-            if isinstance(idx, str):
+        # Normal variable assignment
+        if not isinstance(old_val, Empty) and _binding_type(old_val) != _binding_type(actual_value):
+            raise EnzoRuntimeError(error_message_cannot_bind(_binding_type(actual_value), _binding_type(old_val)), code_line=t_code_line)
+        target_env[name] = actual_value
+        # Also update current env to maintain consistency for reads
+        if update_current_env and env is not target_env:
+            env[name] = actual_value
+        return None
+    # Binding to list index
+    if isinstance(target, ListIndex):
+        # Evaluate the base, but don't dereference ReferenceWrappers yet
+        base_result = eval_ast(target.base, env=env, value_demand=False)
+
+        # If the base is a ReferenceWrapper, we need to operate on the referenced object
+        if isinstance(base_result, ReferenceWrapper):
+            base = base_result.get_value()
+            is_reference = True
+        else:
+            base = base_result
+            is_reference = False
+
+        idx = eval_ast(target.index, env=env)
+        t_code_line = getattr(target, 'code_line', node.code_line)
+
+        # Determine the value to assign: copy vs reference
+        if isinstance(value, ReferenceWrapper):
+            assign_value = value.get_value()  # Dereference for assignment
+        else:
+            assign_value = value  # Use the copied value (from above)
+
+        # Handle EnzoList binding
+        if isinstance(base, EnzoList):
+            if isinstance(idx, (int, float)):
+                if isinstance(idx, float) and not idx.is_integer():
+                    raise EnzoTypeError(error_message_index_must_be_integer(), code_line=t_code_line)
+                try:
+                    # For EnzoList, use 0-based indexing internally but convert from 1-based
+                    base[int(idx) - 1] = assign_value
+                    return None
+                except IndexError:
+                    raise EnzoRuntimeError(error_message_list_index_out_of_range(), code_line=t_code_line)
+            elif isinstance(idx, str):
+                # Check if this is property access or string indexing
                 if getattr(target, 'is_property_access', False):
-                    # Property binding on non-list objects should give "list property not found"
-                    raise EnzoRuntimeError(error_message_list_property_not_found(idx), code_line=t_code_line)
+                    # Property binding (e.g., $list.name := value)
+                    try:
+                        base.set_by_key(idx, assign_value)
+                        return None
+                    except KeyError:
+                        raise EnzoRuntimeError(error_message_list_property_not_found(idx), code_line=t_code_line)
                 else:
                     # String indexing binding should error
                     raise EnzoTypeError(error_message_cant_use_text_as_index(), code_line=t_code_line)
-            if not isinstance(base, list):
-                raise EnzoTypeError(error_message_index_applies_to_lists(), code_line=t_code_line)
-            if not isinstance(idx, (int, float)):
+            else:
                 raise EnzoTypeError(error_message_index_must_be_number(), code_line=t_code_line)
-            if isinstance(idx, float):
-                if not idx.is_integer():
-                    raise EnzoTypeError(error_message_index_must_be_integer(), code_line=t_code_line)
-                idx = int(idx)
-            if not isinstance(idx, int):
+
+        # Legacy list handling and property binding on non-EnzoList objects
+        if isinstance(idx, str):
+            if getattr(target, 'is_property_access', False):
+                # Property binding on non-list objects should give "list property not found"
+                raise EnzoRuntimeError(error_message_list_property_not_found(idx), code_line=t_code_line)
+            else:
+                # String indexing binding should error
+                raise EnzoTypeError(error_message_cant_use_text_as_index(), code_line=t_code_line)
+        if not isinstance(base, list):
+            raise EnzoTypeError(error_message_index_applies_to_lists(), code_line=t_code_line)
+        if not isinstance(idx, (int, float)):
+            raise EnzoTypeError(error_message_index_must_be_number(), code_line=t_code_line)
+        if isinstance(idx, float):
+            if not idx.is_integer():
                 raise EnzoTypeError(error_message_index_must_be_integer(), code_line=t_code_line)
-            if idx < 1 or idx > len(base):
-                raise EnzoRuntimeError(error_message_list_index_out_of_range(), code_line=t_code_line)
-            base[idx - 1] = value
-            return None
+            idx = int(idx)
+        if not isinstance(idx, int):
+            raise EnzoTypeError(error_message_index_must_be_integer(), code_line=t_code_line)
+        if idx < 1 or idx > len(base):
+            raise EnzoRuntimeError(error_message_list_index_out_of_range(), code_line=t_code_line)
+        base[idx - 1] = value
+        return None
 
-        # Handle assignment to BlueprintInstantiation with empty field_values (list assignment)
-        if isinstance(target, BlueprintInstantiation) and not target.field_values:
-            # This is $variable[] <: value - assign value to the variable
-            var_name = target.blueprint_name
-            if var_name not in env:
-                raise EnzoRuntimeError(error_message_unknown_variable(var_name), code_line=getattr(node, 'code_line', None))
-
-            original_var = env[var_name]
-
-            # If the original variable is an EnzoList, we want to preserve its structure
-            # and update it intelligently rather than replacing it entirely
-            if isinstance(original_var, EnzoList) and isinstance(value, (list, EnzoList)):
-                # Smart update: try to match up values with existing keys
-                if isinstance(value, EnzoList):
-                    # If the new EnzoList has keys, copy them
-                    if value._key_map:
-                        for key in value._key_map:
-                            original_var.set_key(key, value.get_by_key(key))
-                    else:
-                        # If the new EnzoList only has positional elements, map them to existing keys
-                        existing_keys = list(original_var._key_map.keys())
-                        for i, val in enumerate(value._elements):
-                            if i < len(existing_keys):
-                                key = existing_keys[i]
-                                original_var.set_key(key, val)
-                elif isinstance(value, list):
-                    # If it's a regular list, try to map values to existing keys
+    # Handle assignment to BlueprintInstantiation with empty field_values (list assignment)
+    if isinstance(target, BlueprintInstantiation) and not target.field_values:
+        # This is $variable[] <: value - assign value to the variable
+        var_name = target.blueprint_name
+        if var_name not in env:
+            raise EnzoRuntimeError(error_message_unknown_variable(var_name), code_line=getattr(node, 'code_line', None))
+
+        original_var = env[var_name]
+
+        # If the original variable is an EnzoList, we want to preserve its structure
+        # and update it intelligently rather than replacing it entirely
+        if isinstance(original_var, EnzoList) and isinstance(value, (list, EnzoList)):
+            # Smart update: try to match up values with existing keys
+            if isinstance(value, EnzoList):
+                # If the new EnzoList has keys, copy them
+                if value._key_map:
+                    for key in value._key_map:
+                        original_var.set_key(key, value.get_by_key(key))
+                else:
+                    # If the new EnzoList only has positional elements, map them to existing keys
                     existing_keys = list(original_var._key_map.keys())
-                    for i, val in enumerate(value):
+                    for i, val in enumerate(value._elements):
                         if i < len(existing_keys):
-                            # Update existing key with new value
                             key = existing_keys[i]
                             original_var.set_key(key, val)
-                # Don't need to reassign - we modified the existing object
+            elif isinstance(value, list):
+                # If it's a regular list, try to map values to existing keys
+                existing_keys = list(original_var._key_map.keys())
+                for i, val in enumerate(value):
+                    if i < len(existing_keys):
+                        # Update existing key with new value
+                        key = existing_keys[i]
+                        original_var.set_key(key, val)
+            # Don't need to reassign - we modified the existing object
+        else:
+            # Replace the entire variable with the new value (fallback)
+            env[var_name] = deep_copy_enzo_value(value)
+
+            # Also update with/without $ prefix
+            if var_name.startswith('$'):
+                bare_name = var_name[1:]
+                if bare_name in env:
+                    env[bare_name] = deep_copy_enzo_value(value)
             else:
-                # Replace the entire variable with the new value (fallback)
-                env[var_name] = deep_copy_enzo_value(value)
+                dollar_name = '$' + var_name
+                if dollar_name in env:
+                    env[dollar_name] = deep_copy_enzo_value(value)
+        return None
 
-                # Also update with/without $ prefix
-                if var_name.startswith('$'):
-                    bare_name = var_name[1:]
-                    if bare_name in env:
-                        env[bare_name] = deep_copy_enzo_value(value)
-                else:
-                    dollar_name = '$' + var_name
-                    if dollar_name in env:
-                        env[dollar_name] = deep_copy_enzo_value(value)
-            return None
+    raise EnzoRuntimeError(error_message_cannot_bind_target(target), code_line=getattr(node, 'code_line', None))
 
-        raise EnzoRuntimeError(error_message_cannot_bind_target(target), code_line=getattr(node, 'code_line', None))
-    if isinstance(node, ListIndex):
-        base = eval_ast(node.base, env=env)
-        idx = eval_ast(node.index, env=env)
-        t_code_line = getattr(node, 'code_line', code_line)
 
-        # Handle EnzoList indexing
-        if isinstance(base, EnzoList):
-            try:
-                if isinstance(idx, (int, float)):
-                    if isinstance(idx, float) and not idx.is_integer():
-                        raise EnzoTypeError(error_message_index_must_be_integer(), code_line=t_code_line)
-                    val = base.get_by_index(int(idx))
+class InlineCacheStats:
+    """Hit and miss counts of the property-read inline caches on ListIndex nodes."""
+    __slots__ = ("hits", "misses")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __repr__(self):
+        return f"inline caches: {self.hits} hits, {self.misses} misses ({self.hit_rate():.1%} hit rate)"
+
+
+inline_cache_stats = InlineCacheStats()
+
+
+def _read_property(node, base, key):
+    """base.get_by_key(key) through node's inline cache.
+
+    The cache keeps the slot the last read resolved to and the shape it resolved it for;
+    a list with the same shape has the key in the same slot. Unshared shapes grow in
+    place, so reads from them are not cached.
+    """
+    cache = node.inline_cache
+    shape = base._shape
+    if cache is not None and cache[0] is shape and cache[1] == key:
+        inline_cache_stats.hits += 1
+        return base._elements[cache[2]]
+    inline_cache_stats.misses += 1
+    slot = base.key_slot(key)
+    if shape.shared:
+        node.inline_cache = (shape, key, slot)
+    return base._elements[slot]
+
+
+@register_eval_handler(ListIndex)
+def _eval_list_index(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    base = eval_ast(node.base, env=env)
+    return _index_value(node, base, value_demand, env, is_loop_context)
+
+
+def _index_value(node, base, value_demand, env, is_loop_context):
+    """The value of ListIndex node once its base is evaluated."""
+    code_line = getattr(node, 'code_line', None)
+    idx = eval_ast(node.index, env=env)
+    t_code_line = getattr(node, 'code_line', code_line)
+
+    # Handle EnzoList indexing
+    if isinstance(base, EnzoList):
+        try:
+            if isinstance(idx, (int, float)):
+                if isinstance(idx, float) and not idx.is_integer():
+                    raise EnzoTypeError(error_message_index_must_be_integer(), code_line=t_code_line)
+                val = base.get_by_index(int(idx))
+                # Auto-invoke functions in value demand context
+                if value_demand and is_function(val):
+                    return invoke_function(val, [], env, self_obj=None, is_loop_context=is_loop_context)
+                return val
+            elif isinstance(idx, str):
+                # Check if this is property access (.foo) or string indexing (."foo")
+                if getattr(node, 'is_property_access', False):
+                    # Property access (e.g., $list.name)
+                    val = _read_property(node, base, idx)
                     # Auto-invoke functions in value demand context
-                    if value_demand and isinstance(val, EnzoFunction):
-                        return invoke_function(val, [], env, self_obj=None, is_loop_context=is_loop_context)
+                    if value_demand and is_function(val):
+                        return invoke_function(val, [], env, self_obj=base, is_loop_context=is_loop_context)
                     return val
-                elif isinstance(idx, str):
-                    # Check if this is property access (.foo) or string indexing (."foo")
-                    if getattr(node, 'is_property_access', False):
-                        # Property access (e.g., $list.name)
-                        val = base.get_by_key(idx)
-                        # Auto-invoke functions in value demand context
-                        if value_demand and isinstance(val, EnzoFunction):
-                            return invoke_function(val, [], env, self_obj=base, is_loop_context=is_loop_context)
-                        return val
-                    else:
-                        # String indexing like ."foo" should error
-                        raise EnzoTypeError(error_message_cant_use_text_as_index(), code_line=t_code_line)
-                else:
-                    raise EnzoTypeError(error_message_index_must_be_number(), code_line=t_code_line)
-            except (IndexError, KeyError):
-                if isinstance(idx, str) and getattr(node, 'is_property_access', False):
-                    raise EnzoRuntimeError(error_message_list_property_not_found(idx), code_line=t_code_line)
                 else:
-                    raise EnzoRuntimeError(error_message_list_index_out_of_range(), code_line=t_code_line)
-
-        # Check if this is variant access before falling back to error handling
-        if isinstance(idx, str) and getattr(node, 'is_property_access', False):
-            # Check if base is a variant group (has a variants attribute)
-            if hasattr(base, 'variants'):
-                # This is variant access: VariantGroup.VariantName
-                variant_group_name = None
-                if isinstance(node.base, VarInvoke):
-                    variant_group_name = node.base.name
-
-                # Check if it's a valid variant
-                if idx not in base.variants:
-                    raise EnzoRuntimeError(f"error: '{idx}' not a valid {variant_group_name}", code_line=t_code_line)
-
-                # Create a variant instance using the global class
-                return EnzoVariantInstance(variant_group_name, idx)
+                    # String indexing like ."foo" should error
+                    raise EnzoTypeError(error_message_cant_use_text_as_index(), code_line=t_code_line)
             else:
-                # Property access on non-list objects should give "list property not found"
+                raise EnzoTypeError(error_message_index_must_be_number(), code_line=t_code_line)
+        except (IndexError, KeyError):
+            if isinstance(idx, str) and getattr(node, 'is_property_access', False):
                 raise EnzoRuntimeError(error_message_list_property_not_found(idx), code_line=t_code_line)
+            else:
+                raise EnzoRuntimeError(error_message_list_index_out_of_range(), code_line=t_code_line)
 
-        # Legacy list handling and property access on non-EnzoList objects
-        if isinstance(idx, str):
-            # String indexing should give "list index must be an integer"
-            raise EnzoRuntimeError(error_message_index_must_be_integer(), code_line=t_code_line)
-        if not isinstance(base, list):
+    # Check if this is variant access before falling back to error handling
+    if isinstance(idx, str) and getattr(node, 'is_property_access', False):
+        # Check if base is a variant group (has a variants attribute)
+        if hasattr(base, 'variants'):
+            # This is variant access: VariantGroup.VariantName
+            variant_group_name = None
             if isinstance(node.base, VarInvoke):
-                raise EnzoRuntimeError(error_message_index_applies_to_lists(), code_line=t_code_line)
-            raise EnzoRuntimeError(error_message_list_index_out_of_range(), code_line=t_code_line)
-        if not isinstance(idx, int) or idx < 1 or idx > len(base):
-            raise EnzoRuntimeError(error_message_list_index_out_of_range(), code_line=t_code_line)
-        val = base[idx - 1]
-        # Auto-invoke functions in value demand context
-        if value_demand and isinstance(val, EnzoFunction):
-            return invoke_function(val, [], env, self_obj=None, is_loop_context=is_loop_context)
-        return val
-    if isinstance(node, ParameterDeclaration):
-        raise EnzoRuntimeError(error_message_param_outside_function(), code_line=getattr(node, 'code_line', None))
+                variant_group_name = node.base.name
 
-    # Blueprint evaluation
-    if isinstance(node, BlueprintAtom):
-        # BlueprintAtom represents a blueprint definition
-        # For now, we'll store it as-is in the environment when it's bound to a name
-        return node
+            # Check if it's a valid variant
+            if idx not in base.variants:
+                raise EnzoRuntimeError(f"error: '{idx}' not a valid {variant_group_name}", code_line=t_code_line)
 
-    if isinstance(node, BlueprintInstantiation):
-        # BlueprintInstantiation represents creating an instance from a blueprint
-        blueprint_name = node.blueprint_name
+            # Create a variant instance using the global class
+            return EnzoVariantInstance(variant_group_name, idx)
+        else:
+            # Property access on non-list objects should give "list property not found"
+            raise EnzoRuntimeError(error_message_list_property_not_found(idx), code_line=t_code_line)
+
+    # Legacy list handling and property access on non-EnzoList objects
+    if isinstance(idx, str):
+        # String indexing should give "list index must be an integer"
+        raise EnzoRuntimeError(error_message_index_must_be_integer(), code_line=t_code_line)
+    if not isinstance(base, list):
+        if isinstance(node.base, VarInvoke):
+            raise EnzoRuntimeError(error_message_index_applies_to_lists(), code_line=t_code_line)
+        raise EnzoRuntimeError(error_message_list_index_out_of_range(), code_line=t_code_line)
+    if not isinstance(idx, int) or idx < 1 or idx > len(base):
+        raise EnzoRuntimeError(error_message_list_index_out_of_range(), code_line=t_code_line)
+    val = base[idx - 1]
+    # Auto-invoke functions in value demand context
+    if value_demand and is_function(val):
+        return invoke_function(val, [], env, self_obj=None, is_loop_context=is_loop_context)
+    return val
+
+
+@register_eval_handler(ParameterDeclaration)
+def _eval_parameter_declaration(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    raise EnzoRuntimeError(error_message_param_outside_function(), code_line=getattr(node, 'code_line', None))
+
+
+# Blueprint evaluation
+
+# FieldLayout value of a function atom default, which is evaluated without being invoked
+_FUNCTION_DEFAULT = object()
+
+
+class FieldLayout:
+    """The fields an instance of a blueprint, or of a variant of a group, is built from.
+
+    fields has (name, key, default node, value) per field in instance order: name is the
+    field name without its $ and key is the name with it. value is the default itself
+    for number and plain text literals, None for fields without a default, _PER_CALL
+    for defaults evaluated per instance and _FUNCTION_DEFAULT for function atoms.
+    """
+    __slots__ = ("fields",)
+
+    def __init__(self, fields):
+        layout = []
+        for field_name, field_default in fields:
+            name = field_name[1:] if field_name.startswith('$') else field_name
+            if field_default is None:
+                value = None
+            elif isinstance(field_default, FunctionAtom):
+                value = _FUNCTION_DEFAULT
+            else:
+                value = _constant_default(field_default)
+            layout.append((name, f'${name}', field_default, value))
+        self.fields = tuple(layout)
+
+
+def blueprint_layout(blueprint):
+    """The FieldLayout of a BlueprintAtom: its fields in definition order."""
+    layout = blueprint.layout
+    if layout is None:
+        layout = blueprint.layout = FieldLayout(blueprint.fields)
+    return layout
+
+
+def variant_layout(group_blueprint, variant_blueprint):
+    """The FieldLayout of a variant, composed with its group's blueprint if there is one.
+
+    The group blueprint's fields come first. A variant field with the same name replaces
+    the group's and moves to the end.
+    """
+    merged = {}
+    blueprints = [variant_blueprint]
+    if group_blueprint is not None and group_blueprint != variant_blueprint:
+        blueprints.insert(0, group_blueprint)
+    for blueprint in blueprints:
+        for field_name, field_default in blueprint.fields:
+            name = field_name[1:] if field_name.startswith('$') else field_name
+            merged.pop(name, None)
+            merged[name] = (field_name, field_default)
+    return FieldLayout(merged.values())
+
+
+def _provided_fields(node):
+    """Map the field names of an instantiation, without their $, to their value nodes."""
+    provided = node.provided_fields
+    if provided is None:
+        provided = node.provided_fields = {}
+        for field_name, field_value in node.field_values:
+            provided[field_name[1:] if field_name.startswith('$') else field_name] = field_value
+    return provided
+
+
+def _instantiate(layout, node, blueprint_name, env):
+    """Build the instance an instantiation node makes from layout, in one pass over its fields."""
+    instance = EnzoList(is_blueprint_instance=True, blueprint_name=blueprint_name)
+    provided = _provided_fields(node)
+    for name, key, default, value in layout.fields:
+        if name in provided:
+            # Use the provided value
+            instance.set_key(key, eval_ast(provided[name], value_demand=True, env=env))
+        elif value is None:
+            continue
+        elif value is _PER_CALL:
+            instance.set_key(key, eval_ast(default, value_demand=True, env=env))
+        elif value is _FUNCTION_DEFAULT:
+            # Preserve function objects, don't auto-invoke
+            instance.set_key(key, eval_ast(default, value_demand=False, env=env))
+        else:
+            instance.set_key(key, value)
+    return instance
 
-        # Look up the blueprint definition
-        if blueprint_name not in env:
-            raise EnzoRuntimeError(f"error: unknown blueprint '{blueprint_name}'", code_line=getattr(node, 'code_line', None))
 
-        blueprint_def = env[blueprint_name]
-        if not isinstance(blueprint_def, BlueprintAtom):
-            raise EnzoRuntimeError(f"error: '{blueprint_name}' is not a blueprint", code_line=getattr(node, 'code_line', None))
+@register_eval_handler(BlueprintAtom)
+def _eval_blueprint_atom(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # BlueprintAtom represents a blueprint definition
+    # For now, we'll store it as-is in the environment when it's bound to a name
+    blueprint_layout(node)
+    return node
 
-        # Create an instance by evaluating the field values and creating an EnzoList
-        instance = EnzoList(is_blueprint_instance=True, blueprint_name=blueprint_name)
 
-        # Create a map of provided field values for efficient lookup
-        provided_values = {}
-        for field_name, field_value in node.field_values:
-            clean_field_name = field_name[1:] if field_name.startswith('$') else field_name
-            provided_values[clean_field_name] = field_value
+@register_eval_handler(BlueprintInstantiation)
+def _eval_blueprint_instantiation(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # BlueprintInstantiation represents creating an instance from a blueprint
+    blueprint_name = node.blueprint_name
+
+    # Look up the blueprint definition
+    if blueprint_name not in env:
+        raise EnzoRuntimeError(f"error: unknown blueprint '{blueprint_name}'", code_line=getattr(node, 'code_line', None))
+
+    blueprint_def = env[blueprint_name]
+    if not isinstance(blueprint_def, BlueprintAtom):
+        raise EnzoRuntimeError(f"error: '{blueprint_name}' is not a blueprint", code_line=getattr(node, 'code_line', None))
+
+    # Create an instance by evaluating the field values and creating an EnzoList
+    instance = _instantiate(blueprint_layout(blueprint_def), node, blueprint_name, env)
+
+    # TODO: Add type validation
 
-        # Iterate through blueprint fields in their definition order
+    return instance
+
+
+@register_eval_handler(BlueprintComposition)
+def _eval_blueprint_composition(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # BlueprintComposition represents composing multiple blueprints
+    combined_fields = []
+    seen_field_names = set()
+
+    for blueprint_item in node.blueprints:
+        blueprint_def = None
+
+        if isinstance(blueprint_item, str):
+            # Blueprint name - look it up in environment
+            if blueprint_item not in env:
+                raise EnzoRuntimeError(f"error: unknown blueprint '{blueprint_item}'", code_line=getattr(node, 'code_line', None))
+            blueprint_def = env[blueprint_item]
+            if not isinstance(blueprint_def, BlueprintAtom):
+                raise EnzoRuntimeError(f"error: '{blueprint_item}' is not a blueprint", code_line=getattr(node, 'code_line', None))
+        elif isinstance(blueprint_item, BlueprintAtom):
+            # Inline blueprint definition
+            blueprint_def = blueprint_item
+        else:
+            raise EnzoRuntimeError(f"error: invalid blueprint component in composition", code_line=getattr(node, 'code_line', None))
+
+        # Check for field conflicts and collect fields
         for field_name, field_default in blueprint_def.fields:
             clean_field_name = field_name[1:] if field_name.startswith('$') else field_name
-            key_with_prefix = f'${clean_field_name}'
-
-            if clean_field_name in provided_values:
-                # Use the provided value
-                evaluated_value = eval_ast(provided_values[clean_field_name], value_demand=True, env=env)
-                instance.set_key(key_with_prefix, evaluated_value)
-            elif field_default is not None:
-                # Use the default value - preserve function objects, don't auto-invoke
-                if isinstance(field_default, FunctionAtom):
-                    default_value = eval_ast(field_default, value_demand=False, env=env)
-                else:
-                    default_value = eval_ast(field_default, value_demand=True, env=env)
-                instance.set_key(key_with_prefix, default_value)
-
-        # TODO: Add type validation
-
-        return instance
-
-    if isinstance(node, BlueprintComposition):
-        # BlueprintComposition represents composing multiple blueprints
-        combined_fields = []
-        seen_field_names = set()
-
-        for blueprint_item in node.blueprints:
-            blueprint_def = None
-
-            if isinstance(blueprint_item, str):
-                # Blueprint name - look it up in environment
-                if blueprint_item not in env:
-                    raise EnzoRuntimeError(f"error: unknown blueprint '{blueprint_item}'", code_line=getattr(node, 'code_line', None))
-                blueprint_def = env[blueprint_item]
-                if not isinstance(blueprint_def, BlueprintAtom):
-                    raise EnzoRuntimeError(f"error: '{blueprint_item}' is not a blueprint", code_line=getattr(node, 'code_line', None))
-            elif isinstance(blueprint_item, BlueprintAtom):
-                # Inline blueprint definition
-                blueprint_def = blueprint_item
+            if clean_field_name in seen_field_names:
+                raise EnzoRuntimeError(f"error: duplicate property '{clean_field_name}' in composed blueprints", code_line=getattr(node, 'code_line', None))
+            seen_field_names.add(clean_field_name)
+            combined_fields.append((field_name, field_default))
+
+    # Return a new blueprint with the combined fields, laid out now rather than on first use
+    composed = BlueprintAtom(combined_fields, code_line=getattr(node, 'code_line', None))
+    blueprint_layout(composed)
+    return composed
+
+
+@register_eval_handler(VariantGroup)
+def _eval_variant_group(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # VariantGroup represents a variant group definition
+    # Process variants and register inline blueprint definitions
+    variant_names = []
+    group_blueprint = None  # Store the blueprint if the group name matches a variant
+
+    for variant in node.variants:
+        if isinstance(variant, tuple):
+            # Inline blueprint definition: (variant_name, blueprint_def)
+            variant_name, blueprint_def = variant
+            variant_names.append(variant_name)
+
+            if variant_name == node.name:
+                # This variant has the same name as the group - store separately
+                group_blueprint = blueprint_def
+                env[f"__{node.name}__blueprint"] = blueprint_def
             else:
-                raise EnzoRuntimeError(f"error: invalid blueprint component in composition", code_line=getattr(node, 'code_line', None))
-
-            # Check for field conflicts and collect fields
-            for field_name, field_default in blueprint_def.fields:
-                clean_field_name = field_name[1:] if field_name.startswith('$') else field_name
-                if clean_field_name in seen_field_names:
-                    raise EnzoRuntimeError(f"error: duplicate property '{clean_field_name}' in composed blueprints", code_line=getattr(node, 'code_line', None))
-                seen_field_names.add(clean_field_name)
-                combined_fields.append((field_name, field_default))
-
-        # Return a new blueprint with the combined fields
-        return BlueprintAtom(combined_fields, code_line=getattr(node, 'code_line', None))
-
-    if isinstance(node, VariantGroup):
-        # VariantGroup represents a variant group definition
-        # Process variants and register inline blueprint definitions
-        variant_names = []
-        group_blueprint = None  # Store the blueprint if the group name matches a variant
-
-        for variant in node.variants:
-            if isinstance(variant, tuple):
-                # Inline blueprint definition: (variant_name, blueprint_def)
-                variant_name, blueprint_def = variant
-                variant_names.append(variant_name)
-
-                if variant_name == node.name:
-                    # This variant has the same name as the group - store separately
-                    group_blueprint = blueprint_def
-                    env[f"__{node.name}__blueprint"] = blueprint_def
-                else:
-                    # Register other blueprints normally
-                    env[variant_name] = blueprint_def
-            else:
-                # Simple variant name - assume it's already defined elsewhere
-                variant_names.append(variant)
-
-        # Create a runtime variant group that validates variant access
-        return EnzoVariantGroup(node.name, variant_names, group_blueprint)
-
-    if isinstance(node, VariantGroupExtension):
-        # VariantGroupExtension represents extending an existing variant group
-        group_name = node.name
-
-        # Check if the variant group exists
-        if group_name not in env:
-            raise EnzoRuntimeError(f"error: cannot extend undefined variant group '{group_name}'", code_line=getattr(node, 'code_line', None))
-
-        existing_group = env[group_name]
-        if not isinstance(existing_group, EnzoVariantGroup):
-            raise EnzoRuntimeError(f"error: '{group_name}' is not a variant group", code_line=getattr(node, 'code_line', None))
-
-        # Process new variants to add
-        new_variant_names = []
-        for variant in node.variants:
-            if isinstance(variant, tuple):
-                # Inline blueprint definition: (variant_name, blueprint_def)
-                variant_name, blueprint_def = variant
-                new_variant_names.append(variant_name)
+                # Register other blueprints normally
                 env[variant_name] = blueprint_def
-            else:
-                # Simple variant name
-                new_variant_names.append(variant)
+        else:
+            # Simple variant name - assume it's already defined elsewhere
+            variant_names.append(variant)
+
+    # Lay out the inline variants now rather than on their first instantiation
+    if node.layouts is None:
+        node.layouts = {variant[0]: (group_blueprint, variant[1], variant_layout(group_blueprint, variant[1]))
+                        for variant in node.variants if isinstance(variant, tuple) and variant[0] != node.name}
+
+    # Create a runtime variant group that validates variant access
+    return EnzoVariantGroup(node.name, variant_names, group_blueprint, dict(node.layouts))
+
+
+@register_eval_handler(VariantGroupExtension)
+def _eval_variant_group_extension(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # VariantGroupExtension represents extending an existing variant group
+    group_name = node.name
+
+    # Check if the variant group exists
+    if group_name not in env:
+        raise EnzoRuntimeError(f"error: cannot extend undefined variant group '{group_name}'", code_line=getattr(node, 'code_line', None))
+
+    existing_group = env[group_name]
+    if not isinstance(existing_group, EnzoVariantGroup):
+        raise EnzoRuntimeError(f"error: '{group_name}' is not a variant group", code_line=getattr(node, 'code_line', None))
+
+    # Process new variants to add
+    new_variant_names = []
+    group_blueprint = existing_group.group_blueprint
+    layouts = dict(existing_group.layouts)
+    for variant in node.variants:
+        if isinstance(variant, tuple):
+            # Inline blueprint definition: (variant_name, blueprint_def)
+            variant_name, blueprint_def = variant
+            new_variant_names.append(variant_name)
+            env[variant_name] = blueprint_def
+            layouts[variant_name] = (group_blueprint, blueprint_def, variant_layout(group_blueprint, blueprint_def))
+        else:
+            # Simple variant name
+            new_variant_names.append(variant)
 
-        # Create extended variant group by merging with existing
-        all_variants = list(existing_group.variants) + new_variant_names
-        extended_group = EnzoVariantGroup(group_name, all_variants, existing_group.group_blueprint)
+    # Create extended variant group by merging with existing
+    all_variants = list(existing_group.variants) + new_variant_names
+    extended_group = EnzoVariantGroup(group_name, all_variants, group_blueprint, layouts)
 
-        # Update the environment with the extended group
-        env[group_name] = extended_group
+    # Update the environment with the extended group
+    env[group_name] = extended_group
 
-        # Return None for extensions - they are side-effect operations
-        return None
+    # Return None for extensions - they are side-effect operations
+    return None
 
-    if isinstance(node, VariantAccess):
-        # VariantAccess represents accessing a variant (e.g., Magic-Type.Fire)
-        variant_group_name = node.variant_group_name
-        variant_name = node.variant_name
 
-        # Look up the variant group
-        if variant_group_name not in env:
-            raise EnzoRuntimeError(f"error: unknown variant group '{variant_group_name}'", code_line=getattr(node, 'code_line', None))
+@register_eval_handler(VariantAccess)
+def _eval_variant_access(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # VariantAccess represents accessing a variant (e.g., Magic-Type.Fire)
+    variant_group_name = node.variant_group_name
+    variant_name = node.variant_name
 
-        variant_group = env[variant_group_name]
+    # Look up the variant group
+    if variant_group_name not in env:
+        raise EnzoRuntimeError(f"error: unknown variant group '{variant_group_name}'", code_line=getattr(node, 'code_line', None))
 
-        # Check if it's a valid variant
-        if hasattr(variant_group, 'variants') and variant_name not in variant_group.variants:
-            raise EnzoRuntimeError(f"error: '{variant_name}' not a valid {variant_group_name}", code_line=getattr(node, 'code_line', None))
+    variant_group = env[variant_group_name]
 
-        # Create a variant instance using the global class
-        return EnzoVariantInstance(variant_group_name, variant_name)
-    if isinstance(node, VariantInstantiation):
-        # VariantInstantiation represents creating an instance of a specific variant
-        variant_group_name = node.variant_group_name
-        variant_name = node.variant_name
+    # Check if it's a valid variant
+    if hasattr(variant_group, 'variants') and variant_name not in variant_group.variants:
+        raise EnzoRuntimeError(f"error: '{variant_name}' not a valid {variant_group_name}", code_line=getattr(node, 'code_line', None))
 
-        # Look up the variant group to validate the variant
-        if variant_group_name not in env:
-            raise EnzoRuntimeError(f"error: unknown variant group '{variant_group_name}'", code_line=getattr(node, 'code_line', None))
+    # Create a variant instance using the global class
+    return EnzoVariantInstance(variant_group_name, variant_name)
 
-        variant_group = env[variant_group_name]
-        if not hasattr(variant_group, 'variants') or variant_name not in variant_group.variants:
-            raise EnzoRuntimeError(f"error: '{variant_name}' not a valid {variant_group_name}", code_line=getattr(node, 'code_line', None))
 
-        # Collect blueprints to compose for this variant
-        blueprints_to_compose = []
+@register_eval_handler(VariantInstantiation)
+def _eval_variant_instantiation(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # VariantInstantiation represents creating an instance of a specific variant
+    variant_group_name = node.variant_group_name
+    variant_name = node.variant_name
 
-        # Check if there's a preserved group blueprint (for cases like Monster3.Monster3)
-        group_blueprint_key = f"__{variant_group_name}__blueprint"
-        if group_blueprint_key in env:
-            blueprints_to_compose.append(env[group_blueprint_key])
+    # Look up the variant group to validate the variant
+    if variant_group_name not in env:
+        raise EnzoRuntimeError(f"error: unknown variant group '{variant_group_name}'", code_line=getattr(node, 'code_line', None))
 
-        # Look up the specific variant blueprint
-        if variant_name not in env:
-            raise EnzoRuntimeError(f"error: unknown variant '{variant_name}'", code_line=getattr(node, 'code_line', None))
+    variant_group = env[variant_group_name]
+    if not hasattr(variant_group, 'variants') or variant_name not in variant_group.variants:
+        raise EnzoRuntimeError(f"error: '{variant_name}' not a valid {variant_group_name}", code_line=getattr(node, 'code_line', None))
 
-        variant_blueprint = env[variant_name]
-        if not isinstance(variant_blueprint, BlueprintAtom):
-            raise EnzoRuntimeError(f"error: '{variant_name}' is not a blueprint", code_line=getattr(node, 'code_line', None))
+    # Check if there's a preserved group blueprint (for cases like Monster3.Monster3)
+    group_blueprint = env.get(f"__{variant_group_name}__blueprint")
 
-        # Add the variant blueprint (avoid duplicates)
-        if not blueprints_to_compose or variant_blueprint != blueprints_to_compose[0]:
-            blueprints_to_compose.append(variant_blueprint)
+    # Look up the specific variant blueprint
+    if variant_name not in env:
+        raise EnzoRuntimeError(f"error: unknown variant '{variant_name}'", code_line=getattr(node, 'code_line', None))
 
-        # Create an instance by combining all blueprints
-        instance = EnzoList(is_blueprint_instance=True, blueprint_name=variant_name)
+    variant_blueprint = env[variant_name]
+    if not isinstance(variant_blueprint, BlueprintAtom):
+        raise EnzoRuntimeError(f"error: '{variant_name}' is not a blueprint", code_line=getattr(node, 'code_line', None))
 
-        # Create a map of provided field values for efficient lookup
-        provided_values = {}
-        for field_name, field_value in node.field_values:
-            clean_field_name = field_name[1:] if field_name.startswith('$') else field_name
-            provided_values[clean_field_name] = field_value
-
-        # Collect all fields from all blueprints (later blueprints override earlier ones)
-        all_fields = []
-        seen_field_names = set()
-
-        for blueprint in blueprints_to_compose:
-            for field_name, field_default in blueprint.fields:
-                clean_field_name = field_name[1:] if field_name.startswith('$') else field_name
-                if clean_field_name not in seen_field_names:
-                    all_fields.append((field_name, field_default))
-                    seen_field_names.add(clean_field_name)
-                else:
-                    # Override: remove the previous field and add the new one
-                    all_fields = [(fn, fd) for fn, fd in all_fields if (fn[1:] if fn.startswith('$') else fn) != clean_field_name]
-                    all_fields.append((field_name, field_default))
+    # Fields of the group blueprint come first; the variant's own fields override them
+    entry = variant_group.layouts.get(variant_name)
+    if entry is None or entry[0] is not group_blueprint or entry[1] is not variant_blueprint:
+        # A variant defined outside the group, or blueprints rebound since it was laid out
+        entry = (group_blueprint, variant_blueprint, variant_layout(group_blueprint, variant_blueprint))
+        variant_group.layouts[variant_name] = entry
+    instance = _instantiate(entry[2], node, variant_name, env)
 
-        # Iterate through all combined fields in their definition order
-        for field_name, field_default in all_fields:
-            clean_field_name = field_name[1:] if field_name.startswith('$') else field_name
-            key_with_prefix = f'${clean_field_name}'
-
-            if clean_field_name in provided_values:
-                # Use the provided value
-                evaluated_value = eval_ast(provided_values[clean_field_name], value_demand=True, env=env)
-                instance.set_key(key_with_prefix, evaluated_value)
-            elif field_default is not None:
-                # Use the default value - preserve function objects, don't auto-invoke
-                if isinstance(field_default, FunctionAtom):
-                    default_value = eval_ast(field_default, value_demand=False, env=env)
-                else:
-                    default_value = eval_ast(field_default, value_demand=True, env=env)
-                instance.set_key(key_with_prefix, default_value)
+    return instance
 
-        return instance
 
-    # Control flow evaluation
-    if isinstance(node, IfStatement):
-        # Check if this is a non-exclusive multi-branch
-        if hasattr(node, 'is_non_exclusive_multi_branch') and node.is_non_exclusive_multi_branch:
-            # For non-exclusive multi-branch, evaluate all conditions and execute all matching ones
-            results = []
-            any_executed = False
+# Control flow evaluation
+@register_eval_handler(IfStatement)
+def _eval_if_statement(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # Check if this is a non-exclusive multi-branch
+    if hasattr(node, 'is_non_exclusive_multi_branch') and node.is_non_exclusive_multi_branch:
+        # For non-exclusive multi-branch, evaluate all conditions and execute all matching ones
+        results = []
+        any_executed = False
 
-            try:
-                for condition, then_block in node.all_branches:
-                    condition_result = eval_ast(condition, env=env, is_loop_context=is_loop_context)
-                    if _is_truthy(condition_result):
-                        any_executed = True
-                        # Execute this branch with isolated scope and collect all results
-                        branch_env = env.copy()
-                        for stmt in then_block:
-                            # In loop context, preserve the original outer_env; otherwise use current env
-                            target_outer_env = outer_env if is_loop_context else env
-                            result = eval_ast(stmt, env=branch_env, is_loop_context=is_loop_context, is_function_context=True, outer_env=target_outer_env, loop_locals=loop_locals)
-                            if result is not None:
-                                results.append(result)
-
-                # If no branches executed and there's an else block, execute it
-                if not any_executed and node.else_block:
-                    else_env = env.copy()
-                    for stmt in node.else_block:
+        try:
+            for condition, then_block in node.all_branches:
+                condition_result = eval_ast(condition, env=env, is_loop_context=is_loop_context)
+                if _is_truthy(condition_result):
+                    any_executed = True
+                    # Execute this branch with isolated scope and collect all results
+                    branch_env = env.copy()
+                    for stmt in then_block:
                         # In loop context, preserve the original outer_env; otherwise use current env
                         target_outer_env = outer_env if is_loop_context else env
-                        result = eval_ast(stmt, env=else_env, is_loop_context=is_loop_context, is_function_context=True, outer_env=target_outer_env, loop_locals=loop_locals)
+                        result = eval_ast(stmt, env=branch_env, is_loop_context=is_loop_context, is_function_context=True, outer_env=target_outer_env, loop_locals=loop_locals)
                         if result is not None:
                             results.append(result)
+
+            # If no branches executed and there's an else block, execute it
+            if not any_executed and node.else_block:
+                else_env = env.copy()
+                for stmt in node.else_block:
+                    # In loop context, preserve the original outer_env; otherwise use current env
+                    target_outer_env = outer_env if is_loop_context else env
+                    result = eval_ast(stmt, env=else_env, is_loop_context=is_loop_context, is_function_context=True, outer_env=target_outer_env, loop_locals=loop_locals)
+                    if result is not None:
+                        results.append(result)
+        except (EndLoopSignal, RestartLoopSignal) as signal:
+            # Collect any results that were accumulated before the signal, then re-raise
+            if results and hasattr(signal, 'last_result'):
+                # If signal doesn't have a result yet, store our collected results
+                if signal.last_result is None:
+                    signal.last_result = results[-1] if len(results) == 1 else results if results else None
+            elif results and not hasattr(signal, 'last_result'):
+                # Add last_result attribute with our collected results
+                signal.last_result = results[-1] if len(results) == 1 else results if results else None
+            raise
+        except Exception as e:
+            # For any other error (including EnzoRuntimeError), print accumulated results first
+            if results:
+                # Print accumulated results before re-raising the error
+                for result in results:
+                    print(format_val(result))
+            raise
+
+        # Return all results as a list if there are multiple, or the single result
+        if len(results) == 0:
+            return None
+        elif len(results) == 1:
+            return results[0]
+        else:
+            return results
+    else:
+        # Regular exclusive if statement
+        condition_result = eval_ast(node.condition, env=env, is_loop_context=is_loop_context)
+        if _is_truthy(condition_result):
+            # Execute then block with isolated scope - collect all non-None results
+            results = []
+            # Create isolated environment for then block (like function atom scoping)
+            then_env = env.copy()
+            try:
+                for stmt in node.then_block:
+                    # In loop context, preserve the original outer_env; otherwise use current env
+                    target_outer_env = outer_env if is_loop_context else env
+                    result = eval_ast(stmt, env=then_env, is_loop_context=is_loop_context, is_function_context=True, outer_env=target_outer_env, loop_locals=loop_locals)
+                    if result is not None:
+                        results.append(result)
             except (EndLoopSignal, RestartLoopSignal) as signal:
                 # Collect any results that were accumulated before the signal, then re-raise
                 if results and hasattr(signal, 'last_result'):
@@ -1956,393 +2360,378 @@ def eval_ast(node, value_demand=False, already_invoked=False, env=None, src_line
                 return results[0]
             else:
                 return results
-        else:
-            # Regular exclusive if statement
-            condition_result = eval_ast(node.condition, env=env, is_loop_context=is_loop_context)
-            if _is_truthy(condition_result):
-                # Execute then block with isolated scope - collect all non-None results
-                results = []
-                # Create isolated environment for then block (like function atom scoping)
-                then_env = env.copy()
-                try:
-                    for stmt in node.then_block:
-                        # In loop context, preserve the original outer_env; otherwise use current env
-                        target_outer_env = outer_env if is_loop_context else env
-                        result = eval_ast(stmt, env=then_env, is_loop_context=is_loop_context, is_function_context=True, outer_env=target_outer_env, loop_locals=loop_locals)
-                        if result is not None:
-                            results.append(result)
-                except (EndLoopSignal, RestartLoopSignal) as signal:
-                    # Collect any results that were accumulated before the signal, then re-raise
-                    if results and hasattr(signal, 'last_result'):
-                        # If signal doesn't have a result yet, store our collected results
-                        if signal.last_result is None:
-                            signal.last_result = results[-1] if len(results) == 1 else results if results else None
-                    elif results and not hasattr(signal, 'last_result'):
-                        # Add last_result attribute with our collected results
-                        signal.last_result = results[-1] if len(results) == 1 else results if results else None
-                    raise
-                except Exception as e:
-                    # For any other error (including EnzoRuntimeError), print accumulated results first
-                    if results:
-                        # Print accumulated results before re-raising the error
-                        for result in results:
-                            print(format_val(result))
-                    raise
-
-                # Return all results as a list if there are multiple, or the single result
-                if len(results) == 0:
-                    return None
-                elif len(results) == 1:
-                    return results[0]
-                else:
-                    return results
-            elif node.else_block:
-                # Execute else block with isolated scope - collect all non-None results
-                results = []
-                # Create isolated environment for else block (like function atom scoping)
-                else_env = env.copy()
-                try:
-                    for stmt in node.else_block:
-                        # In loop context, preserve the original outer_env; otherwise use current env
-                        target_outer_env = outer_env if is_loop_context else env
-                        result = eval_ast(stmt, env=else_env, is_loop_context=is_loop_context, is_function_context=True, outer_env=target_outer_env, loop_locals=loop_locals)
-                        if result is not None:
-                            results.append(result)
-                except (EndLoopSignal, RestartLoopSignal):
-                    # Re-raise loop control signals so they propagate to the loop
-                    raise
-                except Exception as e:
-                    # For any other error (including EnzoRuntimeError), print accumulated results first
-                    if results:
-                        # Print accumulated results before re-raising the error
-                        for result in results:
-                            print(format_val(result))
-                    raise
-
-                # Return all results as a list if there are multiple, or the single result
-                if len(results) == 0:
-                    return None
-                elif len(results) == 1:
-                    return results[0]
-                else:
-                    return results
-            return None
-
-    if isinstance(node, LoopStatement):
-        # Handle different loop types
-        if node.loop_type == "basic":
-            # Basic infinite loop - only exits with end-loop
+        elif node.else_block:
+            # Execute else block with isolated scope - collect all non-None results
             results = []
-            max_iterations = 10000  # Safety limit
-            iteration_count = 0
+            # Create isolated environment for else block (like function atom scoping)
+            else_env = env.copy()
+            try:
+                for stmt in node.else_block:
+                    # In loop context, preserve the original outer_env; otherwise use current env
+                    target_outer_env = outer_env if is_loop_context else env
+                    result = eval_ast(stmt, env=else_env, is_loop_context=is_loop_context, is_function_context=True, outer_env=target_outer_env, loop_locals=loop_locals)
+                    if result is not None:
+                        results.append(result)
+            except (EndLoopSignal, RestartLoopSignal):
+                # Re-raise loop control signals so they propagate to the loop
+                raise
+            except Exception as e:
+                # For any other error (including EnzoRuntimeError), print accumulated results first
+                if results:
+                    # Print accumulated results before re-raising the error
+                    for result in results:
+                        print(format_val(result))
+                raise
 
-            # Create a loop environment that allows shadowing but preserves outer scope
-            # If env is already a ChainMap, create a new layer; otherwise create a new ChainMap
-            if isinstance(env, ChainMap):
-                loop_env = ChainMap({}, env)
+            # Return all results as a list if there are multiple, or the single result
+            if len(results) == 0:
+                return None
+            elif len(results) == 1:
+                return results[0]
             else:
-                loop_env = ChainMap({}, env)
-            # Track which variables were created in loop scope for shadowing behavior
-            loop_locals = set()
-
-            while iteration_count < max_iterations:
-                try:
-                    # Execute loop body in the loop environment
-                    # Use is_function_context=True to allow variable shadowing
-                    # Pass outer_env so that rebinding operations can affect outer scope
-                    # Pass loop_locals to track which variables are shadowed
-                    # Pass is_loop_context=True so end-loop/restart-loop work
-                    for stmt in node.body:
-                        result = eval_ast(stmt, value_demand=True, env=loop_env, is_function_context=True, outer_env=env, loop_locals=loop_locals, is_loop_context=True)
-                        if result is not None:
-                            # If the result is a list from a nested loop, flatten it
-                            if isinstance(result, list) and isinstance(stmt, LoopStatement):
-                                results.extend(result)
-                            else:
-                                results.append(result)
-                except EndLoopSignal as signal:
-                    # Collect any result that was produced before end-loop
-                    if hasattr(signal, 'last_result') and signal.last_result is not None:
-                        results.append(signal.last_result)
-                    break
-                except RestartLoopSignal as signal:
-                    # Collect any result that was produced before restart-loop
-                    if hasattr(signal, 'last_result') and signal.last_result is not None:
-                        results.append(signal.last_result)
-                    # Skip to next iteration without executing remaining body statements
-                    iteration_count += 1
-                    continue
-                iteration_count += 1
-
-            if iteration_count >= max_iterations:
-                raise EnzoRuntimeError("Loop exceeded maximum iterations (possible infinite loop)", code_line=node.code_line)
-            return results if results else None
+                return results
+        return None
 
-        elif node.loop_type == "while":
-            # While loop - continues while condition is true
-            results = []
-            max_iterations = 10000  # Safety limit
-            iteration_count = 0
 
-            # Create loop environment that preserves connection to outer scope
-            # If env is already a ChainMap, create a new layer; otherwise create a new ChainMap
-            if isinstance(env, ChainMap):
-                loop_env = ChainMap({}, env)
-            else:
-                loop_env = ChainMap({}, env)
-            loop_locals = set()  # Track variables created in loop scope
+@register_eval_handler(LoopStatement)
+def _eval_loop_statement(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # Handle different loop types
+    if node.loop_type == "basic":
+        # Basic infinite loop - only exits with end-loop
+        results = []
+        max_iterations = 10000  # Safety limit
+        iteration_count = 0
 
-            while iteration_count < max_iterations:
-                # Evaluate condition using loop environment (so variable changes are visible)
-                condition_result = eval_ast(node.condition, env=loop_env, is_loop_context=is_loop_context)
-                if not _is_truthy(condition_result):
-                    break
+        # Create a loop environment that allows shadowing but preserves outer scope
+        # If env is already a ChainMap, create a new layer; otherwise create a new ChainMap
+        if isinstance(env, ChainMap):
+            loop_env = ChainMap({}, env)
+        else:
+            loop_env = ChainMap({}, env)
+        # Track which variables were created in loop scope for shadowing behavior
+        loop_locals = set()
 
-                try:
-                    # Execute loop body in the persistent loop environment
-                    for stmt in node.body:
-                        result = eval_ast(stmt, value_demand=True, env=loop_env, is_function_context=True, outer_env=env, loop_locals=loop_locals, is_loop_context=True)
-                        if result is not None:
+        while iteration_count < max_iterations:
+            try:
+                # Execute loop body in the loop environment
+                # Use is_function_context=True to allow variable shadowing
+                # Pass outer_env so that rebinding operations can affect outer scope
+                # Pass loop_locals to track which variables are shadowed
+                # Pass is_loop_context=True so end-loop/restart-loop work
+                for stmt in node.body:
+                    result = eval_ast(stmt, value_demand=True, env=loop_env, is_function_context=True, outer_env=env, loop_locals=loop_locals, is_loop_context=True)
+                    if result is not None:
+                        # If the result is a list from a nested loop, flatten it
+                        if isinstance(result, list) and isinstance(stmt, LoopStatement):
+                            results.extend(result)
+                        else:
                             results.append(result)
-                except EndLoopSignal as signal:
-                    # Collect any result that was produced before end-loop
-                    if hasattr(signal, 'last_result') and signal.last_result is not None:
-                        results.append(signal.last_result)
-                    break
-                except RestartLoopSignal as signal:
-                    # Collect any result that was produced before restart-loop
-                    if hasattr(signal, 'last_result') and signal.last_result is not None:
-                        results.append(signal.last_result)
-                    # Skip to next iteration without executing remaining body statements
-                    pass
+            except EndLoopSignal as signal:
+                # Collect any result that was produced before end-loop
+                if hasattr(signal, 'last_result') and signal.last_result is not None:
+                    results.append(signal.last_result)
+                break
+            except RestartLoopSignal as signal:
+                # Collect any result that was produced before restart-loop
+                if hasattr(signal, 'last_result') and signal.last_result is not None:
+                    results.append(signal.last_result)
+                # Skip to next iteration without executing remaining body statements
                 iteration_count += 1
+                continue
+            iteration_count += 1
 
-            if iteration_count >= max_iterations:
-                raise EnzoRuntimeError("While loop exceeded maximum iterations (possible infinite loop)", code_line=node.code_line)
-            return results if results else None
+        if iteration_count >= max_iterations:
+            raise EnzoRuntimeError("Loop exceeded maximum iterations (possible infinite loop)", code_line=node.code_line)
+        return results if results else None
 
-        elif node.loop_type == "until":
-            # Until loop - continues until condition becomes true
-            results = []
-            max_iterations = 10000  # Safety limit
-            iteration_count = 0
+    elif node.loop_type == "while":
+        # While loop - continues while condition is true
+        results = []
+        max_iterations = 10000  # Safety limit
+        iteration_count = 0
 
-            # Create loop environment that preserves connection to outer scope
-            # If env is already a ChainMap, create a new layer; otherwise create a new ChainMap
-            if isinstance(env, ChainMap):
-                loop_env = ChainMap({}, env)
-            else:
-                loop_env = ChainMap({}, env)
-            loop_locals = set()  # Track variables created in loop scope
+        # Create loop environment that preserves connection to outer scope
+        # If env is already a ChainMap, create a new layer; otherwise create a new ChainMap
+        if isinstance(env, ChainMap):
+            loop_env = ChainMap({}, env)
+        else:
+            loop_env = ChainMap({}, env)
+        loop_locals = set()  # Track variables created in loop scope
 
-            while iteration_count < max_iterations:
-                # Evaluate condition using loop environment (so variable changes are visible)
-                condition_result = eval_ast(node.condition, env=loop_env, is_loop_context=is_loop_context)
-                if _is_truthy(condition_result):
-                    break
+        while iteration_count < max_iterations:
+            # Evaluate condition using loop environment (so variable changes are visible)
+            condition_result = eval_ast(node.condition, env=loop_env, is_loop_context=is_loop_context)
+            if not _is_truthy(condition_result):
+                break
 
-                try:
-                    # Execute loop body in the persistent loop environment
-                    for stmt in node.body:
-                        result = eval_ast(stmt, value_demand=True, env=loop_env, is_function_context=True, outer_env=env, loop_locals=loop_locals, is_loop_context=True)
-                        if result is not None:
-                            results.append(result)
-                except EndLoopSignal as signal:
-                    # Collect any result that was produced before end-loop
-                    if hasattr(signal, 'last_result') and signal.last_result is not None:
-                        results.append(signal.last_result)
-                    break
-                except RestartLoopSignal as signal:
-                    # Collect any result that was produced before restart-loop
-                    if hasattr(signal, 'last_result') and signal.last_result is not None:
-                        results.append(signal.last_result)
-                    # Skip to next iteration without executing remaining body statements
-                    pass
-                iteration_count += 1
+            try:
+                # Execute loop body in the persistent loop environment
+                for stmt in node.body:
+                    result = eval_ast(stmt, value_demand=True, env=loop_env, is_function_context=True, outer_env=env, loop_locals=loop_locals, is_loop_context=True)
+                    if result is not None:
+                        results.append(result)
+            except EndLoopSignal as signal:
+                # Collect any result that was produced before end-loop
+                if hasattr(signal, 'last_result') and signal.last_result is not None:
+                    results.append(signal.last_result)
+                break
+            except RestartLoopSignal as signal:
+                # Collect any result that was produced before restart-loop
+                if hasattr(signal, 'last_result') and signal.last_result is not None:
+                    results.append(signal.last_result)
+                # Skip to next iteration without executing remaining body statements
+                pass
+            iteration_count += 1
+
+        if iteration_count >= max_iterations:
+            raise EnzoRuntimeError("While loop exceeded maximum iterations (possible infinite loop)", code_line=node.code_line)
+        return results if results else None
+
+    elif node.loop_type == "until":
+        # Until loop - continues until condition becomes true
+        results = []
+        max_iterations = 10000  # Safety limit
+        iteration_count = 0
 
-            if iteration_count >= max_iterations:
-                raise EnzoRuntimeError("Until loop exceeded maximum iterations (possible infinite loop)", code_line=node.code_line)
-            return results if results else None
+        # Create loop environment that preserves connection to outer scope
+        # If env is already a ChainMap, create a new layer; otherwise create a new ChainMap
+        if isinstance(env, ChainMap):
+            loop_env = ChainMap({}, env)
+        else:
+            loop_env = ChainMap({}, env)
+        loop_locals = set()  # Track variables created in loop scope
 
-        elif node.loop_type == "for":
-            # For loop - iterate over a list
-            results = []
+        while iteration_count < max_iterations:
+            # Evaluate condition using loop environment (so variable changes are visible)
+            condition_result = eval_ast(node.condition, env=loop_env, is_loop_context=is_loop_context)
+            if _is_truthy(condition_result):
+                break
 
-            # Create a new scope for the loop variable that preserves connection to outer scope
-            # If env is already a ChainMap, create a new layer; otherwise create a new ChainMap
-            if isinstance(env, ChainMap):
-                loop_env = ChainMap({}, env)
-            else:
-                loop_env = ChainMap({}, env)
+            try:
+                # Execute loop body in the persistent loop environment
+                for stmt in node.body:
+                    result = eval_ast(stmt, value_demand=True, env=loop_env, is_function_context=True, outer_env=env, loop_locals=loop_locals, is_loop_context=True)
+                    if result is not None:
+                        results.append(result)
+            except EndLoopSignal as signal:
+                # Collect any result that was produced before end-loop
+                if hasattr(signal, 'last_result') and signal.last_result is not None:
+                    results.append(signal.last_result)
+                break
+            except RestartLoopSignal as signal:
+                # Collect any result that was produced before restart-loop
+                if hasattr(signal, 'last_result') and signal.last_result is not None:
+                    results.append(signal.last_result)
+                # Skip to next iteration without executing remaining body statements
+                pass
+            iteration_count += 1
+
+        if iteration_count >= max_iterations:
+            raise EnzoRuntimeError("Until loop exceeded maximum iterations (possible infinite loop)", code_line=node.code_line)
+        return results if results else None
+
+    elif node.loop_type == "for":
+        # For loop - iterate over a list
+        results = []
 
-            i = 0
-            while True:
-                try:
-                    # Re-evaluate the iterable on each iteration for true live iteration
-                    # This allows modifications to the list variable to be immediately visible
-                    current_iterable = eval_ast(node.iterable, env=env, is_loop_context=is_loop_context)
+        # Create a new scope for the loop variable that preserves connection to outer scope
+        # If env is already a ChainMap, create a new layer; otherwise create a new ChainMap
+        if isinstance(env, ChainMap):
+            loop_env = ChainMap({}, env)
+        else:
+            loop_env = ChainMap({}, env)
 
-                    # Ensure it's iterable
-                    if not isinstance(current_iterable, (list, EnzoList)):
-                        raise EnzoRuntimeError(error_message_for_loop_non_iterable(), code_line=node.code_line)
+        i = 0
+        while True:
+            try:
+                # Re-evaluate the iterable on each iteration for true live iteration
+                # This allows modifications to the list variable to be immediately visible
+                current_iterable = eval_ast(node.iterable, env=env, is_loop_context=is_loop_context)
 
-                    # Check if we've reached the end of the list
-                    if i >= len(current_iterable):
-                        break
+                # Ensure it's iterable
+                if not isinstance(current_iterable, (list, EnzoList)):
+                    raise EnzoRuntimeError(error_message_for_loop_non_iterable(), code_line=node.code_line)
 
-                    # Create a fresh loop_locals set for each iteration
-                    loop_locals = set()
-                    item = current_iterable[i]
-                    current_list_length = len(current_iterable)
+                # Check if we've reached the end of the list
+                if i >= len(current_iterable):
+                    break
 
-                    if node.is_reference:
-                        # Reference semantics - bind to a reference of the original list element
-                        # Store with $ prefix for proper variable access
-                        var_name = f"${node.variable}" if not node.variable.startswith('$') else node.variable
-                        loop_env[var_name] = ListElementReference(current_iterable, i)
-                    else:
-                        # Copy semantics - bind to a copy of the item
-                        var_name = f"${node.variable}" if not node.variable.startswith('$') else node.variable
-                        loop_env[var_name] = deep_copy_enzo_value(item) if hasattr(item, '__dict__') else item
+                # Create a fresh loop_locals set for each iteration
+                loop_locals = set()
+                item = current_iterable[i]
+                current_list_length = len(current_iterable)
 
-                    # Execute the loop body
-                    for stmt in node.body:
-                        result = eval_ast(stmt, value_demand=True, env=loop_env, is_loop_context=True, is_function_context=True, outer_env=env, loop_locals=loop_locals)
-                        if result is not None:
-                            # If the result is a list from a nested loop, flatten it
-                            if isinstance(result, list) and isinstance(stmt, LoopStatement):
-                                results.extend(result)
-                            else:
-                                results.append(result)
-
-                    # After executing the loop body, check if the list was modified
-                    # Re-evaluate to get the updated list
-                    updated_iterable = eval_ast(node.iterable, env=env, is_loop_context=is_loop_context)
-
-                    # If the list length changed, we need to adjust our iteration strategy
-                    if len(updated_iterable) != current_list_length:
-                        # List was modified during iteration
-                        # For deletions behind the current position, we need to adjust our index
-                        # Find how many items were deleted before our current position
-                        items_deleted_before = current_list_length - len(updated_iterable)
-
-                        # If items were deleted and we can determine they were before our position,
-                        # adjust the index down. Otherwise, just move to the next logical position.
-                        if items_deleted_before > 0 and len(updated_iterable) > 0:
-                            # First check if the current item was deleted entirely
-                            current_item_exists = False
-                            for list_item in updated_iterable:
+                if node.is_reference:
+                    # Reference semantics - bind to a reference of the original list element
+                    # Store with $ prefix for proper variable access
+                    var_name = f"${node.variable}" if not node.variable.startswith('$') else node.variable
+                    loop_env[var_name] = ListElementReference(current_iterable, i)
+                else:
+                    # Copy semantics - bind to a copy of the item
+                    var_name = f"${node.variable}" if not node.variable.startswith('$') else node.variable
+                    loop_env[var_name] = deep_copy_enzo_value(item) if isinstance(item, (EnzoList, Table)) else item
+
+                # Execute the loop body
+                for stmt in node.body:
+                    result = eval_ast(stmt, value_demand=True, env=loop_env, is_loop_context=True, is_function_context=True, outer_env=env, loop_locals=loop_locals)
+                    if result is not None:
+                        # If the result is a list from a nested loop, flatten it
+                        if isinstance(result, list) and isinstance(stmt, LoopStatement):
+                            results.extend(result)
+                        else:
+                            results.append(result)
+
+                # After executing the loop body, check if the list was modified
+                # Re-evaluate to get the updated list
+                updated_iterable = eval_ast(node.iterable, env=env, is_loop_context=is_loop_context)
+
+                # If the list length changed, we need to adjust our iteration strategy
+                if len(updated_iterable) != current_list_length:
+                    # List was modified during iteration
+                    # For deletions behind the current position, we need to adjust our index
+                    # Find how many items were deleted before our current position
+                    items_deleted_before = current_list_length - len(updated_iterable)
+
+                    # If items were deleted and we can determine they were before our position,
+                    # adjust the index down. Otherwise, just move to the next logical position.
+                    if items_deleted_before > 0 and len(updated_iterable) > 0:
+                        # First check if the current item was deleted entirely
+                        current_item_exists = False
+                        for list_item in updated_iterable:
+                            if list_item == item:
+                                current_item_exists = True
+                                break
+
+                        if not current_item_exists:
+                            # Current item was deleted - skip to the next index position
+                            # This effectively skips whatever item moved into the current position
+                            i += 1
+                        elif i < len(updated_iterable) and updated_iterable[i] == item:
+                            # Current item is still at the same index, continue normally
+                            i += 1
+                        elif i > 0 and i - 1 < len(updated_iterable) and updated_iterable[i - 1] == item:
+                            # Current item shifted back by one position
+                            # Don't increment i since we need to continue from the same position
+                            # The next item is now at index i in the shortened list
+                            pass
+                        else:
+                            # Try to find the current item in the updated list and continue from there
+                            found_position = None
+                            for idx, list_item in enumerate(updated_iterable):
                                 if list_item == item:
-                                    current_item_exists = True
+                                    found_position = idx
                                     break
 
-                            if not current_item_exists:
-                                # Current item was deleted - skip to the next index position
-                                # This effectively skips whatever item moved into the current position
-                                i += 1
-                            elif i < len(updated_iterable) and updated_iterable[i] == item:
-                                # Current item is still at the same index, continue normally
-                                i += 1
-                            elif i > 0 and i - 1 < len(updated_iterable) and updated_iterable[i - 1] == item:
-                                # Current item shifted back by one position
-                                # Don't increment i since we need to continue from the same position
-                                # The next item is now at index i in the shortened list
-                                pass
+                            if found_position is not None:
+                                i = found_position + 1  # Move to next position after current item
                             else:
-                                # Try to find the current item in the updated list and continue from there
-                                found_position = None
-                                for idx, list_item in enumerate(updated_iterable):
-                                    if list_item == item:
-                                        found_position = idx
-                                        break
-
-                                if found_position is not None:
-                                    i = found_position + 1  # Move to next position after current item
-                                else:
-                                    # Current item was deleted, continue from current index
-                                    # (don't increment since items may have shifted)
-                                    pass
-                        else:
-                            # Normal case or items were added - just move to next position
-                            i += 1
+                                # Current item was deleted, continue from current index
+                                # (don't increment since items may have shifted)
+                                pass
                     else:
-                        # List wasn't modified, normal increment
+                        # Normal case or items were added - just move to next position
                         i += 1
-
-                except EndLoopSignal as signal:
-                    # Collect any result that was produced before end-loop
-                    if hasattr(signal, 'last_result') and signal.last_result is not None:
-                        results.append(signal.last_result)
-                    break
-                except RestartLoopSignal as signal:
-                    # Collect any result that was produced before restart-loop
-                    if hasattr(signal, 'last_result') and signal.last_result is not None:
-                        results.append(signal.last_result)
-                    # Move to next iteration (restart current iteration)
+                else:
+                    # List wasn't modified, normal increment
                     i += 1
-                    continue
 
-            return results if results else None
-
-    if isinstance(node, EndLoopStatement):
-        # If we're not in a loop context, this is an error
-        if not is_loop_context:
-            raise EnzoRuntimeError("error: `end-loop;` inside a non-loop function atom", code_line=node.code_line)
-        # Otherwise raise signal to break out of nearest loop
-        raise EndLoopSignal()
-
-    if isinstance(node, RestartLoopStatement):
-        # If we're not in a loop context, this is an error
-        if not is_loop_context:
-            raise EnzoRuntimeError("error: `restart-loop;` inside a non-loop function atom", code_line=node.code_line)
-        # Otherwise raise signal to restart nearest loop
-        raise RestartLoopSignal()
-
-    if isinstance(node, OtherwiseStatement):
-        # Otherwise statements provide a default case that should only execute
-        # if no previous conditions were met. For now, we'll always execute them.
-        # In the future, this might need more sophisticated context tracking.
-        result = None
-        for stmt in node.body:
-            result = eval_ast(stmt, env=env, is_loop_context=is_loop_context, outer_env=outer_env)
-        return result
-
-    if isinstance(node, ComparisonExpression):
-        # Special handling for type comparisons with 'is' and 'is not'
-        if ((node.operator == "is" or node.operator == "is not") and
-            isinstance(node.right, VarInvoke) and
-            node.right.name in ["Number", "Text", "List", "Empty", "Function"]):
-            # For Function type comparisons, don't auto-invoke the left side
-            if node.right.name == "Function":
-                left_val = eval_ast(node.left, value_demand=False, env=env)
-            else:
-                left_val = eval_ast(node.left, value_demand=True, env=env)
-            # Pass the type name directly instead of evaluating as a variable
-            right_val = node.right.name
+            except EndLoopSignal as signal:
+                # Collect any result that was produced before end-loop
+                if hasattr(signal, 'last_result') and signal.last_result is not None:
+                    results.append(signal.last_result)
+                break
+            except RestartLoopSignal as signal:
+                # Collect any result that was produced before restart-loop
+                if hasattr(signal, 'last_result') and signal.last_result is not None:
+                    results.append(signal.last_result)
+                # Move to next iteration (restart current iteration)
+                i += 1
+                continue
+
+        return results if results else None
+    raise EnzoRuntimeError(error_message_unknown_node(node), code_line=getattr(node, 'code_line', None))
+
+
+@register_eval_handler(EndLoopStatement)
+def _eval_end_loop_statement(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # If we're not in a loop context, this is an error
+    if not is_loop_context:
+        raise EnzoRuntimeError("error: `end-loop;` inside a non-loop function atom", code_line=node.code_line)
+    # Otherwise raise signal to break out of nearest loop
+    raise EndLoopSignal()
+
+
+@register_eval_handler(RestartLoopStatement)
+def _eval_restart_loop_statement(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # If we're not in a loop context, this is an error
+    if not is_loop_context:
+        raise EnzoRuntimeError("error: `restart-loop;` inside a non-loop function atom", code_line=node.code_line)
+    # Otherwise raise signal to restart nearest loop
+    raise RestartLoopSignal()
+
+
+@register_eval_handler(OtherwiseStatement)
+def _eval_otherwise_statement(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # Otherwise statements provide a default case that should only execute
+    # if no previous conditions were met. For now, we'll always execute them.
+    # In the future, this might need more sophisticated context tracking.
+    result = None
+    for stmt in node.body:
+        result = eval_ast(stmt, env=env, is_loop_context=is_loop_context, outer_env=outer_env)
+    return result
+
+
+@register_eval_handler(ComparisonExpression)
+def _eval_comparison_expression(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    # Special handling for type comparisons with 'is' and 'is not'
+    if ((node.operator == "is" or node.operator == "is not") and
+        isinstance(node.right, VarInvoke) and
+        node.right.name in ["Number", "Text", "List", "Empty", "Function"]):
+        # For Function type comparisons, don't auto-invoke the left side
+        if node.right.name == "Function":
+            left_val = eval_ast(node.left, value_demand=False, env=env)
         else:
             left_val = eval_ast(node.left, value_demand=True, env=env)
-            right_val = eval_ast(node.right, value_demand=True, env=env)
-
-        return _compare_values(left_val, node.operator, right_val)
-
-    if isinstance(node, LogicalExpression):
-        left_val = eval_ast(node.left, env=env)
-        if node.operator == "and":
-            if not _is_truthy(left_val):
-                return left_val  # Short-circuit
-            return eval_ast(node.right, env=env)
-        elif node.operator == "or":
-            if _is_truthy(left_val):
-                return left_val  # Short-circuit
-            return eval_ast(node.right, env=env)
-        else:
-            raise EnzoRuntimeError(f"Unknown logical operator: {node.operator}", code_line=code_line)
+        # Pass the type name directly instead of evaluating as a variable
+        right_val = node.right.name
+    else:
+        left_val = eval_ast(node.left, value_demand=True, env=env)
+        right_val = eval_ast(node.right, value_demand=True, env=env)
 
-    if isinstance(node, NotExpression):
-        operand_val = eval_ast(node.operand, env=env)
-        return not _is_truthy(operand_val)
+    return _compare_values(left_val, node.operator, right_val)
 
-    raise EnzoRuntimeError(error_message_unknown_node(node), code_line=getattr(node, 'code_line', None))
+
+@register_eval_handler(LogicalExpression)
+def _eval_logical_expression(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    code_line = getattr(node, 'code_line', None)
+    left_val = eval_ast(node.left, env=env)
+    if node.operator == "and":
+        if not _is_truthy(left_val):
+            return left_val  # Short-circuit
+        return eval_ast(node.right, env=env)
+    elif node.operator == "or":
+        if _is_truthy(left_val):
+            return left_val  # Short-circuit
+        return eval_ast(node.right, env=env)
+    else:
+        raise EnzoRuntimeError(f"Unknown logical operator: {node.operator}", code_line=code_line)
+
+
+@register_eval_handler(NotExpression)
+def _eval_not_expression(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    operand_val = eval_ast(node.operand, env=env)
+    return not _is_truthy(operand_val)
+
+
+# Produced by parse_file; the file runner handles both before evaluation
+@register_eval_handler(SectionMarker)
+def _eval_section_marker(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    return None
+
+
+@register_eval_handler(InvalidStatement)
+def _eval_invalid_statement(node, value_demand, already_invoked, env, src_line, is_function_context, outer_env, loop_locals, is_loop_context):
+    raise EnzoParseError(node.message)
 
 # ── text_atom‐interpolation helper ───────────────────────────────────────────
 def _interp(s: str, src_line: str = None, env=None):
@@ -2356,31 +2745,28 @@ def _interp(s: str, src_line: str = None, env=None):
 
     if "<" not in s:
         return s
-
-    out, i = [], 0
-    while i < len(s):
-        j = s.find("<", i)
-        if j == -1:
-            out.append(s[i:])
-            break
-        out.append(s[i:j])
-        k = s.find(">", j + 1)
-        if k == -1:
-            raise EnzoRuntimeError(error_message_unterminated_interpolation())
-        expr_src = s[j + 1 : k].strip()
-        parts = [p.strip() for p in expr_src.split(";") if p.strip()]
-        concatenated = ""
-        for part in parts:
+    return _interp_segments(compile_text_template(s), src_line=src_line, env=env)
+
+def _interp_segments(segments, src_line=None, env=None):
+    # Evaluate segments from compile_text_template in order; errors are raised when reached,
+    # so expressions before a bad one are still evaluated first
+    out = []
+    for segment in segments:
+        kind = segment[0]
+        if kind == "text":
+            out.append(segment[1])
+        elif kind == "expr":
             try:
-                expr_ast = parse(part)
-                val = eval_ast(expr_ast, value_demand=True, env=env)
-                concatenated += str(val)
+                out.append(str(eval_ast(segment[1], value_demand=True, env=env)))
             except Exception:
                 from src.error_messaging import error_message_parse_error_in_interpolation
                 # Use the original quoted code line for error reporting
                 raise EnzoParseError(error_message_parse_error_in_interpolation(), code_line=src_line)
-        out.append(concatenated)
-        i = k + 1
+        elif kind == "unterminated":
+            raise EnzoRuntimeError(error_message_unterminated_interpolation())
+        else:
+            from src.error_messaging import error_message_parse_error_in_interpolation
+            raise EnzoParseError(error_message_parse_error_in_interpolation(), code_line=src_line)
     return "".join(out)
 
 # Sentinel for uninitialized/empty binds
@@ -2483,7 +2869,7 @@ def _compare_values(left, operator, right):
             elif right == "Empty":
                 return left is None or isinstance(left, Empty)
             elif right == "Function":
-                return isinstance(left, EnzoFunction)
+                return is_function(left)
         # Value comparison
         return left == right
     elif operator == "is not":
@@ -2499,7 +2885,7 @@ def _compare_values(left, operator, right):
             elif right == "Empty":
                 return not (left is None or isinstance(left, Empty))
             elif right == "Function":
-                return not isinstance(left, EnzoFunction)
+                return not is_function(left)
         # Value comparison
         return left != right
     elif operator == "is less than":
@@ -0,0 +1,110 @@
+# Packed storage for EnzoLists of numbers
+#
+# A NumberArray keeps a list's elements unboxed in an array.array: typecode 'q' when they
+# are all ints, 'd' when they are all floats, so every element reads back as the same
+# type of number it was stored as. Lists that mix ints and floats, hold ints past 64 bits
+# or hold anything that is not a number stay in Python lists.
+#
+# The class implements the list operations EnzoList performs on its elements. Storing a
+# value the array cannot hold raises TypeError rather than converting it, and EnzoList
+# then moves its elements back to a list (see EnzoList._unpack).
+#
+# The functions at the end run over a NumberArray in C instead of element by element.
+# With NumPy installed, elementwise float arithmetic runs through it; its float64
+# operations round exactly as Python's do, so results do not depend on whether it is.
+
+from array import array
+from itertools import repeat
+from operator import add, mul
+
+from src.persistent_vector import PersistentVector
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Element type -> array typecode
+_TYPECODES = {int: "q", float: "d"}
+# Array typecode -> element type
+_NUMBER_TYPES = {"q": int, "d": float}
+
+
+class NumberArray(array):
+    """An array of ints or of floats that refuses other values; see the module comment."""
+    __slots__ = ()
+
+    def append(self, value):
+        if type(value) is not _NUMBER_TYPES[self.typecode]:
+            raise TypeError(f"NumberArray('{self.typecode}') cannot hold {type(value).__name__}")
+        try:
+            array.append(self, value)
+        except OverflowError:
+            raise TypeError("int too large for NumberArray('q')") from None
+
+    def __setitem__(self, index, value):
+        if type(value) is not _NUMBER_TYPES[self.typecode]:
+            raise TypeError(f"NumberArray('{self.typecode}') cannot hold {type(value).__name__}")
+        try:
+            array.__setitem__(self, index, value)
+        except OverflowError:
+            raise TypeError("int too large for NumberArray('q')") from None
+
+    def copy(self):
+        return NumberArray(self.typecode, self)
+
+    def __eq__(self, other):
+        if isinstance(other, array):
+            return array.__eq__(self, other)
+        if isinstance(other, (list, PersistentVector)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None  # Mutable, like list
+
+
+def pack(elements):
+    """A NumberArray of elements, or None if they are not all ints or all floats."""
+    types = set(map(type, elements))
+    if len(types) != 1:
+        return None
+    typecode = _TYPECODES.get(types.pop())
+    if typecode is None:
+        return None
+    try:
+        return NumberArray(typecode, elements)
+    except OverflowError:
+        return None
+
+
+def scaled(numbers, factor):
+    """The products of each element of the NumberArray numbers and factor, in a new list or NumberArray."""
+    if numbers.typecode == "q" and type(factor) is int:
+        return _ints(map(mul, numbers, repeat(factor)))
+    if numpy is not None and numbers.typecode == "d" and type(factor) is float:
+        return _from_numpy(numpy.frombuffer(numbers, dtype=numpy.float64) * factor)
+    return NumberArray("d", map(mul, numbers, repeat(factor)))
+
+
+def added(left, right):
+    """The elementwise sums of two NumberArrays of the same length, in a new list or NumberArray."""
+    if left.typecode == "q" and right.typecode == "q":
+        return _ints(map(add, left, right))
+    if numpy is not None and left.typecode == "d" and right.typecode == "d":
+        return _from_numpy(numpy.frombuffer(left, dtype=numpy.float64) + numpy.frombuffer(right, dtype=numpy.float64))
+    return NumberArray("d", map(add, left, right))
+
+
+def _ints(values):
+    # A NumberArray of the ints in values, or a list of them if one needs more than 64 bits
+    values = list(values)
+    try:
+        return NumberArray("q", values)
+    except OverflowError:
+        return values
+
+
+def _from_numpy(floats):
+    result = NumberArray("d")
+    result.frombytes(floats.tobytes())
+    return result
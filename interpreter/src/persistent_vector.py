@@ -0,0 +1,156 @@
+# Persistent vector storage for long EnzoLists
+#
+# A PersistentVector keeps its elements in a 32-way trie plus a tail of up to 32 elements,
+# as Clojure's vectors do. copy() is O(1): the copy shares the whole trie. A point update
+# or an append then copies only the nodes on the path to the slot it touches, O(log32 n),
+# instead of the whole element list. Each trie node is a Python list whose first item is
+# the edit token of the vector allowed to change it in place; copy() gives both vectors
+# new tokens, so nodes made before the copy are copied on their next write.
+#
+# The class implements the list operations EnzoList performs on its elements, so an
+# EnzoList can switch its _elements from a list to a PersistentVector without the code
+# around it noticing.
+
+BITS = 5
+WIDTH = 1 << BITS
+MASK = WIDTH - 1
+
+
+class PersistentVector:
+    """A list-like sequence whose copies share structure; see the module comment."""
+    __slots__ = ("_count", "_shift", "_root", "_tail", "_edit")
+
+    def __init__(self, elements=()):
+        self._edit = object()
+        self._count = 0
+        self._shift = BITS
+        self._root = [self._edit]
+        self._tail = []
+        for element in elements:
+            self.append(element)
+
+    def copy(self):
+        new = PersistentVector.__new__(PersistentVector)
+        new._edit = object()
+        new._count = self._count
+        new._shift = self._shift
+        new._root = self._root
+        new._tail = list(self._tail)
+        # Nodes made so far are shared now, so neither vector may change them in place
+        self._edit = object()
+        return new
+
+    def _tail_offset(self):
+        return 0 if self._count < WIDTH else ((self._count - 1) >> BITS) << BITS
+
+    def _index(self, index):
+        if not isinstance(index, int):
+            raise TypeError(f"list indices must be integers or slices, not {type(index).__name__}")
+        if index < 0:
+            index += self._count
+        if index < 0 or index >= self._count:
+            raise IndexError("list index out of range")
+        return index
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        index = self._index(index)
+        offset = self._tail_offset()
+        if index >= offset:
+            return self._tail[index - offset]
+        node = self._root
+        for level in range(self._shift, 0, -BITS):
+            node = node[1 + ((index >> level) & MASK)]
+        return node[1 + (index & MASK)]
+
+    def __setitem__(self, index, value):
+        index = self._index(index)
+        offset = self._tail_offset()
+        if index >= offset:
+            self._tail[index - offset] = value
+            return
+        node = self._root = self._editable(self._root)
+        for level in range(self._shift, 0, -BITS):
+            slot = 1 + ((index >> level) & MASK)
+            node[slot] = node = self._editable(node[slot])
+        node[1 + (index & MASK)] = value
+
+    def _editable(self, node):
+        if node[0] is self._edit:
+            return node
+        node = list(node)
+        node[0] = self._edit
+        return node
+
+    def append(self, value):
+        if len(self._tail) < WIDTH:
+            self._tail.append(value)
+            self._count += 1
+            return
+        # The tail is full: move it into the trie and start a new one
+        tail_node = [self._edit] + self._tail
+        if (self._count >> BITS) > (1 << self._shift):
+            # The trie is full at this height: grow a new root above it
+            self._root = [self._edit, self._root, self._new_path(self._shift, tail_node)]
+            self._shift += BITS
+        else:
+            self._root = self._push_tail(self._shift, self._editable(self._root), tail_node)
+        self._tail = [value]
+        self._count += 1
+
+    def _push_tail(self, level, parent, tail_node):
+        slot = 1 + (((self._count - 1) >> level) & MASK)
+        if level == BITS:
+            child = tail_node
+        elif slot < len(parent):
+            child = self._push_tail(level - BITS, self._editable(parent[slot]), tail_node)
+        else:
+            child = self._new_path(level - BITS, tail_node)
+        if slot < len(parent):
+            parent[slot] = child
+        else:
+            parent.append(child)
+        return parent
+
+    def _new_path(self, level, node):
+        while level:
+            node = [self._edit, node]
+            level -= BITS
+        return node
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+    def clear(self):
+        self._edit = object()
+        self._count = 0
+        self._shift = BITS
+        self._root = [self._edit]
+        self._tail = []
+
+    def _leaves(self, node, level):
+        if level == 0:
+            yield node
+        else:
+            for child in node[1:]:
+                yield from self._leaves(child, level - BITS)
+
+    def __iter__(self):
+        for leaf in self._leaves(self._root, self._shift):
+            yield from leaf[1:]
+        yield from self._tail
+
+    def __eq__(self, other):
+        if isinstance(other, (list, PersistentVector)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None  # Mutable, like list
+
+    def __repr__(self):
+        return f"PersistentVector({list(self)!r})"
@@ -3,6 +3,9 @@
 
 import os
 
+from src.packed_numbers import NumberArray, pack
+from src.persistent_vector import PersistentVector
+
 # Always return the log path, but do NOT truncate the file here.
 def _ensure_debug_log():
     # Updated path: interpreter/debugging/debug.log
@@ -53,19 +56,13 @@ def log_debug(msg):
     # print(msg)  # Enable for debugging
 
 def deep_copy_enzo_value(value):
-    """Create a deep copy of an Enzo value (lists, tables, etc.)."""
+    """Create a deep copy of an Enzo value (lists, tables, etc.).
+
+    Copies of EnzoLists may share the original's elements until one of them changes,
+    see EnzoList.copy.
+    """
     if isinstance(value, EnzoList):
-        # Preserve the blueprint instance flag and name when copying
-        new_list = EnzoList(
-            is_blueprint_instance=getattr(value, '_is_blueprint_instance', False),
-            blueprint_name=getattr(value, '_blueprint_name', None)
-        )
-        # Copy all elements
-        for element in value._elements:
-            new_list.append(deep_copy_enzo_value(element))
-        # Copy key mapping
-        new_list._key_map = value._key_map.copy()
-        return new_list
+        return value.copy()
     elif isinstance(value, (dict, Table)):
         # Deep copy dictionaries/tables
         new_dict = Table() if isinstance(value, Table) else {}
@@ -80,30 +77,295 @@ def deep_copy_enzo_value(value):
         # Functions are immutable, primitives are copied by value
         return value
 
+class Shape:
+    """The layout an EnzoList shares with every list built the same way.
+
+    A shape holds the key map (key name -> 0-based position, in the order keys were
+    added) and whether lists of this shape are blueprint instances, and of which
+    blueprint. Shapes form a tree: each blueprint (and plain lists, EMPTY_SHAPE) has a
+    root, and adding a key moves a list to the child for (key, position), made on first
+    use. All instances of a blueprint therefore share one shape, lists with equal
+    layouts are identical shapes, and inline caches in the evaluator can remember the
+    slot a key resolved to for a shape.
+
+    Past MAX_SHARED_KEYS keys a list leaves the tree for a shape of its own, which is
+    not shared and grows in place, so building a list with many keys stays linear.
+    Shared shapes and their key_map must not be changed; copies of a list with a shape
+    of its own get a copy of it.
+
+    prefixes backs the suffix rule of EnzoList.key_slot: it maps each name that a key,
+    without its $, extends with a numeric suffix ("x" for "$x12" or "$x-3") to the
+    position of the first such key. It is built on first use.
+
+    slot_keys is the reverse of key_map: the key at each position, None for positions
+    without one, up to the last keyed position. It is built on first use too.
+    """
+    __slots__ = ("key_map", "is_blueprint_instance", "blueprint_name", "transitions", "prefixes", "slot_keys", "shared")
+
+    def __init__(self, key_map, is_blueprint_instance=False, blueprint_name=None, shared=True):
+        self.key_map = key_map
+        self.is_blueprint_instance = is_blueprint_instance
+        self.blueprint_name = blueprint_name
+        self.transitions = {}
+        self.prefixes = None
+        self.slot_keys = None
+        self.shared = shared
+
+    def add_key(self, key, index):
+        """The shape of a list of this shape after key is added at index."""
+        if not self.shared:
+            self.key_map[key] = index
+            if self.prefixes is not None:
+                self._add_prefixes(key, index)
+            if self.slot_keys is not None:
+                self._add_slot_key(key, index)
+            return self
+        child = self.transitions.get((key, index))
+        if child is None:
+            key_map = dict(self.key_map)
+            key_map[key] = index
+            if len(key_map) > MAX_SHARED_KEYS:
+                return Shape(key_map, self.is_blueprint_instance, self.blueprint_name, shared=False)
+            child = Shape(key_map, self.is_blueprint_instance, self.blueprint_name)
+            self.transitions[(key, index)] = child
+        return child
+
+    def copy(self):
+        """A shape of its own with the same keys, for a copy of a list with an unshared shape."""
+        return Shape(dict(self.key_map), self.is_blueprint_instance, self.blueprint_name, shared=False)
+
+    def prefix_slot(self, name):
+        """Position of the first key that is name, after its $, plus a numeric suffix; None if none is."""
+        if self.prefixes is None:
+            self.prefixes = {}
+            for key, index in self.key_map.items():
+                self._add_prefixes(key, index)
+        return self.prefixes.get(name)
+
+    def key_at(self, index):
+        """The key at 0-based position index, or None if that element is positional."""
+        if self.slot_keys is None:
+            self.slot_keys = []
+            for key, slot in self.key_map.items():
+                self._add_slot_key(key, slot)
+        return self.slot_keys[index] if index < len(self.slot_keys) else None
+
+    def _add_slot_key(self, key, index):
+        # Keys are added at the end of the list, so positions only grow
+        self.slot_keys.extend([None] * (index - len(self.slot_keys)))
+        self.slot_keys.append(key)
+
+    def _add_prefixes(self, key, index):
+        base = key[1:] if key.startswith('$') else key
+        # Every split inside the trailing run of digits leaves a numeric suffix
+        start = len(base)
+        while start > 0 and base[start - 1].isdigit():
+            start -= 1
+        for end in range(start, len(base)):
+            self.prefixes.setdefault(base[:end], index)
+        # So does "-" followed by the whole run
+        if start < len(base) and start > 0 and base[start - 1] == '-':
+            self.prefixes.setdefault(base[:start - 1], index)
+
+# Keys a shape can have and still be shared with other lists, see Shape
+MAX_SHARED_KEYS = 64
+
+# Length at which an EnzoList without nested containers moves its elements to a
+# PersistentVector, see EnzoList; ENZO_VECTOR_MIN_LENGTH overrides it
+VECTOR_MIN_LENGTH = int(os.environ.get("ENZO_VECTOR_MIN_LENGTH", "1024"))
+
+# Length at which an EnzoList whose elements are all ints or all floats packs them into a
+# NumberArray, see EnzoList; ENZO_PACKED_MIN_LENGTH overrides it
+PACKED_MIN_LENGTH = int(os.environ.get("ENZO_PACKED_MIN_LENGTH", "64"))
+
+EMPTY_SHAPE = Shape({})
+
+# (is_blueprint_instance, blueprint_name) -> root shape of those instances
+_root_shapes = {(False, None): EMPTY_SHAPE}
+
+def root_shape(is_blueprint_instance=False, blueprint_name=None):
+    """The shape of an empty EnzoList made with these constructor arguments."""
+    shape = _root_shapes.get((is_blueprint_instance, blueprint_name))
+    if shape is None:
+        shape = _root_shapes[(is_blueprint_instance, blueprint_name)] = Shape({}, is_blueprint_instance, blueprint_name)
+    return shape
+
 class EnzoList:
-    """Enhanced list that supports both indexed and keyed access."""
+    """Enhanced list that supports both indexed and keyed access.
+
+    An instance holds its elements and its Shape; keys and blueprint details live in the
+    shape, which lists built the same way share.
+
+    Copies of lists without nested containers are copy-on-write (see copy): _cow is
+    None while _elements belongs to this list alone, else a one-item list counting the
+    lists sharing _elements, and everything that changes _elements first calls _own.
+    _nested is set once the list has held a container.
+
+    A list without nested containers that grows to VECTOR_MIN_LENGTH elements moves them
+    to a PersistentVector. _own then takes an O(1) copy of the vector, and each write
+    after it copies O(log n) nodes instead of every element.
+
+    A list whose elements are all ints or all floats when it grows to PACKED_MIN_LENGTH
+    of them packs them into a NumberArray instead, which the builtins in
+    builtin_functions run over in C. The first value the array cannot hold moves the
+    elements back to generic storage (see _unpack).
+    """
+    __slots__ = ("_elements", "_shape", "_cow", "_nested")
 
     def __init__(self, is_blueprint_instance=False, blueprint_name=None):
         self._elements = []     # All elements in insertion order
-        self._key_map = {}      # Maps key names to indices
-        self._is_blueprint_instance = is_blueprint_instance  # Track if this came from a blueprint
-        self._blueprint_name = blueprint_name  # Store blueprint name for proper printing
+        self._cow = None
+        self._nested = False
+        if is_blueprint_instance or blueprint_name is not None:
+            self._shape = root_shape(is_blueprint_instance, blueprint_name)
+        else:
+            self._shape = EMPTY_SHAPE
+
+    def copy(self):
+        """A deep copy of this list.
+
+        A list without nested containers shares its elements with the copy until either
+        list changes. A nested list is copied a level at a time, since its containers
+        may also be held, and changed in place, by other lists: the copy gets new
+        copies of them.
+        """
+        new_list = EnzoList.__new__(EnzoList)
+        new_list._nested = self._nested
+        if self._nested:
+            new_list._cow = None
+            # A loop calling copy directly, so each level of nesting costs one Python frame
+            elements = new_list._elements = []
+            for element in self._elements:
+                if isinstance(element, EnzoList):
+                    element = element.copy()
+                elif isinstance(element, (list, dict)):
+                    element = deep_copy_enzo_value(element)
+                elements.append(element)
+            new_list._shape = self._shape if self._shape.shared else self._shape.copy()
+            return new_list
+        if self._cow is None:
+            self._cow = [1]
+        self._cow[0] += 1
+        new_list._elements = self._elements
+        new_list._shape = self._shape
+        new_list._cow = self._cow
+        return new_list
+
+    def _own(self):
+        """Give this list elements of its own before they change."""
+        cow = self._cow
+        self._cow = None
+        if cow[0] == 1:
+            return  # The other lists sharing the elements have taken copies already
+        cow[0] -= 1
+        self._elements = self._elements.copy()  # O(1) for a PersistentVector
+        if not self._shape.shared:
+            self._shape = self._shape.copy()
+
+    @property
+    def _key_map(self):
+        """Maps key names to indices; read-only, it belongs to the shape."""
+        return self._shape.key_map
+
+    @property
+    def _is_blueprint_instance(self):
+        return self._shape.is_blueprint_instance
+
+    @property
+    def _blueprint_name(self):
+        return self._shape.blueprint_name
 
     def append(self, value):
         """Add an element with automatic index."""
-        self._elements.append(value)
+        if self._cow is not None:
+            self._own()
+        try:
+            self._elements.append(value)
+        except TypeError:
+            # A NumberArray refusing a value it cannot hold
+            self._unpack()
+            self._elements.append(value)
+        if isinstance(value, _CONTAINER_TYPES):
+            self._nested = True
+        elif len(self._elements) == PACKED_MIN_LENGTH or len(self._elements) == VECTOR_MIN_LENGTH:
+            self._grew()
+
+    def _grew(self):
+        # Called when the list reaches PACKED_MIN_LENGTH or VECTOR_MIN_LENGTH elements
+        if type(self._elements) is not list or self._nested:
+            return
+        if len(self._elements) == PACKED_MIN_LENGTH:
+            packed = pack(self._elements)
+            if packed is not None:
+                self._elements = packed
+                return
+        if len(self._elements) >= VECTOR_MIN_LENGTH:
+            self._elements = PersistentVector(self._elements)
+
+    def _unpack(self):
+        # Move the elements out of a NumberArray, into the storage an unpacked list of the
+        # same length would have
+        elements = self._elements
+        if type(elements) is NumberArray:
+            self._elements = PersistentVector(elements) if len(elements) >= VECTOR_MIN_LENGTH else list(elements)
+
+    def _set_slot(self, slot, value):
+        try:
+            self._elements[slot] = value
+        except TypeError:
+            # A NumberArray refusing a value it cannot hold
+            self._unpack()
+            self._elements[slot] = value
+
+    def interpolate(self, other):
+        """Append other's elements, as [<$other>, ...] does.
+
+        An empty list takes a copy-on-write share of a PersistentVector or NumberArray
+        instead of appending element by element.
+        """
+        if not self._elements and type(other._elements) is not list and not other._nested:
+            shared = other.copy()
+            self._elements, self._cow = shared._elements, shared._cow
+            return
+        for item in other._elements:
+            self.append(item)
 
     def set_key(self, key, value):
         """Set a key-value pair."""
+        if self._cow is not None:
+            self._own()
+        if isinstance(value, _CONTAINER_TYPES):
+            self._nested = True
         # Check if key already exists
-        if key in self._key_map:
+        index = self._shape.key_map.get(key)
+        if index is not None:
             # Update existing key
-            index = self._key_map[key]
-            self._elements[index] = value
+            self._set_slot(index, value)
         else:
             # Add new key-value pair
-            self._key_map[key] = len(self._elements)
-            self._elements.append(value)
+            self._shape = self._shape.add_key(key, len(self._elements))
+            try:
+                self._elements.append(value)
+            except TypeError:
+                # A NumberArray refusing a value it cannot hold
+                self._unpack()
+                self._elements.append(value)
+            if len(self._elements) == PACKED_MIN_LENGTH or len(self._elements) == VECTOR_MIN_LENGTH:
+                self._grew()
+
+    def clear(self):
+        """Remove all elements and keys."""
+        if self._cow is not None:
+            self._cow[0] -= 1
+            self._cow = None
+            self._elements = []
+        elif type(self._elements) is list:
+            self._elements.clear()
+        else:
+            self._elements = []
+        self._nested = False
+        shape = self._shape
+        self._shape = root_shape(shape.is_blueprint_instance, shape.blueprint_name)
 
     def get_by_index(self, index):
         """Get element by 1-based index."""
@@ -113,68 +375,55 @@ class EnzoList:
 
     def get_by_key(self, key):
         """Get element by key name."""
+        return self._elements[self.key_slot(key)]
+
+    def key_slot(self, key):
+        """0-based position of the element get_by_key(key) returns; KeyError if there is none.
+
+        The result depends only on key and the list's shape.
+        """
         # Normalize key (remove $ prefix for lookup if present)
         lookup_key = key[1:] if key.startswith('$') else key
-
-        # Try different key formats
-        for k in self._key_map:
-            # Exact match
-            if k == key or k == f"${lookup_key}" or (k.startswith('$') and k[1:] == lookup_key):
-                return self._elements[self._key_map[k]]
+        shape = self._shape
+
+        # Exact match: the $-prefixed form, or a bare key asked for by its bare name;
+        # the one added first wins
+        slot = shape.key_map.get(f"${lookup_key}")
+        if not key.startswith('$'):
+            bare_slot = shape.key_map.get(key)
+            if bare_slot is not None and (slot is None or bare_slot < slot):
+                slot = bare_slot
+        if slot is not None:
+            return slot
 
         # Try pattern matching: if looking for "name", try "name" + suffix patterns
         # This handles cases like looking for "name" and finding "$name6"
         if not lookup_key.isdigit():  # Don't do pattern matching for numeric keys
-            for k in self._key_map:
-                k_base = k[1:] if k.startswith('$') else k  # Remove $ prefix
-                # Check if the stored key starts with the lookup key + digit suffix
-                if k_base.startswith(lookup_key) and len(k_base) > len(lookup_key):
-                    suffix = k_base[len(lookup_key):]
-                    # If the suffix is numeric or a common separator + numeric, it's a match
-                    if suffix.isdigit() or (suffix.startswith('-') and suffix[1:].isdigit()):
-                        return self._elements[self._key_map[k]]
+            slot = shape.prefix_slot(lookup_key)
+            if slot is not None:
+                return slot
 
         raise KeyError(f"list property not found: ${lookup_key}")
 
     def set_by_key(self, key, value):
         """Set element by key name."""
-        # Normalize key (remove $ prefix for lookup if present)
-        lookup_key = key[1:] if key.startswith('$') else key
-
-        # Try different key formats
-        for k in self._key_map:
-            # Exact match
-            if k == key or k == f"${lookup_key}" or (k.startswith('$') and k[1:] == lookup_key):
-                self._elements[self._key_map[k]] = value
-                return
-
-        # Try pattern matching: if looking for "x", try "x" + suffix patterns
-        # This handles cases like looking for "x" and finding "$x12"
-        if not lookup_key.isdigit():  # Don't do pattern matching for numeric keys
-            for k in self._key_map:
-                k_base = k[1:] if k.startswith('$') else k  # Remove $ prefix
-                # Check if the stored key starts with the lookup key + digit suffix
-                if k_base.startswith(lookup_key) and len(k_base) > len(lookup_key):
-                    suffix = k_base[len(lookup_key):]
-                    # If the suffix is numeric or a common separator + numeric, it's a match
-                    if suffix.isdigit() or (suffix.startswith('-') and suffix[1:].isdigit()):
-                        self._elements[self._key_map[k]] = value
-                        return
-
-        raise KeyError(f"list property not found: ${key}")
+        try:
+            slot = self.key_slot(key)
+        except KeyError:
+            raise KeyError(f"list property not found: ${key}") from None
+        if self._cow is not None:
+            self._own()
+        if isinstance(value, _CONTAINER_TYPES):
+            self._nested = True
+        self._set_slot(slot, value)
 
     def get_key_at_index(self, index):
         """Get the key name for the element at the given 0-based index."""
         if index < 0 or index >= len(self._elements):
             return None
 
-        # Find the key that maps to this index
-        for key, key_index in self._key_map.items():
-            if key_index == index:
-                return key
-
-        # If no key found, this is a positional-only element
-        return None
+        # None if this is a positional-only element
+        return self._shape.key_at(index)
 
     def __len__(self):
         return len(self._elements)
@@ -183,20 +432,21 @@ class EnzoList:
         return self._elements[index]
 
     def __setitem__(self, index, value):
-        self._elements[index] = value
+        if self._cow is not None:
+            self._own()
+        if isinstance(value, _CONTAINER_TYPES):
+            self._nested = True
+        self._set_slot(index, value)
 
     def __iter__(self):
         return iter(self._elements)
 
     def __repr__(self):
         items = []
+        key_at = self._shape.key_at
         for i, element in enumerate(self._elements):
             # Check if this element has a key
-            key_for_index = None
-            for k, idx in self._key_map.items():
-                if idx == i:
-                    key_for_index = k
-                    break
+            key_for_index = key_at(i)
 
             if key_for_index:
                 items.append(f"{key_for_index}: {format_val(element)}")
@@ -229,3 +479,6 @@ class EnzoList:
         # Convert key_map to a frozenset of items for hashing
         key_items = frozenset(self._key_map.items()) if self._key_map else frozenset()
         return hash((tuple(self._elements), key_items))
+
+# Element types that make an EnzoList nested, see EnzoList.copy
+_CONTAINER_TYPES = (EnzoList, list, dict)